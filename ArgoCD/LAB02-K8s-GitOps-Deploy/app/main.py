@@ -1,9 +1,18 @@
 from flask import Flask
+from instrumentation.request_metrics import RequestMetrics
+from instrumentation.server import serve
 app = Flask(__name__)
 
+# Request count, latency, response size and in-flight requests per route, served at
+# /metrics for Prometheus (see instrumentation/request_metrics.py). With several gunicorn
+# workers, set PROMETHEUS_MULTIPROC_DIR to a shared directory so /metrics covers all of them.
+metrics = RequestMetrics.from_env(app)
+
 @app.route('/')
 def hello_world():
     return 'Hello, Argo CD User! Welcome to your own deployed app.'
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    # gunicorn configured from WSGI_* variables, or Flask's dev server with WSGI_SERVER=dev
+    # (see instrumentation/server.py)
+    serve(app, "main:app", port=5000)
@@ -0,0 +1,108 @@
+"""Requests/second of /, /health and /version: jsonify per request vs. precomputed bodies.
+
+Calls the WSGI app of each variant directly (no test client, no server) in many
+short interleaved rounds and reports the fastest round, which filters out noise
+from other processes. "304" is /version with a matching If-None-Match:
+
+    python benchmarks/bench_responses.py --requests 200000
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, jsonify
+from werkzeug.test import EnvironBuilder
+
+from static_responses import StaticResponses
+
+
+def make_jsonify_app():
+    # The handlers as they were: environment lookups, a timestamp and jsonify on every request
+    app = Flask(__name__)
+
+    @app.route('/')
+    def hello():
+        return jsonify({
+            'message': 'Hello from CI/CD GitOps Demo!',
+            'version': os.getenv('APP_VERSION', 'v1.0.0'),
+            'environment': os.getenv('ENVIRONMENT', 'development'),
+            'timestamp': datetime.datetime.now().isoformat(),
+            'hostname': os.getenv('HOSTNAME', 'localhost')
+        })
+
+    @app.route('/health')
+    def health():
+        return jsonify({
+            'status': 'healthy',
+            'timestamp': datetime.datetime.now().isoformat()
+        })
+
+    @app.route('/version')
+    def version():
+        return jsonify({
+            'version': os.getenv('APP_VERSION', 'v1.0.0'),
+            'build_date': os.getenv('BUILD_DATE', 'unknown'),
+            'git_commit': os.getenv('GIT_COMMIT', 'unknown')
+        })
+
+    return app
+
+
+def make_precomputed_app():
+    app = Flask(__name__)
+    responses = StaticResponses.from_env()
+    app.add_url_rule('/', 'hello', responses.hello)
+    app.add_url_rule('/health', 'health', responses.health)
+    app.add_url_rule('/version', 'version', responses.version)
+    return app, responses
+
+
+def requests_per_second(app, environ, requests):
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    wsgi_app = app.wsgi_app
+    started = time.perf_counter()
+    for _ in range(requests):
+        body = wsgi_app(environ.copy(), start_response)
+        for _ in body:
+            pass
+        body.close()
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200000, help="requests per endpoint and variant")
+    parser.add_argument("--rounds", type=int, default=40, help="interleaved rounds per endpoint and variant")
+    args = parser.parse_args()
+
+    precomputed, responses = make_precomputed_app()
+    apps = {"jsonify": make_jsonify_app(), "precomputed": precomputed}
+    endpoints = {
+        "/": EnvironBuilder(path="/").get_environ(),
+        "/health": EnvironBuilder(path="/health").get_environ(),
+        "/version": EnvironBuilder(path="/version").get_environ(),
+        "/version 304": EnvironBuilder(path="/version",
+                                       headers={"If-None-Match": f'"{responses.version_etag}"'}).get_environ(),
+    }
+    per_round = args.requests // args.rounds
+    print(f"{'endpoint':<13} {'jsonify req/s':>14} {'precomputed req/s':>18} {'speedup':>8}")
+    for endpoint, environ in endpoints.items():
+        fastest = {}
+        for variant, app in apps.items():
+            requests_per_second(app, environ, 1000)  # warm up
+            fastest[variant] = 0
+        for _ in range(args.rounds):
+            for variant, app in apps.items():
+                fastest[variant] = max(fastest[variant], requests_per_second(app, environ, per_round))
+        print(f"{endpoint:<13} {fastest['jsonify']:>14,.0f} {fastest['precomputed']:>18,.0f} "
+              f"{fastest['precomputed'] / fastest['jsonify']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
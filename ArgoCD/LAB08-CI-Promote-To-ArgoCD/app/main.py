@@ -1,33 +1,33 @@
-from flask import Flask, jsonify
-import os
-import datetime
+from flask import Flask
+from instrumentation.request_metrics import RequestMetrics
+from instrumentation.server import serve
+from static_responses import StaticResponses
 
 app = Flask(__name__)
 
+# Request count, latency, response size and in-flight requests per route, served at
+# /metrics for Prometheus (see instrumentation/request_metrics.py). With several gunicorn
+# workers, set PROMETHEUS_MULTIPROC_DIR to a shared directory so /metrics covers all of them.
+metrics = RequestMetrics.from_env(app)
+
+# Version, environment, hostname, build date and commit don't change while the process
+# runs: their responses are serialized once and only the timestamp is filled in per
+# request. /version answers conditional GETs with 304 (see static_responses.py).
+responses = StaticResponses.from_env()
+
 @app.route('/')
 def hello():
-    return jsonify({
-        'message': 'Hello from CI/CD GitOps Demo!',
-        'version': os.getenv('APP_VERSION', 'v1.0.0'),
-        'environment': os.getenv('ENVIRONMENT', 'development'),
-        'timestamp': datetime.datetime.now().isoformat(),
-        'hostname': os.getenv('HOSTNAME', 'localhost')
-    })
+    return responses.hello()
 
 @app.route('/health')
 def health():
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.datetime.now().isoformat()
-    })
+    return responses.health()
 
 @app.route('/version')
 def version():
-    return jsonify({
-        'version': os.getenv('APP_VERSION', 'v1.0.0'),
-        'build_date': os.getenv('BUILD_DATE', 'unknown'),
-        'git_commit': os.getenv('GIT_COMMIT', 'unknown')
-    })
+    return responses.version()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=False) 
\ No newline at end of file
+    # gunicorn configured from WSGI_* variables, or Flask's dev server with WSGI_SERVER=dev
+    # (see instrumentation/server.py)
+    serve(app, "main:app", port=5000)
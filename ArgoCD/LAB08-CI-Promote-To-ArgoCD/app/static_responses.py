@@ -0,0 +1,104 @@
+import datetime
+import hashlib
+import json
+import os
+import time
+
+from flask import Response, request
+from werkzeug.http import parse_etags, quote_etag
+
+JSON_MIMETYPE = "application/json"
+
+
+def _dumps(data):
+    # The same bytes jsonify produces outside debug mode: sorted keys, compact, newline
+    return json.dumps(data, sort_keys=True, separators=(",", ":")) + "\n"
+
+
+class CoarseClock:
+    """The local time as ISO 8601 bytes, to the second, formatted at most once per second."""
+
+    def __init__(self, time_func=time.time):
+        self._time = time_func
+        self._second = None
+        self._value = b""
+
+    def now(self):
+        second = int(self._time())
+        if second != self._second:
+            # Set the value first: a thread that sees the new second then also sees its value
+            self._value = datetime.datetime.fromtimestamp(second).isoformat().encode()
+            self._second = second
+        return self._value
+
+
+class JsonTemplate:
+    """A JSON body serialized once, with the string value of one field filled in per response."""
+
+    _MARKER = "\x00"
+
+    def __init__(self, data, field):
+        body = _dumps({**data, field: self._MARKER})
+        head, tail = body.split(json.dumps(self._MARKER))
+        self.head = head.encode() + b'"'
+        self.tail = b'"' + tail.encode()
+
+    def render(self, value):
+        # `value` is inserted as is, so it must not need escaping (the clock's output doesn't)
+        return self.head + value + self.tail
+
+
+class StaticResponses:
+    """Pre-serialized bodies of the /, /health and /version endpoints.
+
+    Version, environment, hostname, build date and commit are fixed for the life of
+    the process, so they are read once. Per request, / and /health only splice in
+    the timestamp from a CoarseClock, and /version is a constant body with an ETag:
+    with `etag` on, a request whose If-None-Match matches gets an empty 304.
+    """
+
+    def __init__(self, version, environment, hostname, build_date, git_commit, etag=True, clock=None):
+        self.clock = clock or CoarseClock()
+        self.etag = etag
+        self._hello = JsonTemplate({
+            'message': 'Hello from CI/CD GitOps Demo!',
+            'version': version,
+            'environment': environment,
+            'hostname': hostname,
+        }, 'timestamp')
+        self._health = JsonTemplate({'status': 'healthy'}, 'timestamp')
+        self.version_body = _dumps({
+            'version': version,
+            'build_date': build_date,
+            'git_commit': git_commit,
+        }).encode()
+        self.version_etag = hashlib.sha1(self.version_body).hexdigest()
+        # Caches may keep the body but must revalidate it: the next deployment changes it
+        self._version_headers = [('ETag', quote_etag(self.version_etag)), ('Cache-Control', 'no-cache')]
+
+    @classmethod
+    def from_env(cls, env=None):
+        env = os.environ if env is None else env
+        return cls(
+            version=env.get('APP_VERSION', 'v1.0.0'),
+            environment=env.get('ENVIRONMENT', 'development'),
+            hostname=env.get('HOSTNAME', 'localhost'),
+            build_date=env.get('BUILD_DATE', 'unknown'),
+            git_commit=env.get('GIT_COMMIT', 'unknown'),
+            etag=env.get('VERSION_ETAG', 'true').lower() == 'true',
+        )
+
+    def hello(self):
+        return Response(self._hello.render(self.clock.now()), mimetype=JSON_MIMETYPE)
+
+    def health(self):
+        return Response(self._health.render(self.clock.now()), mimetype=JSON_MIMETYPE)
+
+    def version(self):
+        if not self.etag:
+            return Response(self.version_body, mimetype=JSON_MIMETYPE)
+        if_none_match = request.environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (if_none_match == self._version_headers[0][1]
+                              or parse_etags(if_none_match).contains(self.version_etag)):
+            return Response(status=304, headers=self._version_headers)
+        return Response(self.version_body, headers=self._version_headers, mimetype=JSON_MIMETYPE)
@@ -6,7 +6,9 @@ import os
 # Add the parent directory to sys.path so we can import main
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+import main
 from main import app
+from static_responses import StaticResponses
 
 @pytest.fixture
 def client():
@@ -49,8 +51,18 @@ def test_app_version_env_var(client, monkeypatch):
     """Test that APP_VERSION environment variable is used"""
     monkeypatch.setenv('APP_VERSION', 'v2.0.0')
     monkeypatch.setenv('ENVIRONMENT', 'test')
+    # The responses are built from the environment at startup
+    monkeypatch.setattr(main, 'responses', StaticResponses.from_env())
     
     response = client.get('/')
     data = json.loads(response.data)
     assert data['version'] == 'v2.0.0'
-    assert data['environment'] == 'test' 
\ No newline at end of file
+    assert data['environment'] == 'test' 
+
+def test_metrics_are_recorded_per_route(client):
+    """Test that /metrics counts requests under this app's own route templates."""
+    client.get('/')
+    client.get('/version')
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="/version",status="200"}' in text
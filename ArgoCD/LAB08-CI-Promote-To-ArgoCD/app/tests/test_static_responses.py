@@ -0,0 +1,60 @@
+import json
+import os
+import sys
+
+from flask import Flask, jsonify
+
+# Add the parent directory to sys.path to allow direct import of static_responses
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from static_responses import CoarseClock, StaticResponses
+
+def make_app(**kwargs):
+    app = Flask(__name__)
+    responses = StaticResponses('v1.2.3', 'test', 'pod-1', '2026-01-01', 'abc123', **kwargs)
+    app.add_url_rule('/', 'hello', responses.hello)
+    app.add_url_rule('/health', 'health', responses.health)
+    app.add_url_rule('/version', 'version', responses.version)
+    return app, responses
+
+def test_coarse_clock_formats_once_per_second():
+    """Test that the clock reformats only when the second changes."""
+    now = [100.2]
+    clock = CoarseClock(lambda: now[0])
+    first = clock.now()
+    now[0] = 100.9
+    assert clock.now() is first
+    now[0] = 101.0
+    assert clock.now() != first
+
+def test_bodies_match_jsonify():
+    """Test that the precomputed bodies are byte-for-byte what jsonify would return."""
+    app, responses = make_app()
+    client = app.test_client()
+    hello = client.get('/').data
+    health = client.get('/health').data
+    with app.app_context():
+        assert hello == jsonify({'message': 'Hello from CI/CD GitOps Demo!', 'version': 'v1.2.3',
+                                 'environment': 'test', 'timestamp': json.loads(hello)['timestamp'],
+                                 'hostname': 'pod-1'}).data
+        assert health == jsonify({'status': 'healthy', 'timestamp': json.loads(health)['timestamp']}).data
+        assert client.get('/version').data == jsonify({'version': 'v1.2.3', 'build_date': '2026-01-01',
+                                                        'git_commit': 'abc123'}).data
+
+def test_version_conditional_get():
+    """Test that /version answers a matching If-None-Match with an empty 304."""
+    app, responses = make_app()
+    client = app.test_client()
+    response = client.get('/version')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    response = client.get('/version', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert client.get('/version', headers={'If-None-Match': '"other"'}).status_code == 200
+
+    app, responses = make_app(etag=False)
+    response = app.test_client().get('/version', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
@@ -0,0 +1,56 @@
+"""Time promote_release.py applying, and then re-applying, a release to thousands of manifests.
+
+Builds the same generated repository as bench_update_image_tag.py, with a release
+of every service to env-000 and every other environment promoted from the
+previous one, then times: the first run (every file changes), a rerun (nothing
+changed, answered from the cache), and a run with a new tag for one service:
+
+    python scripts/benchmarks/bench_promote_release.py --environments 10 --services 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_update_image_tag import generate
+from promote_release import PromotionCache, promote
+
+
+def make_release(environments, services, tag):
+    return {
+        'name': 'bench',
+        'services': {f'svc-{s:04d}': tag(s) for s in range(services)},
+        'environments': [{'name': 'env-000'}] + [{'name': f'env-{e:03d}', 'from': f'env-{e - 1:03d}'}
+                                                 for e in range(1, environments)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--environments', type=int, default=10)
+    parser.add_argument('--services', type=int, default=200)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        files = generate(root, args.environments, args.services)
+        cache = os.path.join(root, 'cache.json')
+        print(f'{files} manifests in {args.environments * args.services} directories, {args.jobs} processes')
+        print(f"{'run':<22} {'seconds':>8} {'changed':>8} {'skipped':>8}")
+        runs = (
+            ('first', make_release(args.environments, args.services, lambda s: 'v2')),
+            ('rerun', make_release(args.environments, args.services, lambda s: 'v2')),
+            ('one service changed', make_release(args.environments, args.services, lambda s: 'v3' if s == 0 else 'v2')),
+        )
+        for name, release in runs:
+            started = time.perf_counter()
+            _, _, changed, skipped = promote(release, root, PromotionCache(cache), jobs=args.jobs)
+            print(f'{name:<22} {time.perf_counter() - started:>8.2f} {len(changed):>8} {skipped:>8}')
+
+
+if __name__ == '__main__':
+    main()
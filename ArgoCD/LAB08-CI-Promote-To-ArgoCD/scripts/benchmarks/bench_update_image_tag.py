@@ -0,0 +1,75 @@
+"""Time update_image_tag.py on a generated GitOps repository with thousands of manifests.
+
+Builds environments/<env>/<service>/ directories from the lab's staging manifests
+(a kustomization.yaml and a deployment.yaml each, one image per service), then
+updates one service in every environment and every service in every
+environment, each with the given numbers of processes:
+
+    python scripts/benchmarks/bench_update_image_tag.py --environments 10 --services 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from update_image_tag import main as update_image_tag
+
+SAMPLE_DIR = os.path.join(SCRIPTS_DIR, '..', 'gitops-repo', 'environments', 'staging')
+
+
+def generate(root, environments, services):
+    with open(os.path.join(SAMPLE_DIR, 'deployment.yaml')) as f:
+        deployment = f.read()
+    with open(os.path.join(SAMPLE_DIR, 'kustomization.yaml')) as f:
+        kustomization = f.read()
+    for e in range(environments):
+        for s in range(services):
+            directory = os.path.join(root, 'environments', f'env-{e:03d}', f'svc-{s:04d}')
+            os.makedirs(directory)
+            for name, text in (('deployment.yaml', deployment), ('kustomization.yaml', kustomization)):
+                with open(os.path.join(directory, name), 'w') as f:
+                    f.write(text.replace('cicd-demo', f'svc-{s:04d}'))
+    return environments * services * 2
+
+
+def timed(argv):
+    devnull = open(os.devnull, 'w')
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        started = time.perf_counter()
+        update_image_tag(argv)
+        return time.perf_counter() - started
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--environments', type=int, default=10)
+    parser.add_argument('--services', type=int, default=200)
+    parser.add_argument('--jobs', default=f'1,{os.cpu_count() or 1}', help='comma-separated process counts')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        files = generate(root, args.environments, args.services)
+        print(f'{files} manifests in {args.environments * args.services} directories')
+        print(f"{'update':<14} {'jobs':>5} {'seconds':>8} {'files/s':>9}")
+        scenarios = {
+            'one service': ['svc-0000=v2'],
+            'all services': [f'svc-{s:04d}=v2' for s in range(args.services)],
+        }
+        for tag, jobs in enumerate(sorted({int(j) for j in args.jobs.split(',')})):
+            for scenario, updates in scenarios.items():
+                # A new tag each run, so every matching file is rewritten
+                updates = [update.replace('=v2', f'=v2.{tag}') for update in updates]
+                seconds = timed(['all', *updates, '--gitops-repo', root, '--jobs', str(jobs)])
+                print(f'{scenario:<14} {jobs:>5} {seconds:>8.2f} {files / seconds:>9,.0f}')
+
+
+if __name__ == '__main__':
+    main()
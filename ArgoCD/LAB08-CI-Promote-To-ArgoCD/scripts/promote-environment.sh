@@ -30,7 +30,7 @@ if [ "$confirm" != "y" ] && [ "$confirm" != "Y" ]; then
 fi
 
 # Use the update script to promote to production
-./scripts/update-image-tag.sh production "$STAGING_TAG"
+python3 scripts/update_image_tag.py production "$STAGING_TAG"
 
 echo "✅ Successfully promoted $STAGING_TAG from staging to production"
 echo "Don't forget to commit and push the changes!" 
\ No newline at end of file
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""Promote a release (services, their tags and target environments) through the GitOps repository.
+
+Usage:
+    python scripts/promote_release.py scripts/release.example.yaml
+    python scripts/promote_release.py release.yaml --dry-run --diff
+    python scripts/promote_release.py release.yaml --message-file /tmp/msg && git commit -aF /tmp/msg
+
+A release manifest lists the services with their tags, and the environments in
+the order they are promoted. An environment promoted `from` another one gets the
+tags that environment has once this release is applied, so production can follow
+staging without repeating the tags; `services` limits an environment to some of
+the services:
+
+    name: 2024.06.1
+    services:
+      cicd-demo: v1.1.0
+      api: v2.3.0
+    environments:
+    - name: staging
+    - name: production
+      from: staging
+      services: [cicd-demo]
+
+The engine resolves the environments in dependency order into the tags each
+kustomization directory gets, edits all directories in parallel in a process pool
+(see update_image_tag.py for what is edited), and writes the changed files only
+once every directory was edited successfully, so the working tree holds one
+commit-ready changeset. It prints a summary of the changes (--diff: the unified
+diff) and can write a commit message for them.
+
+The hashes of each directory's files, and of the target tags of the images they
+mention, are recorded in --cache after a run. Directories that hash the same on
+the next run are skipped without being parsed, so rerunning a release that is
+already applied does almost nothing. Keep the cache file out of the GitOps
+repository.
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+from update_image_tag import edit_directory, find_kustomizations, read_image_tags, write_atomic
+
+DEFAULT_CACHE = ".promotion-cache.json"
+
+
+def load_release(path):
+    """The release manifest at `path`, checked. Raises ValueError when it is malformed."""
+    with open(path) as f:
+        release = yaml.safe_load(f) or {}
+    services = release.get("services")
+    if not isinstance(services, dict) or not services:
+        raise ValueError(f"{path}: `services` must map service names to tags")
+    release["services"] = {str(service): str(tag) for service, tag in services.items()}
+    environments = release.get("environments")
+    if not isinstance(environments, list) or not environments:
+        raise ValueError(f"{path}: `environments` must be a list")
+    names = set()
+    for environment in environments:
+        if not isinstance(environment, dict) or not environment.get("name"):
+            raise ValueError(f"{path}: every environment needs a `name`")
+        if environment["name"] in names:
+            raise ValueError(f"{path}: environment {environment['name']} is listed twice")
+        names.add(environment["name"])
+        unknown = set(environment.get("services") or ()) - set(release["services"])
+        if unknown:
+            raise ValueError(f"{path}: {environment['name']} lists services not in `services`: {', '.join(sorted(unknown))}")
+    return release
+
+
+def promotion_order(environments):
+    """The environments sorted so each comes after the one it is promoted from."""
+    by_name = {environment["name"]: environment for environment in environments}
+    ordered = []
+    state = {}  # name -> "visiting" or "done"
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"environments are promoted from each other in a cycle: {' -> '.join(path + [name])}")
+        if name not in by_name:
+            raise ValueError(f"{path[-1]} is promoted from {name}, which is not in the release")
+        state[name] = "visiting"
+        source = by_name[name].get("from")
+        if source:
+            visit(source, path + [name])
+        state[name] = "done"
+        ordered.append(by_name[name])
+
+    for environment in environments:
+        visit(environment["name"], [])
+    return ordered
+
+
+def _current_tag(service, directories):
+    for directory in directories:
+        for repository, tag in read_image_tags(directory).items():
+            if repository == service or repository.endswith("/" + service):
+                return tag
+    return None
+
+
+def plan(release, gitops_repo):
+    """[(environment, directory, {service: tag})] for every kustomization directory of the release's environments."""
+    resolved = {}
+    directories = {}
+    tasks = []
+    for environment in promotion_order(release["environments"]):
+        name = environment["name"]
+        root = os.path.join(gitops_repo, "environments", name)
+        directories[name] = find_kustomizations(root)
+        if not directories[name]:
+            raise ValueError(f"no kustomization found in {root}")
+        services = environment.get("services") or list(release["services"])
+        source = environment.get("from")
+        tags = {}
+        for service in services:
+            if source is None:
+                tags[service] = release["services"][service]
+                continue
+            # The tag the source environment has once this release is applied
+            tag = resolved[source].get(service) or _current_tag(service, directories[source])
+            if tag is None:
+                raise ValueError(f"{name} is promoted from {source}, which does not deploy {service}")
+            tags[service] = tag
+        resolved[name] = tags
+        tasks.extend((name, directory, tags) for directory in directories[name])
+    return tasks, resolved
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _mentioned(updates, texts):
+    return sorted(image for image in updates if any(image.rpartition("/")[2] in text for text in texts))
+
+
+def _tags_digest(updates, images):
+    return _digest(json.dumps({image: updates.get(image) for image in images}, sort_keys=True).encode())
+
+
+class PromotionCache:
+    """Per kustomization directory, after the last run: the hash of each of its files,
+    which of the release's images the files mention, the hash of those images'
+    target tags, and how many values matched.
+
+    Only the tags of mentioned images are compared, so a new tag for another
+    service leaves a directory's entry valid.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self._names = (None, None)
+
+    def _names_digest(self, updates):
+        # The same dict is passed for every directory of an environment
+        if self._names[0] is not updates:
+            self._names = (updates, _digest(json.dumps(sorted(updates)).encode()))
+        return self._names[1]
+
+    def matched(self, directory, updates):
+        """The values matched when the directory was last brought up to date with `updates`,
+        or None if it (or the tags) changed since."""
+        entry = self.entries.get(os.path.abspath(directory))
+        if entry is None:
+            return None
+        texts = []
+        for path, digest in entry["files"].items():
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            if _digest(data) != digest:
+                return None
+            texts.append(data)
+        if entry["names"] == self._names_digest(updates):
+            images = entry["images"]  # same files, same image names: same mentions
+        else:
+            images = _mentioned(updates, [text.decode("utf-8") for text in texts])
+        if entry["tags"] != _tags_digest(updates, images):
+            return None
+        return entry["matched"]
+
+    def record(self, directory, updates, matched, files):
+        images = _mentioned(updates, [text for _, text in files])
+        self.entries[os.path.abspath(directory)] = {
+            "names": self._names_digest(updates),
+            "images": images,
+            "tags": _tags_digest(updates, images),
+            "matched": matched,
+            "files": {os.path.abspath(path): _digest(text.encode("utf-8")) for path, text in files},
+        }
+
+    def save(self):
+        write_atomic(self.path, json.dumps(self.entries, indent=1, sort_keys=True))
+
+
+def _edit(task):
+    # Runs in a pool process: reads and edits one directory, writes nothing
+    environment, directory, updates = task
+    files = edit_directory(directory, updates)
+    return (environment, directory, updates, sum(edits.matched for _, edits in files),
+            [(path, edits.text, edits.apply() if edits.changed else edits.text) for path, edits in files])
+
+
+def _diff_stat(old, new):
+    added = removed = 0
+    for line in difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm="", n=0):
+        if line.startswith("+") and not line.startswith("+++"):
+            added += 1
+        elif line.startswith("-") and not line.startswith("---"):
+            removed += 1
+    return added, removed
+
+
+def unified_diff(path, old, new):
+    """The lines of a git-style unified diff of one file."""
+    for line in difflib.unified_diff(old.splitlines(True), new.splitlines(True), f"a/{path}", f"b/{path}"):
+        yield line if line.endswith("\n") else line + "\n\\ No newline at end of file\n"
+
+
+def commit_message(release, resolved, changed):
+    title = f"Promote release {release['name']}" if release.get("name") else "Promote release"
+    lines = [title, ""]
+    for environment, tags in resolved.items():
+        lines.append(f"{environment}: " + ", ".join(f"{service}={tag}" for service, tag in tags.items()))
+    lines.append("")
+    lines.extend(f"- {path}" for path, _, _ in changed)
+    return "\n".join(lines) + "\n"
+
+
+def promote(release, gitops_repo, cache, jobs=1, dry_run=False):
+    """Applies the release. Returns (resolved tags per environment, matched values per
+    environment, [(path, old text, new text)] of the changed files, directories skipped)."""
+    tasks, resolved = plan(release, gitops_repo)
+    matched = {environment: 0 for environment in resolved}
+    pending = []
+    skipped = 0
+    for environment, directory, updates in tasks:
+        count = cache.matched(directory, updates)
+        if count is None:
+            pending.append((environment, directory, updates))
+        else:
+            matched[environment] += count
+            skipped += 1
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+            results = list(executor.map(_edit, pending, chunksize=max(1, len(pending) // (jobs * 4))))
+    else:
+        results = [_edit(task) for task in pending]
+
+    changed = []
+    for environment, directory, updates, count, files in results:
+        matched[environment] += count
+        changed.extend((path, old, new) for path, old, new in files if old != new)
+    if not dry_run:
+        # Every directory was edited without errors; only now is anything written
+        for path, _, new in changed:
+            write_atomic(path, new)
+        for environment, directory, updates, count, files in results:
+            cache.record(directory, updates, count, [(path, new) for path, _, new in files])
+        cache.save()
+    return resolved, matched, changed, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("release", help="release manifest (YAML)")
+    parser.add_argument("--gitops-repo", default="gitops-repo")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help=f"hashes of the last run (default: {DEFAULT_CACHE})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="processes to edit directories with")
+    parser.add_argument("--dry-run", action="store_true", help="show the changes, write nothing")
+    parser.add_argument("--diff", action="store_true", help="print the unified diff of the changes")
+    parser.add_argument("--message-file", help="write a commit message for the changeset to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        release = load_release(args.release)
+        resolved, matched, changed, skipped = promote(release, args.gitops_repo, PromotionCache(args.cache),
+                                                      jobs=args.jobs, dry_run=args.dry_run)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    for environment, tags in resolved.items():
+        print(f"{environment}: " + ", ".join(f"{service}={tag}" for service, tag in tags.items()))
+        if not matched[environment]:
+            print(f"Error: none of these images are deployed in {environment}")
+            return 1
+    for path, old, new in changed:
+        added, removed = _diff_stat(old, new)
+        print(f"  {path} | +{added} -{removed}")
+        if args.diff:
+            sys.stdout.writelines(unified_diff(path, old, new))
+    if args.message_file and changed:
+        with open(args.message_file, "w") as f:
+            f.write(commit_message(release, resolved, changed))
+    verb = "Would change" if args.dry_run else "Changed"
+    print(f"✅ {verb} {len(changed)} files ({skipped} directories unchanged since the last run)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
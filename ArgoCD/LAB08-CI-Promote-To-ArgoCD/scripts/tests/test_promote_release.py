@@ -0,0 +1,60 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to allow direct import of promote_release
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from promote_release import PromotionCache, main, promote, promotion_order
+
+GITOPS_REPO = os.path.join(os.path.dirname(__file__), '..', '..', 'gitops-repo')
+
+@pytest.fixture
+def repo(tmp_path):
+    shutil.copytree(GITOPS_REPO, tmp_path / 'gitops-repo')
+    return tmp_path / 'gitops-repo'
+
+def release(**services):
+    return {
+        'name': 'test',
+        'services': services,
+        'environments': [{'name': 'production', 'from': 'staging'}, {'name': 'staging'}],
+    }
+
+def test_promotion_order():
+    """Test that an environment comes after the one it is promoted from, and cycles are rejected."""
+    environments = [{'name': 'production', 'from': 'staging'}, {'name': 'staging', 'from': 'qa'}, {'name': 'qa'}]
+    assert [e['name'] for e in promotion_order(environments)] == ['qa', 'staging', 'production']
+    with pytest.raises(ValueError):
+        promotion_order([{'name': 'a', 'from': 'b'}, {'name': 'b', 'from': 'a'}])
+
+def test_promote_then_rerun_is_a_no_op(repo, tmp_path):
+    """Test that a release is applied to every environment and that rerunning it skips all directories."""
+    cache = str(tmp_path / 'cache.json')
+    resolved, matched, changed, skipped = promote(release(**{'cicd-demo': 'v1.1.0'}), str(repo), PromotionCache(cache))
+    assert resolved == {'staging': {'cicd-demo': 'v1.1.0'}, 'production': {'cicd-demo': 'v1.1.0'}}
+    assert len(changed) == 4 and skipped == 0
+    assert 'cicd-demo:v1.1.0' in (repo / 'environments' / 'production' / 'deployment.yaml').read_text()
+
+    resolved, matched, changed, skipped = promote(release(**{'cicd-demo': 'v1.1.0'}), str(repo), PromotionCache(cache))
+    assert changed == [] and skipped == 2
+    assert matched == {'staging': 5, 'production': 5}
+
+    # An edit by hand invalidates that directory's entry
+    path = repo / 'environments' / 'staging' / 'deployment.yaml'
+    path.write_text(path.read_text().replace('cicd-demo:v1.1.0', 'cicd-demo:v0.9.0'))
+    resolved, matched, changed, skipped = promote(release(**{'cicd-demo': 'v1.1.0'}), str(repo), PromotionCache(cache))
+    assert [path for path, _, _ in changed] == [str(path)] and skipped == 1
+
+def test_dry_run_writes_nothing(repo, tmp_path, capsys):
+    """Test that --dry-run prints the diff and leaves the repository and cache alone."""
+    manifest = tmp_path / 'release.yaml'
+    manifest.write_text('services:\n  cicd-demo: v2.0.0\nenvironments:\n- name: staging\n')
+    before = (repo / 'environments' / 'staging' / 'deployment.yaml').read_text()
+    cache = tmp_path / 'cache.json'
+    assert main([str(manifest), '--gitops-repo', str(repo), '--cache', str(cache), '--dry-run', '--diff']) == 0
+    assert '+        image: YOUR_DOCKERHUB_USERNAME/cicd-demo:v2.0.0' in capsys.readouterr().out
+    assert (repo / 'environments' / 'staging' / 'deployment.yaml').read_text() == before
+    assert not cache.exists()
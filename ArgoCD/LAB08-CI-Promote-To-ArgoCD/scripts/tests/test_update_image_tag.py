@@ -0,0 +1,68 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to allow direct import of update_image_tag
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from update_image_tag import main, split_image, update_manifest
+
+GITOPS_REPO = os.path.join(os.path.dirname(__file__), '..', '..', 'gitops-repo')
+
+@pytest.fixture
+def repo(tmp_path):
+    shutil.copytree(GITOPS_REPO, tmp_path / 'gitops-repo')
+    return tmp_path / 'gitops-repo'
+
+def read(repo, environment, name):
+    return (repo / 'environments' / environment / name).read_text()
+
+def test_split_image():
+    """Test that registry ports and digests are not mistaken for tags."""
+    assert split_image('user/app:v1') == ('user/app', 'v1')
+    assert split_image('registry:5000/app') == ('registry:5000/app', None)
+    assert split_image('app:v1@sha256:abc') == ('app', 'v1')
+
+def test_updates_only_the_version_fields(repo):
+    """Test that image, newTag, version labels and APP_VERSION change and nothing else does."""
+    before = read(repo, 'staging', 'deployment.yaml')
+    assert main(['staging', 'v20240101-abc1234', '--gitops-repo', str(repo)]) == 0
+    after = read(repo, 'staging', 'deployment.yaml')
+    expected = (before.replace('version: v1.0.0', 'version: v20240101-abc1234')
+                .replace('cicd-demo:v1.0.0', 'cicd-demo:v20240101-abc1234')
+                .replace('value: "v1.0.0"', 'value: "v20240101-abc1234"'))
+    assert after == expected
+    assert 'newTag: v20240101-abc1234' in read(repo, 'staging', 'kustomization.yaml')
+    assert 'v20240101-abc1234' not in read(repo, 'production', 'deployment.yaml')
+
+def test_several_environments_and_images(repo, capsys):
+    """Test that several environments and IMAGE=TAG pairs are updated in one run."""
+    assert main(['staging,production', 'cicd-demo=2.0', 'other=v9', '--gitops-repo', str(repo), '--jobs', '2']) == 0
+    for environment in ('staging', 'production'):
+        deployment = read(repo, environment, 'deployment.yaml')
+        # A tag that would read as a number is quoted
+        assert 'version: "2.0"' in deployment
+        assert 'cicd-demo:2.0' in deployment
+    assert main(['staging', 'missing=v1', '--gitops-repo', str(repo)]) == 1
+
+def test_leaves_other_workloads_alone():
+    """Test that containers of other images and non-workload documents are not touched."""
+    text = (
+        "kind: ConfigMap\n"
+        "data:\n"
+        "  image: user/app:v1\n"
+        "---\n"
+        "kind: CronJob\n"
+        "spec:\n"
+        "  jobTemplate:\n"
+        "    spec:\n"
+        "      template:\n"
+        "        spec:\n"
+        "          containers:\n"
+        "          - image: user/app:v1  # the job\n"
+        "          - image: sidecar:v1\n"
+    )
+    edits = update_manifest(text, {'app': 'v2'})
+    assert edits.apply() == text.replace('- image: user/app:v1', '- image: user/app:v2')
@@ -0,0 +1,150 @@
+"""Time validate_manifests.py over hundreds of generated apps: cold, warm, and with one app changed.
+
+Generates `--apps` kustomize overlays (namespace, labels and an image tag over a
+base with a Deployment, a Service, a ConfigMap and an HPA), then times a run
+without the cache, a first run that fills it, a rerun (every app from the cache)
+and a run after one overlay changed:
+
+    python benchmarks/bench_validate.py --apps 500 --jobs 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from validate_manifests import main as validate
+
+BASE = """apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: app-{n}
+spec:
+  replicas: 2
+  selector:
+    matchLabels:
+      app: app-{n}
+  template:
+    metadata:
+      labels:
+        app: app-{n}
+    spec:
+      containers:
+      - name: app
+        image: registry.example.com/app-{n}:v1
+        ports:
+        - containerPort: 5000
+        env:
+        - name: LOG_LEVEL
+          valueFrom:
+            configMapKeyRef:
+              name: app-{n}-config
+              key: log_level
+        resources:
+          requests:
+            cpu: 100m
+            memory: 128Mi
+        readinessProbe:
+          httpGet:
+            path: /health
+            port: 5000
+---
+apiVersion: v1
+kind: Service
+metadata:
+  name: app-{n}
+spec:
+  selector:
+    app: app-{n}
+  ports:
+  - port: 80
+    targetPort: 5000
+---
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: app-{n}-config
+data:
+  log_level: info
+---
+apiVersion: autoscaling/v2
+kind: HorizontalPodAutoscaler
+metadata:
+  name: app-{n}
+spec:
+  scaleTargetRef:
+    apiVersion: apps/v1
+    kind: Deployment
+    name: app-{n}
+  minReplicas: 2
+  maxReplicas: 5
+  metrics:
+  - type: Resource
+    resource:
+      name: cpu
+      target:
+        type: Utilization
+        averageUtilization: 70
+"""
+
+OVERLAY = """resources:
+- ../../base/app-{n}
+namespace: app-{n}
+commonLabels:
+  environment: staging
+images:
+- name: registry.example.com/app-{n}
+  newTag: {tag}
+"""
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def generate(root, apps):
+    for n in range(apps):
+        write(os.path.join(root, 'base', f'app-{n}', 'app.yaml'), BASE.format(n=n))
+        write(os.path.join(root, 'base', f'app-{n}', 'kustomization.yaml'), 'resources:\n- app.yaml\n')
+        write(os.path.join(root, 'overlays', f'app-{n}', 'kustomization.yaml'), OVERLAY.format(n=n, tag='v2'))
+
+
+def timed(argv):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        status = validate(argv)
+    if status != 0:
+        sys.exit(output.getvalue())
+    return time.perf_counter() - started, output.getvalue().count('(cached)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--apps', type=int, default=500)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        generate(root, args.apps)
+        overlays = os.path.join(root, 'overlays')
+        cache = ['--cache-dir', os.path.join(root, 'cache'), '--jobs', str(args.jobs)]
+        print(f'{args.apps} apps, {args.jobs} processes')
+        print(f"{'run':<20} {'seconds':>8} {'cached':>7}")
+        for name, argv in (('no cache', [overlays, '--no-cache', '--jobs', str(args.jobs)]),
+                           ('first', [overlays] + cache),
+                           ('rerun', [overlays] + cache),
+                           ('one app changed', [overlays] + cache)):
+            if name == 'one app changed':
+                write(os.path.join(overlays, 'app-0', 'kustomization.yaml'), OVERLAY.format(n=0, tag='v3'))
+            seconds, cached = timed(argv)
+            print(f'{name:<20} {seconds:>8.2f} {cached:>7}')
+
+
+if __name__ == '__main__':
+    main()
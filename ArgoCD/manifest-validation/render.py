@@ -0,0 +1,303 @@
+"""Offline rendering of the sources an ArgoCD Application can point at.
+
+A source is one of:
+- "kustomize": a directory with a kustomization.yaml, rendered with the subset of
+  kustomize the labs use (see KustomizeSource)
+- "directory": a directory of plain manifests, like ArgoCD's directory source
+  (not recursive, so each subdirectory is a source of its own)
+- "helm-values": a values file for a Helm chart. The chart's templates are not
+  available offline, so the values themselves are the output; they are validated
+  against the chart's values schema instead of being rendered into manifests.
+
+Every source lists its input files (`inputs()`), which is all validate_manifests.py
+needs to tell whether its output can have changed, and renders to a list of
+(path of the file a document came from, document).
+"""
+import copy
+import os
+import posixpath
+
+import yaml
+
+try:
+    # libyaml's parser; the pure Python one gives the same documents, ~10x slower
+    from yaml import CSafeLoader as _BaseLoader
+except ImportError:
+    from yaml import SafeLoader as _BaseLoader
+
+KUSTOMIZATION_FILES = ("kustomization.yaml", "kustomization.yml", "Kustomization")
+YAML_EXTENSIONS = (".yaml", ".yml")
+# Fields of a Kustomization that KustomizeSource applies; any other field is an error
+# rather than being silently ignored, since the output would then be wrong
+KUSTOMIZE_FIELDS = ("apiVersion", "kind", "resources", "bases", "namespace", "commonLabels",
+                    "commonAnnotations", "images", "replicas")
+POD_TEMPLATE_KINDS = ("Deployment", "StatefulSet", "DaemonSet", "ReplicaSet", "Job")
+SELECTOR_KINDS = ("Deployment", "StatefulSet", "DaemonSet", "ReplicaSet")
+REPLICA_KINDS = ("Deployment", "StatefulSet", "ReplicaSet")
+CLUSTER_SCOPED_KINDS = ("Namespace", "ClusterRole", "ClusterRoleBinding", "CustomResourceDefinition",
+                        "PersistentVolume", "StorageClass", "PriorityClass", "IngressClass",
+                        "MutatingWebhookConfiguration", "ValidatingWebhookConfiguration")
+
+
+class RenderError(Exception):
+    """A source that cannot be rendered: unreadable or invalid YAML, or kustomize features
+    outside the supported subset."""
+
+
+class UniqueKeyLoader(_BaseLoader):
+    """A safe loader that rejects mappings with the same key twice.
+
+    YAML parsers keep the last value of a repeated key, so a second `env:` or
+    `labels:` in a manifest silently replaces the first; kubectl and ArgoCD do the same.
+    """
+
+    def construct_mapping(self, node, deep=False):
+        seen = set()
+        for key_node, _ in node.value:
+            if isinstance(key_node, yaml.ScalarNode):
+                if key_node.value in seen:
+                    mark = key_node.start_mark
+                    raise RenderError(f"line {mark.line + 1}: duplicate key {key_node.value!r}")
+                seen.add(key_node.value)
+        return super().construct_mapping(node, deep=deep)
+
+
+def load_documents(path):
+    """The non-empty YAML documents of the file at `path`."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [document for document in yaml.load_all(f, Loader=UniqueKeyLoader) if document is not None]
+    except OSError as e:
+        raise RenderError(f"{path}: {e.strerror}")
+    except RenderError as e:
+        raise RenderError(f"{path}: {e}")
+    except yaml.YAMLError as e:
+        raise RenderError(f"{path}: invalid YAML: {e}")
+
+
+def kustomization_file(directory):
+    """The kustomization file of `directory`, or None."""
+    for name in KUSTOMIZATION_FILES:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def yaml_files(directory):
+    """The YAML files directly in `directory`, sorted."""
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.endswith(YAML_EXTENSIONS) and os.path.isfile(os.path.join(directory, name)))
+
+
+def _pod_spec(document):
+    spec = document.get("spec") or {}
+    if document.get("kind") == "Pod":
+        return spec
+    if document.get("kind") == "CronJob":
+        spec = (spec.get("jobTemplate") or {}).get("spec") or {}
+    return (spec.get("template") or {}).get("spec")
+
+
+def _has_template(document):
+    return document.get("kind") in POD_TEMPLATE_KINDS or document.get("kind") == "CronJob"
+
+
+def _template_metadata(document):
+    spec = document.setdefault("spec", {})
+    if document.get("kind") == "CronJob":
+        spec = spec.setdefault("jobTemplate", {}).setdefault("spec", {})
+    return spec.setdefault("template", {}).setdefault("metadata", {})
+
+
+def _split_image(image):
+    # (name, tag, digest) of an image reference
+    name, _, digest = image.partition("@")
+    colon = name.rfind(":")
+    if colon > name.rfind("/"):
+        return name[:colon], name[colon + 1:], digest or None
+    return name, None, digest or None
+
+
+def _set_image(container, images):
+    image = container.get("image")
+    if not isinstance(image, str):
+        return
+    name, tag, digest = _split_image(image)
+    override = images.get(name)
+    if override is None:
+        return
+    name = override.get("newName") or name
+    if override.get("digest"):
+        container["image"] = f"{name}@{override['digest']}"
+        return
+    tag = override.get("newTag", tag)
+    image = f"{name}:{tag}" if tag else name
+    container["image"] = f"{image}@{digest}" if digest and "newTag" not in override else image
+
+
+class Source:
+    """A renderable source; `path` is its directory, or its file for helm-values."""
+
+    kind = None
+
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r})"
+
+    def inputs(self):
+        """The files the output depends on, sorted."""
+        raise NotImplementedError
+
+    def render(self):
+        """[(path, document)]. Raises RenderError."""
+        raise NotImplementedError
+
+
+class DirectorySource(Source):
+    """The YAML files of a directory, as they are."""
+
+    kind = "directory"
+
+    def __init__(self, path, files=None):
+        super().__init__(path)
+        self.files = sorted(files) if files is not None else yaml_files(path)
+
+    def inputs(self):
+        return list(self.files)
+
+    def render(self):
+        return [(path, document) for path in self.files for document in load_documents(path)]
+
+
+class HelmValuesSource(Source):
+    """A values file for `chart`; it renders to itself."""
+
+    kind = "helm-values"
+
+    def __init__(self, path, chart):
+        super().__init__(path)
+        self.chart = chart
+
+    def inputs(self):
+        return [self.path]
+
+    def render(self):
+        documents = load_documents(self.path)
+        if len(documents) > 1:
+            raise RenderError(f"{self.path}: a values file holds one document, found {len(documents)}")
+        values = documents[0] if documents else {}
+        if not isinstance(values, dict):
+            raise RenderError(f"{self.path}: values must be a mapping")
+        return [(self.path, values)]
+
+
+class KustomizeSource(Source):
+    """A kustomization, rendered with the kustomize features the labs use.
+
+    Supported: local `resources` (files, and directories with a kustomization of
+    their own) and the deprecated `bases`, `namespace`, `commonLabels` (also added to
+    selectors and pod templates, like kustomize does), `commonAnnotations`, `images`
+    and `replicas`. Anything else, such as patches, generators or remote resources,
+    raises a RenderError: rendering it wrongly would validate the wrong manifests.
+    """
+
+    kind = "kustomize"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = kustomization_file(path)
+        if self.file is None:
+            raise RenderError(f"{path}: no kustomization file")
+        self._kustomization = None
+
+    @property
+    def kustomization(self):
+        if self._kustomization is None:
+            documents = load_documents(self.file)
+            kustomization = documents[0] if len(documents) == 1 else None
+            if not isinstance(kustomization, dict):
+                raise RenderError(f"{self.file}: a kustomization must be one mapping")
+            unsupported = sorted(set(kustomization) - set(KUSTOMIZE_FIELDS))
+            if unsupported:
+                raise RenderError(f"{self.file}: not supported offline: {', '.join(unsupported)}")
+            self._kustomization = kustomization
+        return self._kustomization
+
+    def _resources(self, seen):
+        # (file, None) for a manifest, (None, KustomizeSource) for a nested kustomization
+        entries = (self.kustomization.get("resources") or []) + (self.kustomization.get("bases") or [])
+        for entry in entries:
+            if not isinstance(entry, str):
+                raise RenderError(f"{self.file}: resources must be paths, got {entry!r}")
+            if "://" in entry or entry.startswith(("github.com/", "git@")):
+                raise RenderError(f"{self.file}: remote resource {entry} is not supported offline")
+            path = os.path.normpath(os.path.join(self.path, *posixpath.normpath(entry).split("/")))
+            if os.path.isdir(path):
+                if path in seen:
+                    raise RenderError(f"{self.file}: {entry} is included in a cycle")
+                yield None, KustomizeSource(path)
+            elif os.path.isfile(path):
+                yield path, None
+            else:
+                raise RenderError(f"{self.file}: resource {entry} does not exist")
+
+    def inputs(self, _seen=()):
+        seen = set(_seen) | {self.path}
+        files = {self.file}
+        for path, nested in self._resources(seen):
+            files.update([path] if nested is None else nested.inputs(seen))
+        return sorted(files)
+
+    def render(self, _seen=()):
+        seen = set(_seen) | {self.path}
+        resources = []
+        for path, nested in self._resources(seen):
+            if nested is None:
+                resources.extend((path, document) for document in load_documents(path))
+            else:
+                resources.extend(nested.render(seen))
+        # Each level's transformers apply to everything below it; copy so a base that
+        # is included twice is not transformed twice
+        resources = [(path, copy.deepcopy(document)) for path, document in resources]
+        for path, document in resources:
+            if not isinstance(document, dict):
+                raise RenderError(f"{path}: a manifest must be a mapping")
+            self._transform(document)
+        return resources
+
+    def _transform(self, document):
+        kustomization = self.kustomization
+        kind = document.get("kind")
+        metadata = document.setdefault("metadata", {})
+        namespace = kustomization.get("namespace")
+        if namespace and kind not in CLUSTER_SCOPED_KINDS:
+            metadata["namespace"] = namespace
+
+        labels = kustomization.get("commonLabels") or {}
+        if labels:
+            metadata.setdefault("labels", {}).update(labels)
+            if _has_template(document):
+                _template_metadata(document).setdefault("labels", {}).update(labels)
+            if kind in SELECTOR_KINDS:
+                document["spec"].setdefault("selector", {}).setdefault("matchLabels", {}).update(labels)
+            elif kind == "Service":
+                document.setdefault("spec", {}).setdefault("selector", {}).update(labels)
+
+        annotations = kustomization.get("commonAnnotations") or {}
+        if annotations:
+            metadata.setdefault("annotations", {}).update(annotations)
+            if _has_template(document):
+                _template_metadata(document).setdefault("annotations", {}).update(annotations)
+
+        images = {image["name"]: image for image in kustomization.get("images") or [] if image.get("name")}
+        if images:
+            spec = _pod_spec(document) or {}
+            for container in (spec.get("containers") or []) + (spec.get("initContainers") or []):
+                _set_image(container, images)
+
+        for replica in kustomization.get("replicas") or []:
+            if kind in REPLICA_KINDS and replica.get("name") == metadata.get("name"):
+                document.setdefault("spec", {})["replicas"] = replica.get("count")
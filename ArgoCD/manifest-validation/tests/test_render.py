@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to allow direct import of render
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from render import DirectorySource, KustomizeSource, RenderError, load_documents
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+DEPLOYMENT = """apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: web
+  namespace: default
+spec:
+  replicas: 1
+  selector:
+    matchLabels:
+      app: web
+  template:
+    metadata:
+      labels:
+        app: web
+    spec:
+      containers:
+      - name: web
+        image: user/web:v1
+"""
+
+def test_kustomize_overlay_transforms(tmp_path):
+    """Test that an overlay applies namespace, labels, images and replicas on top of its base."""
+    write(tmp_path / 'base' / 'deployment.yaml', DEPLOYMENT)
+    write(tmp_path / 'base' / 'kustomization.yaml', 'resources:\n- deployment.yaml\n')
+    write(tmp_path / 'overlay' / 'kustomization.yaml', """resources:
+- ../base
+namespace: staging
+commonLabels:
+  env: staging
+images:
+- name: user/web
+  newTag: v2
+replicas:
+- name: web
+  count: 3
+""")
+    source = KustomizeSource(str(tmp_path / 'overlay'))
+    assert source.inputs() == sorted([str(tmp_path / 'overlay' / 'kustomization.yaml'),
+                                      str(tmp_path / 'base' / 'kustomization.yaml'),
+                                      str(tmp_path / 'base' / 'deployment.yaml')])
+    [(path, deployment)] = source.render()
+    assert path == str(tmp_path / 'base' / 'deployment.yaml')
+    assert deployment['metadata']['namespace'] == 'staging'
+    assert deployment['metadata']['labels'] == {'env': 'staging'}
+    assert deployment['spec']['selector']['matchLabels'] == {'app': 'web', 'env': 'staging'}
+    assert deployment['spec']['template']['metadata']['labels'] == {'app': 'web', 'env': 'staging'}
+    assert deployment['spec']['template']['spec']['containers'][0]['image'] == 'user/web:v2'
+    assert deployment['spec']['replicas'] == 3
+
+def test_unsupported_kustomize_features_are_errors(tmp_path):
+    """Test that patches and remote resources are rejected instead of being ignored."""
+    write(tmp_path / 'a' / 'kustomization.yaml', 'resources: []\npatches:\n- path: patch.yaml\n')
+    with pytest.raises(RenderError, match='not supported offline: patches'):
+        KustomizeSource(str(tmp_path / 'a')).render()
+    write(tmp_path / 'b' / 'kustomization.yaml', 'resources:\n- https://github.com/org/repo//base\n')
+    with pytest.raises(RenderError, match='remote resource'):
+        KustomizeSource(str(tmp_path / 'b')).inputs()
+
+def test_duplicate_keys_are_errors(tmp_path):
+    """Test that a key repeated in a mapping is reported with its line."""
+    write(tmp_path / 'cm.yaml', 'kind: ConfigMap\ndata:\n  a: "1"\n  a: "2"\n')
+    with pytest.raises(RenderError, match="line 4: duplicate key 'a'"):
+        load_documents(str(tmp_path / 'cm.yaml'))
+    assert DirectorySource(str(tmp_path), []).render() == []
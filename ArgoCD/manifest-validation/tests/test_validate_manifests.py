@@ -0,0 +1,53 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to allow direct import of validate_manifests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from validate_manifests import main
+
+GITOPS_REPO = os.path.join(os.path.dirname(__file__), '..', '..', 'LAB08-CI-Promote-To-ArgoCD', 'gitops-repo')
+
+@pytest.fixture
+def repo(tmp_path):
+    shutil.copytree(GITOPS_REPO, tmp_path / 'gitops-repo')
+    return tmp_path / 'gitops-repo'
+
+def test_lab_manifests_are_valid(tmp_path, capsys):
+    """Test that every source of the labs renders and validates without warnings."""
+    assert main(['--strict', '--cache-dir', str(tmp_path / 'cache')]) == 0
+    output = capsys.readouterr().out
+    assert '(kustomize, 2 documents)' in output
+    assert '(helm-values, 1 documents)' in output
+    assert 'Warning' not in output
+
+def test_errors_are_reported(repo, capsys):
+    """Test that schema errors and cross-document errors fail the run."""
+    deployment = repo / 'environments' / 'staging' / 'deployment.yaml'
+    deployment.write_text(deployment.read_text()
+                          .replace('replicas: 2', 'replicas: "2"')
+                          .replace('containerPort: 5000', 'containerport: 5000')
+                          .replace('value: "staging"', 'valueFrom: {configMapKeyRef: {name: cfg, key: env}}')
+                          + '\n---\napiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: cfg\ndata:\n  environment: staging\n')
+    assert main([str(repo), '--no-cache']) == 1
+    output = capsys.readouterr().out
+    assert "spec.replicas: '2' is not of type 'integer'" in output
+    assert "('containerport' was unexpected)" in output
+    assert "ENVIRONMENT refers to key 'env', which ConfigMap/cfg does not have" in output
+    assert output.count('❌') == 1 and 'Error: 1 of 3 sources are invalid' in output
+
+def test_cache_revalidates_only_changed_sources(repo, tmp_path, capsys):
+    """Test that unchanged sources come from the cache and a changed input invalidates its source."""
+    cache = str(tmp_path / 'cache')
+    assert main([str(repo), '--cache-dir', cache]) == 0
+    assert '(cached)' not in capsys.readouterr().out
+    kustomization = repo / 'environments' / 'staging' / 'kustomization.yaml'
+    kustomization.write_text(kustomization.read_text().replace('newTag: v1.0.0', 'newTag: v1.1.0'))
+    assert main([str(repo), '--cache-dir', cache, '--render', str(tmp_path / 'rendered')]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.endswith('(cached)') for line in lines[:-1]] == [True, True, False]
+    rendered = [name for name in os.listdir(tmp_path / 'rendered') if name.endswith('staging.yaml')]
+    assert 'cicd-demo:v1.1.0' in (tmp_path / 'rendered' / rendered[0]).read_text()
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""Validate the ArgoCD labs' manifests and Helm values offline, before ArgoCD syncs them.
+
+Usage:
+    python validate_manifests.py
+    python validate_manifests.py ../LAB08-CI-Promote-To-ArgoCD/gitops-repo --strict
+    python validate_manifests.py path/to/apps --jobs 8 --render rendered/
+
+Every source under the given paths (default: the manifests of LAB02, LAB03, LAB07
+and LAB08) is rendered offline (see render.py) and checked:
+- every document against the bundled JSON schema of its kind (schemas/kubernetes.json):
+  unknown fields, wrong types, invalid names and label values are errors, as they
+  are for the API server. Kinds without a bundled schema get a warning.
+- the documents of a source together: resources defined twice, Deployment selectors
+  that don't match their pod template, configMapKeyRef/secretKeyRef keys missing from
+  a ConfigMap or Secret of the same source (errors), Services that select no pod
+  template and HorizontalPodAutoscalers whose target is missing (warnings)
+- Helm values against the values schema of their chart (schemas/helm/<chart>.json),
+  picked by --chart or by the chart's name in the file name
+
+Results and rendered output are cached in --cache-dir, keyed on a hash of the
+contents of the source's input files, the schemas and this tool's version: a
+source whose inputs didn't change is reported from the cache without being parsed,
+so a CI run over hundreds of apps only renders and validates what changed. Exits
+with 1 if any source has errors (with --strict, also warnings).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import jsonschema
+import yaml
+
+try:
+    # libyaml's emitter, for --render and the cache; the pure Python one is ~10x slower
+    from yaml import CSafeDumper as Dumper
+except ImportError:
+    from yaml import SafeDumper as Dumper
+
+from render import (DirectorySource, HelmValuesSource, KustomizeSource, RenderError, kustomization_file,
+                    yaml_files)
+
+# Part of every cache key: bump it when a change to this tool or render.py changes results
+VERSION = "1"
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_DIR = os.path.join(HERE, "schemas")
+DEFAULT_ROOTS = [os.path.join(HERE, "..", path) for path in (
+    "LAB02-K8s-GitOps-Deploy/k8s-manifests",
+    "LAB03-Helm-Deployments/helm-values",
+    "LAB07-Staging-To-Production/environments",
+    "LAB07-Staging-To-Production/argocd-apps",
+    "LAB08-CI-Promote-To-ArgoCD/gitops-repo",
+)]
+DEFAULT_CACHE_DIR = ".manifest-cache"
+HELM_VALUES_DIRECTORIES = ("helm-values",)
+WORKLOAD_KINDS = ("Deployment", "StatefulSet", "DaemonSet", "ReplicaSet", "Job")
+
+
+def _is_helm_values(path):
+    name = os.path.basename(path)
+    return (os.path.basename(os.path.dirname(path)) in HELM_VALUES_DIRECTORIES
+            or name in ("values.yaml", "values.yml") or name.endswith(("-values.yaml", "-values.yml")))
+
+
+def discover(roots, chart=None, charts=()):
+    """The sources under `roots` (directories or files), in order.
+
+    A directory with a kustomization is a kustomize source. The other YAML files are
+    Helm values (in a helm-values directory, or named values.yaml or *-values.yaml),
+    or else grouped per directory into directory sources; files a kustomization
+    includes are left to it.
+    """
+    kustomizations = []
+    files = []
+    for root in roots:
+        if os.path.isfile(root):
+            files.append(os.path.normpath(root))
+            continue
+        if not os.path.isdir(root):
+            raise ValueError(f"{root} does not exist")
+        for directory, subdirectories, _ in os.walk(root):
+            subdirectories[:] = sorted(name for name in subdirectories if not name.startswith("."))
+            directory = os.path.normpath(directory)
+            if kustomization_file(directory):
+                kustomizations.append(KustomizeSource(directory))
+            else:
+                files.extend(yaml_files(directory))
+
+    sources = list(kustomizations)
+    included = set()
+    for source in kustomizations:
+        try:
+            included.update(source.inputs())
+        except RenderError:
+            pass  # reported when the source is validated
+    directories = {}
+    for path in files:
+        if path in included:
+            continue
+        if _is_helm_values(path):
+            sources.append(HelmValuesSource(path, chart or _chart_for(path, charts)))
+        else:
+            directories.setdefault(os.path.dirname(path), []).append(path)
+    sources.extend(DirectorySource(directory, paths) for directory, paths in directories.items())
+    return sorted(sources, key=lambda source: source.path)
+
+
+def _chart_for(path, charts):
+    name = os.path.basename(path)
+    matches = [chart for chart in charts if chart in name]
+    return max(matches, key=len) if matches else None
+
+
+def _load_json(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return json.loads(data), data
+
+
+class Schemas:
+    """The bundled Kubernetes and Helm values schemas, and a digest of them all."""
+
+    def __init__(self, directory=SCHEMA_DIR):
+        kubernetes, data = _load_json(os.path.join(directory, "kubernetes.json"))
+        digest = hashlib.sha256(data)
+        self._definitions = kubernetes["definitions"]
+        self._kinds = kubernetes["kinds"]
+        self._validators = {}
+        self.charts = {}
+        helm_directory = os.path.join(directory, "helm")
+        for name in sorted(os.listdir(helm_directory)):
+            if name.endswith(".json"):
+                schema, data = _load_json(os.path.join(helm_directory, name))
+                digest.update(name.encode() + b"\0" + data)
+                self.charts[name[:-len(".json")]] = jsonschema.Draft7Validator(schema)
+        self.digest = digest.hexdigest()
+
+    def validator(self, api_version, kind):
+        """The validator for a kind, or None if no schema is bundled for it."""
+        key = f"{api_version} {kind}"
+        if key not in self._validators:
+            definition = self._kinds.get(key)
+            self._validators[key] = definition and jsonschema.Draft7Validator(
+                {"$ref": f"#/definitions/{definition}", "definitions": self._definitions})
+        return self._validators[key]
+
+
+def _json_path(path):
+    return "".join(f"[{part}]" if isinstance(part, int) else f".{part}" for part in path).lstrip(".") or "(root)"
+
+
+def _schema_errors(validator, document):
+    errors = sorted(validator.iter_errors(document), key=lambda error: list(map(str, error.absolute_path)))
+    return [f"{_json_path(error.absolute_path)}: {error.message}" for error in errors]
+
+
+def _name(document):
+    metadata = document.get("metadata") or {}
+    return f"{document.get('kind')}/{metadata.get('name')}"
+
+
+def _namespace(document):
+    return (document.get("metadata") or {}).get("namespace")
+
+
+def _labels(mapping):
+    return mapping if isinstance(mapping, dict) else {}
+
+
+def _pod_templates(resources):
+    for path, document in resources:
+        if document.get("kind") in WORKLOAD_KINDS:
+            template = (document.get("spec") or {}).get("template") or {}
+            yield path, document, template
+        elif document.get("kind") == "Pod":
+            yield path, document, document
+
+
+def cross_checks(resources):
+    """(errors, warnings) of the documents of one source taken together."""
+    errors = []
+    warnings = []
+    seen = {}
+    by_kind = {}
+    for path, document in resources:
+        group = str(document.get("apiVersion")).rpartition("/")[0]
+        key = (group, document.get("kind"), _namespace(document), (document.get("metadata") or {}).get("name"))
+        if key in seen:
+            errors.append(f"{path}: {_name(document)} is also defined in {seen[key]}")
+        seen.setdefault(key, path)
+        by_kind.setdefault(document.get("kind"), {}).setdefault((_namespace(document), key[3]), document)
+
+    templates = list(_pod_templates(resources))
+    for path, document, template in templates:
+        template_labels = _labels((template.get("metadata") or {}).get("labels"))
+        if document.get("kind") != "Pod":
+            selector = _labels(((document.get("spec") or {}).get("selector") or {}).get("matchLabels"))
+            mismatched = sorted(key for key, value in selector.items() if template_labels.get(key) != value)
+            if mismatched:
+                errors.append(f"{path}: {_name(document)}: selector {', '.join(mismatched)} "
+                              "does not match the pod template's labels")
+        for container in ((template.get("spec") or {}).get("containers") or []):
+            for variable in (container.get("env") or []) if isinstance(container, dict) else []:
+                for ref, kind, fields in (("configMapKeyRef", "ConfigMap", ("data", "binaryData")),
+                                          ("secretKeyRef", "Secret", ("data", "stringData"))):
+                    reference = ((variable or {}).get("valueFrom") or {}).get(ref)
+                    if not isinstance(reference, dict) or reference.get("optional"):
+                        continue
+                    target = by_kind.get(kind, {}).get((_namespace(document), reference.get("name")))
+                    if target is None:
+                        continue  # may be created outside this source
+                    keys = set().union(*(_labels(target.get(field)) for field in fields))
+                    if reference.get("key") not in keys:
+                        errors.append(f"{path}: {_name(document)}: {variable.get('name')} refers to key "
+                                      f"{reference.get('key')!r}, which {kind}/{reference.get('name')} does not have")
+
+    for path, document in resources:
+        spec = document.get("spec") or {}
+        if document.get("kind") == "Service" and isinstance(spec.get("selector"), dict) and spec["selector"]:
+            if not any(_namespace(workload) == _namespace(document)
+                       and all(_labels((template.get("metadata") or {}).get("labels")).get(key) == value
+                               for key, value in spec["selector"].items())
+                       for _, workload, template in templates):
+                warnings.append(f"{path}: {_name(document)} selects no pod template of this source")
+        elif document.get("kind") == "HorizontalPodAutoscaler":
+            target = spec.get("scaleTargetRef") or {}
+            if (_namespace(document), target.get("name")) not in by_kind.get(target.get("kind"), {}):
+                warnings.append(f"{path}: {_name(document)} scales {target.get('kind')}/{target.get('name')}, "
+                                "which is not in this source")
+    return errors, warnings
+
+
+def validate(source, schemas):
+    """{"errors", "warnings", "resources", "rendered"} of one source."""
+    result = {"errors": [], "warnings": [], "resources": 0, "rendered": ""}
+    try:
+        resources = source.render()
+    except RenderError as e:
+        result["errors"].append(str(e))
+        return result
+    result["resources"] = len(resources)
+    result["rendered"] = yaml.dump_all([document for _, document in resources], Dumper=Dumper, sort_keys=False)
+
+    if source.kind == "helm-values":
+        validator = schemas.charts.get(source.chart)
+        if validator is None:
+            result["warnings"].append(f"{source.path}: no values schema for chart {source.chart or '(unknown)'}; "
+                                      "use --chart with one of " + ", ".join(sorted(schemas.charts)))
+            return result
+        for path, values in resources:
+            result["errors"].extend(f"{path}: {error}" for error in _schema_errors(validator, values))
+        return result
+
+    valid = []
+    for path, document in resources:
+        if not isinstance(document, dict) or not document.get("apiVersion") or not document.get("kind"):
+            result["errors"].append(f"{path}: a manifest needs apiVersion and kind")
+            continue
+        validator = schemas.validator(document["apiVersion"], document["kind"])
+        if validator is None:
+            result["warnings"].append(f"{path}: no schema for {document['apiVersion']} {document['kind']}; "
+                                      "not validated")
+        else:
+            result["errors"].extend(f"{path}: {_name(document)}: {error}"
+                                    for error in _schema_errors(validator, document))
+        valid.append((path, document))
+    errors, warnings = cross_checks(valid)
+    result["errors"].extend(errors)
+    result["warnings"].extend(warnings)
+    return result
+
+
+def _file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def cache_key(source, schemas):
+    """A hash of everything the source's result depends on. Raises RenderError."""
+    key = hashlib.sha256()
+    key.update(json.dumps([VERSION, schemas.digest, source.kind, source.path,
+                           getattr(source, "chart", None)]).encode())
+    for path in source.inputs():
+        try:
+            key.update(f"\0{path}\0{_file_digest(path)}".encode())
+        except OSError as e:
+            raise RenderError(f"{path}: {e.strerror}")
+    return key.hexdigest()
+
+
+class ResultCache:
+    """Results stored as one JSON file per key under `directory`."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, result):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp, path)
+
+
+_schemas = {}
+
+
+def _validate_in_worker(task):
+    # Runs in a pool process; the schemas are loaded once per process
+    source, schema_dir = task
+    if schema_dir not in _schemas:
+        _schemas[schema_dir] = Schemas(schema_dir)
+    return validate(source, _schemas[schema_dir])
+
+
+def run(sources, schemas, cache=None, jobs=1, schema_dir=SCHEMA_DIR):
+    """[(source, result, cached)] in the order of `sources`."""
+    results = [None] * len(sources)
+    keys = {}
+    pending = []
+    for index, source in enumerate(sources):
+        try:
+            keys[index] = cache_key(source, schemas) if cache else None
+        except RenderError as e:
+            # The inputs can't be listed, so nothing can be cached
+            results[index] = (source, {"errors": [str(e)], "warnings": [], "resources": 0, "rendered": ""}, False)
+            continue
+        result = cache.get(keys[index]) if cache else None
+        if result is not None:
+            results[index] = (source, result, True)
+        else:
+            pending.append(index)
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+            fresh = list(executor.map(_validate_in_worker, [(sources[index], schema_dir) for index in pending],
+                                      chunksize=max(1, len(pending) // (jobs * 4))))
+    else:
+        fresh = [validate(sources[index], schemas) for index in pending]
+    for index, result in zip(pending, fresh):
+        if cache:
+            cache.put(keys[index], result)
+        results[index] = (sources[index], result, False)
+    return results
+
+
+def _display(path):
+    relative = os.path.relpath(path)
+    return path if relative.startswith(".." + os.sep + "..") else relative
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="directories or files to validate (default: the labs' manifests)")
+    parser.add_argument("--chart", help="chart of the Helm values files (default: from their file names)")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="processes to validate sources with")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"result cache (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the cache")
+    parser.add_argument("--render", metavar="DIR", help="also write each source's rendered output to DIR")
+    args = parser.parse_args(argv)
+
+    try:
+        schemas = Schemas()
+        if args.chart and args.chart not in schemas.charts:
+            raise ValueError(f"no values schema for chart {args.chart}; bundled: {', '.join(sorted(schemas.charts))}")
+        sources = discover(args.paths or DEFAULT_ROOTS, chart=args.chart, charts=schemas.charts)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    if not sources:
+        print("Error: no manifests found")
+        return 1
+
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    failed = cached = 0
+    for source, result, from_cache in run(sources, schemas, cache, jobs=args.jobs):
+        cached += from_cache
+        errors, warnings = result["errors"], result["warnings"]
+        ok = not errors and not (args.strict and warnings)
+        failed += not ok
+        status = "✅" if ok else "❌"
+        note = " (cached)" if from_cache else ""
+        print(f"{status} {_display(source.path)} ({source.kind}, {result['resources']} documents){note}")
+        for error in errors:
+            print(f"   Error: {error}")
+        for warning in warnings:
+            print(f"   Warning: {warning}")
+        if args.render and result["rendered"]:
+            parts = [part for part in _display(source.path).split(os.sep) if part not in ("", ".", "..")]
+            name = "__".join(parts)
+            os.makedirs(args.render, exist_ok=True)
+            with open(os.path.join(args.render, os.path.splitext(name)[0] + ".yaml"), "w") as f:
+                f.write(result["rendered"])
+
+    if failed:
+        print(f"Error: {failed} of {len(sources)} sources are invalid")
+        return 1
+    print(f"✅ {len(sources)} sources valid ({cached} from the cache)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+import redis
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from redis_client import ResilientRedis, CircuitOpenError
+
+
+class FlakyRedis:
+    """Stands in for redis.Redis: down for the first `failures` calls, then healthy."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+        self.hits = 0
+
+    def _maybe_fail(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise redis.exceptions.ConnectionError("Connection refused")
+
+    def ping(self):
+        self._maybe_fail()
+        return True
+
+    def incr(self, key):
+        self._maybe_fail()
+        self.hits += 1
+        return self.hits
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_creation_does_not_connect():
+    """Test that building the client does no network I/O."""
+    started = time.perf_counter()
+    client = ResilientRedis('nonexistent.redis.host.for.testing', 6379)
+    assert time.perf_counter() - started < 0.05
+    assert client._client is None
+    assert client.stats()['circuit'] == 'closed'
+
+
+def test_circuit_opens_and_fails_fast():
+    """Test that after a connection error, calls fail without touching Redis."""
+    client = ResilientRedis('localhost', 6379, failure_threshold=1, backoff_initial=60)
+    client._client = FlakyRedis(failures=1)
+    with pytest.raises(redis.exceptions.ConnectionError):
+        client.incr('hits')
+    assert client.is_open
+
+    started = time.perf_counter()
+    with pytest.raises(CircuitOpenError):
+        client.incr('hits')
+    assert time.perf_counter() - started < 0.01
+    assert client._client.calls == 1
+    assert client.stats()['fast_failures'] == 1
+    client.close()
+
+
+def test_background_reconnect_closes_circuit():
+    """Test that the reconnect thread retries with backoff and closes the circuit."""
+    client = ResilientRedis('localhost', 6379, failure_threshold=1, backoff_initial=0.01, backoff_max=0.02)
+    client._client = FlakyRedis(failures=3)
+    with pytest.raises(redis.exceptions.ConnectionError):
+        client.ping()
+    assert _wait_for(lambda: not client.is_open)
+    stats = client.stats()
+    assert stats['reconnect_attempts'] >= 2
+    assert stats['reconnects'] == 1
+    assert client.incr('hits') == 1
+
+
+def test_failure_threshold():
+    """Test that the circuit stays closed until the threshold is reached."""
+    client = ResilientRedis('localhost', 6379, failure_threshold=2, backoff_initial=60)
+    client._client = FlakyRedis(failures=5)
+    with pytest.raises(redis.exceptions.ConnectionError):
+        client.incr('hits')
+    assert not client.is_open
+    with pytest.raises(redis.exceptions.ConnectionError):
+        client.incr('hits')
+    assert client.is_open
+    client.close()
+
+
+def test_default_threshold_is_three_failures(monkeypatch):
+    """Test that one dropped connection does not open the circuit, three in a row do."""
+    monkeypatch.delenv('REDIS_FAILURE_THRESHOLD', raising=False)
+    client = ResilientRedis.from_env('localhost', 6379)
+    client.backoff_initial = 60
+    client._client = FlakyRedis(failures=1)
+    with pytest.raises(redis.exceptions.ConnectionError):
+        client.incr('hits')
+    assert client.incr('hits') == 1  # a success resets the count
+    assert not client.is_open
+
+    client._client = FlakyRedis(failures=5)
+    for _ in range(3):
+        assert not client.is_open
+        with pytest.raises(redis.exceptions.ConnectionError):
+            client.incr('hits')
+    assert client.is_open
+    assert client.stats()['failures'] == 4
+    client.close()
+
+
+def test_counters_add_up_across_threads():
+    """Test that calls from many request threads are all counted."""
+    client = ResilientRedis('localhost', 6379)
+    client._client = FlakyRedis(failures=0)
+
+    def worker():
+        for _ in range(2000):
+            client.ping()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.stats()['calls'] == 16000
@@ -1,54 +1,121 @@
-from flask import Flask
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, jsonify
 import redis
 import os
 import logging
 
-app = Flask(__name__)
+from redis_client import ResilientRedis, CircuitOpenError
+from health import HealthMonitor
+from instrumentation.request_metrics import RequestMetrics
+from instrumentation.server import serve
+
+# How long importing main and the modules it needs takes (part of /stats' startup_seconds)
+_import_seconds = time.perf_counter() - _import_started
+
+
+def config_from_env():
+    """The app's settings, from the environment variables the containers set."""
+    return {
+        # Get Redis host from environment variable or use a default
+        # This allows flexibility for local Docker Compose and other environments.
+        'REDIS_HOST': os.environ.get('REDIS_HOST', 'redis'), # Default to 'redis' which is the service name in docker-compose
+        'REDIS_PORT': int(os.environ.get('REDIS_PORT', 6379)),
+        'HEALTH_PROBE_INTERVAL': float(os.environ.get('HEALTH_PROBE_INTERVAL', 5.0)),
+    }
+
+
+def create_app(config=None, redis_client=None):
+    """Build the app from config_from_env(), updated with `config`.
+
+    Nothing here touches the network: the Redis client (a ResilientRedis for
+    REDIS_HOST:REDIS_PORT unless `redis_client` is given) connects on first use.
+    """
+    created_started = time.perf_counter()
+    app = Flask(__name__)
+    app.config.update(config_from_env())
+    app.config.update(config or {})
+
+    # Request count, latency, response size and in-flight requests per route, served at
+    # /metrics for Prometheus (see instrumentation/request_metrics.py). With several gunicorn
+    # workers, set PROMETHEUS_MULTIPROC_DIR to a shared directory so /metrics covers all of them.
+    RequestMetrics.from_env(app)
+
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+    # Redis client: connects lazily on first use and, while Redis is down, fails fast
+    # and reconnects in the background with exponential backoff (see redis_client.py).
+    # Nothing here touches the network, so the app starts immediately even without Redis.
+    r = redis_client or ResilientRedis.from_env(app.config['REDIS_HOST'], app.config['REDIS_PORT'])
 
-# Get Redis host from environment variable or use a default
-# This allows flexibility for local Docker Compose and other environments.
-redis_host = os.environ.get('REDIS_HOST', 'redis') # Default to 'redis' which is the service name in docker-compose
-redis_port = int(os.environ.get('REDIS_PORT', 6379))
+    # Redis is pinged by a background thread every HEALTH_PROBE_INTERVAL seconds and the
+    # health endpoints answer from that cached result (see health.py), so probes from
+    # Docker/ECS/Kubernetes never wait on Redis.
+    health_monitor = HealthMonitor(interval=app.config['HEALTH_PROBE_INTERVAL'])
+    health_monitor.add_check('redis', r.ping)
+    health_monitor.start()
+    app.extensions['redis'] = r
+    app.extensions['health_monitor'] = health_monitor
 
-# Initialize Redis connection
-try:
-    r = redis.Redis(host=redis_host, port=redis_port, socket_connect_timeout=5, health_check_interval=30)
-    r.ping() # Check connection
-    app.logger.info(f"Successfully connected to Redis at {redis_host}:{redis_port}")
-except redis.exceptions.ConnectionError as e:
-    app.logger.error(f"Could not connect to Redis at {redis_host}:{redis_port}: {e}")
-    r = None # Set r to None if connection fails
+    # How long it took to import and configure the app (reported by /stats)
+    startup_seconds = _import_seconds + time.perf_counter() - created_started
 
-@app.route('/')
-def hello_world():
-    if r:
+    @app.route('/')
+    def hello_world():
         try:
             hits = r.incr('hits')
             return f'Hello from the Web App! This page has been visited {hits} times. (Dev Mode)\n'
+        except CircuitOpenError:
+            return "Hello from the Web App! Redis is not connected. (Dev Mode)\n", 500
         except redis.exceptions.ConnectionError as e:
             app.logger.error(f"Redis connection error during request: {e}")
             return "Hello from the Web App! Could not connect to Redis to update counter. (Dev Mode)\n", 500
         except Exception as e:
             app.logger.error(f"An unexpected error occurred with Redis: {e}")
             return "Hello from the Web App! An error occurred with the counter. (Dev Mode)\n", 500
-    else:
-        return "Hello from the Web App! Redis is not connected. (Dev Mode)\n", 500
 
-@app.route('/health')
-def health_check():
-    if r:
-        try:
-            r.ping()
+    @app.route('/health')
+    @app.route('/health/ready')
+    def health_check():
+        result = health_monitor.result('redis')
+        if result.ok:
             return "Web app is healthy and connected to Redis (Dev Mode)", 200
-        except redis.exceptions.ConnectionError:
-            return "Web app is running, but Redis connection failed (Dev Mode)", 503
-    return "Web app is running, but Redis is not configured/connected (Dev Mode)", 503
+        if result.error is None or isinstance(result.error, CircuitOpenError):
+            # Not probed yet, or Redis is known to be down and we are reconnecting
+            return "Web app is running, but Redis is not configured/connected (Dev Mode)", 503
+        return "Web app is running, but Redis connection failed (Dev Mode)", 503
+
+    @app.route('/health/live')
+    def liveness_check():
+        # Liveness only says the process can serve requests; it never looks at Redis
+        return "Web app is running (Dev Mode)", 200
+
+    @app.route('/health/stats')
+    def health_stats():
+        # Probe cache age and latency histogram
+        return jsonify(health_monitor.stats())
+
+    @app.route('/stats')
+    def stats():
+        # Startup time and Redis failure-path metrics (fast failures should cost microseconds)
+        return jsonify(startup_seconds=startup_seconds, redis=r.stats())
+
+    return app
+
+
+def __getattr__(name):
+    # `main:app` (gunicorn, instrumentation/server.py) builds the app from the environment when it is
+    # first looked up, so importing main (tests, tools) starts nothing
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == '__main__':
-    # Port 5000 is exposed by the Dockerfile for the web service
-    # DEBUG mode is typically enabled via FLASK_DEBUG=1 or FLASK_ENV=development environment variable
-    # which Flask's app.run() picks up.
-    app.run(host='0.0.0.0', port=5000) # debug=True is often set by FLASK_DEBUG or FLASK_ENV 
\ No newline at end of file
+    # gunicorn configured from WSGI_* variables, or Flask's dev server with WSGI_SERVER=dev
+    # (see instrumentation/server.py)
+    serve(create_app(), "main:app", port=5000)
\ No newline at end of file
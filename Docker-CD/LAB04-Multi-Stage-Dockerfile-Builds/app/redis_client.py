@@ -0,0 +1,172 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(redis.exceptions.ConnectionError):
+    """Raised without touching the network while Redis is known to be down."""
+
+
+class ResilientRedis:
+    """Redis client that connects lazily and fails fast while Redis is unavailable.
+
+    Nothing touches the network when the object is created, so importing the app
+    never blocks on Redis. The first command opens the connection. After
+    `failure_threshold` (default 3) consecutive connection errors the circuit opens,
+    so a single dropped connection does not: commands raise CircuitOpenError
+    immediately (no connect timeout) and a background thread pings Redis with
+    exponential backoff, from `backoff_initial` up to `backoff_max` seconds. The
+    first successful ping closes the circuit again. The circuit state and the
+    counters in `metrics` are only changed with `_lock` held.
+    """
+
+    def __init__(self, host, port, socket_connect_timeout=5.0, socket_timeout=5.0,
+                 failure_threshold=3, backoff_initial=0.5, backoff_max=30.0):
+        self.host = host
+        self.port = port
+        self.socket_connect_timeout = socket_connect_timeout
+        self.socket_timeout = socket_timeout
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.backoff_initial = float(backoff_initial)
+        self.backoff_max = float(backoff_max)
+        self.created_at = time.monotonic()
+        self.is_open = False
+        self._client = None
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._reconnect_pid = None
+        self._stop = threading.Event()
+        self.metrics = {
+            'calls': 0,
+            'failures': 0,
+            'fast_failures': 0,
+            'failure_latency_seconds_total': 0.0,
+            'failure_latency_seconds_max': 0.0,
+            'circuit_opened': 0,
+            'reconnect_attempts': 0,
+            'reconnects': 0,
+            'first_connect_seconds': None,
+        }
+
+    @classmethod
+    def from_env(cls, host, port):
+        return cls(
+            host,
+            port,
+            socket_connect_timeout=float(os.environ.get('REDIS_CONNECT_TIMEOUT', 5.0)),
+            socket_timeout=float(os.environ.get('REDIS_SOCKET_TIMEOUT', 5.0)),
+            failure_threshold=int(os.environ.get('REDIS_FAILURE_THRESHOLD', 3)),
+            backoff_initial=float(os.environ.get('REDIS_BACKOFF_INITIAL', 0.5)),
+            backoff_max=float(os.environ.get('REDIS_BACKOFF_MAX', 30.0)),
+        )
+
+    @property
+    def client(self):
+        # redis.Redis() only builds a connection pool; sockets are opened on first use.
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = redis.Redis(
+                        host=self.host,
+                        port=self.port,
+                        socket_connect_timeout=self.socket_connect_timeout,
+                        socket_timeout=self.socket_timeout,
+                        health_check_interval=30,
+                    )
+        return self._client
+
+    def _record_success(self):
+        with self._lock:
+            self._mark_connected()
+
+    def _mark_connected(self):
+        # Called with self._lock held.
+        self._consecutive_failures = 0
+        if self.metrics['first_connect_seconds'] is None:
+            self.metrics['first_connect_seconds'] = time.monotonic() - self.created_at
+
+    def _record_failure(self, started):
+        latency = time.perf_counter() - started
+        with self._lock:
+            self.metrics['failures'] += 1
+            self.metrics['failure_latency_seconds_total'] += latency
+            self.metrics['failure_latency_seconds_max'] = max(self.metrics['failure_latency_seconds_max'], latency)
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.failure_threshold:
+                self._open_circuit()
+
+    def _open_circuit(self):
+        # Called with self._lock held.
+        if not self.is_open:
+            self.is_open = True
+            self.metrics['circuit_opened'] += 1
+            logger.error(f"Redis at {self.host}:{self.port} is unavailable; failing fast while reconnecting")
+        self._start_reconnector()
+
+    def _start_reconnector(self):
+        # Called with self._lock held. One reconnect thread per process.
+        if self._reconnect_pid == os.getpid():
+            return
+        self._reconnect_pid = os.getpid()
+        self._stop = threading.Event()
+        threading.Thread(target=self._reconnect_loop, args=(self._stop,),
+                         name="redis-reconnect", daemon=True).start()
+
+    def _reconnect_loop(self, stop):
+        delay = self.backoff_initial
+        while not stop.wait(delay * random.uniform(0.8, 1.2)):
+            with self._lock:
+                self.metrics['reconnect_attempts'] += 1
+            try:
+                self.client.ping()
+            except redis.exceptions.RedisError as e:
+                logger.info(f"Redis reconnect attempt failed, next try in ~{min(delay * 2, self.backoff_max):.1f}s: {e}")
+                delay = min(delay * 2, self.backoff_max)
+                continue
+            with self._lock:
+                self.is_open = False
+                self._reconnect_pid = None
+                self._mark_connected()
+                self.metrics['reconnects'] += 1
+            logger.info(f"Reconnected to Redis at {self.host}:{self.port}")
+            return
+
+    def execute(self, command, *args):
+        with self._lock:
+            self.metrics['calls'] += 1
+            is_open = self.is_open
+            if is_open:
+                self.metrics['fast_failures'] += 1
+                # A worker forked while the circuit was open has no reconnect thread yet.
+                self._start_reconnector()
+        if is_open:
+            raise CircuitOpenError(f"Redis at {self.host}:{self.port} is unavailable (circuit open)")
+        started = time.perf_counter()
+        try:
+            result = getattr(self.client, command)(*args)
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError):
+            self._record_failure(started)
+            raise
+        self._record_success()
+        return result
+
+    def incr(self, key):
+        return self.execute('incr', key)
+
+    def ping(self):
+        return self.execute('ping')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.metrics)
+            stats['circuit'] = 'open' if self.is_open else 'closed'
+        return stats
+
+    def close(self):
+        self._stop.set()
@@ -7,17 +7,19 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 # Now try to import the app
 try:
-    from main import app as flask_app
+    import main
+    from main import create_app
 except ImportError as e:
-    flask_app = None
-    print(f"Error importing flask_app from main: {e}")
+    create_app = None
+    print(f"Error importing create_app from main: {e}")
     print(f"Current sys.path: {sys.path}")
     print(f"Current working directory: {os.getcwd()}")
 
 @pytest.fixture
 def client():
-    if flask_app is None:
+    if create_app is None:
         pytest.fail("Flask app could not be imported. Check test setup and PYTHONPATH.")
+    flask_app = create_app()
     flask_app.config['TESTING'] = True
     with flask_app.test_client() as client:
         yield client
@@ -39,4 +41,22 @@ def test_health_check(client):
     if response.status_code == 200:
         assert b"Web app is healthy and connected to Redis" in response.data
     else: # 503
-        assert b"Redis is not configured/connected" in response.data or b"Redis connection failed" in response.data 
\ No newline at end of file
+        assert b"Redis is not configured/connected" in response.data or b"Redis connection failed" in response.data
+
+def test_liveness_check(client):
+    """Test that the liveness endpoint answers 200 even when Redis is down."""
+    response = client.get('/health/live')
+    assert response.status_code == 200
+    assert b"Web app is running" in response.data
+
+def test_import_builds_no_app():
+    """Test that importing main creates no Redis client until main:app is looked up."""
+    assert 'app' not in vars(main)
+
+def test_metrics_are_recorded_per_route(client):
+    """Test that /metrics counts requests under this app's own route templates."""
+    client.get('/health/live')
+    client.get('/')
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/health/live",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="/",status="500"}' in text
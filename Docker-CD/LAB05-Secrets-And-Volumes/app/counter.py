@@ -0,0 +1,159 @@
+import atexit
+import fcntl
+import logging
+import mmap
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# The counter file holds a single zero-padded decimal number followed by a newline,
+# e.g. "00000000000000000042\n". A fixed width lets every process map the file and
+# update it in place, and it stays readable with `cat` from inside the volume.
+COUNTER_WIDTH = 20
+COUNTER_FILE_SIZE = COUNTER_WIDTH + 1
+
+
+class BatchedFileCounter:
+    """Write-behind visit counter shared by all workers through a memory-mapped file.
+
+    Increments are collected in memory and added to the file under an exclusive
+    fcntl lock every `flush_every` hits or every `flush_interval` seconds, whichever
+    comes first. Because each flush adds a delta to the value currently in the file,
+    concurrent gunicorn workers never overwrite each other's increments.
+    """
+
+    def __init__(self, path, flush_every=50, flush_interval=1.0):
+        self.path = path
+        self.flush_every = max(1, int(flush_every))
+        self.flush_interval = float(flush_interval)
+        self.flushes = 0
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._base = 0
+        self._pid = None
+        self._fd = None
+        self._mm = None
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def _open(self):
+        # Called with self._lock held. Each process needs its own file description:
+        # flock() locks are shared by descriptors inherited across fork(), so a
+        # descriptor opened before gunicorn forks would not exclude sibling workers.
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                self._migrate(fd)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            mm = mmap.mmap(fd, COUNTER_FILE_SIZE)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd, self._mm, self._pid = fd, mm, os.getpid()
+        # Flush at exit only while the file is open; close() unregisters, so closed
+        # counters (one per app the tests build) are not kept alive until exit. A
+        # forked worker inherits its parent's registration: replace it, not add one.
+        atexit.unregister(self.close)
+        atexit.register(self.close)
+        self._base = self._read(mm)
+        self._pending = 0
+        if self.flush_interval > 0:
+            self._stop = threading.Event()
+            self._flusher = threading.Thread(target=self._flush_loop, args=(self._stop,),
+                                             name="counter-flusher", daemon=True)
+            self._flusher.start()
+
+    @staticmethod
+    def _migrate(fd):
+        # Rewrite files from older versions of the app (plain "42") or empty new
+        # files into the fixed-width layout so they can be mapped.
+        size = os.fstat(fd).st_size
+        if size == COUNTER_FILE_SIZE:
+            return
+        raw = os.pread(fd, 64, 0).strip()
+        try:
+            value = int(raw) if raw else 0
+        except ValueError:
+            logger.error(f"Counter file contained {raw!r}; resetting it to 0")
+            value = 0
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, b"%0*d\n" % (COUNTER_WIDTH, value), 0)
+
+    @staticmethod
+    def _read(mm):
+        try:
+            return int(mm[:COUNTER_WIDTH])
+        except ValueError:
+            return 0
+
+    def _ensure_open(self):
+        if self._pid != os.getpid():
+            # Fresh process (first use, or a worker forked after preload).
+            self._fd = self._mm = None
+            self._open()
+
+    def _flush_locked(self):
+        # Called with self._lock held.
+        if self._mm is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            value = self._read(self._mm) + self._pending
+            self._mm[:COUNTER_WIDTH] = b"%0*d" % (COUNTER_WIDTH, value)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._base = value
+        self._pending = 0
+        self.flushes += 1
+
+    def _flush_loop(self, stop):
+        while not stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Periodic flush of {self.path} failed: {e}")
+
+    def increment(self):
+        """Count one visit and return the current total as seen by this process."""
+        with self._lock:
+            self._ensure_open()
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._flush_locked()
+            return self._base + self._pending
+
+    def value(self):
+        with self._lock:
+            self._ensure_open()
+            return self._base + self._pending
+
+    def flush(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._pending:
+                self._flush_locked()
+
+    def close(self):
+        """Flush outstanding increments and release the mapping."""
+        self._stop.set()
+        with self._lock:
+            if self._pid != os.getpid() or self._mm is None:
+                return
+            if self._pending:
+                self._flush_locked()
+            self._mm.flush()
+            self._mm.close()
+            os.close(self._fd)
+            self._fd = self._mm = self._pid = None
+        atexit.unregister(self.close)
+
+    def reset(self):
+        """Drop in-memory state so the next increment re-reads the file (used by tests)."""
+        self.close()
+        with self._lock:
+            self._base = self._pending = 0
@@ -0,0 +1,127 @@
+import bisect
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the probe latency histogram buckets, Prometheus style.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class CheckResult:
+    __slots__ = ('ok', 'error', 'checked_at', 'latency')
+
+    def __init__(self, ok, error=None, checked_at=None, latency=None):
+        self.ok = ok
+        self.error = error
+        self.checked_at = checked_at
+        self.latency = latency
+
+
+# Returned until the first probe of a check has finished.
+NOT_PROBED = CheckResult(ok=False)
+
+
+class HealthMonitor:
+    """Probes dependencies on its own schedule and serves the last result from memory.
+
+    Each registered check is a callable that raises on failure (e.g. `r.ping`). A
+    daemon thread runs all checks every `interval` seconds and stores one
+    CheckResult per check, so health endpoints never wait on a dependency and cost
+    the same no matter how often Docker, ECS or Kubernetes call them. A result older
+    than `stale_after` seconds counts as failed, in case the probe thread is stuck.
+    """
+
+    def __init__(self, interval=5.0, stale_after=None):
+        self.interval = float(interval)
+        self.stale_after = float(stale_after) if stale_after else 3 * self.interval
+        self.probes = 0
+        self._checks = {}
+        self._results = {}
+        self._histograms = {}
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add_check(self, name, check):
+        self._checks[name] = check
+        self._histograms[name] = {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0.0, 'count': 0}
+
+    def start(self):
+        """Start the probe thread in this process (safe to call repeatedly and after fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            threading.Thread(target=self._run, args=(self._stop,), name="health-probe", daemon=True).start()
+
+    def stop(self):
+        """Stop the probe thread; it exits after the probe in progress, if any."""
+        with self._lock:
+            self._stop.set()
+            self._pid = None
+
+    def _run(self, stop):
+        while True:
+            self.probe_once()
+            if stop.wait(self.interval):
+                return
+
+    def probe_once(self):
+        for name, check in self._checks.items():
+            started = time.perf_counter()
+            try:
+                check()
+                error = None
+            except Exception as e:
+                error = e
+            latency = time.perf_counter() - started
+            self._observe(name, latency)
+            # Swap in a new result object; readers never see a partial update.
+            self._results[name] = CheckResult(error is None, error, time.time(), latency)
+            if error is not None:
+                logger.warning(f"Health probe '{name}' failed after {latency * 1000:.1f} ms: {error}")
+        self.probes += 1
+
+    def _observe(self, name, latency):
+        histogram = self._histograms[name]
+        histogram['buckets'][bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        histogram['sum'] += latency
+        histogram['count'] += 1
+
+    def result(self, name):
+        self.start()
+        result = self._results.get(name, NOT_PROBED)
+        if result.checked_at is not None and time.time() - result.checked_at > self.stale_after:
+            return CheckResult(False, TimeoutError(f"'{name}' probe result is stale"), result.checked_at, result.latency)
+        return result
+
+    def is_ready(self):
+        return all(self.result(name).ok for name in self._checks)
+
+    def cache_age(self, name):
+        checked_at = self._results.get(name, NOT_PROBED).checked_at
+        return None if checked_at is None else time.time() - checked_at
+
+    def stats(self):
+        checks = {}
+        for name in self._checks:
+            result = self.result(name)
+            histogram = self._histograms[name]
+            cumulative, buckets = 0, {}
+            for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), histogram['buckets']):
+                cumulative += count
+                buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+            checks[name] = {
+                'ok': result.ok,
+                'error': None if result.error is None else str(result.error),
+                'cache_age_seconds': self.cache_age(name),
+                'last_latency_seconds': result.latency,
+                'latency_histogram': {'buckets': buckets, 'sum': histogram['sum'], 'count': histogram['count']},
+            }
+        return {'interval_seconds': self.interval, 'probes': self.probes, 'ready': self.is_ready(), 'checks': checks}
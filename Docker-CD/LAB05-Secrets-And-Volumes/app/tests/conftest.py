@@ -0,0 +1,150 @@
+"""Fixtures that build a fresh app per test, with nothing shared between tests.
+
+- `redis_client`: an in-process fake of the Redis commands the app uses, or, with
+  LAB_TEST_REDIS=server, a real redis-server started on a free port for the session
+  (each pytest-xdist worker starts its own) and flushed before each test.
+- `unreachable_redis`: the fake, failing every command like a server that is down.
+- `app_config`: API_KEY_FILE and DATA_FILE in the test's own tmp_path.
+- `app` / `client`: main.create_app() with both, its health probe run once, and its
+  background threads stopped after the test.
+
+So no test touches /tmp or the network, and the suite runs in parallel with
+`pytest -n auto` (pytest-xdist).
+"""
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import redis
+
+# Add the parent directory (app) to sys.path to allow direct import of main
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import create_app
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def incr(self, key, amount=1):
+        self.commands.append((key, amount))
+        return self
+
+    incrby = incr
+
+    def execute(self):
+        return [self.client.incrby(key, amount) for key, amount in self.commands]
+
+
+class FakeRedis:
+    """The Redis commands main.py uses, on a dict. With `up=False` every command
+    fails like an unreachable server."""
+
+    def __init__(self, up=True):
+        self.up = up
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def _check(self):
+        if not self.up:
+            raise redis.exceptions.ConnectionError("Error connecting to fake Redis")
+
+    def ping(self):
+        self._check()
+        return True
+
+    def get(self, key):
+        self._check()
+        value = self.values.get(key)
+        return None if value is None else str(value).encode()
+
+    def incrby(self, key, amount=1):
+        self._check()
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+            return self.values[key]
+
+    incr = incrby
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope='session')
+def redis_server():
+    """(host, port) of a redis-server started for the session, with LAB_TEST_REDIS=server."""
+    if os.environ.get('LAB_TEST_REDIS') != 'server':
+        yield None
+        return
+    binary = shutil.which('redis-server')
+    if binary is None:
+        pytest.skip('LAB_TEST_REDIS=server but redis-server is not installed')
+    port = _free_port()
+    process = subprocess.Popen([binary, '--port', str(port), '--bind', '127.0.0.1', '--save', '',
+                                '--appendonly', 'no'], stdout=subprocess.DEVNULL)
+    client = redis.Redis(port=port)
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            client.ping()
+            break
+        except redis.exceptions.ConnectionError:
+            if time.monotonic() > deadline:
+                process.kill()
+                raise
+            time.sleep(0.05)
+    yield '127.0.0.1', port
+    process.terminate()
+    process.wait()
+
+
+@pytest.fixture
+def redis_client(redis_server):
+    if redis_server is None:
+        return FakeRedis()
+    client = redis.Redis(host=redis_server[0], port=redis_server[1])
+    client.flushdb()
+    return client
+
+
+@pytest.fixture
+def unreachable_redis():
+    return FakeRedis(up=False)
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    return {
+        'API_KEY_FILE': str(tmp_path / 'api_key'),
+        'DATA_FILE': str(tmp_path / 'app_counter.txt'),
+        'REDIS_HOST': 'fake-redis',
+    }
+
+
+@pytest.fixture
+def app(app_config, redis_client):
+    flask_app = create_app(app_config, redis_client=redis_client)
+    flask_app.config['TESTING'] = True
+    services = flask_app.extensions['services']
+    services.health_monitor.probe_once()  # don't wait for the probe thread
+    yield flask_app
+    services.close()
+
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        yield client
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from health import HealthMonitor
+
+
+class Dependency:
+    def __init__(self):
+        self.up = True
+        self.calls = 0
+
+    def check(self):
+        self.calls += 1
+        if not self.up:
+            raise ConnectionError("dependency is down")
+
+
+def test_not_ready_before_first_probe():
+    """Test that an unprobed check is reported as not ready."""
+    monitor = HealthMonitor(interval=60)
+    monitor.add_check('redis', Dependency().check)
+    monitor._pid = os.getpid()  # don't start the probe thread
+    result = monitor.result('redis')
+    assert not result.ok and result.error is None
+    assert not monitor.is_ready()
+
+
+def test_results_are_served_from_cache():
+    """Test that reading the health status never calls the dependency."""
+    dependency = Dependency()
+    monitor = HealthMonitor(interval=60)
+    monitor.add_check('redis', dependency.check)
+    monitor._pid = os.getpid()
+    monitor.probe_once()
+    for _ in range(100):
+        assert monitor.result('redis').ok
+    assert dependency.calls == 1
+
+    dependency.up = False
+    monitor.probe_once()
+    result = monitor.result('redis')
+    assert not result.ok
+    assert isinstance(result.error, ConnectionError)
+
+
+def test_stale_results_are_not_ready():
+    """Test that a result older than stale_after counts as failed."""
+    monitor = HealthMonitor(interval=60, stale_after=0.01)
+    monitor.add_check('redis', Dependency().check)
+    monitor._pid = os.getpid()
+    monitor.probe_once()
+    time.sleep(0.02)
+    assert not monitor.result('redis').ok
+
+
+def test_background_probe_and_stats():
+    """Test that the probe thread fills the cache and stats expose age and latency histogram."""
+    monitor = HealthMonitor(interval=0.01)
+    monitor.add_check('redis', Dependency().check)
+    monitor.start()
+    deadline = time.monotonic() + 2
+    while monitor.probes < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = monitor.stats()
+    redis_stats = stats['checks']['redis']
+    assert stats['ready'] is True
+    assert redis_stats['cache_age_seconds'] is not None
+    histogram = redis_stats['latency_histogram']
+    assert histogram['count'] >= 2
+    assert histogram['buckets']['+Inf'] == histogram['count']
+
+def test_stop_ends_the_probe_thread():
+    """Test that stop() ends the probe thread, so apps built per test don't leak threads."""
+    monitor = HealthMonitor(interval=0.01)
+    monitor.add_check('redis', Dependency().check)
+    monitor.start()
+    monitor.stop()
+    time.sleep(0.05)
+    probes = monitor.probes
+    time.sleep(0.05)
+    assert monitor.probes == probes
@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+import redis
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from redis_store import IncrCoalescer, RedisCounter, make_pool
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def incrby(self, key, amount):
+        self.commands.append((key, amount))
+
+    def execute(self):
+        self.client.round_trips += 1
+        if self.client.fail:
+            raise redis.exceptions.ConnectionError("Redis went away")
+        results = []
+        for key, amount in self.commands:
+            self.client.values[key] = self.client.values.get(key, 0) + amount
+            results.append(self.client.values[key])
+        return results
+
+
+class FakeRedis:
+    def __init__(self, fail=False):
+        self.values = {}
+        self.round_trips = 0
+        self.fail = fail
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def incr(self, key):
+        self.round_trips += 1
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+
+def test_make_pool_is_blocking_and_sized():
+    """Test that the pool is a BlockingConnectionPool with the requested size."""
+    pool = make_pool('localhost', 6379, max_connections=3, pool_timeout=0.5)
+    assert isinstance(pool, redis.BlockingConnectionPool)
+    assert pool.max_connections == 3
+    assert pool.timeout == 0.5
+
+
+def test_direct_counter_uses_plain_incr():
+    """Test that coalescing is off by default."""
+    client = FakeRedis()
+    counter = RedisCounter(client)
+    assert counter.coalescer is None
+    assert [counter.incr('hits') for _ in range(3)] == [1, 2, 3]
+    assert client.round_trips == 3
+
+
+def test_concurrent_incrs_share_one_round_trip():
+    """Test that concurrent INCRs are coalesced and each caller gets a unique value."""
+    client = FakeRedis()
+    coalescer = IncrCoalescer(client, window=0.2, max_batch=20)
+    results = []
+    lock = threading.Lock()
+
+    def hit():
+        value = coalescer.incr('redis_hits')
+        with lock:
+            results.append(value)
+
+    threads = [threading.Thread(target=hit) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(results) == list(range(1, 21))
+    assert client.values['redis_hits'] == 20
+    # max_batch reached before the window expired, so one pipeline carried everything.
+    assert client.round_trips == 1
+
+
+def test_pipeline_errors_reach_every_caller():
+    """Test that a failed pipeline raises the Redis error in the waiting request."""
+    coalescer = IncrCoalescer(FakeRedis(fail=True), window=0.001)
+    with pytest.raises(redis.exceptions.ConnectionError):
+        coalescer.incr('redis_hits')
+
+
+def test_timed_out_incr_is_withdrawn():
+    """Test that an INCR that times out while still queued is never sent, so a retry counts once."""
+    client = FakeRedis()
+    coalescer = IncrCoalescer(client, window=0.3)
+    with pytest.raises(redis.exceptions.TimeoutError):
+        coalescer.incr('redis_hits', timeout=0.05)
+    assert coalescer.incr('redis_hits') == 1
+    assert client.values['redis_hits'] == 1
+    coalescer.close()
+
+
+def test_close_stops_the_thread():
+    """Test that close() sends what is queued, stops the background thread and refuses new INCRs."""
+    client = FakeRedis()
+    coalescer = IncrCoalescer(client, window=0.5)
+    results = []
+    caller = threading.Thread(target=lambda: results.append(coalescer.incr('redis_hits')))
+    caller.start()
+    while not coalescer._queue:
+        time.sleep(0.001)
+    coalescer.close()
+    caller.join()
+    assert results == [1]
+    assert not coalescer._thread.is_alive()
+    with pytest.raises(redis.exceptions.ConnectionError):
+        coalescer.incr('redis_hits')
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import secrets_provider
+from secrets_provider import FileSecret, DEFAULT_API_KEY, ERROR_API_KEY
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_missing_file_uses_default(tmp_path):
+    """Test that a missing secret file falls back to the default key."""
+    secret = FileSecret(str(tmp_path / "api_key"), poll_interval=0)
+    assert secret.get() == DEFAULT_API_KEY
+    assert secret.found() is False
+
+
+def test_value_is_read_once(tmp_path):
+    """Test that repeated reads are served from the cache."""
+    path = tmp_path / "api_key"
+    path.write_text("key-1\n")
+    secret = FileSecret(str(path), poll_interval=0)
+    assert secret.get() == "key-1"
+    path.write_text("key-2")
+    assert secret.get() == "key-1"
+    assert secret.poll() is True
+    assert secret.get() == "key-2"
+    assert secret.poll() is False
+    assert secret.reloads == 1
+
+
+def test_rotation_picked_up_by_watcher(tmp_path):
+    """Test that a rotated secret becomes visible within the poll interval."""
+    path = tmp_path / "api_key"
+    path.write_text("old-key")
+    secret = FileSecret(str(path), poll_interval=0.02)
+    assert secret.get() == "old-key"
+
+    # Rotate the way orchestrators do: write a new file and rename it over the old one.
+    new_path = tmp_path / "api_key.new"
+    new_path.write_text("new-key")
+    os.replace(new_path, path)
+
+    assert _wait_for(lambda: secret.get() == "new-key")
+    assert secret.stats()["reloads"] >= 1
+    secret.close()
+
+
+def test_removed_file_falls_back_to_default(tmp_path):
+    """Test that deleting the secret file reverts to the default key."""
+    path = tmp_path / "api_key"
+    path.write_text("key")
+    secret = FileSecret(str(path), poll_interval=0.02)
+    assert secret.found() is True
+    path.unlink()
+    assert _wait_for(lambda: secret.found() is False)
+    assert secret.get() == DEFAULT_API_KEY
+    secret.close()
+
+
+def test_read_error_is_retried_on_next_poll(tmp_path, monkeypatch):
+    """Test that a transient read error is not cached against the unchanged file."""
+    path = tmp_path / "api_key"
+    path.write_text("key")
+
+    def failing_open(*args, **kwargs):
+        raise PermissionError("transient")
+
+    monkeypatch.setattr(secrets_provider, "open", failing_open, raising=False)
+    secret = FileSecret(str(path), poll_interval=0)
+    assert secret.get() == ERROR_API_KEY
+    assert secret.reload_errors == 1
+
+    monkeypatch.delattr(secrets_provider, "open")
+    assert secret.poll() is True
+    assert secret.get() == "key"
@@ -0,0 +1,111 @@
+"""Compare requests/sec of the batched visit counter against the old per-request file rewrite.
+
+Usage (from the app/ directory):
+    python benchmarks/bench_counter.py --requests 5000 --threads 4 --processes 4
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from counter import BatchedFileCounter
+
+
+def legacy_increment(path):
+    # The original increment_app_counter(): read, parse and rewrite the whole file per request.
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        with open(path, 'r') as f:
+            count = int(f.read().strip()) + 1
+    except (FileNotFoundError, ValueError):
+        count = 1
+    with open(path, 'w') as f:
+        f.write(str(count))
+    return count
+
+
+def make_app(mode, path, flush_every):
+    app = Flask(__name__)
+    if mode == 'legacy':
+        increment = lambda: legacy_increment(path)
+    else:
+        counter = BatchedFileCounter(path, flush_every=flush_every, flush_interval=1.0)
+        increment = counter.increment
+        app.counter = counter
+
+    @app.route('/')
+    def hello():
+        return f'This app endpoint has been visited {increment()} times.'
+
+    return app
+
+
+def run_client(mode, path, flush_every, requests, threads):
+    app = make_app(mode, path, flush_every)
+
+    def drive(n):
+        client = app.test_client()
+        for _ in range(n):
+            client.get('/')
+
+    workers = [threading.Thread(target=drive, args=(requests // threads,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    if hasattr(app, 'counter'):
+        app.counter.close()
+    return elapsed
+
+
+def _process_entry(mode, path, flush_every, requests, threads, results):
+    results.put(run_client(mode, path, flush_every, requests, threads))
+
+
+def bench(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'app_counter.txt')
+        ctx = multiprocessing.get_context('fork')
+        results = ctx.Queue()
+        per_process = args.requests // args.processes
+        procs = [ctx.Process(target=_process_entry,
+                             args=(mode, path, args.flush_every, per_process, args.threads, results))
+                 for _ in range(args.processes)]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        wall = time.perf_counter() - start
+        with open(path) as f:
+            stored = int(f.read().strip())
+    total = per_process // args.threads * args.threads * args.processes
+    return total, wall, stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000, help='total requests across all workers')
+    parser.add_argument('--threads', type=int, default=4, help='threads per worker process')
+    parser.add_argument('--processes', type=int, default=4, help='worker processes sharing the counter file')
+    parser.add_argument('--flush-every', type=int, default=50, help='batch size for the batched counter')
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'requests':>9} {'seconds':>8} {'req/s':>10} {'stored':>8} {'lost':>6}")
+    for mode in ('legacy', 'batched'):
+        total, wall, stored = bench(mode, args)
+        print(f"{mode:<10} {total:>9} {wall:>8.2f} {total / wall:>10.0f} {stored:>8} {total - stored:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Load-test the Redis hit counter with and without INCR coalescing.
+
+Needs a reachable redis-server. Either point it at one that is already running
+(e.g. the lab's compose Redis on localhost:6384) or let the script start a
+throwaway local `redis-server` on a free port:
+
+    python benchmarks/bench_redis.py --port 6384
+    python benchmarks/bench_redis.py --start-server --threads 32 --requests 20000
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import redis
+
+from redis_store import RedisCounter, make_pool
+
+
+def start_redis_server():
+    if shutil.which('redis-server') is None:
+        sys.exit("redis-server not found on PATH; start Redis yourself and pass --host/--port")
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    proc = subprocess.Popen(['redis-server', '--port', str(port), '--save', '', '--appendonly', 'no'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    client = redis.Redis(port=port)
+    for _ in range(100):
+        try:
+            client.ping()
+            return proc, port
+        except redis.exceptions.ConnectionError:
+            time.sleep(0.05)
+    proc.terminate()
+    sys.exit("redis-server did not start")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(host, port, threads, requests, pool_size, window):
+    client = redis.Redis(connection_pool=make_pool(host, port, max_connections=pool_size))
+    client.delete('bench_hits')
+    counter = RedisCounter(client, coalesce_window=window)
+    per_thread = requests // threads
+    latencies = [[] for _ in range(threads)]
+
+    def drive(samples):
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            counter.incr('bench_hits')
+            samples.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=drive, args=(latencies[i],)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    samples = sorted(s for per in latencies for s in per)
+    assert int(client.get('bench_hits')) == len(samples), "lost increments"
+    round_trips = counter.coalescer.batches if counter.coalescer else len(samples)
+    client.connection_pool.disconnect()
+    return {
+        'ops': len(samples),
+        'ops_per_sec': len(samples) / elapsed,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+        'round_trips': round_trips,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=6379)
+    parser.add_argument('--start-server', action='store_true', help='start a temporary local redis-server')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent request threads')
+    parser.add_argument('--requests', type=int, default=10000, help='total INCRs per run')
+    parser.add_argument('--pool-size', type=int, default=10, help='BlockingConnectionPool max_connections')
+    parser.add_argument('--windows-ms', default='0,0.5,2', help='comma separated coalescing windows (0 = off)')
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        server, args.port = start_redis_server()
+        args.host = '127.0.0.1'
+    try:
+        print(f"{'window_ms':>9} {'ops':>7} {'ops/s':>9} {'p50_ms':>8} {'p99_ms':>8} {'round_trips':>12}")
+        for window_ms in (float(w) for w in args.windows_ms.split(',')):
+            result = run(args.host, args.port, args.threads, args.requests, args.pool_size, window_ms / 1000.0)
+            print(f"{window_ms:>9g} {result['ops']:>7} {result['ops_per_sec']:>9.0f} "
+                  f"{result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f} {result['round_trips']:>12}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,108 +1,209 @@
 import os
-from flask import Flask
+from flask import Flask, jsonify
 import redis
 import logging
 
-app = Flask(__name__)
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-
-# Path for the API key secret
-# Docker secrets are typically mounted in /run/secrets/
-API_KEY_FILE_PATH = os.environ.get('API_KEY_FILE', '/run/secrets/api_key_secret')
-
-# Path for a simple data file to demonstrate volume persistence
-DATA_FILE_PATH = os.environ.get('DATA_FILE', '/data/app_counter.txt')
-
-redis_host = os.environ.get('REDIS_HOST', 'redis')
-redis_port = int(os.environ.get('REDIS_PORT', 6379))
-
-# Initialize Redis connection
-try:
-    r = redis.Redis(host=redis_host, port=redis_port, socket_connect_timeout=5, health_check_interval=30)
-    r.ping()
-    app.logger.info(f"Successfully connected to Redis at {redis_host}:{redis_port}")
-except redis.exceptions.ConnectionError as e:
-    app.logger.error(f"Could not connect to Redis at {redis_host}:{redis_port}: {e}")
-    r = None
-
-def read_api_key():
-    try:
-        with open(API_KEY_FILE_PATH, 'r') as f:
-            return f.read().strip()
-    except FileNotFoundError:
-        app.logger.warning(f"API key file not found at {API_KEY_FILE_PATH}. Using default key.")
-        return "default_api_key_not_set"
-    except Exception as e:
-        app.logger.error(f"Error reading API key from {API_KEY_FILE_PATH}: {e}")
-        return "error_reading_api_key"
-
-def get_app_counter():
-    try:
-        if not os.path.exists(os.path.dirname(DATA_FILE_PATH)):
-            os.makedirs(os.path.dirname(DATA_FILE_PATH), exist_ok=True)
-        with open(DATA_FILE_PATH, 'r') as f:
-            return int(f.read().strip())
-    except FileNotFoundError:
-        return 0
-    except (ValueError, Exception) as e:
-        app.logger.error(f"Error reading or initializing app counter from {DATA_FILE_PATH}: {e}")
-        return 0 # Default to 0 if file is corrupted or unreadable
-
-def increment_app_counter():
-    count = get_app_counter() + 1
-    try:
-        if not os.path.exists(os.path.dirname(DATA_FILE_PATH)):
-            os.makedirs(os.path.dirname(DATA_FILE_PATH), exist_ok=True)
-        with open(DATA_FILE_PATH, 'w') as f:
-            f.write(str(count))
-        return count
-    except Exception as e:
-        app.logger.error(f"Error writing app counter to {DATA_FILE_PATH}: {e}")
-        return count -1 # Return previous count on failure
-
-
-@app.route('/')
-def hello_world():
-    api_key = read_api_key()
-    app_counter_val = increment_app_counter()
-    
-    response_text = f'Hello from the Web App! API Key: "{api_key}".<br/>'
-    response_text += f'This app endpoint has been visited {app_counter_val} times (value from {DATA_FILE_PATH}).<br/>'
-
-    if r:
+from counter import BatchedFileCounter
+from secrets_provider import FileSecret
+from redis_store import RedisCounter, pool_from_env
+from health import HealthMonitor
+from instrumentation.request_metrics import RequestMetrics
+from instrumentation.server import serve
+
+
+def config_from_env():
+    """The app's settings, from the environment variables the containers set."""
+    return {
+        # Path for the API key secret
+        # Docker secrets are typically mounted in /run/secrets/
+        'API_KEY_FILE': os.environ.get('API_KEY_FILE', '/run/secrets/api_key_secret'),
+        'SECRET_POLL_INTERVAL': float(os.environ.get('SECRET_POLL_INTERVAL', 2.0)),
+        # Path for a simple data file to demonstrate volume persistence
+        'DATA_FILE': os.environ.get('DATA_FILE', '/data/app_counter.txt'),
+        'COUNTER_FLUSH_EVERY': int(os.environ.get('COUNTER_FLUSH_EVERY', 50)),
+        'COUNTER_FLUSH_INTERVAL': float(os.environ.get('COUNTER_FLUSH_INTERVAL', 1.0)),
+        'REDIS_HOST': os.environ.get('REDIS_HOST', 'redis'),
+        'REDIS_PORT': int(os.environ.get('REDIS_PORT', 6379)),
+        'REDIS_COALESCE_WINDOW_MS': float(os.environ.get('REDIS_COALESCE_WINDOW_MS', 0)),
+        'REDIS_COALESCE_MAX_BATCH': int(os.environ.get('REDIS_COALESCE_MAX_BATCH', 256)),
+        'HEALTH_PROBE_INTERVAL': float(os.environ.get('HEALTH_PROBE_INTERVAL', 5.0)),
+    }
+
+
+def connect_redis(host, port, logger):
+    # Explicitly sized BlockingConnectionPool; see redis_store.py for the REDIS_POOL_* settings.
+    # The pool opens its first connection on the first command, so the app starts at once
+    # even while Redis is unreachable, and picks Redis up as soon as it comes up.
+    r = redis.Redis(connection_pool=pool_from_env(host, port))
+    logger.info(f"Redis client for {host}:{port} created (connects on first use)")
+    return r
+
+
+class Services:
+    """What the request handlers of one app use: the API key, the visit counter and Redis."""
+
+    def __init__(self, config, redis_client, logger):
+        self.logger = logger
+        self.data_file_path = config['DATA_FILE']
+        self.redis_host = config['REDIS_HOST']
+
+        # The key is loaded once and a background thread watches the file, so a rotated
+        # secret is picked up within SECRET_POLL_INTERVAL seconds. See secrets_provider.py.
+        self.api_key_secret = FileSecret(config['API_KEY_FILE'], poll_interval=config['SECRET_POLL_INTERVAL'])
+
+        # Visits are counted in memory and written to DATA_FILE in batches
+        # (every COUNTER_FLUSH_EVERY hits or every COUNTER_FLUSH_INTERVAL seconds),
+        # instead of rewriting the file on every request. See counter.py.
+        self.visit_counter = BatchedFileCounter(
+            config['DATA_FILE'],
+            flush_every=config['COUNTER_FLUSH_EVERY'],
+            flush_interval=config['COUNTER_FLUSH_INTERVAL'],
+        )
+
+        self.r = redis_client
+        # With REDIS_COALESCE_WINDOW_MS > 0, INCRs from concurrent requests are batched into
+        # one pipelined round trip (each request still gets its own counter value).
+        self.redis_counter = RedisCounter(
+            redis_client,
+            coalesce_window=config['REDIS_COALESCE_WINDOW_MS'] / 1000.0,
+            max_batch=config['REDIS_COALESCE_MAX_BATCH'],
+        ) if redis_client else None
+
+        # Redis is pinged by a background thread every HEALTH_PROBE_INTERVAL seconds and the
+        # health endpoints answer from that cached result (see health.py), so probes from
+        # Docker/ECS/Kubernetes never wait on Redis.
+        self.health_monitor = HealthMonitor(interval=config['HEALTH_PROBE_INTERVAL'])
+        if redis_client:
+            self.health_monitor.add_check('redis', redis_client.ping)
+            self.health_monitor.start()
+
+    def read_api_key(self):
+        # Served from memory; the secret file is only re-read when it changes on disk.
+        return self.api_key_secret.get()
+
+    def get_app_counter(self):
         try:
-            redis_hits = r.incr('redis_hits')
-            response_text += f'Redis counter (at {redis_host}) has been incremented to: {redis_hits}.'
-        except redis.exceptions.ConnectionError as e:
-            app.logger.error(f"Redis connection error during request: {e}")
-            response_text += "Could not connect to Redis to update its counter."
+            return self.visit_counter.value()
         except Exception as e:
-            app.logger.error(f"An unexpected error occurred with Redis: {e}")
-            response_text += "An error occurred with the Redis counter."
-    else:
-        response_text += "Redis is not connected."
-    
-    return response_text + "\\n"
-
-@app.route('/health')
-def health_check():
-    # Check API key file presence as part of health, though app will use default if not found
-    api_key_found = os.path.exists(API_KEY_FILE_PATH)
-    api_key_status = "API key file found." if api_key_found else "API key file NOT found (using default)."
-
-    redis_status = "Not Connected"
-    if r:
+            self.logger.error(f"Error reading or initializing app counter from {self.data_file_path}: {e}")
+            return 0 # Default to 0 if file is corrupted or unreadable
+
+    def increment_app_counter(self):
         try:
-            r.ping()
-            redis_status = "Healthy and Connected"
-        except redis.exceptions.ConnectionError:
-            redis_status = "Connection Failed"
-    
-    return f"Web app is running.<br/>API Key Status: {api_key_status}<br/>Redis Status: {redis_status}\\n", 200
+            return self.visit_counter.increment()
+        except Exception as e:
+            self.logger.error(f"Error writing app counter to {self.data_file_path}: {e}")
+            return 0
+
+    def redis_health_status(self):
+        if not self.r:
+            return "Not Connected"
+        result = self.health_monitor.result('redis')
+        if result.ok:
+            return "Healthy and Connected"
+        # Not probed yet: the client connects on first use
+        return "Connection Failed" if result.error is not None else "Not Connected"
+
+    def close(self):
+        """Stop the background threads and flush the visit counter (used by tests)."""
+        self.health_monitor.stop()
+        self.api_key_secret.close()
+        self.visit_counter.close()
+        if self.redis_counter is not None:
+            self.redis_counter.close()
+
+
+def create_app(config=None, redis_client=None):
+    """Build the app from config_from_env(), updated with `config`.
+
+    The Redis client for REDIS_HOST:REDIS_PORT (or `redis_client`, e.g. the
+    in-process fake the tests pass) connects on first use, so building the app
+    never waits on Redis. The app's Services are in app.extensions['services'].
+    """
+    app = Flask(__name__)
+    app.config.update(config_from_env())
+    app.config.update(config or {})
+
+    # Request count, latency, response size and in-flight requests per route, served at
+    # /metrics for Prometheus (see instrumentation/request_metrics.py). With several gunicorn
+    # workers, set PROMETHEUS_MULTIPROC_DIR to a shared directory so /metrics covers all of them.
+    RequestMetrics.from_env(app)
+
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+
+    if redis_client is None:
+        redis_client = connect_redis(app.config['REDIS_HOST'], app.config['REDIS_PORT'], app.logger)
+    services = Services(app.config, redis_client, app.logger)
+    app.extensions['services'] = services
+    redis_host = services.redis_host
+    data_file_path = services.data_file_path
+
+    @app.route('/')
+    def hello_world():
+        api_key = services.read_api_key()
+        app_counter_val = services.increment_app_counter()
+
+        response_text = f'Hello from the Web App! API Key: "{api_key}".<br/>'
+        response_text += f'This app endpoint has been visited {app_counter_val} times (value from {data_file_path}).<br/>'
+
+        if services.r:
+            try:
+                redis_hits = services.redis_counter.incr('redis_hits')
+                response_text += f'Redis counter (at {redis_host}) has been incremented to: {redis_hits}.'
+            except redis.exceptions.ConnectionError as e:
+                app.logger.error(f"Redis connection error during request: {e}")
+                response_text += "Could not connect to Redis to update its counter."
+            except Exception as e:
+                app.logger.error(f"An unexpected error occurred with Redis: {e}")
+                response_text += "An error occurred with the Redis counter."
+        else:
+            response_text += "Redis is not connected."
+
+        return response_text + "\\n"
+
+    @app.route('/health')
+    def health_check():
+        # Check API key file presence as part of health, though app will use default if not found
+        api_key_found = services.api_key_secret.found()
+        api_key_status = "API key file found." if api_key_found else "API key file NOT found (using default)."
+        api_key_status += f" (reloads: {services.api_key_secret.reloads}, errors: {services.api_key_secret.reload_errors})"
+
+        # Answered from memory: the Redis status comes from the last background probe
+        redis_status = services.redis_health_status()
+
+        return f"Web app is running.<br/>API Key Status: {api_key_status}<br/>Redis Status: {redis_status}\\n", 200
+
+    @app.route('/health/live')
+    def liveness_check():
+        # Liveness only says the process can serve requests; it never looks at Redis
+        return "Web app is running.\n", 200
+
+    @app.route('/health/ready')
+    def readiness_check():
+        redis_status = services.redis_health_status()
+        status_code = 200 if redis_status == "Healthy and Connected" else 503
+        return f"Redis Status: {redis_status}\n", status_code
+
+    @app.route('/health/stats')
+    def health_stats():
+        # Probe cache age and latency histogram
+        return jsonify(services.health_monitor.stats())
+
+    return app
+
+
+def __getattr__(name):
+    # `main:app` (gunicorn, instrumentation/server.py) builds the app from the environment when it is
+    # first looked up, so importing main (tests, tools) connects to nothing
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == '__main__':
-    # For production, debug mode should be off. 
-    # Flask's default is debug=False unless FLASK_DEBUG=1 or FLASK_ENV=development is set.
-    app.run(host='0.0.0.0', port=5000) 
\ No newline at end of file
+    # gunicorn configured from WSGI_* variables, or Flask's dev server with WSGI_SERVER=dev
+    # (see instrumentation/server.py)
+    serve(create_app(), "main:app", port=5000)
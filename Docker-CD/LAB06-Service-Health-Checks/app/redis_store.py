@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+def make_pool(host, port, max_connections=10, pool_timeout=1.0,
+              socket_timeout=2.0, socket_connect_timeout=5.0, health_check_interval=30):
+    """Build an explicitly sized connection pool for one worker process.
+
+    A BlockingConnectionPool makes threads wait up to `pool_timeout` seconds for a
+    free connection instead of opening an unbounded number of sockets. Pools are
+    per process: redis-py notices the fork in each gunicorn worker and reconnects,
+    so the total connection count is roughly workers x max_connections.
+    """
+    return redis.BlockingConnectionPool(
+        host=host,
+        port=port,
+        max_connections=max_connections,
+        timeout=pool_timeout,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=socket_connect_timeout,
+        health_check_interval=health_check_interval,
+    )
+
+
+def pool_from_env(host, port):
+    return make_pool(
+        host,
+        port,
+        max_connections=int(os.environ.get('REDIS_POOL_SIZE', 10)),
+        pool_timeout=float(os.environ.get('REDIS_POOL_TIMEOUT', 1.0)),
+        socket_timeout=float(os.environ.get('REDIS_SOCKET_TIMEOUT', 2.0)),
+        socket_connect_timeout=float(os.environ.get('REDIS_CONNECT_TIMEOUT', 5.0)),
+    )
+
+
+class _PendingIncr:
+    __slots__ = ('key', 'done', 'result', 'error')
+
+    def __init__(self, key):
+        self.key = key
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class IncrCoalescer:
+    """Coalesce INCRs from concurrent requests into one pipelined round trip.
+
+    Callers block in incr() while a background thread gathers requests for up to
+    `window` seconds (or until `max_batch` requests are queued). All increments of
+    the same key become a single INCRBY, and every distinct key in the batch is sent
+    in one non-transactional pipeline. Each caller still gets a unique counter
+    value, so the response text is the same as with a plain INCR; the added latency
+    is bounded by `window` plus the round trip.
+    """
+
+    def __init__(self, client, window=0.002, max_batch=256):
+        self.client = client
+        self.window = float(window)
+        self.max_batch = max(1, int(max_batch))
+        self.batches = 0
+        self.coalesced = 0
+        self._cond = threading.Condition()
+        self._queue = []
+        self._pid = None
+        self._thread = None
+        self._closed = False
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._queue = []
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="redis-incr-coalescer", daemon=True)
+            self._thread.start()
+
+    def incr(self, key, timeout=5.0):
+        self._ensure_started()
+        pending = _PendingIncr(key)
+        with self._cond:
+            if self._closed:
+                raise redis.exceptions.ConnectionError("The INCR coalescer is closed")
+            self._queue.append(pending)
+            if len(self._queue) == 1 or len(self._queue) >= self.max_batch:
+                self._cond.notify()
+        if not pending.done.wait(timeout):
+            with self._cond:
+                # Still queued: withdraw it, so that a retry does not count the visit twice.
+                # Otherwise it is already in a pipeline on its way to Redis.
+                if pending in self._queue:
+                    self._queue.remove(pending)
+            raise redis.exceptions.TimeoutError(f"Coalesced INCR of {key!r} timed out")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def close(self):
+        """Send what is queued, then stop the background thread (Services.close())."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        thread = self._thread
+        if self._pid == os.getpid() and thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5.0)
+
+    def _take_batch(self):
+        # The next batch, or None once closed with nothing left to send
+        with self._cond:
+            while True:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return None
+                deadline = time.monotonic() + self.window
+                while len(self._queue) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+                if batch:  # empty if every caller timed out during the window
+                    return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            by_key = OrderedDict()
+            for pending in batch:
+                by_key.setdefault(pending.key, []).append(pending)
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                for key, waiters in by_key.items():
+                    pipe.incrby(key, len(waiters))
+                totals = pipe.execute()
+                for (key, waiters), total in zip(by_key.items(), totals):
+                    # INCRBY returned the value after all n increments; hand out
+                    # total-n+1 ... total in arrival order.
+                    first = total - len(waiters) + 1
+                    for offset, pending in enumerate(waiters):
+                        pending.result = first + offset
+            except Exception as e:
+                logger.error(f"Coalesced Redis pipeline failed: {e}")
+                for pending in batch:
+                    pending.error = e
+            self.batches += 1
+            self.coalesced += len(batch)
+            for pending in batch:
+                pending.done.set()
+
+
+class RedisCounter:
+    """INCR front end used by the request handlers: direct or coalesced."""
+
+    def __init__(self, client, coalesce_window=0.0, max_batch=256):
+        self.client = client
+        self.coalescer = IncrCoalescer(client, coalesce_window, max_batch) if coalesce_window > 0 else None
+
+    def incr(self, key):
+        if self.coalescer is not None:
+            return self.coalescer.incr(key)
+        return self.client.incr(key)
+
+    def close(self):
+        if self.coalescer is not None:
+            self.coalescer.close()
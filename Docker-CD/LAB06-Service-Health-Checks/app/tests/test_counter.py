@@ -0,0 +1,92 @@
+import gc
+import multiprocessing
+import os
+import sys
+import time
+import weakref
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from counter import BatchedFileCounter, COUNTER_FILE_SIZE
+
+
+def _read_file(path):
+    with open(path) as f:
+        return int(f.read().strip())
+
+
+def _worker(path, hits):
+    counter = BatchedFileCounter(path, flush_every=7, flush_interval=0)
+    for _ in range(hits):
+        counter.increment()
+    counter.close()
+
+
+def test_increments_are_batched(tmp_path):
+    """Test that the file is only written every `flush_every` hits."""
+    path = str(tmp_path / "counter.txt")
+    counter = BatchedFileCounter(path, flush_every=10, flush_interval=0)
+    for expected in range(1, 10):
+        assert counter.increment() == expected
+    assert _read_file(path) == 0
+    assert counter.increment() == 10
+    assert _read_file(path) == 10
+    assert counter.flushes == 1
+    counter.close()
+
+
+def test_close_flushes_pending_increments(tmp_path):
+    """Test that pending increments are written on close and survive a restart."""
+    path = str(tmp_path / "counter.txt")
+    counter = BatchedFileCounter(path, flush_every=100, flush_interval=0)
+    for _ in range(3):
+        counter.increment()
+    counter.close()
+    assert _read_file(path) == 3
+    assert BatchedFileCounter(path, flush_every=100, flush_interval=0).increment() == 4
+
+
+def test_closed_counter_is_not_kept_alive(tmp_path):
+    """Test that a closed counter is released, not held by its exit handler until the interpreter exits."""
+    counter = BatchedFileCounter(str(tmp_path / "counter.txt"), flush_interval=0)
+    counter.increment()
+    counter.close()
+    released = weakref.ref(counter)
+    del counter
+    gc.collect()
+    assert released() is None
+
+
+def test_migrates_legacy_counter_file(tmp_path):
+    """Test that a counter written by the old per-request rewrite is picked up."""
+    path = tmp_path / "counter.txt"
+    path.write_text("41")
+    counter = BatchedFileCounter(str(path), flush_every=1, flush_interval=0)
+    assert counter.increment() == 42
+    assert os.path.getsize(path) == COUNTER_FILE_SIZE
+    counter.close()
+
+
+def test_periodic_flush(tmp_path):
+    """Test that the background flusher writes increments without hitting `flush_every`."""
+    path = str(tmp_path / "counter.txt")
+    counter = BatchedFileCounter(path, flush_every=1000, flush_interval=0.01)
+    counter.increment()
+    for _ in range(200):
+        if counter.flushes:
+            break
+        time.sleep(0.01)
+    assert _read_file(path) == 1
+    counter.close()
+
+
+def test_no_lost_increments_across_processes(tmp_path):
+    """Test that concurrent worker processes sharing the file never lose increments."""
+    path = str(tmp_path / "counter.txt")
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_worker, args=(path, 500)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert _read_file(path) == 2000
@@ -1,23 +1,93 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
+import hashlib
 import os
 
+from dataset import InvalidQuery, Query, dataset_from_env, iter_batches, read_page
+from formats import STREAMED, UnsupportedFormat, encode_document, iter_streamed, negotiate
+from instrumentation.request_metrics import RequestMetrics
+from instrumentation.server import serve
+
 app = Flask(__name__)
 
+# Request count, latency, response size and in-flight requests per route, served at
+# /metrics for Prometheus (see instrumentation/request_metrics.py). With several gunicorn
+# workers, set PROMETHEUS_MULTIPROC_DIR to a shared directory so /metrics covers all of them.
+metrics = RequestMetrics.from_env(app)
+
+# /data is served from a dataset (see dataset.py) one page at a time, or as a
+# stream of all matching rows, so memory use does not grow with the size of the
+# result. The format is negotiated from ?format= or the Accept header (formats.py):
+# pages as JSON or MessagePack, streams as NDJSON or Arrow IPC record batches.
+app.config['DATASET'] = dataset_from_env()
+app.config['DATA_PAGE_SIZE'] = int(os.environ.get("DATA_PAGE_SIZE", 100))
+app.config['DATA_PAGE_MAX'] = int(os.environ.get("DATA_PAGE_MAX", 1000))
+
+# Clients (the web frontend) cache /data responses for DATA_MAX_AGE seconds and then
+# revalidate with If-None-Match, which this service answers with an empty 304 while
+# the dataset is unchanged. The ETag only depends on the dataset version and the
+# query, so it is known without building the response.
+DATA_MAX_AGE = int(os.environ.get("DATA_MAX_AGE", 5))
+
+def data_etag(dataset, mimetype):
+    key = f"{dataset.version}?{request.query_string.decode()}#{mimetype}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
 @app.route('/')
 def home():
     return jsonify(message="Welcome to the API Service!", service_id=os.environ.get("SERVICE_ID", "api_service_01"))
 
 @app.route('/data')
 def get_data():
-    return jsonify(data=[
-        {"id": 1, "name": "Item 1", "value": 100},
-        {"id": 2, "name": "Item 2", "value": 200}
-    ], source="API Service")
+    # Query parameters: cursor, limit, fields, name, min_value, max_value,
+    # format=json|msgpack (one page) or format=ndjson|arrow (streamed)
+    dataset = app.config['DATASET']
+    try:
+        mimetype = negotiate(request.args.get("format"), request.accept_mimetypes)
+        query = Query.from_args(request.args)
+        limit = request.args.get("limit")
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                raise InvalidQuery(f"limit must be an integer, got {limit!r}")
+            if limit < 1:
+                raise InvalidQuery("limit must be at least 1")
+        cursor = request.args.get("cursor")
+        streaming = mimetype in STREAMED
+        if streaming:
+            body = iter_streamed(mimetype, iter_batches(dataset, query, cursor, limit),
+                                 metadata={"source": "API Service"})
+            # Fail on a bad cursor now rather than halfway through the stream
+            first_chunk = next(body, b"")
+        else:
+            rows, next_cursor = read_page(dataset, query, cursor,
+                                          min(limit or app.config['DATA_PAGE_SIZE'], app.config['DATA_PAGE_MAX']))
+    except InvalidQuery as e:
+        return jsonify(error=str(e)), 400
+    except UnsupportedFormat as e:
+        return jsonify(error=str(e)), 406
+
+    if streaming:
+        def generate():
+            yield first_chunk
+            yield from body
+        response = Response(generate(), mimetype=mimetype)
+        # Otherwise make_conditional() reads the whole generator into a list to
+        # compute a Content-Length
+        response.implicit_sequence_conversion = False
+    else:
+        document = {"data": rows, "next_cursor": next_cursor, "source": "API Service"}
+        response = Response(encode_document(mimetype, document), mimetype=mimetype)
+    response.set_etag(data_etag(dataset, mimetype))
+    response.headers['Cache-Control'] = f"public, max-age={DATA_MAX_AGE}"
+    response.vary.add("Accept")
+    return response.make_conditional(request)
 
 @app.route('/health')
 def health_check():
     return jsonify(status="healthy", service="API Service"), 200
 
 if __name__ == '__main__':
-    port = int(os.environ.get("FLASK_RUN_PORT", 5000))
-    app.run(host='0.0.0.0', port=port) 
\ No newline at end of file
+    # gunicorn configured from WSGI_* variables, or Flask's dev server with WSGI_SERVER=dev
+    # (see instrumentation/server.py)
+    serve(app, "app:app", port=int(os.environ.get("FLASK_RUN_PORT", 5000))) 
\ No newline at end of file
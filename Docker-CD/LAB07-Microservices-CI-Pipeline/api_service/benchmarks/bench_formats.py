@@ -0,0 +1,72 @@
+"""Encode time, decode time and payload size of /data's formats at 10k, 100k and 1M rows.
+
+Encodes generated rows with the same code /data uses (formats.py) and decodes
+them the way a client would:
+
+    python benchmarks/bench_formats.py --sizes 10000 100000 1000000
+
+The Arrow cases are skipped unless pyarrow is installed (requirements-arrow.txt).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import msgpack
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from dataset import GeneratedDataset, Query, iter_batches, read_page
+from formats import ARROW, JSON, MSGPACK, NDJSON, encode_document, iter_streamed
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per streamed chunk / record batch")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'format':<16} {'encode_ms':>10} {'decode_ms':>10} {'size_MB':>8}")
+    for size in args.sizes:
+        dataset = GeneratedDataset(size)
+        rows, _ = read_page(dataset, Query(), None, size)
+        document = {"data": rows, "next_cursor": None, "source": "API Service"}
+
+        # Rows are generated up front so only encoding is timed
+        batches = list(iter_batches(dataset, Query(), None, batch_size=args.batch_size))
+
+        def streamed(mimetype):
+            return lambda: b"".join(iter_streamed(mimetype, batches))
+
+        cases = [
+            ("json", lambda: encode_document(JSON, document), lambda body: json.loads(body)),
+            ("msgpack", lambda: encode_document(MSGPACK, document), lambda body: msgpack.unpackb(body)),
+            ("ndjson", streamed(NDJSON), lambda body: [json.loads(line) for line in body.splitlines()]),
+        ]
+        if pa is not None:
+            cases += [
+                # Bulk consumers keep the columnar table; "arrow->rows" adds converting to dicts
+                ("arrow", streamed(ARROW), lambda body: pa.ipc.open_stream(body).read_all()),
+                ("arrow->rows", streamed(ARROW), lambda body: pa.ipc.open_stream(body).read_all().to_pylist()),
+            ]
+        for name, encode, decode in cases:
+            body, encode_seconds = timed(encode)
+            _, decode_seconds = timed(lambda: decode(body))
+            print(f"{size:>8} {name:<16} {encode_seconds * 1000:>10.1f} {decode_seconds * 1000:>10.1f} "
+                  f"{len(body) / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import base64
+import binascii
+import json
+import os
+
+
+class InvalidQuery(ValueError):
+    """A /data query parameter (cursor, limit, filter) could not be understood."""
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(str(position).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidQuery(f"invalid cursor: {cursor!r}")
+    if position < 0:
+        raise InvalidQuery(f"invalid cursor: {cursor!r}")
+    return position
+
+
+class GeneratedDataset:
+    """`size` synthetic rows ({"id": i, "name": "Item i", "value": i * 100}), generated on demand.
+
+    Positions are row indexes, so resuming from a cursor is O(1).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.version = f"generated-{size}"
+
+    def scan(self, position=0):
+        # Yields (row, position of the next row)
+        for index in range(position, self.size):
+            row_id = index + 1
+            yield {"id": row_id, "name": f"Item {row_id}", "value": row_id * 100}, index + 1
+
+
+class JsonlDataset:
+    """Rows read lazily from a newline-delimited JSON file, one object per line.
+
+    Positions are byte offsets, so resuming from a cursor seeks straight to the
+    next row instead of re-reading the file from the start.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def version(self):
+        stat = os.stat(self.path)
+        return f"jsonl-{stat.st_ino}-{stat.st_size}-{stat.st_mtime_ns}"
+
+    def scan(self, position=0):
+        with open(self.path, "rb") as f:
+            f.seek(position)
+            for line in f:
+                position += len(line)
+                if line.strip():
+                    yield json.loads(line), position
+
+
+def dataset_from_env():
+    # DATASET_PATH points at a .jsonl file; otherwise DATASET_SIZE rows are generated
+    # (the default of 2 gives the original "Item 1" / "Item 2" response)
+    path = os.environ.get("DATASET_PATH")
+    if path:
+        return JsonlDataset(path)
+    return GeneratedDataset(int(os.environ.get("DATASET_SIZE", 2)))
+
+
+class Query:
+    """Filters and projection for /data, parsed from the request's query string.
+
+    - `name`: case-insensitive substring of the row's name
+    - `min_value` / `max_value`: inclusive bounds on the row's value
+    - `fields`: comma-separated list of fields to return (default: all)
+    """
+
+    def __init__(self, name=None, min_value=None, max_value=None, fields=None):
+        self.name = name.lower() if name else None
+        self.min_value = min_value
+        self.max_value = max_value
+        self.fields = fields
+
+    @classmethod
+    def from_args(cls, args):
+        def number(key):
+            value = args.get(key)
+            if value is None or value == "":
+                return None
+            try:
+                return float(value)
+            except ValueError:
+                raise InvalidQuery(f"{key} must be a number, got {value!r}")
+
+        fields = args.get("fields")
+        fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        return cls(args.get("name"), number("min_value"), number("max_value"), fields)
+
+    def matches(self, row):
+        if self.name is not None and self.name not in str(row.get("name", "")).lower():
+            return False
+        value = row.get("value")
+        if self.min_value is not None and (value is None or value < self.min_value):
+            return False
+        if self.max_value is not None and (value is None or value > self.max_value):
+            return False
+        return True
+
+    def project(self, row):
+        if self.fields is None:
+            return row
+        return {field: row[field] for field in self.fields if field in row}
+
+    def rows(self, dataset, position=0):
+        # Matching, projected rows from `position` on, as (row, position of the next row)
+        for row, next_position in dataset.scan(position):
+            if self.matches(row):
+                yield self.project(row), next_position
+
+
+def read_page(dataset, query, cursor, limit):
+    """Returns (rows, next_cursor) for one page; next_cursor is None on the last page.
+
+    Holds at most `limit` + 1 rows in memory whatever the size of the dataset.
+    """
+    rows = []
+    position = decode_cursor(cursor)
+    for row, next_position in query.rows(dataset, position):
+        if len(rows) == limit:
+            return rows, encode_cursor(position)
+        rows.append(row)
+        position = next_position
+    return rows, None
+
+
+def iter_batches(dataset, query, cursor, limit=None, batch_size=500):
+    """Every matching row (up to `limit`), as lists of at most `batch_size` rows.
+
+    Only one batch is held in memory at a time.
+    """
+    batch = []
+    sent = 0
+    for row, _ in query.rows(dataset, decode_cursor(cursor)):
+        if limit is not None and sent == limit:
+            break
+        batch.append(row)
+        sent += 1
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
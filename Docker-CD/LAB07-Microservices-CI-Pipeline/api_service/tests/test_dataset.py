@@ -0,0 +1,52 @@
+import sys
+import os
+import json
+
+import pytest
+
+# Add the parent directory (api_service) to sys.path to allow direct import of dataset
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dataset import (GeneratedDataset, InvalidQuery, JsonlDataset, Query, decode_cursor,
+                     encode_cursor, iter_batches, read_page)
+
+def test_cursor_round_trip():
+    """Test that cursors are opaque strings that decode back to the position."""
+    assert decode_cursor(encode_cursor(12345)) == 12345
+    assert decode_cursor(None) == 0
+    with pytest.raises(InvalidQuery):
+        decode_cursor("not a cursor")
+
+def test_default_dataset_matches_original_items():
+    """Test that two generated rows are the original static /data items."""
+    rows, next_cursor = read_page(GeneratedDataset(2), Query(), None, 100)
+    assert rows == [{"id": 1, "name": "Item 1", "value": 100}, {"id": 2, "name": "Item 2", "value": 200}]
+    assert next_cursor is None
+
+def test_filtered_pages_resume_after_last_returned_row():
+    """Test that a filtered page's cursor resumes right after its last row."""
+    dataset = GeneratedDataset(100)
+    query = Query(min_value=5000)
+    first, cursor = read_page(dataset, query, None, 10)
+    second, _ = read_page(dataset, query, cursor, 10)
+    assert [r["id"] for r in first] == list(range(50, 60))
+    assert [r["id"] for r in second] == list(range(60, 70))
+
+def test_jsonl_dataset_pages_by_byte_offset(tmp_path):
+    """Test that a JSONL dataset resumes from a cursor without re-reading earlier rows."""
+    path = tmp_path / "rows.jsonl"
+    path.write_text("".join(json.dumps({"id": i, "name": f"Row {i}", "value": i}) + "\n" for i in range(1, 8)))
+    dataset = JsonlDataset(str(path))
+    rows, cursor = read_page(dataset, Query(fields=["id"]), None, 3)
+    assert rows == [{"id": 1}, {"id": 2}, {"id": 3}]
+    with open(path, "rb") as f:
+        assert decode_cursor(cursor) == len(b"".join(f.readlines()[:3]))
+    rows, cursor = read_page(dataset, Query(fields=["id"]), cursor, 10)
+    assert rows == [{"id": i} for i in range(4, 8)] and cursor is None
+
+def test_rows_are_streamed_in_batches():
+    """Test that matching rows come in bounded batches and limit is honoured."""
+    batches = list(iter_batches(GeneratedDataset(1200), Query(), None, batch_size=500))
+    assert [len(batch) for batch in batches] == [500, 500, 200]
+    limited = list(iter_batches(GeneratedDataset(1200), Query(), None, limit=3))
+    assert [[row["id"] for row in batch] for batch in limited] == [[1, 2, 3]]
@@ -0,0 +1,61 @@
+import sys
+import os
+
+import msgpack
+import pytest
+
+# Add the parent directory (api_service) to sys.path to allow direct import of formats
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.datastructures import MIMEAccept
+
+import formats
+from dataset import GeneratedDataset, InvalidQuery, Query, iter_batches
+from formats import ARROW, JSON, MSGPACK, NDJSON, UnsupportedFormat, encode_document, iter_streamed, negotiate
+
+def accept(*values):
+    return MIMEAccept([(value, 1) for value in values])
+
+def test_negotiate(monkeypatch):
+    """Test that ?format= wins over Accept, and JSON is the default."""
+    # Negotiating only needs to know pyarrow is there, not import it
+    monkeypatch.setattr(formats, "_PYARROW_AVAILABLE", True)
+    assert negotiate(None, MIMEAccept()) == JSON
+    assert negotiate(None, accept("*/*")) == JSON
+    assert negotiate(None, accept("application/x-msgpack")) == MSGPACK
+    assert negotiate(None, accept(ARROW)) == ARROW
+    assert negotiate("ndjson", accept(MSGPACK)) == NDJSON
+    with pytest.raises(InvalidQuery):
+        negotiate("xml", MIMEAccept())
+    with pytest.raises(UnsupportedFormat):
+        negotiate(None, accept("text/csv"))
+
+def test_missing_encoder_is_unsupported(monkeypatch):
+    """Test that formats whose package is not installed are not offered."""
+    monkeypatch.setattr(formats, "_PYARROW_AVAILABLE", False)
+    with pytest.raises(UnsupportedFormat):
+        negotiate("arrow", MIMEAccept())
+    assert negotiate(None, MIMEAccept([(ARROW, 1), (JSON, 0.5)])) == JSON
+
+def test_msgpack_document_round_trip():
+    """Test that a MessagePack page decodes to the same document as JSON."""
+    document = {"data": [{"id": 1, "name": "Item 1", "value": 100}], "next_cursor": None, "source": "API Service"}
+    assert msgpack.unpackb(encode_document(MSGPACK, document)) == document
+
+def test_arrow_stream_has_one_record_batch_per_batch():
+    """Test that the Arrow IPC stream carries the rows as record batches with metadata."""
+    pa = pytest.importorskip("pyarrow")
+    batches = iter_batches(GeneratedDataset(1200), Query(), None, batch_size=500)
+    body = b"".join(iter_streamed(ARROW, batches, metadata={"source": "API Service"}))
+    reader = pa.ipc.open_stream(body)
+    record_batches = list(reader)
+    assert [batch.num_rows for batch in record_batches] == [500, 500, 200]
+    assert reader.schema.metadata == {b"source": b"API Service"}
+    table = pa.Table.from_batches(record_batches)
+    assert table.column("id").to_pylist() == list(range(1, 1201))
+
+def test_empty_arrow_stream_is_valid():
+    """Test that a result with no rows is still a readable Arrow stream."""
+    pa = pytest.importorskip("pyarrow")
+    body = b"".join(iter_streamed(ARROW, iter([])))
+    assert pa.ipc.open_stream(body).read_all().num_rows == 0
@@ -0,0 +1,7 @@
+from asgiref.wsgi import WsgiToAsgi
+
+from async_app import app
+
+# ASGI entry point for the async frontend: uvicorn asgi:asgi_app --host 0.0.0.0 --port 5001
+# Flask's async views then run their fan-out on the server's event loop.
+asgi_app = WsgiToAsgi(app)
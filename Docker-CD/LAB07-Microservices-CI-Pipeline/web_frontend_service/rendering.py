@@ -0,0 +1,72 @@
+import json
+
+from markupsafe import Markup
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, the standard library json is used without it
+    orjson = None
+
+# Characters that Flask's |tojson filter escapes so JSON can be embedded in HTML
+_HTML_SAFE = (("<", "\\u003c"), (">", "\\u003e"), ("&", "\\u0026"), ("'", "\\u0027"))
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _html_safe(text):
+    for char, escaped in _HTML_SAFE:
+        text = text.replace(char, escaped)
+    return Markup(text)
+
+
+def dumps_pretty(data):
+    """Pretty-printed, HTML-safe JSON, matching the output of `|tojson(indent=2)`.
+
+    Uses orjson when it is installed (and can encode the value), otherwise json.
+    """
+    if orjson is not None:
+        try:
+            text = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode()
+        except TypeError:
+            text = None
+        if text is not None:
+            return _html_safe(text)
+    return _html_safe(json.dumps(data, indent=2, sort_keys=True))
+
+
+def iter_dumps_pretty(data, chunk_size=STREAM_CHUNK_SIZE):
+    """Same output as dumps_pretty, yielded in chunks of about `chunk_size` characters.
+
+    Lets a streamed page start sending before a large payload is fully encoded.
+    """
+    buffer = []
+    buffered = 0
+    for piece in json.JSONEncoder(indent=2, sort_keys=True).iterencode(data):
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= chunk_size:
+            yield _html_safe("".join(buffer))
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield _html_safe("".join(buffer))
+
+
+class PageRenderer:
+    """A Jinja template compiled once, rendered whole or streamed.
+
+    `render_template_string` compiles its source on every call. This compiles it
+    once against the app's Jinja environment and keeps the Template object.
+    The embedded JSON is passed in as `api_json` chunks (see dumps_pretty and
+    iter_dumps_pretty) instead of running the |tojson filter in the template.
+    """
+
+    def __init__(self, app, source):
+        self.app = app
+        self.template = app.jinja_env.from_string(source)
+
+    def render(self, api_data, **context):
+        return self.template.render(api_json=[dumps_pretty(api_data)], **context)
+
+    def stream(self, api_data, **context):
+        return self.template.generate(api_json=iter_dumps_pretty(api_data), **context)
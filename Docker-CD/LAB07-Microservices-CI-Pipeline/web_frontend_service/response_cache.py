@@ -0,0 +1,159 @@
+import logging
+import re
+import threading
+import time
+
+from api_client import decode_body
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class CachedResponse:
+    """The parts of a requests.Response that the page needs, kept in memory."""
+
+    def __init__(self, status_code, data, etag, max_age, fetched_at):
+        self.status_code = status_code
+        self.data = data
+        self.etag = etag
+        self.max_age = max_age
+        self.fetched_at = fetched_at
+        self.from_cache = False
+
+    @property
+    def text(self):
+        return str(self.data)
+
+    def json(self):
+        return self.data
+
+    def served_from_cache(self):
+        copy = CachedResponse(self.status_code, self.data, self.etag, self.max_age, self.fetched_at)
+        copy.from_cache = True
+        return copy
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class ResponseCache:
+    """Caches successful JSON GET responses from an upstream service.
+
+    - Fresh for `ttl` seconds, or the upstream's Cache-Control max-age if it sends one.
+    - Once stale, the cached copy is still served for up to `stale_ttl` more seconds
+      while a single background thread revalidates it (stale-while-revalidate).
+    - Revalidation sends If-None-Match with the stored ETag, so an unchanged
+      resource costs a 304 with no body.
+    - Concurrent misses for the same URL share one upstream call (single flight).
+
+    Error responses are never cached and are returned as-is. A `ttl` of 0 disables
+    the cache entirely.
+    """
+
+    def __init__(self, session, ttl=5.0, stale_ttl=60.0):
+        self.session = session
+        self.ttl = float(ttl)
+        self.stale_ttl = float(stale_ttl)
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'revalidated': 0, 'refresh_errors': 0}
+        self._entries = {}
+        self._flights = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _max_age(self, response):
+        cache_control = response.headers.get('Cache-Control', '')
+        if 'no-store' in cache_control:
+            return None
+        match = _MAX_AGE.search(cache_control)
+        return float(match.group(1)) if match else self.ttl
+
+    def _fetch(self, url, timeout, entry):
+        headers = {'If-None-Match': entry.etag} if entry is not None and entry.etag else None
+        if headers:
+            response = self.session.get(url, timeout=timeout, headers=headers)
+        else:
+            response = self.session.get(url, timeout=timeout)
+        now = time.monotonic()
+        if response.status_code == 304 and entry is not None:
+            self.stats['revalidated'] += 1
+            refreshed = CachedResponse(200, entry.data, entry.etag, entry.max_age, now)
+            with self._lock:
+                self._entries[url] = refreshed
+            return refreshed
+        if response.status_code != 200:
+            return response
+        max_age = self._max_age(response)
+        if max_age is None:
+            return response
+        cached = CachedResponse(200, decode_body(response), response.headers.get('ETag'), max_age, now)
+        with self._lock:
+            self._entries[url] = cached
+        return cached
+
+    def _fetch_single_flight(self, url, timeout, entry):
+        with self._lock:
+            flight = self._flights.get(url)
+            leader = flight is None
+            if leader:
+                flight = self._flights[url] = _Flight()
+        if not leader:
+            # No deadline of our own: the leader's request is bounded by its timeout (per
+            # connect and per read, so it can legitimately take longer than `timeout`),
+            # and whatever it gets, response or requests exception, is what we get
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+        try:
+            flight.response = self._fetch(url, timeout, entry)
+            return flight.response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[url]
+            flight.done.set()
+
+    def _refresh_in_background(self, url, timeout, entry):
+        with self._lock:
+            if url in self._refreshing:
+                return
+            self._refreshing.add(url)
+
+        def refresh():
+            try:
+                self._fetch_single_flight(url, timeout, entry)
+            except Exception as e:
+                self.stats['refresh_errors'] += 1
+                logger.warning(f"Background refresh of {url} failed, serving stale copy: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(url)
+
+        threading.Thread(target=refresh, name="response-cache-refresh", daemon=True).start()
+
+    def get(self, url, timeout=5):
+        if self.ttl <= 0:
+            return self.session.get(url, timeout=timeout)
+        entry = self._entries.get(url)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < entry.max_age:
+                self.stats['hits'] += 1
+                return entry.served_from_cache()
+            if age < entry.max_age + self.stale_ttl:
+                self.stats['stale_hits'] += 1
+                self._refresh_in_background(url, timeout, entry)
+                return entry.served_from_cache()
+        self.stats['misses'] += 1
+        return self._fetch_single_flight(url, timeout, entry)
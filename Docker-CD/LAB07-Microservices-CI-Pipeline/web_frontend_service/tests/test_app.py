@@ -1,33 +1,50 @@
 import pytest
 import sys
 import os
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
+import json
+import requests
 
 # Add the parent directory (web_frontend_service) to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app import app as flask_app
+from app import app as flask_app, api_cache
+from async_app import app as async_flask_app
 
-@pytest.fixture
-def client():
-    flask_app.config['TESTING'] = True
-    # Set a mock API URL for tests to avoid real network calls
-    flask_app.config['API_SERVICE_URL'] = "http://mock-api-service:1234"
+def make_response(status_code, payload=None, text=""):
+    """A requests.Response as the session returns it: a JSON body when `payload` is given."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.encoding = 'utf-8'
+    if payload is not None:
+        response._content = json.dumps(payload).encode()
+        response.headers['Content-Type'] = 'application/json'
+    else:
+        response._content = text.encode()
+    return response
+
+# Every test runs against both the sync app and the async (fan-out) app
+@pytest.fixture(params=["sync", "async"])
+def client(request):
+    app_under_test = flask_app if request.param == "sync" else async_flask_app
+    for each_app in (flask_app, async_flask_app):
+        each_app.config['TESTING'] = True
+        # Set a mock API URL for tests to avoid real network calls
+        each_app.config['API_SERVICE_URL'] = "http://mock-api-service:1234"
+    # Each test mocks its own API response, so start with an empty /data cache
+    api_cache.clear()
     # Alternative way if app re-reads os.environ directly:
     # with patch.dict(os.environ, {"API_SERVICE_URL": "http://mock-api-service:1234"}):
     #     with flask_app.test_client() as client:
     #         yield client
-    with flask_app.test_client() as client:
+    with app_under_test.test_client() as client:
         yield client
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_home_page_api_success(mock_get, client):
     """Test the home page when API call is successful."""
     # Configure the mock API response
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {"data": [{"id": 1, "name": "Mock Item"}], "source": "Mock API"}
-    mock_get.return_value = mock_response
+    mock_get.return_value = make_response(200, {"data": [{"id": 1, "name": "Mock Item"}], "source": "Mock API"})
 
     response = client.get('/')
     assert response.status_code == 200
@@ -37,20 +54,17 @@ def test_home_page_api_success(mock_get, client):
     assert b"Successfully fetched data" in response.data
     mock_get.assert_called_once_with(f"{flask_app.config['API_SERVICE_URL']}/data", timeout=5)
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_home_page_api_failure(mock_get, client):
     """Test the home page when API call fails."""
-    mock_response = MagicMock()
-    mock_response.status_code = 500
-    mock_response.text = "Internal Server Error"
-    mock_get.return_value = mock_response
+    mock_get.return_value = make_response(500, text="Internal Server Error")
 
     response = client.get('/')
     assert response.status_code == 200 # Page itself should load
     assert b"Error fetching data. API returned HTTP 500" in response.data
     mock_get.assert_called_once_with(f"{flask_app.config['API_SERVICE_URL']}/data", timeout=5)
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_home_page_api_connection_error(mock_get, client):
     """Test the home page when API is unreachable."""
     mock_get.side_effect = requests.exceptions.ConnectionError("Failed to connect")
@@ -60,12 +74,10 @@ def test_home_page_api_connection_error(mock_get, client):
     assert b"Error connecting to API service: Failed to connect" in response.data
     mock_get.assert_called_once_with(f"{flask_app.config['API_SERVICE_URL']}/data", timeout=5)
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_health_check_dependencies_healthy(mock_get, client):
     """Test the /health endpoint when API dependency is healthy."""
-    mock_api_health_response = MagicMock()
-    mock_api_health_response.status_code = 200
-    mock_get.return_value = mock_api_health_response
+    mock_get.return_value = make_response(200, {"status": "healthy"})
 
     response = client.get('/health')
     assert response.status_code == 200
@@ -75,19 +87,17 @@ def test_health_check_dependencies_healthy(mock_get, client):
     assert json_data["dependencies"]["api_service"] == "healthy"
     mock_get.assert_called_once_with(f"{flask_app.config['API_SERVICE_URL']}/health", timeout=2)
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_health_check_dependencies_unhealthy(mock_get, client):
     """Test the /health endpoint when API dependency is unhealthy."""
-    mock_api_health_response = MagicMock()
-    mock_api_health_response.status_code = 503
-    mock_get.return_value = mock_api_health_response
+    mock_get.return_value = make_response(503, {"status": "unhealthy"})
 
     response = client.get('/health')
     assert response.status_code == 200
     json_data = response.get_json()
     assert json_data["dependencies"]["api_service"] == "unhealthy (HTTP 503)"
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_health_check_dependencies_unreachable(mock_get, client):
     """Test the /health endpoint when API dependency is unreachable."""
     mock_get.side_effect = requests.exceptions.RequestException("Cannot connect")
@@ -95,4 +105,28 @@ def test_health_check_dependencies_unreachable(mock_get, client):
     response = client.get('/health')
     assert response.status_code == 200
     json_data = response.get_json()
-    assert json_data["dependencies"]["api_service"] == "unreachable" 
\ No newline at end of file
+    assert json_data["dependencies"]["api_service"] == "unreachable" 
+@patch('requests.Session.get')
+def test_home_page_streamed(mock_get, client):
+    """Test the home page in STREAM_RENDER mode."""
+    mock_get.return_value = make_response(200, {"data": [{"id": 1, "name": "Mock Item"}], "source": "Mock API"})
+
+    client.application.config['STREAM_RENDER'] = True
+    try:
+        response = client.get('/')
+    finally:
+        client.application.config['STREAM_RENDER'] = False
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert b"Mock Item" in response.data
+    assert b"Successfully fetched data" in response.data
+
+@patch('requests.Session.get')
+def test_metrics_are_recorded_per_route(mock_get, client):
+    """Test that /metrics counts requests under this app's own route templates."""
+    mock_get.side_effect = requests.exceptions.RequestException("Cannot connect")
+    client.get('/health')
+    client.get('/missing')
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"}' in text
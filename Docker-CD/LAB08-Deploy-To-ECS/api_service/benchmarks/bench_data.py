@@ -0,0 +1,67 @@
+"""Peak RSS of serving a large /data result buffered (one JSON document) vs. streamed as NDJSON.
+
+Each mode runs in its own child process against a generated dataset, so peak
+RSS is measured in isolation:
+
+    python benchmarks/bench_data.py --rows 1000000
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def child(mode, rows):
+    from app import app
+    from dataset import GeneratedDataset
+
+    app.config['DATASET'] = GeneratedDataset(rows)
+    baseline = peak_rss_mb()
+    received = 0
+    start = time.perf_counter()
+    with app.test_client() as client:
+        if mode == "buffered":
+            # One page holding the whole result, as the old jsonify endpoint did
+            app.config['DATA_PAGE_MAX'] = rows
+            response = client.get(f"/data?limit={rows}")
+            received = len(response.data)
+        else:
+            response = client.get("/data?format=ndjson", buffered=False)
+            for chunk in response.response:
+                received += len(chunk)
+            response.close()
+    elapsed = time.perf_counter() - start
+    print(f"{mode} {elapsed:.3f} {received} {baseline:.1f} {peak_rss_mb():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--child", choices=["buffered", "ndjson"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.rows)
+        return
+
+    print(f"{'mode':<10} {'rows':>9} {'seconds':>8} {'MB sent':>8} {'base RSS MB':>12} {'peak RSS MB':>12}")
+    for mode in ("buffered", "ndjson"):
+        output = subprocess.run([sys.executable, __file__, "--child", mode, "--rows", str(args.rows)],
+                                check=True, capture_output=True, text=True).stdout.split()
+        _, elapsed, received, baseline, peak = output
+        print(f"{mode:<10} {args.rows:>9} {float(elapsed):>8.2f} {int(received) / 1e6:>8.1f} "
+              f"{float(baseline):>12.1f} {float(peak):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import functools
+import importlib.util
+import json
+
+from dataset import InvalidQuery
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is only offered when the package is installed
+    msgpack = None
+
+# So is Arrow. pyarrow takes longer to import than the rest of the app, so it is only
+# imported by the first Arrow response (_pyarrow)
+_PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# ?format= names, and other media types clients use for the same formats
+FORMAT_NAMES = {"json": JSON, "ndjson": NDJSON, "msgpack": MSGPACK, "arrow": ARROW}
+ALIASES = {"application/x-msgpack": MSGPACK}
+
+# Streamed formats return every matching row (up to limit) in one response;
+# the others return one page with a next_cursor
+STREAMED = (NDJSON, ARROW)
+
+
+# json.dumps() with non-default arguments builds a new encoder on every call
+_compact_json = json.JSONEncoder(separators=(",", ":")).encode
+
+
+class UnsupportedFormat(Exception):
+    """The requested format is known but its encoder is not installed."""
+
+
+def available():
+    mimetypes = [JSON, NDJSON]
+    if msgpack is not None:
+        mimetypes += [MSGPACK, "application/x-msgpack"]
+    if _PYARROW_AVAILABLE:
+        mimetypes.append(ARROW)
+    return mimetypes
+
+
+def negotiate(format_name, accept_mimetypes):
+    """Picks the response format from ?format= if given, else from the Accept header.
+
+    JSON is the default when the client sends no Accept header or accepts anything.
+    """
+    if format_name:
+        mimetype = FORMAT_NAMES.get(format_name)
+        if mimetype is None:
+            raise InvalidQuery(f"unknown format {format_name!r}, expected one of {', '.join(FORMAT_NAMES)}")
+        if mimetype not in available():
+            raise UnsupportedFormat(f"format {format_name!r} is not available on this server")
+        return mimetype
+    best = accept_mimetypes.best_match(available(), default=None) if accept_mimetypes else JSON
+    if best is None:
+        raise UnsupportedFormat(f"none of the accepted types are available: {accept_mimetypes}")
+    return ALIASES.get(best, best)
+
+
+def encode_document(mimetype, document):
+    """A page (the dict /data returns) as JSON or MessagePack bytes."""
+    if mimetype == MSGPACK:
+        return msgpack.packb(document)
+    return _compact_json(document).encode()
+
+
+@functools.lru_cache(maxsize=None)
+def _pyarrow():
+    import pyarrow.ipc
+    return pyarrow
+
+
+class _Chunks:
+    # Minimal file object for pyarrow's stream writer; the caller drains `parts`
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def iter_arrow(batches, metadata=None):
+    """An Arrow IPC stream: the schema, then one record batch per batch of rows.
+
+    The schema comes from the first batch; later batches are cast to it.
+    """
+    pa = _pyarrow()
+    sink = _Chunks()
+    writer = None
+    schema = None
+    for rows in batches:
+        if writer is None:
+            schema = pa.RecordBatch.from_pylist(rows).schema.with_metadata(metadata or {})
+            writer = pa.ipc.new_stream(sink, schema)
+        writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+        yield sink.drain()
+    if writer is None:
+        writer = pa.ipc.new_stream(sink, pa.schema([], metadata=metadata or {}))
+    writer.close()
+    yield sink.drain()
+
+
+def iter_ndjson(batches):
+    """Newline-delimited JSON, one chunk per batch of rows."""
+    for rows in batches:
+        yield "".join(_compact_json(row) + "\n" for row in rows).encode()
+
+
+def iter_streamed(mimetype, batches, metadata=None):
+    """Chunks of a streamed response body for an iterable of row batches."""
+    if mimetype == ARROW:
+        return iter_arrow(batches, metadata)
+    return iter_ndjson(batches)
@@ -1,6 +1,7 @@
 import pytest
 import sys
 import os
+import json
 
 # Add the parent directory (api_service) to sys.path to allow direct import of app
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -37,4 +38,109 @@ def test_health_check_endpoint(client):
     assert response.status_code == 200
     json_data = response.get_json()
     assert json_data["status"] == "healthy"
-    assert json_data["service"] == "API Service" 
\ No newline at end of file
+    assert json_data["service"] == "API Service"
+
+def test_data_endpoint_cache_headers(client):
+    """Test that /data sends an ETag and Cache-Control header."""
+    response = client.get('/data')
+    assert response.headers["ETag"]
+    assert "max-age=" in response.headers["Cache-Control"]
+
+def test_data_endpoint_conditional_get(client):
+    """Test that a matching If-None-Match is answered with 304 and no body."""
+    etag = client.get('/data').headers["ETag"]
+    response = client.get('/data', headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+@pytest.fixture
+def large_dataset():
+    """Swap in a generated 2,500-row dataset for the duration of a test."""
+    from dataset import GeneratedDataset
+    original = flask_app.config['DATASET']
+    flask_app.config['DATASET'] = GeneratedDataset(2500)
+    yield flask_app.config['DATASET']
+    flask_app.config['DATASET'] = original
+
+def test_data_endpoint_pagination(client, large_dataset):
+    """Test that following next_cursor returns every row exactly once."""
+    ids = []
+    cursor = None
+    while True:
+        response = client.get('/data', query_string={"limit": 1000, "cursor": cursor} if cursor else {"limit": 1000})
+        assert response.status_code == 200
+        json_data = response.get_json()
+        assert len(json_data["data"]) <= 1000
+        ids.extend(row["id"] for row in json_data["data"])
+        cursor = json_data["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == list(range(1, 2501))
+
+def test_data_endpoint_filters_and_fields(client, large_dataset):
+    """Test name/value filters and fields= projection."""
+    response = client.get('/data?name=item 12&min_value=120000&max_value=125000&fields=id,name')
+    json_data = response.get_json()
+    assert [row["id"] for row in json_data["data"]] == list(range(1200, 1251))
+    assert json_data["next_cursor"] is None
+    assert all(set(row) == {"id", "name"} for row in json_data["data"])
+
+def test_data_endpoint_page_size_is_capped(client, large_dataset):
+    """Test that limit cannot exceed DATA_PAGE_MAX."""
+    response = client.get('/data?limit=100000')
+    assert len(response.get_json()["data"]) == flask_app.config['DATA_PAGE_MAX']
+
+def test_data_endpoint_ndjson_stream(client, large_dataset):
+    """Test the newline-delimited JSON streaming mode."""
+    response = client.get('/data?format=ndjson&max_value=50000')
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.is_streamed
+    # The body was not collected up front to compute a length
+    assert "Content-Length" not in response.headers
+    lines = response.data.decode().splitlines()
+    assert len(lines) == 500
+    assert json.loads(lines[-1]) == {"id": 500, "name": "Item 500", "value": 50000}
+
+def test_data_endpoint_bad_query(client):
+    """Test that invalid query parameters are rejected with 400."""
+    for query in ("cursor=!!", "limit=0", "limit=ten", "min_value=low", "format=ndjson&cursor=!!"):
+        response = client.get(f'/data?{query}')
+        assert response.status_code == 400, query
+        assert "error" in response.get_json()
+
+def test_data_endpoint_content_negotiation(client, large_dataset):
+    """Test MessagePack pages selected through the Accept header."""
+    import msgpack
+
+    response = client.get('/data?limit=10', headers={"Accept": "application/msgpack"})
+    assert response.mimetype == "application/msgpack"
+    assert "Accept" in response.headers["Vary"]
+    document = msgpack.unpackb(response.data)
+    assert [row["id"] for row in document["data"]] == list(range(1, 11))
+    assert document["next_cursor"] == client.get('/data?limit=10').get_json()["next_cursor"]
+
+    assert client.get('/data', headers={"Accept": "text/csv"}).status_code == 406
+
+def test_data_endpoint_arrow_stream(client, large_dataset):
+    """Test Arrow streams selected through the Accept header (needs requirements-arrow.txt)."""
+    pa = pytest.importorskip("pyarrow")
+
+    response = client.get('/data?fields=id,value', headers={"Accept": "application/vnd.apache.arrow.stream"})
+    assert response.mimetype == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.data).read_all()
+    assert table.num_rows == 2500 and table.column_names == ["id", "value"]
+
+def test_data_endpoint_etag_depends_on_format(client):
+    """Test that JSON and MessagePack representations of the same URL have different ETags."""
+    json_etag = client.get('/data').headers["ETag"]
+    msgpack_etag = client.get('/data', headers={"Accept": "application/msgpack"}).headers["ETag"]
+    assert json_etag != msgpack_etag
+
+def test_metrics_are_recorded_per_route(client):
+    """Test that /metrics counts requests under this app's own route templates."""
+    client.get('/')
+    client.get('/data')
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="/data",status="200"}' in text
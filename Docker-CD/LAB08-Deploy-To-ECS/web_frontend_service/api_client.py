@@ -0,0 +1,103 @@
+import functools
+import importlib.util
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import msgpack
+except ImportError:  # responses are requested as JSON without it
+    msgpack = None
+
+# Arrow streams are only decoded when pyarrow is installed. It takes longer to import
+# than the rest of the app, so it is only imported by the first Arrow response (_pyarrow)
+_PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# api_service negotiates /data's format from the Accept header. MessagePack is
+# cheaper to decode than JSON, so it is preferred when the decoder is available.
+DEFAULT_ACCEPT = f"{MSGPACK}, application/json;q=0.9" if msgpack is not None else "application/json"
+
+
+@functools.lru_cache(maxsize=None)
+def _pyarrow():
+    import pyarrow.ipc
+    return pyarrow
+
+
+def decode_body(response):
+    """The decoded body of an API response, based on its Content-Type.
+
+    MessagePack and Arrow IPC streams are decoded when their packages are
+    installed; anything else is parsed as JSON. An Arrow stream is returned as
+    {"data": [rows...]} plus its schema metadata, the same shape as a JSON page.
+    """
+    mimetype = response.headers.get('Content-Type', '').split(';')[0].strip()
+    if mimetype in (MSGPACK, "application/x-msgpack") and msgpack is not None:
+        return msgpack.unpackb(response.content)
+    if mimetype == ARROW and _PYARROW_AVAILABLE:
+        reader = _pyarrow().ipc.open_stream(response.content)
+        document = {key.decode(): value.decode() for key, value in (reader.schema.metadata or {}).items()}
+        document["data"] = reader.read_all().to_pylist()
+        return document
+    return response.json()
+
+
+def make_adapter(pool_size=10, max_retries=2, backoff_factor=0.1, pool_block=False):
+    """HTTPAdapter with a keep-alive connection pool and a retry policy.
+
+    Only connection failures are retried (the request never reached the API), so a
+    slow or failing API is not hit again. Retries apply to idempotent methods such
+    as GET only.
+    """
+    retry = Retry(total=max_retries, connect=max_retries, read=0, status=0,
+                  backoff_factor=backoff_factor, raise_on_status=False)
+    return HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                       max_retries=retry, pool_block=pool_block)
+
+
+class PooledSession:
+    """Hands out a requests.Session per thread, all sharing one connection pool.
+
+    Sessions keep cookies and other per-session state and are not safe to share
+    between threads. The HTTPAdapter's urllib3 pool is thread-safe, so every
+    thread's session mounts the same adapter: connections to the API service are
+    reused across requests and threads instead of opening a new TCP connection
+    for each page view.
+    """
+
+    def __init__(self, adapter, accept=DEFAULT_ACCEPT):
+        self.adapter = adapter
+        self.accept = accept
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls):
+        return cls(make_adapter(
+            pool_size=int(os.environ.get('API_POOL_SIZE', 10)),
+            max_retries=int(os.environ.get('API_MAX_RETRIES', 2)),
+            backoff_factor=float(os.environ.get('API_RETRY_BACKOFF', 0.1)),
+            pool_block=os.environ.get('API_POOL_BLOCK', 'false').lower() == 'true',
+        ), accept=os.environ.get('API_ACCEPT', DEFAULT_ACCEPT))
+
+    @property
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            session.headers['Accept'] = self.accept
+            self._local.session = session
+        return session
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        self.adapter.close()
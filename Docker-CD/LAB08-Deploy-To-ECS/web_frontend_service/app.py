@@ -1,10 +1,35 @@
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, Response, jsonify
 import requests
 import os
 
+from api_client import PooledSession, decode_body
+from response_cache import ResponseCache, CachedResponse
+from rendering import PageRenderer
+from instrumentation.request_metrics import RequestMetrics
+from instrumentation.server import serve
+
 app = Flask(__name__)
 
+# Request count, latency, response size and in-flight requests per route, served at
+# /metrics for Prometheus (see instrumentation/request_metrics.py). With several gunicorn
+# workers, set PROMETHEUS_MULTIPROC_DIR to a shared directory so /metrics covers all of them.
+metrics = RequestMetrics.from_env(app)
+
 API_SERVICE_URL = os.environ.get("API_SERVICE_URL", "http://api_service:5000")
+app.config['API_SERVICE_URL'] = API_SERVICE_URL
+
+# Keep-alive connections to the API service are pooled and reused across requests
+# (pool size and retry policy come from API_POOL_SIZE / API_MAX_RETRIES, see api_client.py)
+api_session = PooledSession.from_env()
+
+# /data responses are cached for API_CACHE_TTL seconds (or the API's max-age), then served
+# stale for up to API_CACHE_STALE_TTL seconds while being revalidated with If-None-Match
+# in the background. API_CACHE_TTL=0 turns the cache off. See response_cache.py.
+api_cache = ResponseCache(
+    api_session,
+    ttl=float(os.environ.get("API_CACHE_TTL", 5)),
+    stale_ttl=float(os.environ.get("API_CACHE_STALE_TTL", 60)),
+)
 
 HTML_TEMPLATE = '''
 <!DOCTYPE html>
@@ -16,7 +41,7 @@ HTML_TEMPLATE = '''
     <h1>Welcome to the Web Frontend Service!</h1>
     <p>Service ID: {{ service_id }}</p>
     <h2>Data from API Service ({{ api_url }}):</h2>
-    <pre>{{ api_data | tojson(indent=2) }}</pre>
+    <pre>{% for chunk in api_json %}{{ chunk }}{% endfor %}</pre>
     <p><i>API Call Status: {{ api_call_status }}</i></p>
     <hr>
     <p><a href="/health">Health Check</a></p>
@@ -24,28 +49,45 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
+# Compiled once at startup; api_data is serialized by rendering.dumps_pretty (orjson when
+# installed). Set STREAM_RENDER=true to stream the page in chunks for large payloads.
+page = PageRenderer(app, HTML_TEMPLATE)
+app.config['STREAM_RENDER'] = os.environ.get("STREAM_RENDER", "false").lower() == "true"
+
+def describe_api_response(response):
+    # Returns (api_data, api_call_status) for a /data response; shared with async_app.py
+    if response.status_code == 200:
+        api_call_status = f"Successfully fetched data (HTTP {response.status_code})"
+        if isinstance(response, CachedResponse):
+            if response.from_cache:
+                api_call_status += " from cache"
+            return response.json(), api_call_status
+        return decode_body(response), api_call_status
+    api_call_status = f"Error fetching data. API returned HTTP {response.status_code}: {response.text}"
+    return {"error": response.text, "status_code": response.status_code}, api_call_status
+
+def describe_api_error(e):
+    return {"error": str(e)}, f"Error connecting to API service: {e}"
+
+def describe_api_health(api_response):
+    if api_response.status_code == 200:
+        return "healthy"
+    return f"unhealthy (HTTP {api_response.status_code})"
+
 @app.route('/')
 def home():
     service_id = os.environ.get("SERVICE_ID", "web_frontend_01")
-    api_data = None
-    api_call_status = "Not called yet"
+    api_url = app.config['API_SERVICE_URL']
     try:
-        response = requests.get(f"{API_SERVICE_URL}/data", timeout=5)
-        if response.status_code == 200:
-            api_data = response.json()
-            api_call_status = f"Successfully fetched data (HTTP {response.status_code})"
-        else:
-            api_call_status = f"Error fetching data. API returned HTTP {response.status_code}: {response.text}"
-            api_data = {"error": response.text, "status_code": response.status_code}
+        response = api_cache.get(f"{api_url}/data", timeout=5)
+        api_data, api_call_status = describe_api_response(response)
     except requests.exceptions.RequestException as e:
-        api_call_status = f"Error connecting to API service: {e}"
-        api_data = {"error": str(e)}
+        api_data, api_call_status = describe_api_error(e)
         
-    return render_template_string(HTML_TEMPLATE, 
-                                service_id=service_id, 
-                                api_data=api_data, 
-                                api_url=API_SERVICE_URL,
-                                api_call_status=api_call_status)
+    context = dict(service_id=service_id, api_url=api_url, api_call_status=api_call_status)
+    if app.config['STREAM_RENDER']:
+        return Response(page.stream(api_data, **context), mimetype='text/html')
+    return page.render(api_data, **context)
 
 @app.route('/health')
 def health_check():
@@ -54,16 +96,14 @@ def health_check():
     
     # Check connectivity to the API service as part of its health
     try:
-        api_response = requests.get(f"{API_SERVICE_URL}/health", timeout=2)
-        if api_response.status_code == 200:
-            frontend_status["dependencies"] = {"api_service": "healthy"}
-        else:
-            frontend_status["dependencies"] = {"api_service": f"unhealthy (HTTP {api_response.status_code})"}
+        api_response = api_session.get(f"{app.config['API_SERVICE_URL']}/health", timeout=2)
+        frontend_status["dependencies"] = {"api_service": describe_api_health(api_response)}
     except requests.exceptions.RequestException:
         frontend_status["dependencies"] = {"api_service": "unreachable"}
         
     return jsonify(frontend_status), 200
 
 if __name__ == '__main__':
-    port = int(os.environ.get("FLASK_RUN_PORT", 5001))
-    app.run(host='0.0.0.0', port=port) 
\ No newline at end of file
+    # gunicorn configured from WSGI_* variables, or Flask's dev server with WSGI_SERVER=dev
+    # (see instrumentation/server.py)
+    serve(app, "app:app", port=int(os.environ.get("FLASK_RUN_PORT", 5001)))
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, jsonify
+import requests
+import os
+
+from app import (HTML_TEMPLATE, api_cache, api_session, describe_api_error,
+                 describe_api_health, describe_api_response)
+from fanout import fetch_all, parse_backends
+from rendering import PageRenderer
+from instrumentation.request_metrics import RequestMetrics
+from instrumentation.server import serve
+
+# Async variant of app.py: same / and /health contract, but / fetches /data from every
+# backend in BACKEND_URLS concurrently and renders whatever came back before the deadline.
+# Needs Flask's async support (asgiref). Serve it on an ASGI server with
+#   uvicorn asgi:asgi_app --host 0.0.0.0 --port 5001
+# or with the development server: python async_app.py
+app = Flask(__name__)
+
+# Same /metrics endpoint as app.py (see instrumentation/request_metrics.py)
+metrics = RequestMetrics.from_env(app)
+
+app.config['API_SERVICE_URL'] = os.environ.get("API_SERVICE_URL", "http://api_service:5000")
+# Comma-separated `url` or `name=url` entries; defaults to API_SERVICE_URL alone
+app.config['BACKEND_URLS'] = parse_backends(os.environ.get("BACKEND_URLS", ""))
+# Per-backend timeout and the deadline for the whole fan-out, in seconds
+app.config['BACKEND_TIMEOUT'] = float(os.environ.get("BACKEND_TIMEOUT", 5))
+app.config['FANOUT_DEADLINE'] = float(os.environ.get("FANOUT_DEADLINE", 8))
+app.config['STREAM_RENDER'] = os.environ.get("STREAM_RENDER", "false").lower() == "true"
+
+page = PageRenderer(app, HTML_TEMPLATE)
+
+# Backend calls go through the same pooled, cached session as app.py; these threads
+# only wait on it while the event loop waits on all of them together
+fanout_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('API_POOL_SIZE', 10)),
+                                     thread_name_prefix="fanout")
+
+def backends():
+    return app.config['BACKEND_URLS'] or [("api_service", app.config['API_SERVICE_URL'])]
+
+def describe_result(result):
+    if result.timed_out:
+        deadline = app.config['FANOUT_DEADLINE']
+        return {"error": "deadline exceeded"}, f"No response within the {deadline}s deadline"
+    if result.error is not None:
+        if not isinstance(result.error, (requests.exceptions.RequestException, TimeoutError)):
+            app.logger.error(f"Unexpected error calling {result.url}: {result.error!r}")
+        return describe_api_error(result.error)
+    return describe_api_response(result.response)
+
+@app.route('/')
+async def home():
+    service_id = os.environ.get("SERVICE_ID", "web_frontend_01")
+    targets = backends()
+    results = await fetch_all(api_cache.get, targets, "/data", app.config['BACKEND_TIMEOUT'],
+                              app.config['FANOUT_DEADLINE'], executor=fanout_executor)
+    described = [describe_result(result) for result in results]
+    if len(results) == 1:
+        api_data, api_call_status = described[0]
+    else:
+        # Partial results: every backend gets an entry, failed ones carry their error
+        api_data = {result.name: data for result, (data, _) in zip(results, described)}
+        succeeded = sum(1 for result in results if result.response is not None and result.response.status_code == 200)
+        api_call_status = f"Fetched data from {succeeded}/{len(results)} backends. " + "; ".join(
+            f"{result.name}: {status}" for result, (_, status) in zip(results, described))
+
+    context = dict(service_id=service_id, api_url=", ".join(url for _, url in targets),
+                   api_call_status=api_call_status)
+    if app.config['STREAM_RENDER']:
+        return Response(page.stream(api_data, **context), mimetype='text/html')
+    return page.render(api_data, **context)
+
+@app.route('/health')
+async def health_check():
+    frontend_status = {"status": "healthy", "service": "Web Frontend"}
+    results = await fetch_all(api_session.get, backends(), "/health", 2, app.config['FANOUT_DEADLINE'],
+                              executor=fanout_executor)
+    frontend_status["dependencies"] = {
+        result.name: "unreachable" if result.response is None else describe_api_health(result.response)
+        for result in results
+    }
+    return jsonify(frontend_status), 200
+
+if __name__ == '__main__':
+    # gunicorn configured from WSGI_* variables, or Flask's dev server with WSGI_SERVER=dev
+    # (see instrumentation/server.py)
+    serve(app, "async_app:app", port=int(os.environ.get("FLASK_RUN_PORT", 5001)))
@@ -0,0 +1,96 @@
+"""Per-request latency of a fresh connection per call (requests.get) vs. the pooled session.
+
+Starts a local keep-alive stub of api_service's /data endpoint on a free port, so
+no other services are needed:
+
+    python benchmarks/bench_api_client.py --requests 2000 --threads 8
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from api_client import PooledSession, make_adapter
+
+PAYLOAD = json.dumps({"data": [{"id": 1, "name": "Item 1", "value": 100},
+                               {"id": 2, "name": "Item 2", "value": 200}],
+                      "source": "API Service"}).encode()
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like gunicorn/werkzeug behind the real service
+    disable_nagle_algorithm = True  # headers and body are separate writes; avoid delayed-ACK stalls
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubApiHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(get, url, requests_total, threads):
+    per_thread = requests_total // threads
+    samples = [[] for _ in range(threads)]
+
+    def drive(out):
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            response = get(f"{url}/data", timeout=5)
+            response.json()
+            out.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=drive, args=(samples[i],)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    flat = sorted(s for per in samples for s in per)
+    return len(flat) / elapsed, percentile(flat, 50) * 1000, percentile(flat, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=10)
+    args = parser.parse_args()
+
+    server, url = start_stub()
+    pooled = PooledSession(make_adapter(pool_size=args.pool_size))
+    try:
+        print(f"{'client':<16} {'req/s':>9} {'p50_ms':>8} {'p99_ms':>8}")
+        for name, get in (("requests.get", requests.get), ("pooled session", pooled.get)):
+            rps, p50, p99 = run(get, url, args.requests, args.threads)
+            print(f"{name:<16} {rps:>9.0f} {p50:>8.3f} {p99:>8.3f}")
+    finally:
+        pooled.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
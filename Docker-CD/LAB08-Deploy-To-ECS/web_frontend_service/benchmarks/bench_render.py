@@ -0,0 +1,96 @@
+"""Render throughput of the home page: render_template_string + |tojson vs. the precompiled page.
+
+Renders the page template directly (no HTTP, no API service) for payloads of
+2, 1,000 and 100,000 items:
+
+    python benchmarks/bench_render.py --seconds 2
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, render_template_string
+
+import rendering
+from app import HTML_TEMPLATE
+from rendering import PageRenderer
+
+# The page template as it was before rendering.py, using the |tojson filter
+LEGACY_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Web Frontend</title>
+</head>
+<body>
+    <h1>Welcome to the Web Frontend Service!</h1>
+    <p>Service ID: {{ service_id }}</p>
+    <h2>Data from API Service ({{ api_url }}):</h2>
+    <pre>{{ api_data | tojson(indent=2) }}</pre>
+    <p><i>API Call Status: {{ api_call_status }}</i></p>
+    <hr>
+    <p><a href="/health">Health Check</a></p>
+</body>
+</html>
+'''
+
+CONTEXT = dict(service_id="web_frontend_01", api_url="http://api_service:5000",
+               api_call_status="Successfully fetched data (HTTP 200)")
+
+
+def payload(items):
+    return {"data": [{"id": i, "name": f"Item {i}", "value": i * 100} for i in range(items)],
+            "source": "API Service"}
+
+
+def measure(render, seconds):
+    renders = 0
+    start = time.perf_counter()
+    while True:
+        render()
+        renders += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return renders / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent per case")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 1000, 100000])
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    page = PageRenderer(app, HTML_TEMPLATE)
+    orjson = rendering.orjson
+
+    def with_json_stdlib(render):
+        def run():
+            rendering.orjson = None
+            try:
+                render()
+            finally:
+                rendering.orjson = orjson
+        return run
+
+    print(f"orjson {'available' if orjson is not None else 'not installed'}")
+    print(f"{'items':>7} {'mode':<32} {'renders/s':>10} {'ms/render':>10}")
+    with app.app_context():
+        for size in args.sizes:
+            data = payload(size)
+            cases = [
+                ("render_template_string+tojson", lambda: render_template_string(LEGACY_TEMPLATE, api_data=data, **CONTEXT)),
+                ("precompiled, json", with_json_stdlib(lambda: page.render(data, **CONTEXT))),
+                ("precompiled, orjson", lambda: page.render(data, **CONTEXT)),
+                ("precompiled, streamed", lambda: "".join(page.stream(data, **CONTEXT))),
+            ]
+            for name, render in cases:
+                rate = measure(render, args.seconds)
+                print(f"{size:>7} {name:<32} {rate:>10.1f} {1000.0 / rate:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
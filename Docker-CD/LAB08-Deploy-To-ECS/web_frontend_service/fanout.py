@@ -0,0 +1,74 @@
+import asyncio
+import functools
+import time
+from urllib.parse import urlparse
+
+
+def parse_backends(value):
+    """Parses BACKEND_URLS: comma-separated `url` or `name=url` entries.
+
+    Unnamed backends are named after their host:port. Returns a list of
+    (name, url) pairs.
+    """
+    backends = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, url = entry.partition("=")
+        if not sep or "://" in name:
+            name, url = urlparse(entry).netloc or entry, entry
+        backends.append((name.strip(), url.strip().rstrip("/")))
+    return backends
+
+
+class BackendResult:
+    """Outcome of one backend call: a response, an error, or neither if it missed the deadline."""
+
+    def __init__(self, name, url, response=None, error=None, elapsed=None):
+        self.name = name
+        self.url = url
+        self.response = response
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def timed_out(self):
+        return self.response is None and self.error is None
+
+
+async def _call(fetch, executor, url, timeout):
+    # fetch is blocking (the pooled, cached requests session), so it runs in a thread;
+    # the event loop only waits on it, with its own timeout on top of the HTTP one.
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(
+            loop.run_in_executor(executor, functools.partial(fetch, url, timeout=timeout)), timeout)
+        return response, None, time.perf_counter() - start
+    except asyncio.TimeoutError:
+        return None, TimeoutError(f"timed out after {timeout}s"), time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+
+
+async def fetch_all(fetch, backends, path, timeout, deadline, executor=None):
+    """Calls `fetch(url + path, timeout=timeout)` on every backend concurrently.
+
+    Each call is limited to `timeout` seconds and the whole fan-out to `deadline`
+    seconds. Results come back in backend order; backends that had not answered
+    when the deadline passed are returned with `timed_out` set, so the caller can
+    render what it has.
+    """
+    tasks = [asyncio.ensure_future(_call(fetch, executor, f"{url}{path}", timeout)) for _, url in backends]
+    if tasks:
+        await asyncio.wait(tasks, timeout=deadline)
+    results = []
+    for (name, url), task in zip(backends, tasks):
+        if task.done():
+            response, error, elapsed = task.result()
+            results.append(BackendResult(name, url, response, error, elapsed))
+        else:
+            task.cancel()
+            results.append(BackendResult(name, url))
+    return results
@@ -0,0 +1,74 @@
+import sys
+import os
+import threading
+
+# Add the parent directory (web_frontend_service) to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+import msgpack
+import pytest
+import requests
+
+from api_client import PooledSession, decode_body, make_adapter
+
+def make_response(content, content_type):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.headers['Content-Type'] = content_type
+    return response
+
+def test_sessions_are_per_thread_but_share_the_pool():
+    """Each thread gets its own Session, all mounted on the same adapter."""
+    pooled = PooledSession(make_adapter(pool_size=4))
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(pooled.session)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(s) for s in sessions}) == 3
+    assert all(s.get_adapter("http://api_service:5000/data") is pooled.adapter for s in sessions)
+    assert pooled.session is pooled.session
+
+def test_adapter_retries_connection_errors_only():
+    """The retry policy retries failed connects but never re-sends a request the API received."""
+    adapter = make_adapter(pool_size=8, max_retries=3)
+    assert adapter._pool_maxsize == 8
+    assert adapter.max_retries.connect == 3
+    assert adapter.max_retries.read == 0
+    assert adapter.max_retries.status == 0
+
+def test_from_env(monkeypatch):
+    """Pool size and retries are configurable through the environment."""
+    monkeypatch.setenv("API_POOL_SIZE", "25")
+    monkeypatch.setenv("API_MAX_RETRIES", "0")
+    pooled = PooledSession.from_env()
+    assert pooled.adapter._pool_maxsize == 25
+    assert pooled.adapter.max_retries.total == 0
+
+def test_sessions_prefer_msgpack():
+    """Sessions ask for MessagePack first when it can be decoded."""
+    pooled = PooledSession(make_adapter())
+    assert pooled.session.headers['Accept'].startswith("application/msgpack")
+    assert PooledSession(make_adapter(), accept="application/json").session.headers['Accept'] == "application/json"
+
+ROWS = [{"id": 1, "name": "Item 1", "value": 100}, {"id": 2, "name": "Item 2", "value": 200}]
+
+def test_decode_body_by_content_type():
+    """JSON and MessagePack bodies decode to the same document."""
+    document = {"data": ROWS, "source": "API Service"}
+    assert decode_body(make_response(json.dumps(document).encode(), "application/json")) == document
+    assert decode_body(make_response(msgpack.packb(document), "application/msgpack")) == document
+
+def test_decode_arrow_body():
+    """Arrow bodies decode to the same document as JSON ones (needs requirements-arrow.txt)."""
+    pa = pytest.importorskip("pyarrow")
+    document = {"data": ROWS, "source": "API Service"}
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pylist(ROWS).replace_schema_metadata({"source": "API Service"})
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    assert decode_body(make_response(sink.getvalue().to_pybytes(), "application/vnd.apache.arrow.stream")) == document
@@ -0,0 +1,63 @@
+import sys
+import os
+import asyncio
+import time
+import json
+
+import requests
+
+# Add the parent directory (web_frontend_service) to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fanout import fetch_all, parse_backends
+from async_app import app as async_flask_app
+
+def make_fetch(delays, fail=()):
+    """A blocking fetch whose latency per backend host is given by `delays`."""
+    def fetch(url, timeout=None):
+        host = url.split("/")[2]
+        time.sleep(delays.get(host, 0))
+        if host in fail:
+            raise requests.exceptions.ConnectionError(f"{host} refused the connection")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({"source": host}).encode()
+        response.headers['Content-Type'] = 'application/json'
+        return response
+    return fetch
+
+def test_parse_backends():
+    """BACKEND_URLS accepts plain and named entries."""
+    assert parse_backends(" http://a:5000/ , b=http://b:5000,") == [("a:5000", "http://a:5000"), ("b", "http://b:5000")]
+    assert parse_backends("") == []
+
+def test_backends_are_called_concurrently():
+    """The fan-out takes as long as the slowest backend, not the sum."""
+    backends = [(name, f"http://{name}") for name in ("a", "b", "c")]
+    start = time.perf_counter()
+    results = asyncio.run(fetch_all(make_fetch({"a": 0.2, "b": 0.2, "c": 0.2}), backends, "/data", timeout=1, deadline=2))
+    assert time.perf_counter() - start < 0.5
+    assert [r.response.json()["source"] for r in results] == ["a", "b", "c"]
+
+def test_timeouts_and_deadline_give_partial_results():
+    """A slow backend times out, one past the deadline is marked timed_out, the rest are kept."""
+    backends = [(name, f"http://{name}") for name in ("fast", "slow", "down")]
+    fetch = make_fetch({"slow": 0.5}, fail={"down"})
+    results = asyncio.run(fetch_all(fetch, backends, "/data", timeout=0.1, deadline=1))
+    fast, slow, down = results
+    assert fast.response.status_code == 200
+    assert isinstance(slow.error, TimeoutError)
+    assert isinstance(down.error, requests.exceptions.ConnectionError)
+
+    results = asyncio.run(fetch_all(fetch, backends, "/data", timeout=1, deadline=0.1))
+    assert results[1].timed_out and not results[0].timed_out
+
+def test_async_home_renders_partial_results(monkeypatch):
+    """With several backends the page shows what came back and why the rest did not."""
+    monkeypatch.setitem(async_flask_app.config, 'BACKEND_URLS', parse_backends("one=http://one,two=http://two"))
+    monkeypatch.setattr("async_app.api_cache.get", make_fetch({}, fail={"two"}))
+    with async_flask_app.test_client() as client:
+        response = client.get('/')
+    assert response.status_code == 200
+    assert b"Fetched data from 1/2 backends" in response.data
+    assert b"two: Error connecting to API service: two refused the connection" in response.data
@@ -0,0 +1,40 @@
+import sys
+import os
+
+# Add the parent directory (web_frontend_service) to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, render_template_string
+
+import rendering
+from rendering import PageRenderer, dumps_pretty, iter_dumps_pretty
+
+SAMPLE = {"source": "API <Service> & 'co'", "data": [{"id": i, "name": f"Item {i}", "value": i * 1.5} for i in range(50)]}
+
+def test_dumps_pretty_matches_tojson_filter():
+    """The fast path produces exactly what |tojson(indent=2) would."""
+    app = Flask(__name__)
+    with app.app_context():
+        expected = render_template_string("{{ data | tojson(indent=2) }}", data=SAMPLE)
+    assert str(dumps_pretty(SAMPLE)) == expected
+
+def test_dumps_pretty_without_orjson(monkeypatch):
+    """The standard library fallback gives the same output."""
+    with_orjson = dumps_pretty(SAMPLE)
+    monkeypatch.setattr(rendering, "orjson", None)
+    assert dumps_pretty(SAMPLE) == with_orjson
+
+def test_iter_dumps_pretty_chunks_join_to_full_output():
+    """Streamed chunks are bounded in size and add up to the full document."""
+    chunks = list(iter_dumps_pretty(SAMPLE, chunk_size=256))
+    assert len(chunks) > 1
+    assert "".join(chunks) == dumps_pretty(SAMPLE)
+
+def test_render_and_stream_agree():
+    """The page is compiled once and renders the same whole or streamed."""
+    renderer = PageRenderer(Flask(__name__), "<h1>{{ title }}</h1><pre>{% for chunk in api_json %}{{ chunk }}{% endfor %}</pre>")
+    template = renderer.template
+    rendered = renderer.render(SAMPLE, title="Items")
+    assert "".join(renderer.stream(SAMPLE, title="Items")) == rendered
+    assert renderer.template is template
+    assert "\\u003cService\\u003e" in rendered
@@ -0,0 +1,157 @@
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory (web_frontend_service) to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+import requests
+
+from response_cache import ResponseCache
+
+def make_response(status_code, data=None, headers=None):
+    """A requests.Response as the session returns it, with a JSON body when `data` is given."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.encoding = 'utf-8'
+    response.headers.update(headers or {})
+    if data is not None:
+        response._content = json.dumps(data).encode()
+        response.headers['Content-Type'] = 'application/json'
+    else:
+        response._content = b''
+    return response
+
+class FakeSession:
+    """Serves a fixed payload with an ETag and honours If-None-Match."""
+
+    def __init__(self, status_code=200, delay=0.0, max_age=None, cache_control=None):
+        self.status_code = status_code
+        self.delay = delay
+        self.cache_control = f"public, max-age={max_age}" if max_age is not None else cache_control
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None, headers=None):
+        with self.lock:
+            self.calls.append(headers)
+        time.sleep(self.delay)
+        if self.status_code != 200:
+            return make_response(self.status_code, {"error": "Internal Server Error"})
+        if headers and headers.get('If-None-Match') == '"v1"':
+            return make_response(304)
+        response_headers = {'ETag': '"v1"'}
+        if self.cache_control is not None:
+            response_headers['Cache-Control'] = self.cache_control
+        return make_response(200, {"data": [1, 2]}, response_headers)
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_fresh_responses_are_served_from_memory():
+    """Within the TTL only the first request reaches the API."""
+    session = FakeSession()
+    cache = ResponseCache(session, ttl=60)
+    first = cache.get("http://api/data")
+    second = cache.get("http://api/data")
+    assert first.json() == second.json() == {"data": [1, 2]}
+    assert not first.from_cache and second.from_cache
+    assert len(session.calls) == 1
+
+def test_stale_response_is_revalidated_in_background():
+    """A stale entry is served immediately and refreshed with If-None-Match (304)."""
+    session = FakeSession(max_age=0)
+    cache = ResponseCache(session, ttl=60, stale_ttl=60)
+    cache.get("http://api/data")
+    stale = cache.get("http://api/data")
+    assert stale.from_cache
+    assert _wait_for(lambda: cache.stats['revalidated'] == 1)
+    assert session.calls[1] == {'If-None-Match': '"v1"'}
+
+def test_concurrent_misses_make_one_upstream_call():
+    """N concurrent misses share a single request (single flight)."""
+    session = FakeSession(delay=0.1)
+    cache = ResponseCache(session, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("http://api/data"))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(results) == 10
+    assert all(r.json() == {"data": [1, 2]} for r in results)
+    assert len(session.calls) == 1
+
+def test_followers_wait_for_a_leader_slower_than_their_timeout():
+    """A miss joining an upstream call that takes longer than its own timeout gets that call's response."""
+    session = FakeSession(delay=0.5)
+    cache = ResponseCache(session, ttl=60)
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get("http://api/data", timeout=5)))
+    leader.start()
+    assert _wait_for(lambda: session.calls)
+    follower = cache.get("http://api/data", timeout=0.1)
+    leader.join()
+    assert follower.json() == {"data": [1, 2]}
+    assert results[0].json() == {"data": [1, 2]}
+    assert len(session.calls) == 1
+
+def test_followers_get_the_leaders_error():
+    """A miss joining an upstream call that fails gets the same requests exception."""
+    class FailingSession(FakeSession):
+        def get(self, url, timeout=None, headers=None):
+            super().get(url, timeout, headers)
+            raise requests.exceptions.ReadTimeout("read timed out")
+    session = FailingSession(delay=0.3)
+    cache = ResponseCache(session, ttl=60)
+    errors = []
+
+    def fetch():
+        try:
+            cache.get("http://api/data", timeout=0.1)
+        except requests.exceptions.RequestException as e:
+            errors.append(e)
+    threads = [threading.Thread(target=fetch) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(errors) == 3 and len(session.calls) == 1
+
+def test_etag_and_max_age_are_read_from_the_headers():
+    """The ETag is stored for revalidation and max-age overrides the TTL."""
+    cache = ResponseCache(FakeSession(max_age=30), ttl=60)
+    first = cache.get("http://api/data")
+    assert (first.etag, first.max_age) == ('"v1"', 30.0)
+
+def test_no_store_responses_are_not_cached():
+    """Cache-Control: no-store responses are passed through and never stored."""
+    session = FakeSession(cache_control="no-store")
+    cache = ResponseCache(session, ttl=60)
+    assert cache.get("http://api/data").json() == {"data": [1, 2]}
+    cache.get("http://api/data")
+    assert len(session.calls) == 2
+
+def test_errors_are_not_cached():
+    """Error responses are passed through and retried on the next request."""
+    session = FakeSession(status_code=500)
+    cache = ResponseCache(session, ttl=60)
+    assert cache.get("http://api/data").status_code == 500
+    assert cache.get("http://api/data").status_code == 500
+    assert len(session.calls) == 2
+
+def test_zero_ttl_disables_cache():
+    """API_CACHE_TTL=0 sends every request upstream."""
+    session = FakeSession()
+    cache = ResponseCache(session, ttl=0)
+    cache.get("http://api/data")
+    cache.get("http://api/data")
+    assert len(session.calls) == 2
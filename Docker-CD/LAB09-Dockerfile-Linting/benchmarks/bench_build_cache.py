@@ -0,0 +1,103 @@
+"""Time main.py over hundreds of generated Dockerfiles, with and without their build contexts.
+
+Generates `--dockerfiles` service directories, each with a small Flask app (a
+package of `--modules` modules, tests and a requirements.txt) and a Dockerfile
+that is either single-stage with a well-ordered install, single-stage with the
+install after `COPY . .`, or multi-stage with a builder. Then times the
+analysis of all of them (every context file grouped into rebuild scenarios) and
+of one --changed file:
+
+    python benchmarks/bench_build_cache.py --dockerfiles 500 --modules 20
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import main as analyze
+
+ORDERED = """FROM python:3.11-slim
+WORKDIR /app
+RUN apt-get update && apt-get install -y --no-install-recommends curl && rm -rf /var/lib/apt/lists/*
+COPY requirements.txt .
+RUN pip install --no-cache-dir -r requirements.txt
+COPY service/ ./service/
+EXPOSE 5000
+CMD ["python", "-m", "service"]
+"""
+
+BUSTED = """FROM python:3.11-slim
+WORKDIR /app
+COPY . .
+RUN pip install --no-cache-dir -r requirements.txt
+CMD ["python", "-m", "service"]
+"""
+
+MULTI_STAGE = """FROM python:3.11 AS builder
+WORKDIR /build
+COPY requirements.txt .
+RUN pip install --prefix=/install --no-cache-dir -r requirements.txt
+COPY service/ ./service/
+RUN python -m compileall -q service
+
+FROM python:3.11-slim
+COPY --from=builder /install /usr/local
+COPY --from=builder /build/service /app/service
+WORKDIR /app
+USER 1000
+CMD ["python", "-m", "service"]
+"""
+
+DOCKERFILES = (ORDERED, BUSTED, MULTI_STAGE)
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def generate(root, dockerfiles, modules):
+    for n in range(dockerfiles):
+        service = os.path.join(root, f'service-{n}')
+        write(os.path.join(service, 'Dockerfile'), DOCKERFILES[n % len(DOCKERFILES)])
+        write(os.path.join(service, '.dockerignore'), 'tests/\n*.md\n')
+        write(os.path.join(service, 'requirements.txt'), 'Flask==2.3.3\nredis==5.0.1\n')
+        write(os.path.join(service, 'README.md'), f'# service-{n}\n')
+        write(os.path.join(service, 'service', '__main__.py'), 'from service.app import app\napp.run()\n')
+        for m in range(modules):
+            write(os.path.join(service, 'service', f'module_{m}.py'), f'def handler_{m}():\n    return {m}\n' * 20)
+            write(os.path.join(service, 'tests', f'test_module_{m}.py'), f'def test_{m}():\n    assert True\n')
+
+
+def timed(argv):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        analyze(argv)
+    return time.perf_counter() - started, output.getvalue().count('Warning:')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dockerfiles', type=int, default=500)
+    parser.add_argument('--modules', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        generate(root, args.dockerfiles, args.modules)
+        print(f'{args.dockerfiles} Dockerfiles, {args.modules} modules and {args.modules} tests each')
+        print(f"{'run':<20} {'seconds':>8} {'warnings':>9}")
+        for name, argv in (('all scenarios', [root]),
+                           ('all, with --layers', [root, '--layers']),
+                           ('one file changed', [root, '--changed', 'service/module_0.py'])):
+            seconds, warnings = timed(argv)
+            print(f'{name:<20} {seconds:>8.2f} {warnings:>9}')
+
+
+if __name__ == '__main__':
+    main()
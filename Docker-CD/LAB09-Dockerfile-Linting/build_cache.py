@@ -0,0 +1,689 @@
+"""Build-cache simulation and layer-size estimates for Dockerfiles.
+
+Nothing is built or pulled. A Dockerfile is parsed into stages and steps, the
+files of its build context are listed (without those .dockerignore excludes), and
+each COPY/ADD is matched against them. A step's cache entry depends on the step
+before it, so a changed file invalidates the first step that copies it and every
+later step of that stage, plus the stages built FROM it and those that COPY
+--from it. Stages the target does not need are skipped, as BuildKit does.
+
+Layer sizes are estimates:
+
+    COPY/ADD from the context   the size of the files copied
+    COPY --from=<stage>         the copied context files, else the stage's RUN layers
+    RUN pip install             each requirement and its dependencies, sized from the
+                                same packages installed where the analyzer runs
+                                (PIP_PACKAGE_BYTES for packages not installed here)
+    RUN apt-get/apk install     APT_PACKAGE_BYTES per package, plus APT_LISTS_BYTES
+                                when the apt lists are not removed in the same RUN
+    RUN npm/yarn/pnpm install   NODE_MODULES_BYTES
+    any other RUN               RUN_BYTES
+    ENV, WORKDIR, CMD, ...      nothing (image configuration, no files)
+"""
+import functools
+import json
+import os
+import posixpath
+import re
+import shlex
+from importlib import metadata
+
+MB = 1024 * 1024
+PIP_PACKAGE_BYTES = 5 * MB
+APT_PACKAGE_BYTES = 25 * MB
+APT_LISTS_BYTES = 20 * MB
+NODE_MODULES_BYTES = 100 * MB
+RUN_BYTES = 1 * MB
+
+# Files a dependency install reads: copying only these before the install keeps
+# its layer cached while the rest of the code changes
+DEPENDENCY_MANIFESTS = re.compile(
+    r"(^|/)(requirements[^/]*\.(txt|in)|constraints[^/]*\.txt|pyproject\.toml|setup\.(py|cfg)|Pipfile(\.lock)?"
+    r"|poetry\.lock|uv\.lock|package(-lock)?\.json|npm-shrinkwrap\.json|yarn\.lock|pnpm-lock\.yaml)$")
+PIP_INSTALL = re.compile(r"(^|\s|/)(pip3?(\.\d+)?|-m\s+pip)\s+install\b")
+PYTHON_INSTALL = re.compile(r"\b(poetry\s+install|pipenv\s+(install|sync)|uv\s+sync|pdm\s+(install|sync))\b")
+NODE_INSTALL = re.compile(r"\b(npm\s+(ci|install|i)|yarn(\s+install)?|pnpm\s+(install|i))\b")
+SYSTEM_INSTALL = re.compile(r"\b(apt-get|apt)\s+(-\S+\s+)*install\b|\bapk\s+(-\S+\s+)*add\b")
+APT_UPDATE = re.compile(r"\b(apt-get|apt)\s+(-\S+\s+)*update\b")
+# pip options followed by a value that is not a package
+PIP_VALUE_OPTIONS = {"-c", "--constraint", "-e", "--editable", "-i", "--index-url", "--extra-index-url", "-f",
+                     "--find-links", "-t", "--target", "--prefix", "--root", "--timeout", "--default-timeout",
+                     "--retries", "--progress-bar", "--cache-dir", "--src", "--platform", "--python-version",
+                     "--implementation", "--abi", "--trusted-host", "--proxy", "--cert", "--client-cert",
+                     "--log", "--upgrade-strategy", "--only-binary", "--no-binary", "--report"}
+REQUIREMENT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+
+class DockerfileError(Exception):
+    """The Dockerfile cannot be analyzed (unreadable, or no FROM)."""
+
+
+class Instruction:
+    """One instruction of a Dockerfile, with its --flags split off."""
+
+    def __init__(self, line, keyword, arguments, flags=None, heredocs=()):
+        self.line = line
+        self.keyword = keyword
+        self.arguments = arguments
+        self.flags = flags or {}
+        self.heredocs = list(heredocs)
+
+    def __repr__(self):
+        return f"Instruction({self.line}, {self.keyword!r}, {self.arguments!r})"
+
+    def text(self, width=None):
+        flags = " ".join(f"--{name}={value}" if value is not True else f"--{name}"
+                         for name, values in self.flags.items() for value in values)
+        text = " ".join(part for part in (self.keyword, flags, self.arguments.split("\n")[0]) if part)
+        return text if width is None or len(text) <= width else text[:width - 1] + "…"
+
+
+def _split_flags(rest):
+    flags = {}
+    while rest.startswith("--"):
+        token, _, rest = rest.partition(" ")
+        rest = rest.lstrip()
+        name, sep, value = token[2:].partition("=")
+        flags.setdefault(name.lower(), []).append(value if sep else True)
+    return flags, rest
+
+
+def parse(text):
+    """The instructions of a Dockerfile, in order.
+
+    Handles the escape parser directive, line continuations (with the comment and
+    blank lines Docker skips inside them) and heredocs (`RUN <<EOF`).
+    """
+    lines = text.splitlines()
+    escape = "\\"
+    for line in lines:
+        directive = re.match(r"#\s*(\w+)\s*=\s*(\S+)\s*$", line.strip())
+        if not directive:
+            break
+        if directive.group(1).lower() == "escape":
+            escape = directive.group(2)
+
+    instructions = []
+    index = 0
+    while index < len(lines):
+        start = index
+        line = lines[index]
+        index += 1
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        parts = []
+        while True:
+            body = line.rstrip()
+            if not body.endswith(escape):
+                parts.append(body)
+                break
+            parts.append(body[:-len(escape)])
+            while index < len(lines) and (not lines[index].strip() or lines[index].lstrip().startswith("#")):
+                index += 1
+            if index == len(lines):
+                break
+            line = lines[index]
+            index += 1
+        match = re.match(r"(\S+)\s*(.*)", "".join(parts).strip(), re.S)
+        keyword = match.group(1).upper()
+        flags, arguments = _split_flags(match.group(2)) if keyword in ("FROM", "RUN", "COPY", "ADD") \
+            else ({}, match.group(2))
+        heredocs = []
+        if keyword in ("RUN", "COPY", "ADD"):
+            for strip_tabs, word in re.findall(r"<<(-?)[\"']?(\w+)[\"']?", arguments):
+                body = []
+                while index < len(lines):
+                    line = lines[index]
+                    index += 1
+                    if (line.lstrip("\t") if strip_tabs else line) == word:
+                        break
+                    body.append(line)
+                heredocs.append("\n".join(body))
+        instructions.append(Instruction(start + 1, keyword, arguments, flags, heredocs))
+    return instructions
+
+
+def _expand(value, variables):
+    # $NAME, ${NAME}, ${NAME:-default} and ${NAME:+alternative}
+    def replace(match):
+        name = match.group(1) or match.group(2)
+        current = variables.get(name, "")
+        if match.group(3) == ":-":
+            return current or match.group(4)
+        if match.group(3) == ":+":
+            return match.group(4) if current else ""
+        return current
+    return re.sub(r"\$(?:(\w+)|\{(\w+)(?:(:[-+])([^}]*))?\})", replace, value)
+
+
+def _words(arguments):
+    # Exec form (["a", "b"]) or shell words
+    if arguments.startswith("["):
+        try:
+            words = json.loads(arguments)
+            if isinstance(words, list):
+                return [str(word) for word in words]
+        except ValueError:
+            pass
+    try:
+        return shlex.split(arguments)
+    except ValueError:
+        return arguments.split()
+
+
+def _glob_pattern(pattern):
+    # Go's filepath.Match as Docker uses it (* and ? stop at /), plus ** for any directories
+    regex = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**", index):
+            regex.append(".*")
+            index += 2
+            if pattern.startswith("/", index):
+                regex[-1] = "(.*/)?"
+                index += 1
+            continue
+        regex.append("[^/]*" if char == "*" else "[^/]" if char == "?" else
+                     char if char in "[]" else re.escape(char))
+        index += 1
+    return "".join(regex)
+
+
+def _path_pattern(path):
+    # A source or .dockerignore pattern matches the path itself and everything under it
+    path = posixpath.normpath(path.lstrip("/")) if path.strip("/.") else ""
+    if not path:
+        return re.compile(r".*")
+    return re.compile(_glob_pattern(path) + r"(/.*)?$")
+
+
+class BuildContext:
+    """The files of a build context: {path relative to the context: size in bytes}.
+
+    Files excluded by the context's .dockerignore are left out, the way Docker
+    never sends them to the builder.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {}
+        ignore = self._dockerignore()
+        for directory, subdirectories, names in os.walk(root):
+            subdirectories.sort()
+            for name in sorted(names):
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, root).replace(os.sep, "/")
+                if ignore and self._ignored(relative, ignore):
+                    continue
+                try:
+                    self.files[relative] = os.path.getsize(path)
+                except OSError:
+                    continue
+        self._read = {}
+
+    def _dockerignore(self):
+        try:
+            with open(os.path.join(self.root, ".dockerignore")) as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+        patterns = []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            exclude = not line.startswith("!")
+            patterns.append((exclude, _path_pattern(line.lstrip("!").strip())))
+        return patterns
+
+    @staticmethod
+    def _ignored(path, patterns):
+        # The last matching pattern wins; a ! pattern brings a file back
+        ignored = False
+        for exclude, pattern in patterns:
+            if ignored != exclude and pattern.match(path):
+                ignored = exclude
+        return ignored
+
+    def matching(self, source):
+        """The context files a COPY/ADD source (a path, directory or glob) copies."""
+        pattern = _path_pattern(source)
+        return [path for path in self.files if pattern.match(path)]
+
+    def read(self, path):
+        if path not in self._read:
+            try:
+                with open(os.path.join(self.root, path), encoding="utf-8", errors="replace") as f:
+                    self._read[path] = f.read()
+            except OSError:
+                self._read[path] = ""
+        return self._read[path]
+
+
+def _example_order(path):
+    # Shallow files first, and code before the Dockerfile, docs and dotfiles
+    name = posixpath.basename(path)
+    incidental = name.startswith(".") or "dockerfile" in name.lower() or name.endswith((".md", ".rst", ".txt"))
+    return path.count("/"), incidental, path
+
+
+def _canonical(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+@functools.lru_cache(maxsize=None)
+def _installed(name):
+    # (size in bytes, [unconditional requirements]) of an installed distribution, or None
+    try:
+        distribution = metadata.distribution(name)
+    except (metadata.PackageNotFoundError, ValueError):
+        return None
+    size = sum(file.size or 0 for file in distribution.files or ())
+    requires = [match.group(0) for match in (REQUIREMENT_NAME.match(requirement)
+                                             for requirement in distribution.requires or () if ";" not in requirement)
+                if match]
+    return size, requires
+
+
+def pip_install_bytes(names):
+    """Estimated size of installing `names` and their dependencies with pip."""
+    seen = set()
+    total = 0
+    pending = list(names)
+    while pending:
+        name = _canonical(pending.pop())
+        if name in seen:
+            continue
+        seen.add(name)
+        installed = _installed(name)
+        if installed is None:
+            total += PIP_PACKAGE_BYTES
+            continue
+        total += installed[0]
+        pending.extend(installed[1])
+    return total
+
+
+def requirement_names(text, read=None, path=""):
+    """Package names in a requirements file; `read(path)` follows its -r includes."""
+    names = []
+    for line in text.splitlines():
+        line = line.split(" #")[0].split("#")[0].strip() if not line.lstrip().startswith("#") else ""
+        if not line:
+            continue
+        include = re.match(r"(-r|--requirement)\s*=?\s*(\S+)", line)
+        if include:
+            if read is not None:
+                included = posixpath.normpath(posixpath.join(posixpath.dirname(path), include.group(2)))
+                names += requirement_names(read(included), read, included)
+            continue
+        if line.startswith("-") or "://" in line or line.startswith((".", "/")):
+            continue
+        match = REQUIREMENT_NAME.match(line)
+        if match:
+            names.append(match.group(0))
+    return names
+
+
+class Stage:
+    """One FROM of a Dockerfile and the steps after it."""
+
+    def __init__(self, index, instruction, base, name):
+        self.index = index
+        self.instruction = instruction
+        self.base = base  # an image, or the Stage it is built FROM
+        self.name = name
+        self.steps = []
+        inherited = isinstance(base, Stage)
+        self.workdir = base.workdir if inherited else "/"
+        # {path in the image: context file} for the files COPY/ADD put there
+        self.container_files = dict(base.container_files) if inherited else {}
+
+
+class Step:
+    """An instruction after FROM, with what it copies and its estimated layer size."""
+
+    def __init__(self, instruction, stage):
+        self.instruction = instruction
+        self.stage = stage
+        self.files = frozenset()  # context files it copies
+        self.from_stage = None  # the Stage a COPY --from or RUN --mount=from= reads
+        self.source_steps = ()  # the steps of from_stage whose output it reads
+        self.bytes = 0
+        self.estimate = "config"
+        self.installs_dependencies = False
+
+    @property
+    def line(self):
+        return self.instruction.line
+
+
+def _context_path(source):
+    # A COPY source as a path relative to the context ("" for the whole context)
+    return posixpath.normpath("/" + source).lstrip("/")
+
+
+class Analysis:
+    """The stages, steps and build-cache behavior of one Dockerfile.
+
+    `context` is the build context directory (default: the Dockerfile's), or a
+    BuildContext to share one listing between Dockerfiles. `target` is a stage
+    name (default: the last stage).
+    """
+
+    def __init__(self, path, context=None, target=None):
+        self.path = path
+        if not isinstance(context, BuildContext):
+            context = BuildContext(context or os.path.dirname(os.path.abspath(path)))
+        self.context = context
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                instructions = parse(f.read())
+        except OSError as e:
+            raise DockerfileError(f"cannot read {path}: {e.strerror}")
+        self.stages = []
+        self._add_stages(instructions)
+        if not self.stages:
+            raise DockerfileError(f"{path} has no FROM instruction")
+        self.target = self._stage(target) if target else self.stages[-1]
+        if self.target is None:
+            raise DockerfileError(f"{path} has no stage named {target!r}")
+        self.needed = self._needed()
+        self.steps = [step for stage in self.needed for step in stage.steps]
+        self.image_steps = [step for stage in self._ancestry(self.target) for step in stage.steps]
+
+    def _stage(self, reference):
+        for stage in self.stages:
+            if stage.name == reference.lower() or str(stage.index) == reference:
+                return stage
+        return None
+
+    def _add_stages(self, instructions):
+        global_args = {}
+        stage = None
+        variables = {}
+        for instruction in instructions:
+            keyword = instruction.keyword
+            if keyword == "FROM":
+                words = _expand(instruction.arguments, global_args).split()
+                if words:
+                    name = words[2].lower() if len(words) > 2 and words[1].lower() == "as" else None
+                    stage = Stage(len(self.stages), instruction, self._stage(words[0]) or words[0], name)
+                    self.stages.append(stage)
+                    variables = {}
+            elif stage is None:
+                if keyword == "ARG":  # before the first FROM: only FROM lines see it
+                    for word in _words(instruction.arguments):
+                        name, _, default = word.partition("=")
+                        global_args[name] = default
+            else:
+                step = Step(instruction, stage)
+                self._describe(step, variables, global_args)
+                stage.steps.append(step)
+
+    def _describe(self, step, variables, global_args):
+        instruction = step.instruction
+        keyword = instruction.keyword
+        arguments = _expand(instruction.arguments, variables)
+        stage = step.stage
+        if keyword == "ARG":
+            for word in _words(arguments):
+                name, sep, value = word.partition("=")
+                variables[name] = value if sep else global_args.get(name, "")
+        elif keyword == "ENV":
+            words = _words(arguments)
+            if words and "=" in words[0]:
+                for word in words:
+                    name, _, value = word.partition("=")
+                    variables[name] = value
+            else:
+                name, _, value = arguments.partition(" ")
+                variables[name.strip()] = value.strip()
+        elif keyword == "WORKDIR":
+            stage.workdir = posixpath.join(stage.workdir, arguments.strip())
+        elif keyword in ("COPY", "ADD"):
+            self._describe_copy(step, _words(arguments))
+        elif keyword == "RUN":
+            self._describe_run(step, arguments + "\n" + "\n".join(instruction.heredocs))
+
+    def _describe_copy(self, step, words):
+        instruction = step.instruction
+        stage = step.stage
+        if instruction.heredocs or len(words) < 2:
+            step.estimate = "inline"
+            step.bytes = sum(len(body) for body in instruction.heredocs)
+            return
+        sources, destination = words[:-1], posixpath.join(stage.workdir, words[-1])
+        into_directory = len(sources) > 1 or words[-1].endswith(("/", "."))
+        source_stage = (instruction.flags.get("from") or [None])[0]
+        if source_stage:
+            step.from_stage = self._stage(source_stage)
+            if step.from_stage is None:  # an image: nothing in this build changes it
+                step.estimate = "image"
+                return
+            step.estimate = "stage"
+            # BuildKit checksums what COPY --from copies, so only a change to that content
+            # rebuilds it: context files the stage copied there, or else what its RUNs made
+            patterns = [_path_pattern(_context_path(source)) for source in sources]
+            step.files = frozenset(context_path for image_path, context_path in step.from_stage.container_files.items()
+                                   if any(pattern.match(image_path.lstrip("/")) for pattern in patterns))
+            if step.files:
+                step.bytes = sum(self.context.files[path] for path in step.files)
+            else:
+                step.source_steps = [other for ancestor in self._ancestry(step.from_stage)
+                                     for other in ancestor.steps if other.instruction.keyword == "RUN"]
+                step.bytes = sum(other.bytes for other in step.source_steps)
+            return
+        files = []
+        for source in sources:
+            if "://" in source:
+                continue  # ADD of a URL
+            source = _context_path(source)
+            matched = self.context.matching(source)
+            files += matched
+            single_file = matched == [source]
+            # Directories are copied by their contents, files and glob matches by name
+            base = posixpath.dirname(source) if single_file or any(char in source for char in "*?[") else source
+            for path in matched:
+                if single_file and not into_directory:
+                    image_path = destination
+                else:
+                    image_path = posixpath.join(destination, posixpath.relpath(path, base) if base else path)
+                stage.container_files[posixpath.normpath(image_path)] = path
+        step.files = frozenset(files)
+        step.bytes = sum(self.context.files[path] for path in step.files)
+        step.estimate = "files"
+
+    def _describe_run(self, step, script):
+        instruction = step.instruction
+        for mount in instruction.flags.get("mount", ()):
+            options = dict(option.partition("=")[::2] for option in str(mount).split(","))
+            if options.get("from"):
+                step.from_stage = self._stage(options["from"])
+                if step.from_stage is not None:
+                    step.source_steps = [other for ancestor in self._ancestry(step.from_stage)
+                                         for other in ancestor.steps]
+            elif options.get("type") == "bind":
+                step.files |= frozenset(self.context.matching(_context_path(options.get("source", "."))))
+        step.estimate = "run"
+        step.bytes = RUN_BYTES
+        if PIP_INSTALL.search(script) or PYTHON_INSTALL.search(script) or NODE_INSTALL.search(script):
+            step.installs_dependencies = True
+        if PIP_INSTALL.search(script):
+            step.estimate = "pip"
+            step.bytes = pip_install_bytes(self._pip_packages(script, step.stage)) or RUN_BYTES
+        elif NODE_INSTALL.search(script):
+            step.estimate = "node"
+            step.bytes = NODE_MODULES_BYTES
+        elif SYSTEM_INSTALL.search(script) or APT_UPDATE.search(script):
+            step.estimate = "apt"
+            packages = 0
+            for command in re.split(r"&&|\|\||;|\n", script):
+                words = _words(command.strip())
+                if "install" in words[:4] or "add" in words[:3]:
+                    verb = words.index("install") if "install" in words[:4] else words.index("add")
+                    packages += sum(1 for word in words[verb + 1:] if not word.startswith("-"))
+            step.bytes = packages * APT_PACKAGE_BYTES
+            if APT_UPDATE.search(script) and "/var/lib/apt/lists" not in script:
+                step.bytes += APT_LISTS_BYTES
+
+    def _pip_packages(self, script, stage):
+        names = []
+        for command in re.split(r"&&|\|\||;|\n", script):
+            match = PIP_INSTALL.search(command)
+            if not match:
+                continue
+            words = _words(command[match.end():].strip())
+            index = 0
+            while index < len(words):
+                word = words[index]
+                index += 1
+                requirements = None
+                if word in ("-r", "--requirement") and index < len(words):
+                    requirements = words[index]
+                    index += 1
+                elif word.startswith("--requirement="):
+                    requirements = word.partition("=")[2]
+                elif word.startswith("-r") and len(word) > 2:
+                    requirements = word[2:]
+                elif word in PIP_VALUE_OPTIONS:
+                    index += 1
+                elif not word.startswith("-") and "/" not in word and word != ".":
+                    match = REQUIREMENT_NAME.match(word)
+                    if match:
+                        names.append(match.group(0))
+                if requirements:
+                    path = self._context_file(requirements, stage)
+                    names += requirement_names(self.context.read(path), self.context.read, path) \
+                        if path else ["<requirements>"]
+        return names
+
+    def _context_file(self, path, stage):
+        # The context file that was copied to `path` in the image, or one with the same name
+        image_path = posixpath.normpath(posixpath.join(stage.workdir, path))
+        if image_path in stage.container_files:
+            return stage.container_files[image_path]
+        name = posixpath.basename(path)
+        candidates = sorted((context_path for context_path in stage.container_files.values()
+                             if posixpath.basename(context_path) == name), key=len)
+        if candidates:
+            return candidates[0]
+        return name if name in self.context.files else None
+
+    def _ancestry(self, stage):
+        # The stage and the stages it is built FROM, oldest first
+        chain = [stage]
+        while isinstance(chain[0].base, Stage):
+            chain.insert(0, chain[0].base)
+        return chain
+
+    def _needed(self):
+        needed = set()
+        pending = [self.target]
+        while pending:
+            stage = pending.pop()
+            if stage.index in needed:
+                continue
+            needed.add(stage.index)
+            if isinstance(stage.base, Stage):
+                pending.append(stage.base)
+            pending.extend(step.from_stage for step in stage.steps if step.from_stage is not None)
+        return [stage for stage in self.stages if stage.index in needed]
+
+    def rebuilt(self, changed):
+        """The steps of the needed stages that a change to the `changed` context files rebuilds."""
+        changed = set(changed)
+        rebuilt = set()
+        for stage in self.needed:
+            # A stage built FROM another starts from its last layer
+            invalid = isinstance(stage.base, Stage) and any(step in rebuilt for step in stage.base.steps)
+            for step in stage.steps:
+                if not invalid and (step.files & changed or any(source in rebuilt for source in step.source_steps)):
+                    invalid = True
+                if invalid:
+                    rebuilt.add(step)
+        return rebuilt
+
+    def scenario(self, changed):
+        """What editing the `changed` context files rebuilds: steps, and bytes of the image's layers."""
+        rebuilt = self.rebuilt(changed)
+        first = min(rebuilt, key=lambda step: self.steps.index(step)) if rebuilt else None
+        return {
+            "changed": sorted(changed),
+            "first_rebuilt": None if first is None else {"line": first.line, "instruction": first.instruction.text()},
+            "rebuilt_steps": len(rebuilt),
+            "rebuilt_bytes": sum(step.bytes for step in self.image_steps if step in rebuilt),
+        }
+
+    def scenarios(self):
+        """One scenario per group of context files that invalidate the same steps.
+
+        Files copied by the same COPY/ADD steps rebuild the same layers, so each
+        group is simulated once, with `files` the number of files in it. Files no
+        step copies are left out: changing them rebuilds nothing.
+        """
+        groups = {}
+        for path in self.context.files:
+            signature = tuple(index for index, step in enumerate(self.steps) if path in step.files)
+            if signature:
+                groups.setdefault(signature, []).append(path)
+        scenarios = []
+        for signature, paths in groups.items():
+            paths.sort(key=_example_order)
+            scenario = self.scenario([paths[0]])
+            scenario["files"] = len(paths)
+            scenario["examples"] = paths[:3]
+            scenarios.append(scenario)
+        return sorted(scenarios, key=lambda scenario: (-scenario["rebuilt_steps"], -scenario["rebuilt_bytes"]))
+
+    def cache_busts(self):
+        """Dependency installs rebuilt by changes to files other than the dependency manifests.
+
+        One warning per install step whose stage (or a stage it is built FROM) copied
+        such files before it: editing any of them reinstalls every dependency.
+        """
+        warnings = []
+        for stage in self.needed:
+            copied = []  # (step, files other than manifests) so far, from the oldest ancestor on
+            for step in (step for ancestor in self._ancestry(stage) for step in ancestor.steps):
+                others = [path for path in step.files if not DEPENDENCY_MANIFESTS.search(path)]
+                if others:
+                    copied.append((step, others))
+                if step.stage is stage and step.installs_dependencies and copied:
+                    busting, files = copied[0]
+                    warnings.append({
+                        "line": step.line,
+                        "install": step.instruction.text(),
+                        "bytes": step.bytes,
+                        "copy_line": busting.line,
+                        "copy": busting.instruction.text(),
+                        "files": len(files),
+                        "examples": sorted(files, key=_example_order)[:3],
+                    })
+        return warnings
+
+    def to_json(self):
+        return {
+            "dockerfile": self.path,
+            "context": self.context.root,
+            "target": self.target.name or str(self.target.index),
+            "steps": [{"line": step.line, "instruction": step.instruction.text(), "stage": step.stage.index,
+                       "bytes": step.bytes, "estimate": step.estimate, "in_image": step in self.image_steps}
+                      for step in self.steps],
+            "image_bytes": sum(step.bytes for step in self.image_steps),
+        }
+
+
+def find_dockerfiles(root):
+    """Dockerfiles under `root`: Dockerfile, Dockerfile.* / Dockerfile-*, *.Dockerfile."""
+    found = []
+    for directory, subdirectories, names in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories
+                                   if name not in (".git", "node_modules", "__pycache__"))
+        for name in sorted(names):
+            lower = name.lower()
+            if lower == "dockerfile" or lower.startswith(("dockerfile.", "dockerfile-")) or \
+                    lower.endswith(".dockerfile"):
+                found.append(os.path.join(directory, name))
+    return found
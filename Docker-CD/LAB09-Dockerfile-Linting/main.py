@@ -1 +1,151 @@
-print("Hello from dummy main.py") 
\ No newline at end of file
+#!/usr/bin/env python3
+"""Show how well Dockerfiles use the build cache, and what an edit rebuilds.
+
+Usage:
+    python main.py Dockerfile-to-lint
+    python main.py ../LAB04-Multi-Stage-Dockerfile-Builds/Dockerfile.prod --layers
+    python main.py ../LAB06-Service-Health-Checks/app/Dockerfile --changed main.py
+    python main.py ../.. --strict      # every Dockerfile in the repository
+
+The files of each Dockerfile's build context (its directory, or --context) are
+grouped by the COPY/ADD steps that copy them. For each group, the report shows
+the first step that editing one of its files rebuilds, how many steps are
+rebuilt, and how many bytes of the image's layers change (what a deploy pushes
+and pulls). --changed shows one change set instead, with paths relative to the
+context; repeat it for each edited file. A path that is not in the context is an
+error.
+
+A warning is printed for every dependency install (pip, poetry, npm, ...) that
+runs after a COPY of files other than the dependency manifests, because editing
+any of those files reinstalls every dependency. --strict exits with 1 when there
+is such a warning, or a Dockerfile that cannot be analyzed (such as the LAB01
+template, which has no FROM yet). build_cache.py explains how the layers are
+sized.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from build_cache import Analysis, BuildContext, DockerfileError, find_dockerfiles
+
+INSTRUCTION_WIDTH = 44
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
+
+
+def _edited(scenario):
+    if "files" not in scenario:
+        return ", ".join(scenario["changed"])
+    more = scenario["files"] - 1
+    return scenario["examples"][0] + (f" (+{more} more)" if more else "")
+
+
+def _in_context(path):
+    path = os.path.normpath(path)
+    return not os.path.isabs(path) and path != ".." and not path.startswith(".." + os.sep)
+
+
+def print_analysis(analysis, scenarios, warnings, layers=False):
+    image_bytes = sum(step.bytes for step in analysis.image_steps)
+    target = analysis.target.name or analysis.target.index
+    print(f"\n{os.path.relpath(analysis.path)} (target stage {target}, {len(analysis.steps)} steps, "
+          f"~{format_bytes(image_bytes)} of layers above the base image)")
+    if layers:
+        print(f"  {'Line':>4}  {'Step':<{INSTRUCTION_WIDTH}}  {'Estimate':<8} {'Bytes':>9}")
+        for stage in analysis.needed:
+            print(f"  {stage.instruction.line:>4}  {stage.instruction.text(INSTRUCTION_WIDTH)}")
+            for step in stage.steps:
+                size = format_bytes(step.bytes) if step.estimate != "config" else ""
+                print(f"  {step.line:>4}    {step.instruction.text(INSTRUCTION_WIDTH - 2):<{INSTRUCTION_WIDTH - 2}}"
+                      f"  {step.estimate:<8} {size:>9}")
+    if not scenarios:
+        print("  No step copies files from the build context.")
+    else:
+        print(f"  {'Edited':<28} {'Files':>5}  {'First rebuilt step':<{INSTRUCTION_WIDTH + 6}} {'Steps':>6} "
+              f"{'Bytes':>9}")
+        for scenario in scenarios:
+            first = scenario["first_rebuilt"]
+            step = f"line {first['line']:<4} {first['instruction']}" if first else "nothing"
+            step = step if len(step) <= INSTRUCTION_WIDTH + 6 else step[:INSTRUCTION_WIDTH + 5] + "…"
+            files = scenario.get("files", len(scenario["changed"]))
+            print(f"  {_edited(scenario)[:28]:<28} {files:>5}  {step:<{INSTRUCTION_WIDTH + 6}} "
+                  f"{scenario['rebuilt_steps']:>2}/{len(analysis.steps):<3} {format_bytes(scenario['rebuilt_bytes']):>9}")
+    for warning in warnings:
+        examples = ", ".join(warning["examples"]) + (", ..." if warning["files"] > len(warning["examples"]) else "")
+        print(f"  Warning: line {warning['line']} `{warning['install']}` (~{format_bytes(warning['bytes'])}) "
+              f"is rebuilt whenever one of the {warning['files']} files besides the dependency manifests that "
+              f"line {warning['copy_line']} `{warning['copy']}` copies changes ({examples}). Copy only the "
+              f"manifests before the install, and the rest after it.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=["."], metavar="PATH",
+                        help="Dockerfiles, or directories to search for them (default: .)")
+    parser.add_argument("--context", help="build context directory (default: each Dockerfile's directory)")
+    parser.add_argument("--target", help="stage to build (default: the last one)")
+    parser.add_argument("--changed", action="append", metavar="FILE",
+                        help="show what editing this file (relative to the context) rebuilds; repeat for a "
+                             "change set")
+    parser.add_argument("--layers", action="store_true", help="list every step with its estimated size")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--strict", action="store_true", help="exit with 1 if a dependency install is cache-busted")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    dockerfiles = []
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"Error: {path} does not exist")
+            return 1
+        dockerfiles += find_dockerfiles(path) if os.path.isdir(path) else [path]
+    if not dockerfiles:
+        print(f"Error: no Dockerfiles found in {' '.join(args.paths)}")
+        return 1
+
+    contexts = {}  # Dockerfiles in the same directory share one listing of their context
+    results = []
+    errors = 0
+    warned = 0
+    for dockerfile in dockerfiles:
+        root = os.path.abspath(args.context or os.path.dirname(dockerfile) or ".")
+        if root not in contexts:
+            contexts[root] = BuildContext(root)
+        missing = [path for path in args.changed or ()
+                   if not _in_context(path) or not os.path.exists(os.path.join(root, path))]
+        if missing:
+            print(f"Error: {', '.join(missing)} not in the build context {os.path.relpath(root)} of {dockerfile}")
+            return 1
+        try:
+            analysis = Analysis(dockerfile, contexts[root], args.target)
+        except DockerfileError as e:
+            errors += 1
+            if not args.json:
+                print(f"\nError: {e}")
+            continue
+        scenarios = [analysis.scenario(args.changed)] if args.changed else analysis.scenarios()
+        warnings = analysis.cache_busts()
+        warned += bool(warnings)
+        if args.json:
+            results.append(dict(analysis.to_json(), scenarios=scenarios, warnings=warnings))
+        else:
+            print_analysis(analysis, scenarios, warnings, args.layers)
+
+    if args.json:
+        print(json.dumps(results, indent=1))
+    elif len(dockerfiles) > 1:
+        print(f"\n{len(dockerfiles)} Dockerfiles analyzed in {(time.perf_counter() - started) * 1000:.0f} ms: "
+              f"{warned} with a cache-busted dependency install, {errors} could not be analyzed")
+    return 1 if args.strict and (errors or warned) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
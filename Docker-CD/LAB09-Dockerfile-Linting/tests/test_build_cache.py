@@ -0,0 +1,164 @@
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to allow direct import of build_cache
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import build_cache
+from build_cache import Analysis, BuildContext, DockerfileError, parse, pip_install_bytes, requirement_names
+
+def make_context(root, dockerfile, files):
+    for path, content in files.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(content)
+    (root / 'Dockerfile').write_text(dockerfile)
+    return str(root / 'Dockerfile')
+
+def lines(steps):
+    return sorted(step.line for step in steps)
+
+GOOD = """FROM python:3.9-slim
+WORKDIR /app
+COPY requirements.txt .
+RUN pip install --no-cache-dir -r requirements.txt
+COPY . .
+CMD ["python", "main.py"]
+"""
+
+BAD = """FROM python:3.9-slim
+WORKDIR /app
+COPY . .
+RUN pip install --no-cache-dir -r requirements.txt
+CMD ["python", "main.py"]
+"""
+
+APP = {'requirements.txt': 'not-installed-package==1.0\n', 'main.py': 'print("hi")\n', 'lib/util.py': 'x = 1\n'}
+
+def test_parse_continuations_comments_and_heredocs():
+    """Test that continuations skip comment lines, flags are split off and heredoc bodies are kept."""
+    instructions = parse(
+        "# syntax=docker/dockerfile:1\n"
+        "FROM --platform=linux/amd64 python:3.9 AS build\n"
+        "RUN apt-get update && \\\n"
+        "    # a comment inside the continuation\n"
+        "    apt-get install -y gcc\n"
+        "COPY --chown=app:app --from=build /src /dst\n"
+        "RUN <<EOF\n"
+        "pip install flask\n"
+        "EOF\n"
+        "cmd [\"python\"]\n")
+    assert [(i.line, i.keyword) for i in instructions] == [(2, 'FROM'), (3, 'RUN'), (6, 'COPY'), (7, 'RUN'), (10, 'CMD')]
+    assert instructions[0].flags == {'platform': ['linux/amd64']}
+    assert instructions[1].arguments == "apt-get update &&     apt-get install -y gcc"
+    assert instructions[2].flags == {'chown': ['app:app'], 'from': ['build']}
+    assert instructions[3].heredocs == ['pip install flask']
+
+def test_dockerignore_and_copy_sources(tmp_path):
+    """Test that ignored files are not in the context and sources match files, directories and globs."""
+    make_context(tmp_path, GOOD, dict(APP, **{'.dockerignore': '*.md\nlib/**\n!lib/keep.py\n',
+                                              'README.md': 'docs', 'lib/keep.py': ''}))
+    context = BuildContext(str(tmp_path))
+    assert sorted(context.files) == ['.dockerignore', 'Dockerfile', 'lib/keep.py', 'main.py', 'requirements.txt']
+    assert context.matching('lib') == ['lib/keep.py']
+    assert sorted(context.matching('*.txt')) == ['requirements.txt']
+    assert len(context.matching('')) == len(context.files)
+
+def test_code_edit_keeps_the_install_cached(tmp_path):
+    """Test that editing code rebuilds from the last COPY only when the requirements are copied first."""
+    analysis = Analysis(make_context(tmp_path, GOOD, APP))
+    assert lines(analysis.rebuilt(['main.py'])) == [5, 6]
+    assert lines(analysis.rebuilt(['requirements.txt'])) == [3, 4, 5, 6]
+    assert analysis.rebuilt(['not/in/the/context.py']) == set()
+    assert analysis.cache_busts() == []
+
+    scenario = analysis.scenario(['lib/util.py'])
+    assert scenario['first_rebuilt']['line'] == 5 and scenario['rebuilt_steps'] == 2
+    assert scenario['rebuilt_bytes'] == sum(len(content) for content in APP.values()) + len(GOOD)
+
+def test_copy_everything_before_install_is_flagged(tmp_path):
+    """Test that an install after COPY . . is rebuilt by every code edit and reported."""
+    analysis = Analysis(make_context(tmp_path, BAD, APP))
+    assert lines(analysis.rebuilt(['main.py'])) == [3, 4, 5]
+    [warning] = analysis.cache_busts()
+    assert (warning['line'], warning['copy_line'], warning['files']) == (4, 3, 3)
+    assert warning['examples'][0] == 'main.py'  # code before the Dockerfile
+    assert warning['bytes'] == build_cache.PIP_PACKAGE_BYTES
+
+def test_scenarios_group_files_by_the_steps_that_copy_them(tmp_path):
+    """Test that one scenario is reported per group of files copied by the same steps."""
+    analysis = Analysis(make_context(tmp_path, GOOD, APP))
+    scenarios = analysis.scenarios()
+    assert [(s['examples'][0], s['files'], s['rebuilt_steps']) for s in scenarios] == [
+        ('requirements.txt', 1, 4), ('main.py', 3, 2)]
+
+def test_multi_stage_copy_from_rebuilds_only_what_changed(tmp_path):
+    """Test that COPY --from is rebuilt only when the content it copies changed, and unused stages are skipped."""
+    dockerfile = """FROM python:3.9 AS builder
+WORKDIR /build
+COPY requirements.txt .
+RUN pip install --prefix=/install -r requirements.txt
+COPY . .
+
+FROM node:20 AS unused
+COPY . .
+RUN npm ci
+
+FROM python:3.9-slim
+COPY --from=builder /install /usr/local
+COPY --from=builder /build/main.py /app/
+CMD ["python", "/app/main.py"]
+"""
+    analysis = Analysis(make_context(tmp_path, dockerfile, APP))
+    assert [stage.name for stage in analysis.needed] == ['builder', None]
+    assert lines(analysis.rebuilt(['lib/util.py'])) == [5]
+    assert lines(analysis.rebuilt(['main.py'])) == [5, 13, 14]
+    assert lines(analysis.rebuilt(['requirements.txt'])) == [3, 4, 5, 12, 13, 14]
+    assert analysis.scenario(['lib/util.py'])['rebuilt_bytes'] == 0  # not in the final image
+    assert analysis.cache_busts() == []  # the npm ci after COPY . . is in a stage the target skips
+
+    builder = Analysis(make_context(tmp_path, dockerfile, APP), target='builder')
+    assert [stage.name for stage in builder.needed] == ['builder']
+
+def test_stage_based_on_a_busted_stage(tmp_path):
+    """Test that an install in a stage built FROM a stage that copied the code is flagged too."""
+    dockerfile = "FROM python:3.9 AS base\nCOPY . /app\n\nFROM base\nRUN pip install -r /app/requirements.txt\n"
+    analysis = Analysis(make_context(tmp_path, dockerfile, APP))
+    [warning] = analysis.cache_busts()
+    assert (warning['line'], warning['copy_line']) == (5, 2)
+    assert lines(analysis.rebuilt(['main.py'])) == [2, 5]
+
+def test_requirements_and_installed_package_sizes():
+    """Test requirement parsing and that installed packages are sized with their dependencies."""
+    text = "# comment\nFlask>=2.0  # web\n-r other.txt\n-e .\nredis[hiredis]==5.0 ; python_version > '3'\n"
+    assert requirement_names(text) == ['Flask', 'redis']
+    assert requirement_names(text, read=lambda path: 'gunicorn\n' if path == 'other.txt' else '') == \
+        ['Flask', 'gunicorn', 'redis']
+    assert pip_install_bytes(['flask']) > pip_install_bytes(['werkzeug']) > 0
+    assert pip_install_bytes(['surely-not-an-installed-package']) == build_cache.PIP_PACKAGE_BYTES
+
+def test_apt_estimate_and_variables(tmp_path):
+    """Test the apt estimate and ARG/ENV expansion in COPY sources and WORKDIR."""
+    dockerfile = """ARG BASE=python:3.9
+FROM $BASE
+ARG SRC=lib
+ENV APP_HOME=/srv
+WORKDIR ${APP_HOME}/app
+RUN apt-get update && apt-get install -y --no-install-recommends gcc libpq-dev
+COPY ${SRC}/ ./lib/
+"""
+    analysis = Analysis(make_context(tmp_path, dockerfile, APP))
+    apt, copy = analysis.steps[3], analysis.steps[4]
+    assert apt.bytes == 2 * build_cache.APT_PACKAGE_BYTES + build_cache.APT_LISTS_BYTES
+    assert copy.files == {'lib/util.py'}
+    assert analysis.target.container_files == {'/srv/app/lib/util.py': 'lib/util.py'}
+
+def test_errors(tmp_path):
+    """Test that a Dockerfile without FROM, a missing file or an unknown target is an error."""
+    with pytest.raises(DockerfileError):
+        Analysis(make_context(tmp_path, "# TODO_BASE_IMAGE\n", {}))
+    with pytest.raises(DockerfileError):
+        Analysis(str(tmp_path / 'missing'))
+    with pytest.raises(DockerfileError):
+        Analysis(make_context(tmp_path, GOOD, APP), target='nope')
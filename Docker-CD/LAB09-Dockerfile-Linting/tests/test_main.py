@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+# Add the parent directory to sys.path to allow direct import of main
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import format_bytes, main
+
+LAB = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DOCKERFILE = os.path.join(LAB, 'Dockerfile-to-lint')
+
+def test_format_bytes():
+    """Test that sizes are printed in the largest unit below 1024."""
+    assert format_bytes(512) == '512 B'
+    assert format_bytes(1536) == '1.5 KB'
+    assert format_bytes(12.5 * 1024 * 1024) == '12.5 MB'
+
+def test_dockerfile_to_lint_is_reported(capsys):
+    """Test that the lab's Dockerfile is reported for installing after ADD . /app, and fails with --strict."""
+    assert main([DOCKERFILE, '--layers']) == 0
+    output = capsys.readouterr().out
+    assert 'Warning: line 18 `RUN pip install -r /app/requirements.txt`' in output
+    assert 'line 15 `ADD . /app`' in output
+    assert main([DOCKERFILE, '--strict']) == 1
+
+def test_changed_files_as_json(capsys):
+    """Test that --changed reports one scenario per Dockerfile in the JSON output."""
+    assert main([DOCKERFILE, '--json', '--changed', 'main.py']) == 0
+    [result] = json.loads(capsys.readouterr().out)
+    [scenario] = result['scenarios']
+    assert scenario['changed'] == ['main.py']
+    assert scenario['first_rebuilt']['line'] == 15
+    assert [warning['line'] for warning in result['warnings']] == [18]
+
+def test_missing_path(capsys):
+    """Test that a path that does not exist is an error."""
+    assert main([os.path.join(LAB, 'no-such-Dockerfile')]) == 1
+    assert 'does not exist' in capsys.readouterr().out
+
+def test_changed_is_repeatable_and_checked(capsys):
+    """Test that --changed can be repeated and that a path outside the build context is an error."""
+    assert main([DOCKERFILE, '--json', '--changed', 'main.py', '--changed', 'requirements.txt']) == 0
+    [result] = json.loads(capsys.readouterr().out)
+    assert result['scenarios'][0]['changed'] == ['main.py', 'requirements.txt']
+
+    assert main(['--changed', 'requirements.txt', DOCKERFILE]) == 0  # the Dockerfile is not taken as a changed file
+    capsys.readouterr()
+    assert main([DOCKERFILE, '--changed', '../LAB04-Multi-Stage-Dockerfile-Builds/Dockerfile.prod']) == 1
+    assert 'not in the build context' in capsys.readouterr().out
@@ -0,0 +1,78 @@
+from flask import Flask, jsonify, request
+import os
+
+from ingester import LogIngester
+from store import SegmentStore, parse_ts
+from tailer import ContainerLogTailer
+from instrumentation.request_metrics import RequestMetrics
+from instrumentation.server import serve
+
+app = Flask(__name__)
+
+# Request count, latency, response size and in-flight requests per route, served at
+# /metrics for Prometheus (see instrumentation/request_metrics.py). With several gunicorn
+# workers, set PROMETHEUS_MULTIPROC_DIR to a shared directory so /metrics covers all of them.
+metrics = RequestMetrics.from_env(app)
+
+# Tails the json-file logs Docker writes for each container (mounted read-only from
+# the host), indexes them into an append-only segment store under STORE_DIR and
+# answers searches over them. LOG_SERVICES limits tailing to some compose services.
+LOG_ROOT = os.environ.get("LOG_ROOT", "/var/lib/docker/containers")
+STORE_DIR = os.environ.get("STORE_DIR", "/data")
+services = [s for s in os.environ.get("LOG_SERVICES", "").split(",") if s.strip()]
+
+store = SegmentStore(STORE_DIR, segment_lines=int(os.environ.get("SEGMENT_LINES", 50000)))
+ingester = LogIngester(
+    ContainerLogTailer(LOG_ROOT, services=services or None),
+    store,
+    interval=float(os.environ.get("POLL_INTERVAL", 0.5)),
+    checkpoint_path=os.path.join(STORE_DIR, "checkpoint.json"),
+)
+
+def time_arg(name):
+    # Accepts epoch seconds or an ISO 8601 UTC timestamp
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        ts = parse_ts(value)
+        if ts is None:
+            raise ValueError(f"{name} must be epoch seconds or an ISO 8601 UTC timestamp, got {value!r}")
+        return ts
+
+@app.before_request
+def start_ingester():
+    ingester.start()
+
+@app.route('/search')
+def search():
+    # /search?start=...&end=...&service=service1&level=ERROR&route=/health&q=words&limit=100
+    try:
+        records = store.search(
+            start=time_arg("start"),
+            end=time_arg("end"),
+            q=request.args.get("q"),
+            limit=min(int(request.args.get("limit", 100)), 10000),
+            service=request.args.get("service"),
+            level=request.args.get("level"),
+            route=request.args.get("route"),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(count=len(records), records=records)
+
+@app.route('/stats')
+def stats():
+    return jsonify(ingester.stats())
+
+@app.route('/health')
+def health():
+    return "Log aggregator is healthy!", 200
+
+if __name__ == '__main__':
+    # One worker process, so the ingester is the only writer to the store; requests
+    # are served by that worker's threads (see instrumentation/server.py for the WSGI_* settings)
+    serve(app, "app:app", port=int(os.environ.get("FLASK_RUN_PORT", 5002)), workers=1,
+          on_worker_start=ingester.start)
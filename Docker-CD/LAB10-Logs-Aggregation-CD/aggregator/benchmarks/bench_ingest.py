@@ -0,0 +1,86 @@
+"""Ingestion rate (lines/second, one core) and search latency of the log aggregator.
+
+Writes json-file logs for two fake containers in the layout Docker uses, in the
+format service1/service2 log in, then ingests them into a fresh store:
+
+    python benchmarks/bench_ingest.py --lines 500000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from store import SegmentStore
+from tailer import ContainerLogTailer
+
+MESSAGES = [
+    ("/", "Service 1 received a request at the root endpoint."),
+    ("/health", "Service 1 health check accessed."),
+    ("/", "request completed"),
+    ("/health", "request completed"),
+]
+
+
+def write_container_logs(root, container_id, service, lines, start):
+    container_dir = os.path.join(root, container_id)
+    os.makedirs(container_dir)
+    with open(os.path.join(container_dir, "config.v2.json"), "w") as f:
+        json.dump({"Name": f"/lab10-{service}-1", "Config": {"Labels": {"com.docker.compose.service": service}}}, f)
+    with open(os.path.join(container_dir, f"{container_id}-json.log"), "w") as f:
+        for i in range(lines):
+            when = start + timedelta(microseconds=i * 1000)
+            route, message = MESSAGES[i % len(MESSAGES)]
+            record = {"ts": when.isoformat(timespec="milliseconds"), "level": "ERROR" if i % 1000 == 0 else "INFO",
+                      "service": service, "logger": "app", "message": message,
+                      "request_id": f"{i:032x}", "route": route}
+            if message == "request completed":
+                record.update(method="GET", status=200, latency_ms=0.2)
+            docker_time = when.strftime("%Y-%m-%dT%H:%M:%S.%f") + "123Z"
+            f.write(json.dumps({"log": json.dumps(record) + "\n", "stream": "stdout", "time": docker_time}) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=500000, help="total lines, split over two containers")
+    parser.add_argument("--segment-lines", type=int, default=50000)
+    args = parser.parse_args()
+
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "containers")
+        write_container_logs(root, "a" * 64, "service1", args.lines // 2, start)
+        write_container_logs(root, "b" * 64, "service2", args.lines // 2, start)
+
+        store = SegmentStore(os.path.join(tmp, "store"), segment_lines=args.segment_lines)
+        tailer = ContainerLogTailer(root)
+        cpu_started, started = time.process_time(), time.perf_counter()
+        ingested = tailer.poll(store.append_lines)
+        store.flush()
+        elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+        print(f"ingested {ingested} lines in {elapsed:.2f}s: {ingested / elapsed:,.0f} lines/s "
+              f"({ingested / cpu:,.0f} lines per CPU second), {store.stats()['segments']} segments")
+
+        middle = start.timestamp() + args.lines // 4 / 1000
+        queries = [
+            ("keyword, all time", dict(q="health check")),
+            ("service+level, all time", dict(service="service2", level="ERROR")),
+            ("route+keyword, 10s window", dict(route="/", q="completed", start=middle, end=middle + 10)),
+            ("time only, 1s window", dict(start=middle, end=middle + 1)),
+        ]
+        print(f"{'query':<30} {'results':>8} {'ms':>8}")
+        for name, query in queries:
+            runs = 20
+            began = time.perf_counter()
+            for _ in range(runs):
+                results = store.search(limit=100, **query)
+            print(f"{name:<30} {len(results):>8} {(time.perf_counter() - began) / runs * 1000:>8.2f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
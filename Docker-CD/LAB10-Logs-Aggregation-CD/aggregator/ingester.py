@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LogIngester:
+    """Moves new container log lines from a ContainerLogTailer into a SegmentStore.
+
+    A daemon thread polls every `interval` seconds. After each poll the store is
+    flushed and the tailer's positions are written to `checkpoint_path`, so after
+    a restart tailing resumes where the stored lines end.
+    """
+
+    def __init__(self, tailer, store, interval=0.5, checkpoint_path=None):
+        self.tailer = tailer
+        self.store = store
+        self.interval = float(interval)
+        self.checkpoint_path = checkpoint_path
+        self.polls = 0
+        self.lines = 0
+        self.errors = 0
+        self.last_poll_seconds = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                tailer.restore(json.load(f))
+
+    def start(self):
+        """Start the ingest thread in this process (safe to call repeatedly and after fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            threading.Thread(target=self._run, args=(self._stop,), name="log-ingest", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, stop):
+        while True:
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Log ingestion failed: {e}")
+            if stop.wait(self.interval):
+                return
+
+    def poll_once(self):
+        started = time.perf_counter()
+        lines = self.tailer.poll(self.store.append_lines)
+        if lines:
+            self.store.flush()
+            self.save_checkpoint()
+        self.polls += 1
+        self.lines += lines
+        self.last_poll_seconds = time.perf_counter() - started
+        return lines
+
+    def save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.tailer.checkpoint(), f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def stats(self):
+        return {"polls": self.polls, "lines_ingested": self.lines, "errors": self.errors,
+                "last_poll_seconds": self.last_poll_seconds, "store": self.store.stats()}
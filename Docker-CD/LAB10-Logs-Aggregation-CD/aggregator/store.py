@@ -0,0 +1,369 @@
+import bisect
+import calendar
+import functools
+import glob
+import json
+import os
+import re
+import threading
+
+# Fields with an inverted index, besides the words of the message
+INDEXED_FIELDS = ("service", "level", "route")
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+_second_cache = {}
+
+
+def parse_ts(value):
+    """Epoch seconds for an ISO 8601 UTC timestamp.
+
+    Handles both Docker's "2026-01-02T03:04:05.123456789Z" and the services'
+    "2026-01-02T03:04:05.123+00:00". The whole-second part is cached, since
+    consecutive lines mostly share it.
+    """
+    if not value or len(value) < 19:
+        return None
+    second = value[:19]
+    base = _second_cache.get(second)
+    if base is None:
+        try:
+            base = calendar.timegm((int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                    int(value[11:13]), int(value[14:16]), int(value[17:19]), 0, 0, 0))
+        except ValueError:
+            return None
+        if len(_second_cache) > 4096:
+            _second_cache.clear()
+        _second_cache[second] = base
+    if len(value) > 20 and value[19] == ".":
+        return base + float(value[19:].partition("+")[0].rstrip("Z"))
+    return base
+
+
+@functools.lru_cache(maxsize=8192)
+def tokenize(text):
+    # Cached: log messages repeat a lot
+    return frozenset(_TOKEN.findall(text.lower()))
+
+
+_scan_json = json.JSONDecoder().scan_once
+
+
+def _decode_json(text):
+    # json.loads without its whitespace handling and Python-level wrappers: the
+    # lines are compact JSON, and this runs twice for every ingested line
+    try:
+        value, end = _scan_json(text, 0)
+    except StopIteration:
+        raise ValueError("Expecting value") from None
+    if end != len(text) and text[end:].strip():
+        raise ValueError("Extra data")
+    return value
+
+
+def parse_line(service, line):
+    """A record dict from one json-file log line of a container.
+
+    The services log JSON objects (see instrumentation/structured_logging.py), whose
+    fields are kept; any other output becomes {"message": ...}. Every record gets
+    `service`, `stream` and `ts` (falling back to Docker's receive time).
+    """
+    outer = _decode_json(line.decode() if isinstance(line, bytes) else line)
+    log = outer.get("log", "").rstrip("\n")
+    record = None
+    if log.startswith("{"):
+        try:
+            record = _decode_json(log)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            record = None
+    if record is None:
+        record = {"message": log}
+    record.setdefault("service", service)
+    record["stream"] = outer.get("stream")
+    if "ts" not in record:
+        record["ts"] = outer.get("time")
+    return record
+
+
+class Segment:
+    """One append-only file of log lines, with its indexes.
+
+    Each line is `<service>\\t<json-file line>`. Record ids are line numbers.
+    - `times`/`offsets`: timestamp and byte offset of each record
+    - `postings`: field -> value -> sorted record ids, for INDEXED_FIELDS and "term"
+      (the words of the message)
+    - `by_time`: (ts, id) pairs sorted by time; built when the segment is sealed,
+      so time ranges within it are found with a binary search
+    """
+
+    # Distinct (service, level, route, message) tuples whose posting lists are kept
+    # at hand while writing; above this, the lists are looked up again
+    POSTING_CACHE_SIZE = 4096
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path[:-len(".log")] + ".idx.json"
+        self.times = []
+        self.offsets = []
+        self.postings = {field: {} for field in INDEXED_FIELDS + ("term",)}
+        self.min_ts = None
+        self.max_ts = None
+        self.by_time = None
+        self.size = 0
+        self._file = None
+        self._posting_cache = {}
+
+    @property
+    def sealed(self):
+        return self.by_time is not None
+
+    def __len__(self):
+        return len(self.times)
+
+    def open_for_append(self):
+        self._file = open(self.path, "ab")
+        self.size = self._file.tell()
+
+    def append(self, prefix, raw, record):
+        """Writes one line; `prefix` is the encoded `<service>\\t`."""
+        data = prefix + raw + b"\n"
+        self._file.write(data)
+        self._index(record, self.size)
+        self.size += len(data)
+
+    def _index(self, record, offset):
+        record_id = len(self.times)
+        ts = parse_ts(record.get("ts")) or 0.0
+        self.times.append(ts)
+        self.offsets.append(offset)
+        if self.min_ts is None:
+            self.min_ts = self.max_ts = ts
+        elif ts < self.min_ts:
+            self.min_ts = ts
+        elif ts > self.max_ts:
+            self.max_ts = ts
+        # Most lines share their service, level, route and message with many others,
+        # so the posting lists they go in are looked up once per combination
+        key = (record.get("service"), record.get("level"), record.get("route"), record.get("message", ""))
+        try:
+            lists = self._posting_cache.get(key)
+        except TypeError:  # a field that is a JSON object or array
+            key = None
+            lists = None
+        if lists is None:
+            lists = self._posting_lists(record)
+            if key is not None:
+                if len(self._posting_cache) >= self.POSTING_CACHE_SIZE:
+                    self._posting_cache.clear()
+                self._posting_cache[key] = lists
+        for ids in lists:
+            ids.append(record_id)
+
+    def _posting_lists(self, record):
+        # The lists a record's id is appended to, created if they are new
+        postings = self.postings
+        lists = []
+        for field in INDEXED_FIELDS:
+            value = record.get(field)
+            if value is not None:
+                lists.append(postings[field].setdefault(str(value), []))
+        terms = postings["term"]
+        for term in tokenize(str(record.get("message", ""))):
+            lists.append(terms.setdefault(term, []))
+        return lists
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def seal(self):
+        """Closes the file and writes the index next to it."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._posting_cache = {}
+        self.by_time = sorted(zip(self.times, range(len(self.times))))
+        index = {"times": self.times, "offsets": self.offsets, "postings": self.postings,
+                 "min_ts": self.min_ts, "max_ts": self.max_ts, "size": self.size}
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            # json.dumps uses the C encoder; json.dump(index, f) would not
+            f.write(json.dumps(index, separators=(",", ":")))
+        os.replace(tmp, self.index_path)
+
+    @classmethod
+    def load(cls, path):
+        segment = cls(path)
+        with open(segment.index_path) as f:
+            index = json.load(f)
+        segment.times = index["times"]
+        segment.offsets = index["offsets"]
+        segment.postings = index["postings"]
+        segment.min_ts = index["min_ts"]
+        segment.max_ts = index["max_ts"]
+        segment.size = index["size"]
+        segment.by_time = sorted(zip(segment.times, range(len(segment.times))))
+        return segment
+
+    @classmethod
+    def recover(cls, path):
+        # An unsealed segment has no index; rebuild it by re-reading its lines
+        segment = cls(path)
+        with open(path, "rb") as f:
+            for data in f:
+                if not data.endswith(b"\n"):
+                    break  # torn final write
+                service, _, raw = data.rstrip(b"\n").partition(b"\t")
+                segment._index(parse_line(service.decode(), raw), segment.size)
+                segment.size += len(data)
+        segment.open_for_append()
+        segment._file.truncate(segment.size)
+        return segment
+
+    def overlaps(self, start, end):
+        if self.min_ts is None:
+            return False
+        return (start is None or self.max_ts >= start) and (end is None or self.min_ts <= end)
+
+    def candidates(self, filters, terms, start, end):
+        """Record ids matching every filter and term, within [start, end]."""
+        lists = []
+        for field, value in filters.items():
+            lists.append(self.postings[field].get(str(value), []))
+        for term in terms:
+            lists.append(self.postings["term"].get(term, []))
+        ids = None
+        for posting in sorted(lists, key=len):
+            # Intersect the shortest lists first
+            ids = set(posting) if ids is None else ids.intersection(posting)
+            if not ids:
+                return []
+        if start is None and end is None:
+            return sorted(ids) if ids is not None else range(len(self.times))
+        low = float("-inf") if start is None else start
+        high = float("inf") if end is None else end
+        if self.by_time is not None and (ids is None or len(ids) > 64):
+            # Binary search the sorted time index instead of checking every candidate
+            lo = bisect.bisect_left(self.by_time, (low, -1))
+            hi = bisect.bisect_right(self.by_time, (high, len(self.times)))
+            in_range = [record_id for _, record_id in self.by_time[lo:hi]]
+            return sorted(in_range) if ids is None else sorted(ids.intersection(in_range))
+        times = self.times
+        pool = range(len(times)) if ids is None else sorted(ids)
+        return [record_id for record_id in pool if low <= times[record_id] <= high]
+
+    def read(self, record_ids):
+        """The records with these ids, in the given order."""
+        self.flush()
+        lines = {}
+        with open(self.path, "rb") as f:
+            for record_id in sorted(record_ids, key=self.offsets.__getitem__):
+                f.seek(self.offsets[record_id])
+                lines[record_id] = f.readline().rstrip(b"\n")
+        records = []
+        for record_id in record_ids:
+            service, _, raw = lines[record_id].partition(b"\t")
+            records.append(parse_line(service.decode(), raw))
+        return records
+
+
+class SegmentStore:
+    """Append-only log store made of segments of at most `segment_lines` records.
+
+    Only the newest segment is written to. When it is full it is sealed: its
+    index is written next to it and it is never modified again. Searches skip
+    segments outside the requested time range and use each segment's inverted
+    index, so they read only the matching lines from disk.
+    """
+
+    def __init__(self, directory, segment_lines=50000):
+        self.directory = directory
+        self.segment_lines = segment_lines
+        self.segments = []
+        self.lines = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        for path in sorted(glob.glob(os.path.join(directory, "segment-*.log"))):
+            if os.path.exists(path[:-len(".log")] + ".idx.json"):
+                self.segments.append(Segment.load(path))
+            else:
+                self.segments.append(Segment.recover(path))
+        if not self.segments or self.segments[-1].sealed:
+            self._new_segment()
+        self.lines = sum(len(segment) for segment in self.segments)
+
+    def _new_segment(self):
+        number = len(self.segments) + 1
+        segment = Segment(os.path.join(self.directory, f"segment-{number:06d}.log"))
+        segment.open_for_append()
+        self.segments.append(segment)
+
+    @property
+    def active(self):
+        return self.segments[-1]
+
+    def append_lines(self, service, lines):
+        """Parses and stores json-file lines (bytes) of one container. Returns the number stored."""
+        stored = 0
+        prefix = service.encode() + b"\t"
+        with self._lock:
+            segment = self.active
+            for raw in lines:
+                try:
+                    record = parse_line(service, raw)
+                except ValueError:
+                    continue
+                if len(segment.times) >= self.segment_lines:
+                    segment.seal()
+                    self._new_segment()
+                    segment = self.active
+                segment.append(prefix, raw, record)
+                stored += 1
+            self.lines += stored
+        return stored
+
+    def flush(self):
+        with self._lock:
+            self.active.flush()
+
+    def close(self):
+        with self._lock:
+            self.active.flush()
+            if self.active._file is not None:
+                self.active._file.close()
+                self.active._file = None
+
+    def search(self, start=None, end=None, q=None, limit=100, **filters):
+        """Newest records first, at most `limit`, matching the time range,
+        `filters` (service, level, route) and every word in `q`."""
+        filters = {field: value for field, value in filters.items() if value is not None}
+        unknown = set(filters) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"cannot filter on {', '.join(sorted(unknown))}")
+        terms = tokenize(q) if q else set()
+        results = []
+        with self._lock:
+            segments = sorted((s for s in self.segments if s.overlaps(start, end)),
+                              key=lambda s: s.max_ts, reverse=True)
+            for segment in segments:
+                if len(results) >= limit and segment.max_ts < results[limit - 1][0]:
+                    break  # nothing older can make the top `limit`
+                ids = segment.candidates(filters, terms, start, end)
+                newest = sorted(ids, key=lambda record_id: segment.times[record_id], reverse=True)[:limit]
+                results.extend((segment.times[record_id], segment, record_id) for record_id in newest)
+                results.sort(key=lambda item: item[0], reverse=True)
+                del results[limit:]
+            wanted = {}
+            for _, segment, record_id in results:
+                wanted.setdefault(segment, []).append(record_id)
+            found = {}
+            for segment, record_ids in wanted.items():
+                for record_id, record in zip(record_ids, segment.read(record_ids)):
+                    found[segment, record_id] = record
+        return [found[segment, record_id] for _, segment, record_id in results]
+
+    def stats(self):
+        with self._lock:
+            return {"segments": len(self.segments), "lines": self.lines,
+                    "active_segment_lines": len(self.active)}
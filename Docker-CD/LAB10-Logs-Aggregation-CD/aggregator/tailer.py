@@ -0,0 +1,108 @@
+import glob
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 4 * 1024 * 1024
+
+
+def service_name(container_dir, container_id):
+    # Compose stores the service name as a label in the container's config
+    try:
+        with open(os.path.join(container_dir, "config.v2.json")) as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return container_id[:12]
+    labels = (config.get("Config") or {}).get("Labels") or {}
+    return labels.get("com.docker.compose.service") or config.get("Name", "").lstrip("/") or container_id[:12]
+
+
+class _Position:
+    def __init__(self, inode, offset=0):
+        self.inode = inode
+        self.offset = offset
+
+
+class ContainerLogTailer:
+    """Follows the json-file logs of every container under `root` (/var/lib/docker/containers).
+
+    Each poll reads the lines appended since the last one. Rotation is followed by
+    inode: when `<id>-json.log` has been replaced, the rest of the old file is read
+    from `<id>-json.log.1` before starting on the new one. Positions can be saved
+    and restored (checkpoint) so a restart does not ingest lines twice.
+    """
+
+    def __init__(self, root, services=None):
+        self.root = root
+        # Only tail these compose services (None: all containers)
+        self.services = set(services) if services else None
+        self.positions = {}
+        self._names = {}
+
+    def containers(self):
+        for path in glob.glob(os.path.join(self.root, "*", "*-json.log")):
+            container_dir = os.path.dirname(path)
+            container_id = os.path.basename(container_dir)
+            if container_id not in self._names:
+                self._names[container_id] = service_name(container_dir, container_id)
+            service = self._names[container_id]
+            if self.services is None or service in self.services:
+                yield container_id, service, path
+
+    def poll(self, handle_lines):
+        """Calls handle_lines(service, lines) with the new complete lines (bytes) of each container."""
+        total = 0
+        for container_id, service, path in self.containers():
+            try:
+                inode = os.stat(path).st_ino
+            except FileNotFoundError:
+                continue
+            position = self.positions.get(container_id)
+            if position is None:
+                position = self.positions[container_id] = _Position(inode)
+            if position.inode != inode:
+                rotated = path + ".1"
+                try:
+                    if os.stat(rotated).st_ino == position.inode:
+                        total += self._read(rotated, position, service, handle_lines)
+                except FileNotFoundError:
+                    pass
+                position.inode, position.offset = inode, 0
+            total += self._read(path, position, service, handle_lines)
+        return total
+
+    def _read(self, path, position, service, handle_lines):
+        total = 0
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if size < position.offset:
+                logger.warning(f"{path} was truncated, reading it from the start")
+                position.offset = 0
+            f.seek(position.offset)
+            pending = b""  # the start of a line that continues in the next chunk
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break  # a partial line is left for the next poll
+                end = chunk.rfind(b"\n")
+                if end < 0:
+                    pending += chunk  # a line longer than READ_CHUNK
+                    continue
+                lines = (pending + chunk[:end]).split(b"\n")
+                handle_lines(service, lines)
+                total += len(lines)
+                position.offset += len(pending) + end + 1
+                pending = chunk[end + 1:]
+        return total
+
+    def checkpoint(self):
+        return {container_id: [p.inode, p.offset] for container_id, p in self.positions.items()}
+
+    def restore(self, checkpoint):
+        self.positions = {container_id: _Position(inode, offset) for container_id, (inode, offset) in checkpoint.items()}
@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Add the parent directory (aggregator) to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# app.py reads these at import time
+LOG_ROOT = tempfile.mkdtemp()
+os.environ["LOG_ROOT"] = LOG_ROOT
+os.environ["STORE_DIR"] = tempfile.mkdtemp()
+
+from app import app as flask_app, ingester
+
+@pytest.fixture
+def client():
+    flask_app.config['TESTING'] = True
+    with flask_app.test_client() as client:
+        yield client
+
+def test_search_ingested_container_logs(client):
+    """Test that lines written to a container's json-file log can be searched."""
+    container_dir = os.path.join(LOG_ROOT, "d" * 64)
+    os.makedirs(container_dir)
+    with open(os.path.join(container_dir, "config.v2.json"), "w") as f:
+        json.dump({"Config": {"Labels": {"com.docker.compose.service": "service1"}}}, f)
+    with open(os.path.join(container_dir, "d" * 64 + "-json.log"), "w") as f:
+        for i, route in enumerate(["/", "/health", "/"]):
+            record = {"ts": f"2026-01-01T00:00:0{i}.000+00:00", "level": "INFO", "message": "request completed", "route": route}
+            f.write(json.dumps({"log": json.dumps(record) + "\n", "stream": "stdout", "time": "2026-01-01T00:00:00Z"}) + "\n")
+    assert ingester.poll_once() == 3
+
+    response = client.get('/search?service=service1&route=/&q=completed')
+    assert response.status_code == 200
+    assert response.get_json()["count"] == 2
+    response = client.get('/search?start=2026-01-01T00:00:01Z&end=2026-01-01T00:00:01.5Z')
+    assert [r["route"] for r in response.get_json()["records"]] == ["/health"]
+    assert client.get('/stats').get_json()["lines_ingested"] >= 3
+
+def test_search_rejects_bad_arguments(client):
+    """Test that unparseable times are rejected with 400."""
+    assert client.get('/search?start=yesterday').status_code == 400
+
+def test_metrics_are_recorded_per_route(client):
+    """Test that /metrics counts requests under this app's own route templates."""
+    client.get('/stats')
+    client.get('/search?start=yesterday')
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/stats",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="/search",status="400"}' in text
@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+
+# Add the parent directory (aggregator) to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from store import SegmentStore, parse_line, parse_ts
+
+def docker_line(ts, message, **fields):
+    record = dict({"level": "INFO"}, ts=ts, message=message, **fields)
+    return json.dumps({"log": json.dumps(record) + "\n", "stream": "stdout",
+                       "time": ts.replace("+00:00", "123456Z")}).encode()
+
+def at(second):
+    return f"2026-01-01T00:00:{second:02d}.000+00:00"
+
+def test_parse_ts():
+    """Test Docker and service timestamps parse to epoch seconds."""
+    assert parse_ts("1970-01-01T00:00:01.5+00:00") == 1.5
+    assert abs(parse_ts("1970-01-01T00:01:00.123456789Z") - 60.123456789) < 1e-6
+    assert parse_ts("not a timestamp") is None
+
+def test_parse_line_keeps_json_fields_and_wraps_plain_text():
+    """Test that JSON log lines keep their fields and other output becomes a message."""
+    record = parse_line("service1", docker_line(at(1), "hello", route="/"))
+    assert record["message"] == "hello" and record["route"] == "/" and record["service"] == "service1"
+    plain = parse_line("service2", json.dumps({"log": "plain text\n", "stream": "stderr", "time": "2026-01-01T00:00:00Z"}))
+    assert plain == {"message": "plain text", "service": "service2", "stream": "stderr", "ts": "2026-01-01T00:00:00Z"}
+
+def test_search_by_fields_keywords_and_time(tmp_path):
+    """Test that searches combine the inverted index, keywords and time range, newest first."""
+    store = SegmentStore(str(tmp_path), segment_lines=4)
+    store.append_lines("service1", [docker_line(at(i), f"request number {i}", route="/" if i % 2 else "/health",
+                                                level="ERROR" if i == 7 else "INFO") for i in range(10)])
+    store.append_lines("service2", [docker_line(at(5), "other service")])
+    assert store.stats()["segments"] == 3
+
+    assert [r["message"] for r in store.search(level="ERROR")] == ["request number 7"]
+    routes = store.search(service="service1", route="/", limit=2)
+    assert [r["message"] for r in routes] == ["request number 9", "request number 7"]
+    window = store.search(start=parse_ts(at(3)), end=parse_ts(at(5)), q="request")
+    assert [r["message"] for r in window] == ["request number 5", "request number 4", "request number 3"]
+    assert store.search(q="number missing") == []
+
+def test_reopen_loads_sealed_segments_and_recovers_active(tmp_path):
+    """Test that a restarted store finds every line, with or without an index file."""
+    store = SegmentStore(str(tmp_path), segment_lines=3)
+    store.append_lines("service1", [docker_line(at(i), f"line {i}") for i in range(5)])
+    store.close()
+
+    reopened = SegmentStore(str(tmp_path), segment_lines=3)
+    assert reopened.stats()["lines"] == 5
+    assert len(reopened.search(q="line", limit=10)) == 5
+    reopened.append_lines("service1", [docker_line(at(9), "line 9")])
+    assert reopened.search(limit=1)[0]["message"] == "line 9"
@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+
+# Add the parent directory (aggregator) to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tailer as tailer_module
+from tailer import ContainerLogTailer
+
+CONTAINER = "c" * 64
+
+def make_container(root, service="service1"):
+    container_dir = root / CONTAINER
+    container_dir.mkdir(parents=True)
+    (container_dir / "config.v2.json").write_text(json.dumps({"Config": {"Labels": {"com.docker.compose.service": service}}}))
+    return container_dir / f"{CONTAINER}-json.log"
+
+def collect(tailer):
+    seen = []
+    tailer.poll(lambda service, lines: seen.extend((service, line.decode()) for line in lines))
+    return seen
+
+def test_reads_only_new_complete_lines(tmp_path):
+    """Test that each poll returns appended lines and holds back a partial one."""
+    log = make_container(tmp_path)
+    log.write_text("one\ntwo\nthr")
+    tailer = ContainerLogTailer(str(tmp_path))
+    assert collect(tailer) == [("service1", "one"), ("service1", "two")]
+    with open(log, "a") as f:
+        f.write("ee\n")
+    assert collect(tailer) == [("service1", "three")]
+    assert collect(tailer) == []
+
+def test_line_longer_than_the_read_size(tmp_path, monkeypatch):
+    """Test that a line spanning several reads is returned whole, and only once it is complete."""
+    monkeypatch.setattr(tailer_module, "READ_CHUNK", 8)
+    log = make_container(tmp_path)
+    log.write_text("one\n" + "x" * 20)
+    tailer = ContainerLogTailer(str(tmp_path))
+    assert collect(tailer) == [("service1", "one")]
+    with open(log, "a") as f:
+        f.write("y\nshort\n" + "z" * 9 + "\n")
+    assert [line for _, line in collect(tailer)] == ["x" * 20 + "y", "short", "z" * 9]
+    assert collect(tailer) == []
+
+def test_follows_rotation(tmp_path):
+    """Test that lines written before a rotation are read from the rotated file."""
+    log = make_container(tmp_path)
+    log.write_text("one\n")
+    tailer = ContainerLogTailer(str(tmp_path))
+    collect(tailer)
+    with open(log, "a") as f:
+        f.write("two\n")
+    os.rename(log, str(log) + ".1")
+    log.write_text("three\n")
+    assert [line for _, line in collect(tailer)] == ["two", "three"]
+
+def test_checkpoint_restore_and_service_filter(tmp_path):
+    """Test that a restored tailer resumes after the checkpoint and skips other services."""
+    log = make_container(tmp_path)
+    log.write_text("one\n")
+    tailer = ContainerLogTailer(str(tmp_path))
+    collect(tailer)
+    with open(log, "a") as f:
+        f.write("two\n")
+    restored = ContainerLogTailer(str(tmp_path))
+    restored.restore(json.loads(json.dumps(tailer.checkpoint())))
+    assert collect(restored) == [("service1", "two")]
+    assert collect(ContainerLogTailer(str(tmp_path), services=["service2"])) == []
@@ -1,12 +1,21 @@
 from flask import Flask
-import logging
-import sys
+
+from instrumentation.request_metrics import RequestMetrics
+from instrumentation.server import serve
+from instrumentation.structured_logging import setup_logging
 
 app = Flask(__name__)
 
-# Configure logging to stdout for Docker
-app.logger.addHandler(logging.StreamHandler(sys.stdout))
-app.logger.setLevel(logging.INFO)
+# Request count, latency, response size and in-flight requests per route, served at
+# /metrics for Prometheus (see instrumentation/request_metrics.py). With several gunicorn
+# workers, set PROMETHEUS_MULTIPROC_DIR to a shared directory so /metrics covers all of them.
+metrics = RequestMetrics.from_env(app)
+
+# Log to stdout for Docker as JSON lines with request_id, route and latency_ms fields.
+# Request threads only enqueue records; a background listener writes them in batches,
+# samples /health (LOG_SAMPLE_RATES) and counts records dropped when the queue is full
+# (see instrumentation/structured_logging.py).
+log_pipeline = setup_logging(app, service="service1")
 
 @app.route('/')
 def home():
@@ -19,4 +28,6 @@ def health():
     return "Service 1 is healthy!", 200
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000) 
\ No newline at end of file
+    # gunicorn configured from WSGI_* variables, or Flask's dev server with WSGI_SERVER=dev
+    # (see instrumentation/server.py)
+    serve(app, "app:app", port=5000)
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""Work out which projects and tests of the monorepo a change affects.
+
+Usage:
+    python scripts/affected.py --base origin/main
+    python scripts/affected.py common-lib/utils.py
+    python scripts/affected.py --base "$BEFORE" --head "$GITHUB_SHA" --github-output "$GITHUB_OUTPUT"
+
+Every top-level directory with Python files (service-a, service-b, common-lib,
+...) is a project. The imports of every Python file are read from its syntax tree
+(nothing is imported or run) and resolved to files the way the services find them
+at run time: the importing file's directory first, then its own project, then the
+other projects, whose directories are on the path. A changed file affects itself
+and every file that imports it, directly or through other files, so a change to
+common-lib/utils.py affects both services that import it, while a change to
+service-a/app_a.py affects service-a only. A test (test_*.py or *_test.py) is
+affected if it is one of those files.
+
+Other changes are mapped conservatively: a changed non-Python file (requirements,
+Dockerfile) affects every Python file of its project, and a change outside the
+projects (the workflows, files at the root) affects everything. Markdown files are
+ignored.
+
+The output is a GitHub Actions matrix, one entry per affected project with its
+affected tests:
+
+    {"include": [{"project": "service-a", "tests": "tests/test_app.py"}]}
+
+The imports of each file are cached in --cache under the file's git blob id (its
+modification time and size outside git), so only files that changed since the
+last run are parsed, also in a fresh CI checkout with the cache restored.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_CACHE = ".affected-cache.json"
+CACHE_VERSION = 1
+IGNORED_SUFFIXES = (".md",)
+SKIP_DIRECTORIES = {".git", ".github", "__pycache__", ".venv", "venv", ".tox", "node_modules", ".pytest_cache"}
+NULL_COMMIT = "0" * 40  # github.event.before of a push that creates a branch
+
+
+def project_of(path):
+    """The project (top-level directory) of a repository-relative path, or None for a root file."""
+    head, sep, _ = path.partition("/")
+    return head if sep else None
+
+
+def is_test(path):
+    name = path.rpartition("/")[2]
+    return name.startswith("test_") or name.endswith("_test.py")
+
+
+def _git(root, *args):
+    result = subprocess.run(["git", "-C", root, *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"git {args[0]} failed")
+    return result.stdout
+
+
+def _stat_signature(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _walk(root):
+    files = {}
+    for directory, subdirectories, names in os.walk(root):
+        subdirectories[:] = [name for name in subdirectories if name not in SKIP_DIRECTORIES]
+        for name in names:
+            if name.endswith(".py"):
+                path = os.path.join(directory, name)
+                files[os.path.relpath(path, root).replace(os.sep, "/")] = _stat_signature(path)
+    return files
+
+
+def python_files(root):
+    """{repository-relative path: signature} of the Python files under `root`.
+
+    In a git work tree the signature is the blob id from the index, which is the same
+    in every checkout; files that differ from the index (modified, untracked) get
+    their modification time and size instead.
+    """
+    try:
+        staged = _git(root, "ls-files", "--stage", "-z", "--", "*.py")
+        dirty = _git(root, "ls-files", "--modified", "--others", "--exclude-standard", "-z", "--", "*.py")
+    except (OSError, RuntimeError):
+        return _walk(root)
+    files = {}
+    for entry in staged.split("\0"):
+        if entry:
+            info, _, path = entry.partition("\t")
+            files[path] = info.split()[1]
+    for path in set(dirty.split("\0")) - {""}:
+        try:
+            files[path] = _stat_signature(os.path.join(root, path))
+        except OSError:
+            files.pop(path, None)  # deleted
+    return {path: signature for path, signature in files.items()
+            if not SKIP_DIRECTORIES.intersection(path.split("/")[:-1])}
+
+
+def module_name(path):
+    """The dotted name a file is imported by, from the directory that holds it
+    on the path (its project, or the project's src/)."""
+    parts = path[:-len(".py")].split("/")
+    if len(parts) > 1:
+        parts = parts[1:]  # the project directory is on the path
+        if len(parts) > 1 and parts[0] == "src":
+            parts = parts[1:]
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def scan_imports(source, path):
+    """The module names a file imports, as absolute dotted names, sorted.
+
+    `from a import b` yields both a and a.b, since b may be a module; names that
+    turn out not to be modules are dropped when the graph is built. Literal
+    importlib.import_module() and __import__() calls count as imports too.
+    """
+    try:
+        tree = ast.parse(source, path)
+    except (SyntaxError, ValueError):
+        return []
+    package = module_name(path).split(".")
+    if not path.endswith("/__init__.py"):
+        package = package[:-1]
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                if node.level - 1 > len(package):
+                    continue
+                base = package[:len(package) - (node.level - 1)]
+                module = ".".join(base + ([node.module] if node.module else []))
+            else:
+                module = node.module
+            if module:
+                names.add(module)
+            names.update(f"{module}.{alias.name}" if module else alias.name
+                         for alias in node.names if alias.name != "*")
+        elif (isinstance(node, ast.Call) and node.args and isinstance(node.args[0], ast.Constant)
+              and isinstance(node.args[0].value, str)
+              and ((isinstance(node.func, ast.Attribute) and node.func.attr == "import_module")
+                   or (isinstance(node.func, ast.Name) and node.func.id in ("import_module", "__import__")))):
+            names.add(node.args[0].value)
+    return sorted(names)
+
+
+def _names_for(path):
+    # Every name `path` can be imported by: from its own directory's parent
+    # directories down to its directory ("module", "package.module", ...)
+    parts = path[:-len(".py")].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return [".".join(parts[start:]) for start in range(len(parts))]
+
+
+class DependencyGraph:
+    """The files of the monorepo and the module names each of them imports.
+
+    Imports are resolved lazily, and only for files that import a name the file in
+    question could be imported by, so finding what a change affects costs time in
+    proportion to the files it affects rather than to the size of the repository.
+    """
+
+    def __init__(self, imports):
+        self.imports = imports  # {path: [module names]}
+        self._importers = {}  # module name -> paths that import it
+        for path, names in imports.items():
+            for name in names:
+                self._importers.setdefault(name, []).append(path)
+        self._modules = None
+        self._resolved = {}
+
+    @property
+    def modules(self):
+        """{module name: paths that define it}"""
+        if self._modules is None:
+            self._modules = {}
+            for path in self.imports:
+                self._modules.setdefault(module_name(path), []).append(path)
+        return self._modules
+
+    def dependencies(self, path):
+        """The files `path` imports."""
+        if path not in self._resolved:
+            self._resolved[path] = self._resolve(path, self.imports[path])
+        return self._resolved[path]
+
+    def _resolve(self, path, names):
+        directory = path.rpartition("/")[0]
+        project = project_of(path)
+        resolved = set()
+        for name in names:
+            # The importing file's directory is first on the path when it is run as a script
+            relative = f"{directory}/{name.replace('.', '/')}" if directory else name.replace(".", "/")
+            local = [candidate for candidate in (f"{relative}.py", f"{relative}/__init__.py")
+                     if candidate in self.imports]
+            candidates = local or self.modules.get(name, ())
+            same_project = [candidate for candidate in candidates if project_of(candidate) == project]
+            # A name several other projects define could be any of them
+            resolved.update(same_project or candidates)
+        resolved.discard(path)
+        return resolved
+
+    def _candidates(self, path):
+        return {importer for name in _names_for(path) for importer in self._importers.get(name, ())}
+
+    def dependents(self, path):
+        """The files that import `path` directly."""
+        return {importer for importer in self._candidates(path) if path in self.dependencies(importer)}
+
+    def affected(self, paths):
+        """`paths` and every file that imports one of them, directly or not."""
+        affected = set()
+        pending = [path for path in paths if path in self.imports]
+        while pending:
+            path = pending.pop()
+            if path not in affected:
+                affected.add(path)
+                pending.extend(self.dependents(path) - affected)
+        return affected
+
+    def importers_of(self, path):
+        """Files that may have imported `path`, for a file that no longer exists."""
+        return self._candidates(path)
+
+
+def _read_cache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get("files", {}) if cache.get("version") == CACHE_VERSION else {}
+
+
+def _write_cache(path, files):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"version": CACHE_VERSION, "files": files}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def build_graph(root, cache_path=None):
+    """The DependencyGraph of the Python files under `root`, parsing only the files
+    whose signature changed since the cache was written."""
+    cached = _read_cache(cache_path) if cache_path else {}
+    entries = {}
+    parsed = 0
+    for path, signature in python_files(root).items():
+        entry = cached.get(path)
+        if entry is None or entry[0] != signature:
+            try:
+                with open(os.path.join(root, path), "rb") as f:
+                    source = f.read()
+            except OSError:
+                continue
+            entry = [signature, scan_imports(source, path)]
+            parsed += 1
+        entries[path] = entry
+    if cache_path and (parsed or len(entries) != len(cached)):
+        _write_cache(cache_path, entries)
+    return DependencyGraph({path: entry[1] for path, entry in entries.items()})
+
+
+def changed_files(root, base, head="HEAD"):
+    """Paths under `root` that differ between the merge base of `base` and `head`, and `head`."""
+    return [path for path in _git(root, "diff", "--name-only", "--relative", "--no-renames", "-z",
+                                  f"{base}...{head}").split("\0") if path]
+
+
+def everything(graph):
+    """{project: all its tests} for every project."""
+    projects = {}
+    for path in graph.imports:
+        project = project_of(path)
+        if project is not None:
+            projects.setdefault(project, [])
+            if is_test(path):
+                projects[project].append(path)
+    return {project: sorted(tests) for project, tests in projects.items()}
+
+
+def affected(graph, changed):
+    """{project: sorted affected tests} for the changed paths."""
+    projects = {project_of(path) for path in graph.imports} - {None}
+    files = set()
+    for path in changed:
+        if path.endswith(IGNORED_SUFFIXES):
+            continue
+        project = project_of(path)
+        if project not in projects and not path.endswith(".py"):
+            # Workflows, files at the root, a directory without Python: anything may depend on them
+            return everything(graph)
+        if path in graph.imports:
+            files.add(path)
+        elif path.endswith(".py"):
+            files.update(graph.importers_of(path))  # deleted: whoever imported it
+        else:
+            files.update(p for p in graph.imports if project_of(p) == project)
+    result = {project_of(path): [] for path in changed
+              if project_of(path) in projects and not path.endswith(IGNORED_SUFFIXES)}
+    for path in graph.affected(files):
+        project = project_of(path)
+        if project is not None:
+            result.setdefault(project, [])
+            if is_test(path):
+                result[project].append(path)
+    return {project: sorted(tests) for project, tests in result.items()}
+
+
+def matrix(projects):
+    """A GitHub Actions matrix: one entry per project, with its tests relative to it."""
+    return {"include": [{"project": project,
+                         "tests": " ".join(test[len(project) + 1:] for test in projects[project])}
+                        for project in sorted(projects)]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="changed paths, relative to --root (instead of --base)")
+    parser.add_argument("--root", default=".", help="root of the monorepo (default: the current directory)")
+    parser.add_argument("--base", help="compare HEAD (or --head) with the merge base of this commit")
+    parser.add_argument("--head", default="HEAD")
+    parser.add_argument("--all", action="store_true", help="every project, with all its tests")
+    parser.add_argument("--cache", help=f"imports cache (default: {DEFAULT_CACHE} in --root)")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--github-output", help="append matrix= and any= for later jobs to this file ($GITHUB_OUTPUT)")
+    args = parser.parse_args(argv)
+    if not args.files and not args.base and not args.all:
+        parser.error("give the changed files, --base or --all")
+
+    cache = None if args.no_cache else args.cache or os.path.join(args.root, DEFAULT_CACHE)
+    graph = build_graph(args.root, cache)
+    if args.all or args.base == NULL_COMMIT:
+        projects = everything(graph)
+    else:
+        try:
+            changed = changed_files(args.root, args.base, args.head) if args.base else args.files
+        except (OSError, RuntimeError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        projects = affected(graph, changed)
+
+    output = json.dumps(matrix(projects), separators=(",", ":"))
+    print(output)
+    for project, tests in sorted(projects.items()):
+        print(f"{project}: {len(tests)} tests", file=sys.stderr)
+    if args.github_output:
+        with open(args.github_output, "a") as f:
+            f.write(f"matrix={output}\nany={'true' if projects else 'false'}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
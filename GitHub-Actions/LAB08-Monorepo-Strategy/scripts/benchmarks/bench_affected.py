@@ -0,0 +1,84 @@
+"""Time building the dependency graph of a generated monorepo, without and with the cache.
+
+Generates `--projects` projects of `--modules` modules each (plus a tests/ module
+per module), importing from their own project and a shared library, adds them to
+a git index, and times graph construction: without the cache (every file parsed),
+from the cache, and from the cache after one file changed:
+
+    python scripts/benchmarks/bench_affected.py --projects 50 --modules 100
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from affected import affected, build_graph
+
+
+def generate(root, projects, modules):
+    library = os.path.join(root, 'common-lib')
+    os.makedirs(library)
+    for m in range(modules):
+        with open(os.path.join(library, f'lib_{m}.py'), 'w') as f:
+            f.write(f'import json\n\n\ndef helper_{m}(value):\n    return json.dumps(value)\n')
+    for p in range(projects):
+        package = os.path.join(root, f'service-{p}', f'service_{p}')
+        tests = os.path.join(root, f'service-{p}', 'tests')
+        os.makedirs(package)
+        os.makedirs(tests)
+        open(os.path.join(package, '__init__.py'), 'w').close()
+        for m in range(modules // 2):
+            with open(os.path.join(package, f'module_{m}.py'), 'w') as f:
+                f.write(f'import os\nfrom lib_{m} import helper_{m}\n')
+                if m:
+                    f.write(f'from .module_{m - 1} import run_{m - 1}\n')
+                f.write(f'\n\ndef run_{m}():\n    return helper_{m}(os.getcwd())\n')
+            with open(os.path.join(tests, f'test_module_{m}.py'), 'w') as f:
+                f.write(f'from service_{p}.module_{m} import run_{m}\n\n\n'
+                        f'def test_run():\n    assert run_{m}()\n')
+    subprocess.run(['git', 'init', '-q', root], check=True)
+    subprocess.run(['git', '-C', root, 'add', '.'], check=True)
+
+
+def timed(root, cache, rounds=5):
+    fastest = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        graph = build_graph(root, cache)
+        seconds = time.perf_counter() - started
+        fastest = seconds if fastest is None else min(fastest, seconds)
+    return fastest, graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--projects', type=int, default=50)
+    parser.add_argument('--modules', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        generate(root, args.projects, args.modules)
+        cache = os.path.join(root, '.affected-cache.json')
+        seconds, graph = timed(root, None, rounds=1)
+        print(f'{len(graph.imports)} Python files')
+        print(f"{'run':<22} {'ms':>8}")
+        print(f"{'no cache':<22} {seconds * 1000:>8.0f}")
+        build_graph(root, cache)
+        seconds, graph = timed(root, cache)
+        print(f"{'cached':<22} {seconds * 1000:>8.0f}")
+        with open(os.path.join(root, 'common-lib', 'lib_0.py'), 'a') as f:
+            f.write('\n# changed\n')
+        seconds, graph = timed(root, cache, rounds=1)
+        print(f"{'one file changed':<22} {seconds * 1000:>8.0f}")
+        started = time.perf_counter()
+        projects = affected(graph, ['common-lib/lib_0.py'])
+        print(f"{'affected lib_0.py':<22} {(time.perf_counter() - started) * 1000:>8.0f}"
+              f"  ({len(projects)} projects, {sum(map(len, projects.values()))} tests)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to allow direct import of affected
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import affected
+from affected import build_graph, main, matrix, scan_imports
+
+LAB = os.path.join(os.path.dirname(__file__), '..', '..')
+
+@pytest.fixture
+def monorepo(tmp_path):
+    for project in ('common-lib', 'service-a', 'service-b'):
+        shutil.copytree(os.path.join(LAB, project), tmp_path / project)
+    (tmp_path / 'service-a' / 'tests').mkdir()
+    (tmp_path / 'service-a' / 'tests' / 'test_app_a.py').write_text('from app_a import main\n')
+    (tmp_path / 'service-b' / 'tests').mkdir()
+    (tmp_path / 'service-b' / 'tests' / 'test_app_b.py').write_text('import app_b\n')
+    return tmp_path
+
+def test_scan_imports():
+    """Test that absolute, relative and importlib imports are found without running the code."""
+    source = ('import os, json as j\nfrom . import sibling\nfrom ..core.models import User\n'
+              'import importlib\nplugin = importlib.import_module("plugins.csv")\n'
+              'def f():\n    from utils import common_function\n')
+    assert scan_imports(source, 'service-a/pkg/sub/views.py') == [
+        'importlib', 'json', 'os', 'pkg.core.models', 'pkg.core.models.User', 'pkg.sub', 'pkg.sub.sibling',
+        'plugins.csv', 'utils', 'utils.common_function']
+    assert scan_imports('def broken(:\n', 'service-a/broken.py') == []
+
+def test_common_lib_change_affects_both_services(monorepo):
+    """Test that a change to common-lib re-runs both services, one in service-a only service-a."""
+    graph = build_graph(str(monorepo))
+    assert affected.affected(graph, ['common-lib/utils.py']) == {
+        'common-lib': [], 'service-a': ['service-a/tests/test_app_a.py'], 'service-b': ['service-b/tests/test_app_b.py']}
+    assert affected.affected(graph, ['service-a/app_a.py']) == {'service-a': ['service-a/tests/test_app_a.py']}
+    assert affected.affected(graph, ['service-b/requirements.txt', 'service-a/README.md']) == {
+        'service-b': ['service-b/tests/test_app_b.py']}
+    assert set(affected.affected(graph, ['.github/workflows/ci.yml'])) == {'common-lib', 'service-a', 'service-b'}
+    assert matrix(affected.affected(graph, ['service-a/app_a.py'])) == {
+        'include': [{'project': 'service-a', 'tests': 'tests/test_app_a.py'}]}
+
+def test_cache_parses_only_changed_files(monorepo, monkeypatch):
+    """Test that a second build reuses the cached imports of unchanged files."""
+    cache = str(monorepo / '.affected-cache.json')
+    build_graph(str(monorepo), cache)
+    parsed = []
+    scan = affected.scan_imports
+    monkeypatch.setattr(affected, 'scan_imports', lambda source, path: parsed.append(path) or scan(source, path))
+    (monorepo / 'service-b' / 'app_b.py').write_text('import json\n')
+    graph = build_graph(str(monorepo), cache)
+    assert parsed == ['service-b/app_b.py']
+    assert affected.affected(graph, ['common-lib/utils.py']) == {
+        'common-lib': [], 'service-a': ['service-a/tests/test_app_a.py']}
+
+def test_matrix_from_git_diff(monorepo, tmp_path):
+    """Test that --base diffs against git and writes the matrix to the GitHub output file."""
+    def git(*args):
+        subprocess.run(['git', '-c', 'user.name=ci', '-c', 'user.email=ci@example.com', '-C', str(monorepo), *args],
+                       check=True, capture_output=True)
+    git('init', '-q')
+    git('add', '.')
+    git('commit', '-qm', 'initial')
+    (monorepo / 'common-lib' / 'utils.py').write_text('def common_function():\n    return "changed"\n')
+    git('commit', '-qam', 'change common-lib')
+    output = tmp_path / 'github_output'
+    assert main(['--root', str(monorepo), '--base', 'HEAD~1', '--github-output', str(output)]) == 0
+    lines = output.read_text().splitlines()
+    assert [entry['project'] for entry in json.loads(lines[0].partition('=')[2])['include']] == [
+        'common-lib', 'service-a', 'service-b']
+    assert lines[1] == 'any=true'
@@ -1,8 +1,16 @@
 # Service A - Python Application
+import os
+import sys
+
+# common-lib is shared by the services; put it on the path to import from it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common-lib"))
+
+from utils import common_function
 
 def main():
     print("Hello from Service A (Python)!")
+    print(common_function())
     # Imagine this service has its own logic and dependencies
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,8 +1,16 @@
 # Service B - Python Application
+import os
+import sys
+
+# common-lib is shared by the services; put it on the path to import from it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common-lib"))
+
+from utils import common_function
 
 def start_service_b():
     print("Hello from Service B (Python)!")
+    print(common_function())
     # Imagine this service has its own distinct Python logic
 
 if __name__ == "__main__":
-    start_service_b() 
\ No newline at end of file
+    start_service_b()
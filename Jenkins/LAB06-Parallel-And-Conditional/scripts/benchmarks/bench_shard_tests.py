@@ -0,0 +1,74 @@
+"""Simulate the wall-clock time of the suites split into 1 to N shards.
+
+Takes recorded durations (a --durations file written by `shard_tests.py record`)
+or generates suites with long-tailed test durations, plans them for each shard
+count, and prints the slowest shard's expected time next to the serial time:
+
+    python scripts/benchmarks/bench_shard_tests.py --durations .test-durations.json
+    python scripts/benchmarks/bench_shard_tests.py --suites 40 --tests 60 --max-shards 16
+
+For comparison, "per suite" is the fixed split a hand-written `parallel` block
+makes: whole suites dealt to the shards in turn, whatever they take.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from shard_tests import Durations, assign
+
+
+def generate(suites, tests, seed=0):
+    randomness = random.Random(seed)
+    durations = Durations()
+    for s in range(suites):
+        suite = f'suite-{s}'
+        # Most tests take milliseconds; a few (integration, load) take seconds
+        durations.tests[suite] = {f'tests.test_{s}::test_{t}': round(randomness.lognormvariate(-3, 1.5), 4)
+                                  for t in range(randomness.randint(1, 2 * tests))}
+        durations.startup[suite] = round(randomness.uniform(0.3, 1.5), 3)
+    return durations
+
+
+def collected_from(durations):
+    # Node IDs whose JUnit keys are the recorded ones: tests.test_a::test_b <- tests/test_a.py::test_b
+    return {suite: [f"{key.partition('::')[0].replace('.', '/')}.py::{key.partition('::')[2]}" for key in sorted(tests)]
+            for suite, tests in durations.tests.items()}
+
+
+def per_suite(collected, durations, shards):
+    loads = [0.0] * shards
+    for i, (suite, nodeids) in enumerate(sorted(collected.items())):
+        loads[i % shards] += durations.suite_startup(suite) + sum(durations.test(suite, n) for n in nodeids)
+    return max(loads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--durations', help='recorded durations to simulate (default: generated)')
+    parser.add_argument('--suites', type=int, default=40)
+    parser.add_argument('--tests', type=int, default=60, help='average tests per generated suite')
+    parser.add_argument('--max-shards', type=int, default=16)
+    args = parser.parse_args()
+
+    durations = Durations.load(args.durations) if args.durations else generate(args.suites, args.tests)
+    collected = collected_from(durations)
+    serial = per_suite(collected, durations, 1)
+    print(f'{sum(map(len, collected.values()))} tests in {len(collected)} suites, {serial:.1f} s serially\n')
+    print(f"{'shards':>6} {'LPT':>8} {'speedup':>8} {'per suite':>10} {'speedup':>8} {'plan ms':>8}")
+    shards = 1
+    while shards <= args.max_shards:
+        started = time.perf_counter()
+        _, loads = assign(collected, durations, shards)
+        elapsed = (time.perf_counter() - started) * 1000
+        naive = per_suite(collected, durations, shards)
+        print(f'{shards:>6} {max(loads):>7.1f}s {serial / max(loads):>7.2f}x {naive:>9.1f}s {serial / naive:>7.2f}x '
+              f'{elapsed:>8.1f}')
+        shards *= 2
+
+
+if __name__ == '__main__':
+    main()
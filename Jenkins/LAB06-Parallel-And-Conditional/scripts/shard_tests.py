@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Split the pytest suites of the repository into shards that take about as long.
+
+Usage:
+    python shard_tests.py plan --shards 4 --output shard-plan.json
+    python shard_tests.py run --plan shard-plan.json --shard 2 --junit-dir test-reports
+    python shard_tests.py record test-reports/*.xml
+
+A suite is a directory with a tests/ directory (Jenkins/LAB06-.../app,
+Docker-CD/LAB06-.../app, ...). Each suite runs in its own pytest process from its
+directory, because the labs import their code as top-level modules (`main`,
+`app`) that would clash in one process.
+
+`plan` collects the test IDs of every suite under the given paths and assigns
+them to --shards shards with the longest-processing-time heuristic: jobs are
+taken from the slowest down and each goes to the shard that is least loaded so
+far. A job is a whole suite, because every pytest process pays for its startup
+(interpreter, imports, collection); a suite is split into parts of its tests
+only where that is expected to finish sooner despite the extra startups. A shard
+that gets a whole suite runs it as `tests`, not as a list of IDs.
+
+Durations come from the JUnit XML of earlier runs, kept in --durations by
+`record`. Tests without a recorded duration are expected to take the median of
+the recorded ones, and suites without a recorded startup DEFAULT_STARTUP seconds.
+The shards of a plan don't change as long as the tests and durations don't, so
+every parallel branch of a pipeline can read the same plan file.
+
+`run` executes one shard of a plan: one pytest invocation per suite, each with
+its own JUnit XML in --junit-dir, which records the process' wall time too.
+It exits with 1 if any invocation failed.
+"""
+import argparse
+import heapq
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_DURATIONS = ".test-durations.json"
+DURATIONS_VERSION = 1
+PLAN_VERSION = 1
+DEFAULT_STARTUP = 1.0  # seconds before the first test of a suite never run before
+DEFAULT_TEST = 0.1     # seconds a test takes when no test has a recorded duration
+SKIP_DIRECTORIES = {".git", "__pycache__", ".venv", "venv", ".tox", "node_modules", ".pytest_cache"}
+WALL_TIME_PROPERTY = "shard_tests.wall_time"
+
+
+def junit_key(nodeid):
+    """The `classname::name` of a pytest node ID in JUnit XML:
+    tests/test_app.py::TestHealth::test_ok -> tests.test_app.TestHealth::test_ok."""
+    path, *names = nodeid.split("::")
+    classname = ".".join([path[:-3].replace("/", ".")] + names[:-1])
+    return f"{classname}::{names[-1]}"
+
+
+def find_suites(root, paths=(".",)):
+    """Repository-relative directories that have a tests/ directory with test files."""
+    suites = set()
+    for path in paths:
+        for directory, subdirectories, files in os.walk(os.path.join(root, path)):
+            subdirectories[:] = sorted(d for d in subdirectories if d not in SKIP_DIRECTORIES)
+            if os.path.basename(directory) == "tests" and any(
+                    name.startswith("test_") and name.endswith(".py") for name in files):
+                suites.add(os.path.relpath(os.path.dirname(directory), root).replace(os.sep, "/"))
+    return sorted(suites)
+
+
+def _pytest(*args):
+    return [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", "--rootdir", ".", *args]
+
+
+def collect(root, suite):
+    """The node IDs of a suite's tests, as pytest collects them."""
+    result = subprocess.run(_pytest("--collect-only", "-q", "tests"), cwd=os.path.join(root, suite),
+                            capture_output=True, text=True)
+    if result.returncode not in (0, 5):  # 5: no tests collected
+        tail = " | ".join(result.stdout.strip().splitlines()[-3:])
+        raise RuntimeError(f"{suite}: collection failed ({tail})")
+    return [line.strip() for line in result.stdout.splitlines() if "::" in line and not line.startswith(" ")]
+
+
+def collect_all(root, suites, jobs=None):
+    """{suite: [node ID]}, collected in parallel."""
+    with ThreadPoolExecutor(jobs or os.cpu_count() or 1) as pool:
+        return dict(zip(suites, pool.map(lambda suite: collect(root, suite), suites)))
+
+
+class Durations:
+    """Recorded seconds per test (by suite and JUnit key) and per suite startup."""
+
+    def __init__(self, tests=None, startup=None):
+        self.tests = tests or {}
+        self.startup = startup or {}
+        self._median = None
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        if data.get("version") != DURATIONS_VERSION:
+            return cls()
+        return cls(data["tests"], data["startup"])
+
+    def save(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": DURATIONS_VERSION, "tests": self.tests, "startup": self.startup}, f,
+                      indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+    def test(self, suite, nodeid):
+        seconds = self.tests.get(suite, {}).get(junit_key(nodeid))
+        if seconds is not None:
+            return seconds
+        if self._median is None:
+            recorded = [seconds for tests in self.tests.values() for seconds in tests.values()]
+            self._median = statistics.median(recorded) if recorded else DEFAULT_TEST
+        return self._median
+
+    def suite_startup(self, suite):
+        return self.startup.get(suite, DEFAULT_STARTUP)
+
+    def record_junit(self, path):
+        """Adds the durations of a JUnit XML report written by `run` (the suite is the
+        testsuite's name). Returns the number of tests recorded."""
+        recorded = 0
+        for testsuite in ET.parse(path).getroot().iter("testsuite"):
+            suite = testsuite.get("name")
+            tests = self.tests.setdefault(suite, {})
+            total = 0.0
+            for testcase in testsuite.iter("testcase"):
+                seconds = float(testcase.get("time", 0))
+                tests[f"{testcase.get('classname')}::{testcase.get('name')}"] = seconds
+                total += seconds
+                recorded += 1
+            for prop in testsuite.iter("property"):
+                if prop.get("name") == WALL_TIME_PROPERTY:
+                    self.startup[suite] = round(max(0.0, float(prop.get("value")) - total), 3)
+        self._median = None
+        return recorded
+
+
+def _longest_first(jobs, bins):
+    # Longest-processing-time: [(seconds, key, item)] into `bins` lists, each job to
+    # the bin that is least loaded so far. Returns (bins, loads).
+    heap = [(0.0, i) for i in range(bins)]
+    assigned = [[] for _ in range(bins)]
+    loads = [0.0] * bins
+    for seconds, _, item in sorted(jobs, key=lambda job: (-job[0], job[1])):
+        load, i = heapq.heappop(heap)
+        assigned[i].append(item)
+        loads[i] = load + seconds
+        heapq.heappush(heap, (loads[i], i))
+    return assigned, loads
+
+
+def assign(collected, durations, shards):
+    """[{suite: [node ID]}] of `shards` shards and their expected seconds.
+
+    Each suite is one job (startup plus its tests), unless splitting it into parts
+    that each pay the startup again is expected to finish sooner: the estimate for
+    k parts is the longer of its slowest part and the fair share of a shard (all
+    the work, with k - 1 more startups, divided by `shards`). The jobs are then
+    assigned longest first, each to the shard that is least loaded so far.
+    """
+    costs = {suite: [(durations.test(suite, nodeid), nodeid, nodeid) for nodeid in nodeids]
+             for suite, nodeids in collected.items() if nodeids}
+    total = sum(durations.suite_startup(suite) + sum(seconds for seconds, _, _ in tests)
+                for suite, tests in costs.items())
+    jobs = []
+    for suite, tests in costs.items():
+        startup = durations.suite_startup(suite)
+        best = None
+        for parts in range(1, min(shards, len(tests)) + 1):
+            chunks, loads = _longest_first(tests, parts)
+            estimate = max(startup + max(loads), (total + (parts - 1) * startup) / shards)
+            if best is None or estimate < best[0]:
+                best = (estimate, chunks, loads)
+        for nodeids, load in zip(best[1], best[2]):
+            jobs.append((startup + load, (suite, nodeids[0]), (suite, nodeids)))
+    assigned_jobs, loads = _longest_first(jobs, shards)
+    assigned = [{} for _ in range(shards)]
+    for shard, shard_jobs in zip(assigned, assigned_jobs):
+        for suite, nodeids in shard_jobs:
+            shard.setdefault(suite, []).extend(nodeids)
+    return assigned, loads
+
+
+def plan(collected, durations, shards):
+    """The plan `run` executes: per shard, the pytest arguments of each suite."""
+    assigned, loads = assign(collected, durations, shards)
+    plan_shards = []
+    for index, (suites, expected) in enumerate(zip(assigned, loads), start=1):
+        invocations = []
+        for suite, nodeids in sorted(suites.items()):
+            whole = len(nodeids) == len(collected[suite])
+            invocations.append({"suite": suite, "args": ["tests"] if whole else sorted(nodeids),
+                                "tests": len(nodeids)})
+        plan_shards.append({"shard": index, "expected_seconds": round(expected, 3), "invocations": invocations})
+    serial = sum(durations.test(suite, nodeid) for suite, nodeids in collected.items() for nodeid in nodeids) + \
+        sum(durations.suite_startup(suite) for suite, nodeids in collected.items() if nodeids)
+    return {"version": PLAN_VERSION, "shards": plan_shards, "serial_seconds": round(serial, 3),
+            "expected_seconds": round(max(loads), 3) if loads else 0.0}
+
+
+def _report_name(shard, suite):
+    return f"shard-{shard}-{suite.replace('/', '_')}.xml"
+
+
+def _add_wall_time(report, wall):
+    tree = ET.parse(report)
+    for testsuite in tree.getroot().iter("testsuite"):
+        properties = testsuite.find("properties")
+        if properties is None:
+            properties = ET.Element("properties")
+            testsuite.insert(0, properties)
+        ET.SubElement(properties, "property", name=WALL_TIME_PROPERTY, value=f"{wall:.3f}")
+    tree.write(report, encoding="utf-8", xml_declaration=True)
+
+
+def run_shard(root, shard_plan, junit_dir, pytest_args=()):
+    """Runs each invocation of one shard; returns the suites that failed."""
+    os.makedirs(junit_dir, exist_ok=True)
+    failed = []
+    for invocation in shard_plan["invocations"]:
+        suite = invocation["suite"]
+        report = os.path.abspath(os.path.join(junit_dir, _report_name(shard_plan["shard"], suite)))
+        command = _pytest("--junitxml", report, "-o", f"junit_suite_name={suite}", *pytest_args,
+                          *invocation["args"])
+        print(f"--- {suite}: {invocation['tests']} tests", flush=True)
+        started = time.perf_counter()
+        returncode = subprocess.run(command, cwd=os.path.join(root, suite)).returncode
+        if os.path.exists(report):
+            _add_wall_time(report, time.perf_counter() - started)
+        if returncode not in (0, 5):
+            failed.append(suite)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", default=".", help="root of the repository (default: the current directory)")
+    parser.add_argument("--durations", help=f"recorded durations (default: {DEFAULT_DURATIONS} in --root)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    plan_parser = commands.add_parser("plan", help="split the tests into shards")
+    plan_parser.add_argument("paths", nargs="*", default=["."], help="only suites under these paths")
+    plan_parser.add_argument("--shards", type=int, required=True)
+    plan_parser.add_argument("--output", help="write the plan to this file instead of stdout")
+    plan_parser.add_argument("--jobs", type=int, help="suites collected at once (default: CPUs)")
+    run_parser = commands.add_parser("run", help="run one shard of a plan")
+    run_parser.add_argument("--plan", required=True)
+    run_parser.add_argument("--shard", type=int, required=True, help="1 to the number of shards")
+    run_parser.add_argument("--junit-dir", default="test-reports")
+    run_parser.add_argument("pytest_args", nargs="*", help="more pytest arguments (after --)")
+    record_parser = commands.add_parser("record", help="store the durations of JUnit XML reports")
+    record_parser.add_argument("reports", nargs="+")
+    args = parser.parse_args(argv)
+    durations_path = args.durations or os.path.join(args.root, DEFAULT_DURATIONS)
+
+    if args.command == "plan":
+        if args.shards < 1:
+            parser.error("--shards must be at least 1")
+        try:
+            collected = collect_all(args.root, find_suites(args.root, args.paths), args.jobs)
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        result = plan(collected, Durations.load(durations_path), args.shards)
+        output = json.dumps(result, indent=1)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(output + "\n")
+        else:
+            print(output)
+        for shard in result["shards"]:
+            print(f"shard {shard['shard']}: {sum(i['tests'] for i in shard['invocations'])} tests in "
+                  f"{len(shard['invocations'])} suites, ~{shard['expected_seconds']:.1f} s", file=sys.stderr)
+        print(f"~{result['expected_seconds']:.1f} s with {args.shards} shards, "
+              f"~{result['serial_seconds']:.1f} s serially", file=sys.stderr)
+        return 0
+
+    if args.command == "run":
+        with open(args.plan) as f:
+            shards = json.load(f)["shards"]
+        if not 1 <= args.shard <= len(shards):
+            parser.error(f"--shard must be between 1 and {len(shards)}")
+        failed = run_shard(args.root, shards[args.shard - 1], args.junit_dir, args.pytest_args)
+        if failed:
+            print(f"Error: tests failed in {', '.join(failed)}")
+            return 1
+        print(f"✅ Shard {args.shard} passed")
+        return 0
+
+    durations = Durations.load(durations_path)
+    recorded = 0
+    for report in args.reports:
+        try:
+            recorded += durations.record_junit(report)
+        except (OSError, ET.ParseError) as e:
+            print(f"Error: {report}: {e}")
+            return 1
+    durations.save(durations_path)
+    print(f"✅ Recorded {recorded} test durations in {durations_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
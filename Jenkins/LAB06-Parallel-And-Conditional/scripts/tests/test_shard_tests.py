@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+# Add the parent directory to sys.path to allow direct import of shard_tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from shard_tests import Durations, assign, junit_key, main, plan
+
+def test_junit_key():
+    """Test that node IDs map to the classname::name pytest writes in JUnit XML."""
+    assert junit_key('tests/test_main.py::test_greet') == 'tests.test_main::test_greet'
+    assert junit_key('tests/test_app.py::TestHealth::test_ok[ready]') == 'tests.test_app.TestHealth::test_ok[ready]'
+
+def test_longest_processing_time_balances_shards():
+    """Test that suites are spread by duration and a suite longer than a fair share is split."""
+    durations = Durations(
+        tests={'a': {f'tests.test_a::test_{i}': 4.0 for i in range(3)},
+               'b': {'tests.test_b::test_0': 3.0}, 'c': {'tests.test_c::test_0': 2.0}},
+        startup={'a': 0.0, 'b': 0.0, 'c': 0.0})
+    collected = {'a': [f'tests/test_a.py::test_{i}' for i in range(3)],
+                 'b': ['tests/test_b.py::test_0'], 'c': ['tests/test_c.py::test_0']}
+    assigned, loads = assign(collected, durations, 2)
+    assert sorted(loads) == [8.0, 9.0]
+    assert all('a' in shard for shard in assigned)
+    result = plan(collected, durations, 1)
+    assert result['shards'][0]['invocations'][0] == {'suite': 'a', 'args': ['tests'], 'tests': 3}
+    assert result['serial_seconds'] == result['expected_seconds'] == 17.0
+
+def test_startup_keeps_small_suites_whole():
+    """Test that a suite's tests stay in one shard when their startup outweighs splitting them."""
+    durations = Durations(tests={'a': {f'tests.test_a::test_{i}': 0.1 for i in range(10)},
+                                 'b': {'tests.test_b::test_0': 6.0}},
+                          startup={'a': 5.0, 'b': 0.0})
+    collected = {'a': [f'tests/test_a.py::test_{i}' for i in range(10)], 'b': ['tests/test_b.py::test_0']}
+    assigned, loads = assign(collected, durations, 2)
+    assert [len(shard.get('a', [])) for shard in assigned].count(10) == 1
+    assert sorted(round(load, 3) for load in loads) == [6.0, 6.0]
+
+def test_plan_run_and_record(tmp_path, capsys):
+    """Test planning, running and recording the shards of two suites end to end."""
+    for suite, count in (('lab1/app', 3), ('lab2/app', 1)):
+        tests = tmp_path / suite / 'tests'
+        tests.mkdir(parents=True)
+        (tests / 'test_it.py').write_text(''.join(f'def test_{i}():\n    pass\n' for i in range(count)))
+    root, durations = str(tmp_path), str(tmp_path / 'durations.json')
+    assert main(['--root', root, '--durations', durations, 'plan', '--shards', '2',
+                 '--output', str(tmp_path / 'plan.json')]) == 0
+    shards = json.loads((tmp_path / 'plan.json').read_text())['shards']
+    assert sorted(len(shard['invocations']) for shard in shards) == [1, 1]
+    for shard in (1, 2):
+        assert main(['--root', root, 'run', '--plan', str(tmp_path / 'plan.json'), '--shard', str(shard),
+                     '--junit-dir', str(tmp_path / 'reports')]) == 0
+    reports = sorted(str(report) for report in (tmp_path / 'reports').iterdir())
+    assert main(['--durations', durations, 'record'] + reports) == 0
+    recorded = Durations.load(durations)
+    assert sorted(recorded.tests['lab1/app']) == [f'tests.test_it::test_{i}' for i in range(3)]
+    assert set(recorded.startup) == {'lab1/app', 'lab2/app'}
+    assert 'Recorded 4 test durations' in capsys.readouterr().out
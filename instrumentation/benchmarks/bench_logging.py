@@ -0,0 +1,123 @@
+"""Request latency with logging disabled, with the old synchronous StreamHandler, and with the queued JSON pipeline.
+
+Each mode serves the same two routes as LAB10's service1/app.py through Flask's test client from
+several threads, logging to a file (stdout would flood the terminal).
+--write-latency-ms simulates a slow stdout pipe:
+
+    python benchmarks/bench_logging.py --requests 20000 --threads 8
+    python benchmarks/bench_logging.py --requests 20000 --threads 8 --write-latency-ms 0.2
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from flask.logging import default_handler
+
+from instrumentation.structured_logging import RouteSampler, setup_logging
+
+
+class SlowStream:
+    """Adds a fixed delay to every write, like stdout piped to a log driver that is falling behind."""
+
+    def __init__(self, stream, latency):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, data):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def make_app(mode, stream):
+    app = Flask(f"bench_{mode}")
+    if mode == "stream-handler":
+        # How LAB10's service1/app.py logged before structured_logging.py (minus Flask's default
+        # stderr handler, which also wrote every record a second time)
+        app.logger.removeHandler(default_handler)
+        app.logger.addHandler(logging.StreamHandler(stream))
+        app.logger.setLevel(logging.INFO)
+        app.logger.propagate = False
+        pipeline = None
+    elif mode == "queued-json":
+        pipeline = setup_logging(app, service="bench", stream=stream)
+        pipeline.sampler = RouteSampler({"/health": 0.1})
+    else:
+        app.logger.disabled = True
+        pipeline = None
+
+    @app.route('/')
+    def home():
+        app.logger.info("Service 1 received a request at the root endpoint.")
+        return "Hello from Service 1!"
+
+    @app.route('/health')
+    def health():
+        app.logger.info("Service 1 health check accessed.")
+        return "Service 1 is healthy!", 200
+
+    return app, pipeline
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(app, requests_total, threads):
+    per_thread = requests_total // threads
+    samples = [[] for _ in range(threads)]
+
+    def drive(out):
+        client = app.test_client()
+        for i in range(per_thread):
+            start = time.perf_counter()
+            client.get('/health' if i % 2 else '/')
+            out.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=drive, args=(samples[i],)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    flat = sorted(s for per in samples for s in per)
+    return len(flat) / elapsed, percentile(flat, 50) * 1000, percentile(flat, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--write-latency-ms", type=float, default=0.0,
+                        help="delay added to each write to the log stream")
+    args = parser.parse_args()
+
+    print(f"{'mode':<16} {'req/s':>9} {'p50_ms':>8} {'p99_ms':>8} {'lines':>8} {'writes':>8}")
+    for mode in ("disabled", "stream-handler", "queued-json"):
+        with tempfile.TemporaryFile("w+") as stream:
+            app, pipeline = make_app(mode, SlowStream(stream, args.write_latency_ms / 1000))
+            rps, p50, p99 = run(app, args.requests, args.threads)
+            writes = "-"
+            if pipeline is not None:
+                pipeline.stop()
+                writes = pipeline.stream_handler.writes
+            stream.flush()
+            stream.seek(0)
+            lines = sum(1 for _ in stream)
+            print(f"{mode:<16} {rps:>9.0f} {p50:>8.3f} {p99:>8.3f} {lines:>8} {writes:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Per-request overhead of RequestMetrics (instrumentation/request_metrics.py).
+
+Calls the WSGI app of a minimal Flask app directly (no test client, no server),
+with and without metrics, in many short interleaved rounds. The fastest round
+of each mode is reported, which filters out noise from other processes. The
+instrumentation is also timed on its own, around a WSGI app that does nothing:
+
+    python benchmarks/bench_metrics.py --requests 200000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from werkzeug.test import EnvironBuilder
+
+from instrumentation.request_metrics import RequestMetrics, _InstrumentedWsgiApp
+
+
+def make_app(mode, directory):
+    app = Flask(__name__)
+    metrics = None
+    if mode == "metrics":
+        metrics = RequestMetrics(app)
+    elif mode == "multiprocess":
+        metrics = RequestMetrics(app, multiprocess_dir=directory)
+
+    @app.route('/items/<int:item_id>')
+    def item(item_id):
+        return "ok"
+
+    return app, metrics
+
+
+def per_request_us(app, requests):
+    environ = EnvironBuilder(path="/items/42").get_environ()
+
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    wsgi_app = app.wsgi_app
+    started = time.perf_counter()
+    for _ in range(requests):
+        body = wsgi_app(environ.copy(), start_response)
+        for _ in body:
+            pass
+        body.close()
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def instrumentation_us(requests):
+    # The WSGI wrapper plus the after_request hook, without Flask's own request handling
+    app = Flask(__name__)
+    metrics = RequestMetrics(app)
+
+    @app.route('/items/<int:item_id>')
+    def item(item_id):
+        return "ok"
+
+    response = app.response_class("ok")
+    environ = EnvironBuilder(path="/items/42").get_environ()
+    with app.test_request_context(environ_overrides=environ):
+        app.preprocess_request()
+
+        def noop_app(environ, start_response):
+            metrics._record_route(response)
+            start_response("200 OK", [("Content-Type", "text/html; charset=utf-8"), ("Content-Length", "2")])
+            return [b"ok"]
+
+        wrapped = _InstrumentedWsgiApp(noop_app, metrics)
+        started = time.perf_counter()
+        for _ in range(requests):
+            wrapped(environ, lambda status, headers, exc_info=None: None)
+        return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=40, help="interleaved rounds per mode")
+    args = parser.parse_args()
+
+    modes = ("none", "metrics", "multiprocess")
+    with tempfile.TemporaryDirectory() as directory:
+        apps = {mode: make_app(mode, directory) for mode in modes}
+        for app, _ in apps.values():
+            per_request_us(app, 1000)  # warm up
+        timings = {mode: [] for mode in modes}
+        for _ in range(args.rounds):
+            for mode in modes:
+                timings[mode].append(per_request_us(apps[mode][0], args.requests // args.rounds))
+        for _, metrics in apps.values():
+            if metrics is not None:
+                metrics.close()
+
+    baseline = min(timings["none"])
+    print(f"{'mode':<14} {'us/request':>11} {'overhead us':>12} {'median us':>10}")
+    for mode in modes:
+        fastest = min(timings[mode])
+        print(f"{mode:<14} {fastest:>11.2f} {fastest - baseline:>12.2f} {statistics.median(timings[mode]):>10.2f}")
+    print(f"instrumentation alone: {min(instrumentation_us(args.requests // args.rounds) for _ in range(5)):.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
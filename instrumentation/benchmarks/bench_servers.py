@@ -0,0 +1,114 @@
+"""Requests/second of a lab app on Flask's dev server and on gunicorn with each worker class.
+
+Starts the app's script (`python app.py` in `--app-dir`, LAB07's api_service by
+default) once per server mode (see instrumentation/server.py) and loads it with
+keep-alive connections from client threads for a fixed time:
+
+    python benchmarks/bench_servers.py --duration 10 --concurrency 32 --path /data
+    python benchmarks/bench_servers.py --app-dir ../Docker-CD/LAB07-Microservices-CI-Pipeline/web_frontend_service --path /metrics
+
+The client threads share the machine with the server; on a small machine pin
+them to other CPUs (taskset) or the client becomes the bottleneck.
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+PACKAGE_DIR = os.path.join(REPO_ROOT, "instrumentation")
+APP_DIR = os.path.join(REPO_ROOT, "Docker-CD", "LAB07-Microservices-CI-Pipeline", "api_service")
+
+MODES = {
+    "dev": {"WSGI_SERVER": "dev"},
+    "sync": {"WSGI_WORKER_CLASS": "sync"},
+    "gthread": {"WSGI_WORKER_CLASS": "gthread"},
+    "gevent": {"WSGI_WORKER_CLASS": "gevent"},
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(host, port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start within {timeout}s")
+
+
+def load(host, port, path, concurrency, duration):
+    """Returns (requests completed, errors) over `duration` seconds."""
+    counts = [0] * concurrency
+    errors = [0] * concurrency
+    stop_at = time.monotonic() + duration
+
+    def client(index):
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        while time.monotonic() < stop_at:
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                response.read()
+                if response.status == 200:
+                    counts[index] += 1
+                else:
+                    errors[index] += 1
+                if response.will_close:
+                    connection.close()
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                connection.close()
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts), sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app-dir", default=APP_DIR, help="directory of the app (default: LAB07's api_service)")
+    parser.add_argument("--script", default="app.py", help="script in --app-dir that serves the app on FLASK_RUN_PORT")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated: dev,sync,gthread,gevent")
+    parser.add_argument("--workers", type=int, default=None, help="WEB_CONCURRENCY (default: sized from the CPU count)")
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'server':<10} {'req/s':>9} {'errors':>7}")
+    for mode in args.modes.split(","):
+        port = free_port()
+        env = dict(os.environ, FLASK_RUN_PORT=str(port), **MODES[mode])
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [PACKAGE_DIR, os.environ.get("PYTHONPATH")]))
+        if args.workers:
+            env["WEB_CONCURRENCY"] = str(args.workers)
+        process = subprocess.Popen([sys.executable, args.script], cwd=args.app_dir, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up("127.0.0.1", port)
+            load("127.0.0.1", port, args.path, args.concurrency, 1)  # warm up
+            completed, errors = load("127.0.0.1", port, args.path, args.concurrency, args.duration)
+            print(f"{mode:<10} {completed / args.duration:>9,.0f} {errors:>7}")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""Instrumentation shared by the lab Flask apps.
+
+- request_metrics: request count, latency and size histograms served at /metrics
+- server: serve(app) runs the app under gunicorn, configured from WSGI_* variables
+- structured_logging: queued, batched JSON request logs with per-route sampling
+"""
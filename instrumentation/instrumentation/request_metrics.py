@@ -0,0 +1,323 @@
+import atexit
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import Response, request
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets: request latency in seconds, response size in bytes
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Route label for requests that matched no URL rule (404s), so that random paths
+# do not each create a new series
+UNMATCHED_ROUTE = "<unmatched>"
+
+# WSGI environ key the matched route is passed back in
+ROUTE_KEY = "request_metrics.route"
+
+
+class Histogram:
+    """Per-bucket counts (the last one is +Inf) and the sum of the observed values."""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, buckets, counts=None, total=0.0):
+        self.counts = list(counts) if counts else [0] * (len(buckets) + 1)
+        self.total = total
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+
+
+class ProcessMetrics:
+    """The metrics recorded by one process.
+
+    - `requests`: (method, route, status) -> number of requests
+    - `latency`/`sizes`: (method, route) -> Histogram
+    - `in_flight`: requests currently being handled
+    """
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS, size_buckets=SIZE_BUCKETS):
+        self.latency_buckets = latency_buckets
+        self.size_buckets = size_buckets
+        self.requests = {}
+        self.latency = {}
+        self.sizes = {}
+        self.in_flight = 0
+
+    def observe(self, method, route, status, seconds, size):
+        # Called with the owner's lock held
+        key = (method, route, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(self.latency_buckets)
+        histogram.counts[bisect.bisect_left(self.latency_buckets, seconds)] += 1
+        histogram.total += seconds
+        if size is not None:
+            histogram = self.sizes.get(key)
+            if histogram is None:
+                histogram = self.sizes[key] = Histogram(self.size_buckets)
+            histogram.counts[bisect.bisect_left(self.size_buckets, size)] += 1
+            histogram.total += size
+
+    def merge(self, other, in_flight=True):
+        for key, count in other.requests.items():
+            self.requests[key] = self.requests.get(key, 0) + count
+        for mine, theirs, buckets in ((self.latency, other.latency, self.latency_buckets),
+                                      (self.sizes, other.sizes, self.size_buckets)):
+            for key, histogram in theirs.items():
+                mine.setdefault(key, Histogram(buckets)).merge(histogram)
+        if in_flight:
+            self.in_flight += other.in_flight
+
+    def to_dict(self):
+        return {
+            "requests": [[*key, count] for key, count in self.requests.items()],
+            "latency": [[*key, h.counts, h.total] for key, h in self.latency.items()],
+            "sizes": [[*key, h.counts, h.total] for key, h in self.sizes.items()],
+            "in_flight": self.in_flight,
+        }
+
+    @classmethod
+    def from_dict(cls, data, latency_buckets=LATENCY_BUCKETS, size_buckets=SIZE_BUCKETS):
+        metrics = cls(latency_buckets, size_buckets)
+        metrics.requests = {(method, route, status): count for method, route, status, count in data["requests"]}
+        metrics.latency = {(method, route): Histogram(latency_buckets, counts, total)
+                           for method, route, counts, total in data["latency"]}
+        metrics.sizes = {(method, route): Histogram(size_buckets, counts, total)
+                         for method, route, counts, total in data["sizes"]}
+        metrics.in_flight = data["in_flight"]
+        return metrics
+
+    def copy(self):
+        return ProcessMetrics.from_dict(self.to_dict(), self.latency_buckets, self.size_buckets)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _number(value):
+    if isinstance(value, float):
+        return "+Inf" if value == float("inf") else repr(value)
+    return str(value)
+
+
+def _write_histogram(lines, name, help_text, histograms, buckets):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), histogram in sorted(histograms.items()):
+        labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+        cumulative = 0
+        for bound, count in zip(buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{_number(bound)}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {_number(histogram.total)}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+
+def render(metrics):
+    """The metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP http_requests_total Requests handled, by method, route and status code.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route, status), count in sorted(metrics.requests.items()):
+        lines.append(f'http_requests_total{{method="{_escape(method)}",route="{_escape(route)}",'
+                     f'status="{status}"}} {count}')
+    _write_histogram(lines, "http_request_duration_seconds", "Time from receiving a request to returning its response.",
+                     metrics.latency, metrics.latency_buckets)
+    _write_histogram(lines, "http_response_size_bytes", "Size of response bodies with a known length.",
+                     metrics.sizes, metrics.size_buckets)
+    lines.append("# HELP http_requests_in_progress Requests currently being handled.")
+    lines.append("# TYPE http_requests_in_progress gauge")
+    lines.append(f"http_requests_in_progress {metrics.in_flight}")
+    return "\n".join(lines) + "\n"
+
+
+class _InstrumentedWsgiApp:
+    """Wraps app.wsgi_app to time each request and see its status and Content-Length.
+
+    The time runs until the response has been started (the app returned its body),
+    not until a streamed body has been sent.
+    """
+
+    def __init__(self, wsgi_app, metrics):
+        self.wsgi_app = wsgi_app
+        self.metrics = metrics
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        self.metrics.started()
+        seen = [None, None]
+
+        def capture(status, headers, exc_info=None):
+            seen[0] = int(status[:3])
+            for name, value in headers:
+                if name == "Content-Length":
+                    seen[1] = int(value)
+                    break
+            return start_response(status, headers, exc_info)
+
+        try:
+            return self.wsgi_app(environ, capture)
+        finally:
+            # When an exception propagates (debug mode) nothing was started: count a 500
+            self.metrics.finished(environ["REQUEST_METHOD"], environ.get(ROUTE_KEY, UNMATCHED_ROUTE),
+                                  seen[0] or 500, time.perf_counter() - started, seen[1])
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class RequestMetrics:
+    """Records request count, latency, response size and in-flight requests of a Flask app
+    and serves them at `path` (/metrics) for Prometheus.
+
+    Observations only update in-memory counters under a lock, so they add a few
+    microseconds per request.
+
+    With several worker processes (gunicorn), set `multiprocess_dir` to a directory
+    shared by the workers and emptied when the server starts: each worker writes a
+    snapshot of its metrics there every `flush_interval` seconds, and whichever
+    worker answers /metrics adds up its own live metrics and the other workers'
+    snapshots. Counters of workers that have exited are kept, so totals never go
+    backwards; their in-flight requests are not.
+    """
+
+    def __init__(self, app=None, path="/metrics", multiprocess_dir=None, flush_interval=1.0,
+                 latency_buckets=LATENCY_BUCKETS, size_buckets=SIZE_BUCKETS):
+        self.path = path
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = float(flush_interval)
+        self.latency_buckets = tuple(latency_buckets)
+        self.size_buckets = tuple(size_buckets)
+        self.metrics = ProcessMetrics(self.latency_buckets, self.size_buckets)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._stop = threading.Event()
+        if multiprocess_dir:
+            os.makedirs(multiprocess_dir, exist_ok=True)
+            atexit.register(self.close)
+        if app is not None:
+            self.init_app(app)
+
+    @classmethod
+    def from_env(cls, app=None):
+        # PROMETHEUS_MULTIPROC_DIR is the variable prometheus_client uses for the same purpose
+        return cls(
+            app,
+            path=os.environ.get("METRICS_PATH", "/metrics"),
+            multiprocess_dir=os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None,
+            flush_interval=float(os.environ.get("METRICS_FLUSH_INTERVAL", 1.0)),
+        )
+
+    def init_app(self, app):
+        # Timing, status and size are taken around the WSGI app, which needs no
+        # request-context lookups; only the matched route comes from a Flask hook.
+        app.wsgi_app = _InstrumentedWsgiApp(app.wsgi_app, self)
+        app.after_request(self._record_route)
+        app.add_url_rule(self.path, "metrics", self.expose)
+
+    @staticmethod
+    def _record_route(response):
+        req = request._get_current_object()
+        rule = req.url_rule
+        if rule is not None:
+            req.environ[ROUTE_KEY] = rule.rule
+        return response
+
+    def _ensure_started(self):
+        # Called with self._lock held, in a new process (first request, or a worker
+        # forked after the app was loaded): start from empty metrics so nothing the
+        # parent recorded is counted twice, and start writing snapshots.
+        self._pid = os.getpid()
+        self.metrics = ProcessMetrics(self.latency_buckets, self.size_buckets)
+        if self.multiprocess_dir and self.flush_interval > 0:
+            self._stop = threading.Event()
+            threading.Thread(target=self._flush_loop, args=(self._stop,),
+                             name="metrics-flusher", daemon=True).start()
+
+    def started(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._ensure_started()
+            self.metrics.in_flight += 1
+
+    def finished(self, method, route, status, seconds, size):
+        with self._lock:
+            self.metrics.in_flight -= 1
+            self.metrics.observe(method, route, status, seconds, size)
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.multiprocess_dir, f"request-metrics-{pid}.json")
+
+    def _flush_loop(self, stop):
+        while not stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Writing request metrics to {self.multiprocess_dir} failed: {e}")
+
+    def flush(self):
+        """Write this process's snapshot (multiprocess mode only)."""
+        if not self.multiprocess_dir or self._pid != os.getpid():
+            return
+        with self._lock:
+            data = self.metrics.to_dict()
+        path = self._snapshot_path(self._pid)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp, path)
+
+    def close(self):
+        atexit.unregister(self.close)
+        self._stop.set()
+        try:
+            self.flush()
+        except OSError as e:
+            logger.warning(f"Could not write final request metrics to {self.multiprocess_dir}: {e}")
+
+    def collect(self):
+        """This process's metrics plus, in multiprocess mode, every other worker's last snapshot."""
+        with self._lock:
+            total = self.metrics.copy()
+        if not self.multiprocess_dir:
+            return total
+        own = self._snapshot_path(os.getpid())
+        for path in glob.glob(os.path.join(self.multiprocess_dir, "request-metrics-*.json")):
+            if path == own:
+                continue
+            try:
+                with open(path) as f:
+                    other = ProcessMetrics.from_dict(json.load(f), self.latency_buckets, self.size_buckets)
+                pid = int(os.path.basename(path)[len("request-metrics-"):-len(".json")])
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping unreadable metrics snapshot {path}: {e}")
+                continue
+            total.merge(other, in_flight=_pid_alive(pid))
+        return total
+
+    def expose(self):
+        return Response(render(self.collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,160 @@
+import glob
+import logging
+import math
+import os
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.util import import_app
+except ImportError:
+    # Without gunicorn (e.g. running the app outside its image) serve() falls back
+    # to Flask's development server
+    BaseApplication = object
+    import_app = None
+
+logger = logging.getLogger(__name__)
+
+WORKER_CLASSES = ("sync", "gthread", "gevent")
+
+
+def _cgroup_cpu_quota():
+    # The CPU limit of the container (docker run --cpus, Kubernetes limits.cpu), if any
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()  # cgroup v2: "max 100000" or "150000 100000"
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus():
+    """CPUs this process can use: its CPU affinity, capped by the container's CPU limit."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def default_workers(worker_class, cpus):
+    # A sync worker serves one request at a time, so use gunicorn's recommended
+    # (2 x CPUs) + 1. gthread and gevent workers overlap requests waiting on I/O
+    # themselves and need only one process per CPU.
+    if worker_class == "sync":
+        return 2 * cpus + 1
+    return cpus
+
+
+def gunicorn_options(bind, env=None, **overrides):
+    """gunicorn settings from the WSGI_* environment variables; `overrides` win."""
+    env = os.environ if env is None else env
+    worker_class = overrides.pop("worker_class", None) or env.get("WSGI_WORKER_CLASS", "gthread").lower()
+    if worker_class not in WORKER_CLASSES:
+        raise ValueError(f"WSGI_WORKER_CLASS must be one of {', '.join(WORKER_CLASSES)}, got {worker_class!r}")
+    # gevent patches the standard library when a worker starts; the app has to be
+    # imported after that, in each worker, instead of once in the master
+    preload = env.get("WSGI_PRELOAD", "false" if worker_class == "gevent" else "true").lower() == "true"
+    options = {
+        "bind": bind,
+        "worker_class": worker_class,
+        "workers": int(env.get("WEB_CONCURRENCY") or default_workers(worker_class, available_cpus())),
+        "preload_app": preload,
+        "timeout": int(env.get("WSGI_TIMEOUT", 30)),
+        "graceful_timeout": int(env.get("WSGI_GRACEFUL_TIMEOUT", 30)),
+        "keepalive": int(env.get("WSGI_KEEPALIVE", 5)),
+        # Restart a worker after this many requests (0: never), with jitter so they don't all restart at once
+        "max_requests": int(env.get("WSGI_MAX_REQUESTS", 0)),
+        "max_requests_jitter": int(env.get("WSGI_MAX_REQUESTS_JITTER", 0)),
+        "accesslog": env.get("WSGI_ACCESS_LOG") or None,
+        "on_starting": _clear_metrics_dir,
+    }
+    if worker_class == "gthread":
+        options["threads"] = int(env.get("WSGI_THREADS", 4))
+    elif worker_class == "gevent":
+        options["worker_connections"] = int(env.get("WSGI_WORKER_CONNECTIONS", 1000))
+    if os.path.isdir("/dev/shm"):
+        # Worker heartbeat files on tmpfs; a container's /tmp may be a slow overlay filesystem
+        options["worker_tmp_dir"] = "/dev/shm"
+    options.update(overrides)
+    return options
+
+
+def _clear_metrics_dir(arbiter):
+    # Snapshots of the previous run's workers would otherwise be added to /metrics
+    # (see request_metrics.py)
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        return
+    for path in glob.glob(os.path.join(directory, "*")):
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+class GunicornServer(BaseApplication):
+    """Runs a WSGI app under gunicorn from Python, without the gunicorn command line.
+
+    With preload_app the master process loads `app` once and forks the workers
+    from it, so they share its memory pages until they write to them. Otherwise
+    each worker imports `app_uri` ("module:variable") itself.
+    """
+
+    def __init__(self, app, app_uri, options):
+        self.application = app
+        self.app_uri = app_uri
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        if self.cfg.preload_app or self.app_uri is None:
+            return self.application
+        return import_app(self.app_uri)
+
+
+def serve(app, app_uri=None, host="0.0.0.0", port=5000, on_worker_start=None, **overrides):
+    """Serve `app` until the process is stopped.
+
+    Uses gunicorn, configured from WSGI_* environment variables (see
+    gunicorn_options), unless WSGI_SERVER=dev, debugging is on (FLASK_DEBUG=1 or
+    FLASK_ENV=development) or gunicorn is not installed: then Flask's development
+    server is used, with its reloader and debugger when debugging is on.
+
+    `app_uri` ("main:app") lets workers import the app themselves when it is not
+    preloaded (gevent, or WSGI_PRELOAD=false). `on_worker_start` is called in each
+    worker process before it serves requests. Send SIGHUP to the master (PID 1 in
+    the container) to replace the workers gracefully: in-flight requests get
+    WSGI_GRACEFUL_TIMEOUT seconds to finish. Without preloading the new workers
+    also load the current code.
+    """
+    server = os.environ.get("WSGI_SERVER", "gunicorn").lower()
+    # The same switches Flask's dev server uses to turn on its debugger and reloader
+    debug = (os.environ.get("FLASK_DEBUG", "").lower() in ("1", "true")
+             or os.environ.get("FLASK_ENV") == "development")
+    if server == "dev" or debug or import_app is None:
+        if server != "dev" and not debug:
+            logger.warning("gunicorn is not installed; serving with Flask's development server")
+        if on_worker_start is not None:
+            on_worker_start()
+        app.run(host=host, port=port)
+        return
+    if server != "gunicorn":
+        raise ValueError(f"WSGI_SERVER must be gunicorn or dev, got {server!r}")
+    options = gunicorn_options(f"{host}:{port}", **overrides)
+    if on_worker_start is not None:
+        options["post_worker_init"] = lambda worker: on_worker_start()
+    logger.info(f"Starting gunicorn on {options['bind']} with {options['workers']} {options['worker_class']} workers")
+    GunicornServer(app, app_uri, options).run()
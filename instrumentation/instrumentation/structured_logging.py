@@ -0,0 +1,273 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+# Fields copied from a record's `extra` into the JSON line when present
+REQUEST_FIELDS = ("request_id", "method", "route", "status", "latency_ms")
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line."""
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "service": self.service,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in REQUEST_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        return json.dumps(entry, separators=(",", ":"))
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: when the queue is full the record is dropped and counted."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # The base class formats the record and copies it; the request thread only
+        # needs to merge args into the message (and render any traceback) before
+        # the record crosses to the listener thread.
+        message = record.getMessage()
+        if record.exc_info:
+            message = f"{message}\n{logging.Formatter().formatException(record.exc_info)}"
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class BatchingStreamHandler(logging.Handler):
+    """Buffers formatted lines and writes them to the stream in one call per batch.
+
+    A batch is written when it reaches `batch_size` lines, when the oldest line
+    is `flush_interval` seconds old, or when flush() is called (the listener
+    does that whenever the queue runs empty).
+    """
+
+    def __init__(self, stream=None, batch_size=100, flush_interval=0.5):
+        super().__init__()
+        self.stream = stream or sys.stdout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writes = 0
+        self._buffer = []
+        self._first_buffered = None
+
+    def emit(self, record):
+        try:
+            self._buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if self._first_buffered is None:
+            self._first_buffered = time.monotonic()
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._first_buffered >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._buffer:
+                self.stream.write("\n".join(self._buffer) + "\n")
+                self.stream.flush()
+                self.writes += 1
+                self._buffer = []
+                self._first_buffered = None
+        finally:
+            self.release()
+
+
+class BatchingQueueListener(QueueListener):
+    """QueueListener that flushes its handlers when the queue runs empty and reports drops."""
+
+    def __init__(self, log_queue, handler, queue_handler):
+        super().__init__(log_queue, handler, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self._reported_drops = 0
+
+    def enqueue_sentinel(self):
+        # Block rather than fail if stop() is called while the queue is full
+        self.queue.put(self._sentinel)
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            self.report_drops()
+            for handler in self.handlers:
+                handler.flush()
+
+    def report_drops(self):
+        dropped = self.queue_handler.dropped
+        if dropped > self._reported_drops:
+            record = logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": f"Log queue full: dropped {dropped - self._reported_drops} records ({dropped} in total)",
+            })
+            self._reported_drops = dropped
+            super().handle(record)
+
+
+class RouteSampler:
+    """Keeps 1 in N requests per route, for high-volume routes such as /health.
+
+    `rates` maps a route to the fraction of its requests to log (0.01 = 1 in 100).
+    Routes that are not listed are always logged. Counting instead of random
+    sampling gives an exact, evenly spread rate.
+    """
+
+    def __init__(self, rates):
+        self.every = {route: max(1, round(1 / rate)) if rate > 0 else None for route, rate in rates.items()}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_string(cls, value):
+        # LOG_SAMPLE_RATES format: "/health=0.01,/metrics=0.1"
+        rates = {}
+        for entry in value.split(","):
+            route, sep, rate = entry.strip().partition("=")
+            if sep:
+                rates[route.strip()] = float(rate)
+        return cls(rates)
+
+    def keep(self, route):
+        if route not in self.every:
+            return True
+        every = self.every[route]
+        if every is None:
+            return False
+        with self._lock:
+            count = self._counts.get(route, 0)
+            self._counts[route] = count + 1
+        return count % every == 0
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id and route to records logged during a request, and drops
+    INFO/DEBUG records of requests the sampler skipped."""
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        if getattr(record, "request_id", None) is None:
+            record.request_id = g.get("request_id")
+            record.route = g.get("route")
+        return g.get("log_sampled", True) or record.levelno >= logging.WARNING
+
+
+class LogPipeline:
+    """Request threads put records on a bounded queue (DroppingQueueHandler); one
+    listener thread formats them as JSON and writes them to stdout in batches."""
+
+    def __init__(self, service, stream=None, queue_size=10000, batch_size=100, flush_interval=0.5, sampler=None):
+        self.queue_size = queue_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler = DroppingQueueHandler(self.queue)
+        self.queue_handler.addFilter(RequestContextFilter())
+        self.stream_handler = BatchingStreamHandler(stream, batch_size, flush_interval)
+        self.stream_handler.setFormatter(JsonFormatter(service))
+        self.listener = None
+        self.sampler = sampler or RouteSampler({})
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        # The listener thread does not survive a fork, so each process starts its own
+        # listener. A forked process also gets a new queue and drop count: the parent's
+        # queue may hold records it still has to write, or a lock its listener held
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                if self._pid is not None:
+                    self.queue = queue.Queue(maxsize=self.queue_size)
+                    self.queue_handler.queue = self.queue
+                    self.queue_handler.dropped = 0
+                self.listener = BatchingQueueListener(self.queue, self.stream_handler, self.queue_handler)
+                self.listener.start()
+                self._pid = os.getpid()
+
+    def stop(self):
+        if self._pid == os.getpid():
+            self.listener.stop()
+            self.listener.report_drops()
+            self.stream_handler.flush()
+            self._pid = None
+
+    def stats(self):
+        return {"queued": self.queue.qsize(), "dropped": self.queue_handler.dropped,
+                "writes": self.stream_handler.writes}
+
+
+def setup_logging(app, service, stream=None):
+    """Routes app.logger through a LogPipeline and logs one JSON line per request.
+
+    Configured from LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL and
+    LOG_SAMPLE_RATES (default "/health=0.1").
+    """
+    pipeline = LogPipeline(
+        service,
+        stream=stream,
+        queue_size=int(os.environ.get("LOG_QUEUE_SIZE", 10000)),
+        batch_size=int(os.environ.get("LOG_BATCH_SIZE", 100)),
+        flush_interval=float(os.environ.get("LOG_FLUSH_INTERVAL", 0.5)),
+        sampler=RouteSampler.from_string(os.environ.get("LOG_SAMPLE_RATES", "/health=0.1")),
+    )
+    app.logger.handlers = [pipeline.queue_handler]
+    app.logger.setLevel(logging.INFO)
+    app.logger.propagate = False
+    pipeline.ensure_started()
+    atexit.register(pipeline.stop)
+
+    @app.before_request
+    def start_request_log():
+        pipeline.ensure_started()
+        g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        g.route = request.url_rule.rule if request.url_rule is not None else request.path
+        g.log_sampled = pipeline.sampler.keep(g.route)
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def finish_request_log(response):
+        started = g.get("request_started")
+        if started is not None:
+            app.logger.info("request completed", extra={
+                "request_id": g.request_id, "method": request.method, "route": g.route,
+                "status": response.status_code,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            })
+            response.headers["X-Request-ID"] = g.request_id
+        return response
+
+    return pipeline
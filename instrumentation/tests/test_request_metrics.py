@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+
+from flask import Flask
+
+# Add the parent directory to sys.path to allow direct import of the instrumentation package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from instrumentation.request_metrics import RequestMetrics
+
+def make_app(**kwargs):
+    app = Flask(__name__)
+    metrics = RequestMetrics(app, **kwargs)
+
+    @app.route('/items/<int:item_id>')
+    def item(item_id):
+        return "x" * 500
+
+    @app.route('/fail')
+    def fail():
+        raise RuntimeError("boom")
+
+    return app, metrics
+
+def test_metrics_are_recorded_per_route():
+    """Test that requests are counted and timed per route template, not per path."""
+    app, metrics = make_app()
+    client = app.test_client()
+    client.get('/items/1')
+    client.get('/items/2')
+    client.get('/missing/path')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/items/<int:item_id>",status="200"} 2' in text
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"} 1' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/items/<int:item_id>",le="+Inf"} 2' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/<int:item_id>"} 2' in text
+    assert 'http_response_size_bytes_bucket{method="GET",route="/items/<int:item_id>",le="100"} 0' in text
+    assert 'http_response_size_bytes_bucket{method="GET",route="/items/<int:item_id>",le="1000"} 2' in text
+    assert 'http_response_size_bytes_sum{method="GET",route="/items/<int:item_id>"} 1000' in text
+    # The scrape itself is in progress while the metrics are rendered
+    assert "http_requests_in_progress 1" in text
+
+def test_in_flight_returns_to_zero_after_errors():
+    """Test that a request failing with an exception is counted as a 500 and no longer in flight."""
+    app, metrics = make_app()
+    assert app.test_client().get('/fail').status_code == 500
+    assert metrics.metrics.in_flight == 0
+    assert metrics.metrics.requests[("GET", "/fail", 500)] == 1
+
+def test_multiprocess_snapshots_are_merged(tmp_path):
+    """Test that /metrics adds up the snapshots written by other worker processes."""
+    app, metrics = make_app(multiprocess_dir=str(tmp_path), flush_interval=0)
+    client = app.test_client()
+    client.get('/items/1')
+
+    # A worker that has exited: its counters still count, its in-flight requests do not
+    other = {"requests": [["GET", "/items/<int:item_id>", 200, 3]],
+             "latency": [["GET", "/items/<int:item_id>", [0] * 13 + [3], 30.0]],
+             "sizes": [], "in_flight": 2}
+    (tmp_path / "request-metrics-999999999.json").write_text(json.dumps(other))
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/items/<int:item_id>",status="200"} 4' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/items/<int:item_id>",le="10.0"} 1' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/<int:item_id>"} 4' in text
+    assert "http_requests_in_progress 1" in text
+
+    metrics.flush()
+    written = json.loads((tmp_path / f"request-metrics-{os.getpid()}.json").read_text())
+    assert ["GET", "/items/<int:item_id>", 200, 1] in written["requests"]
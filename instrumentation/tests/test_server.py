@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+# Add the parent directory to sys.path to allow direct import of the instrumentation package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from instrumentation import server
+from instrumentation.server import default_workers, gunicorn_options, serve
+
+def test_default_workers():
+    """Test that sync workers are sized (2 x CPUs) + 1 and threaded/async workers one per CPU."""
+    assert default_workers("sync", 4) == 9
+    assert default_workers("gthread", 4) == 4
+    assert default_workers("gevent", 4) == 4
+
+def test_gunicorn_options_from_env(monkeypatch):
+    """Test that WSGI_* variables select the worker class and its settings."""
+    monkeypatch.setattr(server, "available_cpus", lambda: 2)
+    options = gunicorn_options("0.0.0.0:5000", env={})
+    assert options["worker_class"] == "gthread"
+    assert options["workers"] == 2
+    assert options["threads"] == 4
+    assert options["preload_app"] is True
+
+    options = gunicorn_options("0.0.0.0:5000", env={"WSGI_WORKER_CLASS": "sync", "WSGI_TIMEOUT": "10"})
+    assert options["workers"] == 5
+    assert options["timeout"] == 10
+    assert "threads" not in options
+
+    # gevent workers import the app themselves, after patching the standard library
+    options = gunicorn_options("0.0.0.0:5000", env={"WSGI_WORKER_CLASS": "gevent", "WEB_CONCURRENCY": "3"})
+    assert options["workers"] == 3
+    assert options["worker_connections"] == 1000
+    assert options["preload_app"] is False
+
+    assert gunicorn_options("0.0.0.0:5000", env={}, workers=1)["workers"] == 1
+    with pytest.raises(ValueError):
+        gunicorn_options("0.0.0.0:5000", env={"WSGI_WORKER_CLASS": "eventlet"})
+
+def test_serve_uses_dev_server_when_asked(monkeypatch):
+    """Test that WSGI_SERVER=dev runs Flask's development server."""
+    monkeypatch.setenv("WSGI_SERVER", "dev")
+    monkeypatch.delenv("FLASK_DEBUG", raising=False)
+    app = Flask(__name__)
+    calls = []
+    monkeypatch.setattr(app, "run", lambda **kwargs: calls.append(kwargs))
+    started = []
+    serve(app, "main:app", port=5123, on_worker_start=lambda: started.append(True))
+    assert calls == [{"host": "0.0.0.0", "port": 5123}]
+    assert started == [True]
+
+def test_serve_uses_dev_server_in_development(monkeypatch):
+    """Test that FLASK_ENV=development keeps the dev server (and its reloader) for compose dev setups."""
+    monkeypatch.delenv("WSGI_SERVER", raising=False)
+    monkeypatch.setenv("FLASK_ENV", "development")
+    app = Flask(__name__)
+    calls = []
+    monkeypatch.setattr(app, "run", lambda **kwargs: calls.append(kwargs))
+    serve(app, "main:app")
+    assert calls == [{"host": "0.0.0.0", "port": 5000}]
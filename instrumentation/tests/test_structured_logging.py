@@ -0,0 +1,186 @@
+import io
+import json
+import logging
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+# Add the parent directory to sys.path to allow direct import of the instrumentation package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from instrumentation.structured_logging import BatchingStreamHandler, JsonFormatter, LogPipeline, RouteSampler, setup_logging
+
+class CountingStream(io.StringIO):
+    """A stream that counts the write() calls it gets."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super().write(data)
+
+def make_app(monkeypatch, stream, sample_rates=None):
+    if sample_rates is None:
+        monkeypatch.delenv("LOG_SAMPLE_RATES", raising=False)
+    else:
+        monkeypatch.setenv("LOG_SAMPLE_RATES", sample_rates)
+    app = Flask(__name__)
+    pipeline = setup_logging(app, service="test-service", stream=stream)
+
+    @app.route('/items/<int:item_id>')
+    def item(item_id):
+        app.logger.info("looking up item %d", item_id)
+        return "ok"
+
+    @app.route('/health')
+    def health():
+        failure = app.config.get("FAIL_HEALTH")
+        if failure:
+            app.logger.warning("health check failing: %s", failure)
+        return "ok"
+
+    return app, pipeline
+
+def records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+def test_request_log_has_request_id_route_and_latency(monkeypatch):
+    """Test that each request logs one JSON line with its request id, route, status and latency."""
+    stream = io.StringIO()
+    app, pipeline = make_app(monkeypatch, stream)
+    response = app.test_client().get('/items/42', headers={'X-Request-ID': 'abc123'})
+    generated = app.test_client().get('/items/7').headers['X-Request-ID']
+    pipeline.stop()
+
+    assert response.headers['X-Request-ID'] == 'abc123'
+    logged, completed = records(stream)[:2]
+    # Records logged by the view carry the request's id and route too
+    assert logged['message'] == 'looking up item 42'
+    assert (logged['request_id'], logged['route']) == ('abc123', '/items/<int:item_id>')
+    assert completed['message'] == 'request completed'
+    assert (completed['service'], completed['level'], completed['method'], completed['status']) == \
+        ('test-service', 'INFO', 'GET', 200)
+    assert completed['request_id'] == 'abc123' and completed['route'] == '/items/<int:item_id>'
+    assert completed['latency_ms'] >= 0
+    assert records(stream)[3]['request_id'] == generated and len(generated) == 32
+
+def test_health_requests_are_sampled(monkeypatch):
+    """Test that 1 in N /health requests is logged, but warnings of the skipped ones are kept."""
+    stream = io.StringIO()
+    app, pipeline = make_app(monkeypatch, stream, sample_rates="/health=0.25")
+    client = app.test_client()
+    for _ in range(7):
+        client.get('/health')
+    client.get('/items/1')
+    app.config["FAIL_HEALTH"] = "redis down"
+    client.get('/health')  # the 8th /health request: not sampled
+    pipeline.stop()
+
+    lines = records(stream)
+    assert len([r for r in lines if r.get('route') == '/health' and r['message'] == 'request completed']) == 2
+    assert len([r for r in lines if r.get('route') == '/items/<int:item_id>']) == 2  # not listed: always logged
+    [warning] = [r for r in lines if r['level'] == 'WARNING']
+    assert warning['message'] == 'health check failing: redis down' and warning['route'] == '/health'
+
+def test_route_sampler_rates():
+    """Test LOG_SAMPLE_RATES parsing and that a rate of 0 logs none of a route's requests."""
+    sampler = RouteSampler.from_string(" /health=0.1, /metrics=0 ,bad-entry")
+    assert sampler.every == {'/health': 10, '/metrics': None}
+    assert [sampler.keep('/health') for _ in range(20)].count(True) == 2
+    assert not sampler.keep('/metrics')
+    assert sampler.keep('/other')
+
+def test_full_queue_drops_and_counts_records():
+    """Test that records are dropped without blocking when the queue is full, and the drop is reported."""
+    stream = io.StringIO()
+    pipeline = LogPipeline('test-service', stream=stream, queue_size=2)
+    logger = logging.getLogger('test_full_queue')
+    logger.propagate = False
+    logger.addHandler(pipeline.queue_handler)
+    try:
+        for n in range(5):
+            logger.warning("record %d", n)  # no listener yet: nothing drains the queue
+        assert pipeline.stats() == {'queued': 2, 'dropped': 3, 'writes': 0}
+
+        pipeline.ensure_started()
+        pipeline.stop()
+    finally:
+        logger.removeHandler(pipeline.queue_handler)
+    messages = [r['message'] for r in records(stream)]
+    assert messages == ['record 0', 'record 1', 'Log queue full: dropped 3 records (3 in total)']
+
+def test_lines_are_written_in_batches():
+    """Test that lines are written once per batch_size lines, after flush_interval, or on flush()."""
+    stream = CountingStream()
+    handler = BatchingStreamHandler(stream, batch_size=3, flush_interval=60)
+    handler.setFormatter(JsonFormatter('test-service'))
+    for n in range(7):
+        handler.emit(logging.makeLogRecord({'msg': f'line {n}', 'levelname': 'INFO'}))
+    assert (stream.writes, handler.writes) == (2, 2)
+    handler.flush()
+    assert (stream.writes, handler.writes) == (3, 3)
+    assert [r['message'] for r in records(stream)] == [f'line {n}' for n in range(7)]
+    handler.flush()  # nothing buffered: no write
+    assert stream.writes == 3
+
+    handler.flush_interval = 0
+    handler.emit(logging.makeLogRecord({'msg': 'late', 'levelname': 'INFO'}))
+    assert stream.writes == 4
+
+def test_listener_writes_a_batch_when_the_queue_runs_empty():
+    """Test that the listener flushes the batch as soon as it has drained the queue."""
+    stream = CountingStream()
+    pipeline = LogPipeline('test-service', stream=stream, batch_size=1000, flush_interval=60)
+    logger = logging.getLogger('test_queue_empty')
+    logger.propagate = False
+    logger.addHandler(pipeline.queue_handler)
+    try:
+        for n in range(50):
+            logger.warning("record %d", n)
+        pipeline.ensure_started()
+        pipeline.queue.join()
+        pipeline.stop()
+    finally:
+        logger.removeHandler(pipeline.queue_handler)
+    assert len(records(stream)) == 50
+    assert stream.writes == 1
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_each_process_starts_its_own_listener(tmp_path):
+    """Test that a forked process (a gunicorn worker) writes through a new listener of its own."""
+    path = tmp_path / 'log.jsonl'
+    with open(path, 'w') as stream:
+        pipeline = LogPipeline('test-service', stream=stream)
+        logger = logging.getLogger('test_fork')
+        logger.propagate = False
+        logger.addHandler(pipeline.queue_handler)
+        try:
+            pipeline.ensure_started()
+            parent_listener = pipeline.listener
+            logger.warning("from the parent")
+            pipeline.queue.join()
+
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    pipeline.ensure_started()
+                    logger.warning("from the child")
+                    pipeline.stop()
+                    status = 0 if pipeline.listener is not parent_listener else 2
+                finally:
+                    os._exit(status)
+            _, status = os.waitpid(pid, 0)
+            assert os.waitstatus_to_exitcode(status) == 0
+
+            pipeline.ensure_started()
+            assert pipeline.listener is parent_listener  # same process: not restarted
+            pipeline.stop()
+        finally:
+            logger.removeHandler(pipeline.queue_handler)
+    messages = [json.loads(line)['message'] for line in path.read_text().splitlines()]
+    assert messages == ['from the parent', 'from the child']
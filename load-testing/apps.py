@@ -0,0 +1,138 @@
+"""Discovery of the lab apps and of what each needs to run outside its container.
+
+An app is a module with a module-level `app = Flask(__name__)`, or with a
+`create_app()` factory (then `main:app` builds it on first use). Its source is read
+with ast, never imported: the routes to load (static GET routes from
+`@app.route(...)`) and the environment variables the app's directory reads, which
+tell whether it needs Redis, an upstream API, a data file or a secret.
+"""
+import ast
+import os
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+INSTRUMENTATION = os.path.join(REPO_ROOT, "instrumentation")
+SKIP_DIRECTORIES = {"tests", "benchmarks", "__pycache__", ".git", ".github", "load-testing", "node_modules"}
+
+
+class LabApp:
+    """One Flask app of a lab: `module`:app in `directory`."""
+
+    def __init__(self, directory, module, routes, env_names):
+        self.directory = directory
+        self.module = module
+        self.routes = routes
+        self.env_names = env_names
+        self.id = os.path.relpath(os.path.join(directory, module), REPO_ROOT).replace(os.sep, "/")
+
+    def __repr__(self):
+        return f"LabApp({self.id!r})"
+
+    @property
+    def needs_redis(self):
+        return "REDIS_HOST" in self.env_names
+
+    @property
+    def needs_upstream(self):
+        return bool({"API_SERVICE_URL", "BACKEND_URLS"} & self.env_names)
+
+
+def _is_flask_app(node):
+    if isinstance(node, ast.FunctionDef) and node.name == "create_app":
+        return True
+    return (isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == "app"
+                                                 for target in node.targets)
+            and isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name)
+            and node.value.func.id == "Flask")
+
+
+def _routes(tree):
+    routes = []
+    for node in ast.walk(tree):  # factories define their routes inside create_app()
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)
+                    and decorator.func.attr == "route" and decorator.args
+                    and isinstance(decorator.args[0], ast.Constant)):
+                continue
+            rule = decorator.args[0].value
+            methods = next((keyword.value for keyword in decorator.keywords if keyword.arg == "methods"), None)
+            if methods is not None and not any(isinstance(method, ast.Constant) and method.value == "GET"
+                                               for method in getattr(methods, "elts", ())):
+                continue
+            if "<" not in rule and rule not in routes:
+                routes.append(rule)
+    return routes
+
+
+def _env_names(tree):
+    # os.environ.get("X"), os.getenv("X"), os.environ["X"]
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and node.args and isinstance(node.args[0], ast.Constant):
+            func = node.func
+            if isinstance(func, ast.Attribute) and (
+                    func.attr == "getenv" or (func.attr == "get" and isinstance(func.value, ast.Attribute)
+                                              and func.value.attr == "environ")):
+                names.add(node.args[0].value)
+        elif (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Attribute)
+              and node.value.attr == "environ" and isinstance(node.slice, ast.Constant)):
+            names.add(node.slice.value)
+    return {name for name in names if isinstance(name, str)}
+
+
+def _parse(path):
+    try:
+        with open(path, "rb") as f:
+            return ast.parse(f.read(), path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+
+def discover(roots=(REPO_ROOT,)):
+    """The lab apps under `roots`, sorted by id."""
+    apps = []
+    for root in roots:
+        for directory, subdirectories, files in os.walk(root):
+            subdirectories[:] = sorted(name for name in subdirectories if name not in SKIP_DIRECTORIES)
+            modules = {name: _parse(os.path.join(directory, name)) for name in sorted(files) if name.endswith(".py")}
+            env_names = None
+            for name, tree in modules.items():
+                if tree is None or not any(_is_flask_app(node) for node in tree.body):
+                    continue
+                if env_names is None:
+                    # The app's helper modules read settings too (redis_store.py, api_client.py, ...)
+                    env_names = set().union(*(_env_names(other) for other in modules.values() if other))
+                apps.append(LabApp(directory, name[:-len(".py")], _routes(tree), env_names))
+    return sorted(apps, key=lambda app: app.id)
+
+
+def select(apps, patterns):
+    """The apps whose id contains any of `patterns` (all of them without patterns)."""
+    if not patterns:
+        return list(apps)
+    return [app for app in apps if any(pattern in app.id for pattern in patterns)]
+
+
+def stand_in_environment(app, workdir, redis=None, upstream=None):
+    """Environment variables pointing `app` at the stand-ins and at files in `workdir`."""
+    # The apps import the shared instrumentation package, which their Dockerfiles pip install
+    env = {"PYTHONPATH": os.pathsep.join(filter(None, [INSTRUMENTATION, os.environ.get("PYTHONPATH")]))}
+    names = app.env_names
+    if app.needs_redis:
+        env["REDIS_HOST"], env["REDIS_PORT"] = redis.host, str(redis.port)
+    if "API_SERVICE_URL" in names:
+        env["API_SERVICE_URL"] = upstream.url
+    if "BACKEND_URLS" in names:
+        env["BACKEND_URLS"] = f"api={upstream.url}"
+    if "API_KEY_FILE" in names:
+        env["API_KEY_FILE"] = os.path.join(workdir, "api_key")
+        with open(env["API_KEY_FILE"], "w") as f:
+            f.write("load-test-key\n")
+    if "DATA_FILE" in names:
+        env["DATA_FILE"] = os.path.join(workdir, "counter.txt")
+    for name in ("STORE_DIR", "LOG_ROOT"):
+        if name in names:
+            env[name] = os.path.join(workdir, name.lower())
+            os.makedirs(env[name], exist_ok=True)
+    return env
@@ -0,0 +1,172 @@
+"""An open-loop HTTP/1.1 load generator.
+
+Requests are sent on a fixed schedule (`rate` per second, evenly spaced or with
+Poisson arrivals), whether or not earlier requests have been answered, the way
+independent users arrive. A closed loop (send, wait, send) slows down with the
+server and hides exactly the queueing a slow server causes ("coordinated
+omission"). Each latency is measured from the time the request was scheduled, so
+time spent waiting for a free connection counts too.
+
+The generator runs on asyncio with raw keep-alive connections (at most
+`connections` of them), so one client process can drive thousands of requests per
+second without a thread per request.
+"""
+import asyncio
+import random
+import time
+
+
+class EndpointSamples:
+    """Latencies (seconds) of the successful requests to one path, and its failures."""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+
+    def record(self, status, latency):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if 200 <= status < 400:
+            self.latencies.append(latency)
+        else:
+            self.errors += 1
+
+
+class LoadResult:
+    """What a run measured: samples per path, the measured window, and how late the
+    generator itself sent requests (a large lag means the client, not the server,
+    was the bottleneck)."""
+
+    def __init__(self, paths):
+        self.endpoints = {path: EndpointSamples() for path in paths}
+        self.started = None
+        self.finished = None
+        self.max_send_lag = 0.0
+        self.timeouts = 0
+
+    @property
+    def elapsed(self):
+        return (self.finished or self.started) - self.started
+
+
+async def _read_response(reader):
+    # Returns (status, keep_alive)
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, _, header_block = head.partition(b"\r\n")
+    version, status = status_line[:8], int(status_line[9:12])
+    headers = {}
+    for line in header_block.split(b"\r\n"):
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower()] = value.strip().lower()
+    keep_alive = version == b"HTTP/1.1" and headers.get(b"connection") != b"close"
+    if headers.get(b"transfer-encoding") == b"chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif b"content-length" in headers:
+        await reader.readexactly(int(headers[b"content-length"]))
+    elif status not in (204, 304):
+        await reader.read()  # until the server closes the connection
+        keep_alive = False
+    return status, keep_alive
+
+
+class _ConnectionPool:
+    def __init__(self, host, port, size):
+        self.host = host
+        self.port = port
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def acquire(self):
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            return await asyncio.open_connection(self.host, self.port)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, reusable):
+        if reusable:
+            self._idle.append(connection)
+        else:
+            connection[1].close()
+        self._slots.release()
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+async def _request(pool, request, scheduled, samples, timeout):
+    connection = None
+    reusable = False
+    try:
+        connection = await asyncio.wait_for(pool.acquire(), timeout)
+        reader, writer = connection
+        writer.write(request)
+        status, reusable = await asyncio.wait_for(_read_response(reader), timeout)
+        samples.record(status, time.perf_counter() - scheduled)
+    except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+        samples.errors += 1
+    except asyncio.TimeoutError:
+        samples.errors += 1
+        return "timeout"
+    finally:
+        if connection is not None:
+            pool.release(connection, reusable)
+    return None
+
+
+async def _run(host, port, paths, rate, duration, warmup, connections, timeout, arrivals, seed):
+    result = LoadResult(paths)
+    discarded = {path: EndpointSamples() for path in paths}
+    requests = [f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUser-Agent: loadgen\r\n\r\n".encode()
+                for path in paths]
+    pool = _ConnectionPool(host, port, connections)
+    randomness = random.Random(seed)
+    loop_start = time.perf_counter()
+    measure_from = loop_start + warmup
+    end = measure_from + duration
+    pending = set()
+    scheduled = loop_start
+    index = 0
+    while scheduled < end:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif scheduled >= measure_from:
+            result.max_send_lag = max(result.max_send_lag, -delay)
+        path_index = index % len(paths)
+        samples = (result.endpoints if scheduled >= measure_from else discarded)[paths[path_index]]
+        task = asyncio.ensure_future(_request(pool, requests[path_index], scheduled, samples, timeout))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        index += 1
+        gap = randomness.expovariate(rate) if arrivals == "poisson" else 1.0 / rate
+        scheduled += gap
+    result.started = measure_from
+    if pending:
+        outcomes = await asyncio.gather(*pending)
+        result.timeouts = outcomes.count("timeout")
+    result.finished = time.perf_counter()
+    pool.close()
+    return result
+
+
+def run_load(host, port, paths, rate, duration, warmup=1.0, connections=32, timeout=10.0,
+             arrivals="uniform", seed=0):
+    """Sends `rate` requests per second to `paths` in turn for `warmup` + `duration`
+    seconds and returns the LoadResult of the requests scheduled after the warmup."""
+    if not paths:
+        raise ValueError("no paths to request")
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    if arrivals not in ("uniform", "poisson"):
+        raise ValueError(f"arrivals must be uniform or poisson, got {arrivals!r}")
+    return asyncio.run(_run(host, port, list(paths), rate, duration, warmup, connections, timeout, arrivals, seed))
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Load-test every Flask app of the labs under gunicorn and compare with a baseline.
+
+Usage:
+    python load-testing/loadtest.py --list
+    python load-testing/loadtest.py --rate 200 --duration 10 --output results.json
+    python load-testing/loadtest.py LAB06 LAB07 --baseline load-testing/baseline.json
+    python load-testing/loadtest.py --baseline load-testing/baseline.json --update-baseline
+
+Each app found under the repository (see apps.py; FILTERs select apps whose id
+contains them) is started in its own gunicorn process, with local stand-ins for
+the services it talks to (see standins.py): an in-memory Redis for the Docker-CD
+counter apps and an upstream HTTP service for the web frontends. The open-loop
+generator of loadgen.py then sends --rate requests/second to the app's static GET
+routes in turn for --duration seconds, after a --warmup that is not measured.
+
+Reported per app and route: throughput, p50/p95/p99/p99.9 latency, errors, and
+the resident memory of the gunicorn master and workers (current and peak, from
+/proc on Linux). --output writes them as JSON. With --baseline the run is
+compared with a stored results file and exits with 1 if throughput, p99 latency,
+peak memory or errors got worse than the thresholds allow (see results.py);
+--update-baseline stores this run's results as the new baseline instead.
+
+Latencies depend on the machine: compare runs with the same settings on the same
+machine (the settings are stored with the results and must match).
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from apps import discover, select, stand_in_environment
+from loadgen import run_load
+from results import (DEFAULT_THRESHOLDS, RESULTS_VERSION, compare, merge_baseline, read_results, summarize_run,
+                     write_results)
+from standins import RedisStandIn, UpstreamStandIn
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+    return children + [grandchild for child in children for grandchild in _children(child)]
+
+
+def _memory(pid):
+    # (VmRSS, VmHWM) in bytes
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    name, value, _ = line.split()
+                    values[name] = int(value) * 1024
+    except OSError:
+        pass
+    return values.get("VmRSS:", 0), values.get("VmHWM:", 0)
+
+
+class AppServer:
+    """One lab app running under gunicorn on a free local port."""
+
+    def __init__(self, app, env, log_path, workers=2, threads=4, worker_class="gthread"):
+        self.app = app
+        self.port = _free_port()
+        self.log_path = log_path
+        command = [sys.executable, "-m", "gunicorn", "--chdir", app.directory,
+                   "--bind", f"127.0.0.1:{self.port}", "--workers", str(workers),
+                   "--worker-class", worker_class, "--log-level", "warning", f"{app.module}:app"]
+        if worker_class == "gthread":
+            command[-1:-1] = ["--threads", str(threads)]
+        self.command = command
+        self.env = dict(os.environ, **env)
+        self.process = None
+
+    def start(self, timeout=30.0):
+        with open(self.log_path, "ab") as log:
+            self.process = subprocess.Popen(self.command, env=self.env, stdout=log, stderr=subprocess.STDOUT)
+        path = self.app.routes[0] if self.app.routes else "/"
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {self.process.returncode}: {self._log_tail()}")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=1) as s:
+                    s.sendall(f"GET {path} HTTP/1.0\r\n\r\n".encode())
+                    if s.recv(12).startswith(b"HTTP/"):
+                        return self
+            except OSError:
+                time.sleep(0.1)
+        self.stop()
+        raise RuntimeError(f"not answering after {timeout:.0f} s: {self._log_tail()}")
+
+    def _log_tail(self, lines=5):
+        try:
+            with open(self.log_path, errors="replace") as f:
+                return " | ".join(f.read().strip().splitlines()[-lines:])
+        except OSError:
+            return "(no log)"
+
+    def memory(self):
+        """(current RSS, peak RSS) of the master and its workers in bytes, or None off Linux."""
+        if not os.path.exists(f"/proc/{self.process.pid}/status"):
+            return None
+        totals = [_memory(pid) for pid in [self.process.pid] + _children(self.process.pid)]
+        return sum(rss for rss, _ in totals), sum(peak for _, peak in totals)
+
+    def stop(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def print_app(app_id, result):
+    print(f"\n{app_id}")
+    if "error" in result:
+        print(f"  Error: {result['error']}")
+        return
+    print(f"  {'route':<16} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'errors':>7}")
+    for path, endpoint in list(result["endpoints"].items()) + [("(all)", result["overall"])]:
+        print(f"  {path:<16} {endpoint['throughput']:>9,.1f} {endpoint['p50_ms']:>8.2f} {endpoint['p95_ms']:>8.2f} "
+              f"{endpoint['p99_ms']:>8.2f} {endpoint['p999_ms']:>9.2f} {endpoint['errors']:>7}")
+    if result["rss_mb"] is not None:
+        print(f"  RSS {result['rss_mb']} MB (peak {result['peak_rss_mb']} MB)")
+    if result["max_send_lag_ms"] > 50:
+        print(f"  Warning: requests were sent up to {result['max_send_lag_ms']:.0f} ms late; "
+              "the generator could not keep up with --rate, so latencies include its own lag")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("filters", nargs="*", metavar="FILTER", help="only apps whose id contains one of these")
+    parser.add_argument("--list", action="store_true", help="list the apps and their routes, and exit")
+    parser.add_argument("--rate", type=float, default=200, help="requests/second per app (default: 200)")
+    parser.add_argument("--duration", type=float, default=10, help="measured seconds per app (default: 10)")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured seconds first (default: 2)")
+    parser.add_argument("--connections", type=int, default=32, help="keep-alive connections at most (default: 32)")
+    parser.add_argument("--arrivals", choices=("uniform", "poisson"), default="uniform")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers (default: 2)")
+    parser.add_argument("--threads", type=int, default=4, help="threads per gthread worker (default: 4)")
+    parser.add_argument("--worker-class", choices=("sync", "gthread", "gevent"), default="gthread")
+    parser.add_argument("--upstream-delay", type=float, default=0.005,
+                        help="seconds the upstream stand-in takes to answer (default: 0.005)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results file to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run in --baseline instead")
+    for name, default in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--max-{name.replace('_', '-')}", dest=name, type=float, default=default,
+                            help=f"regression threshold (default: {default})")
+    args = parser.parse_args(argv)
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline needs --baseline")
+
+    apps = select(discover(), args.filters)
+    if args.list:
+        for app in apps:
+            needs = [name for name, needed in (("redis", app.needs_redis), ("upstream", app.needs_upstream)) if needed]
+            print(f"{app.id}  {' '.join(app.routes)}" + (f"  (stand-ins: {', '.join(needs)})" if needs else ""))
+        return 0
+    if not apps:
+        print("Error: no apps match " + " ".join(args.filters))
+        return 1
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        try:
+            baseline = read_results(args.baseline)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+    elif args.baseline and not args.update_baseline:
+        print(f"Error: {args.baseline} does not exist; create it with --update-baseline")
+        return 1
+
+    settings = {name: getattr(args, name) for name in ("rate", "duration", "warmup", "connections", "arrivals",
+                                                        "workers", "threads", "worker_class", "upstream_delay")}
+    results = {"version": RESULTS_VERSION, "settings": settings, "cpus": os.cpu_count(), "apps": {}}
+    redis = RedisStandIn().start() if any(app.needs_redis for app in apps) else None
+    upstream = UpstreamStandIn(delay=args.upstream_delay).start() if any(app.needs_upstream for app in apps) else None
+    try:
+        with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+            for app in apps:
+                app_dir = os.path.join(workdir, app.id.replace("/", "_"))
+                os.makedirs(app_dir)
+                env = stand_in_environment(app, app_dir, redis=redis, upstream=upstream)
+                server = AppServer(app, env, os.path.join(app_dir, "gunicorn.log"), workers=args.workers,
+                                   threads=args.threads, worker_class=args.worker_class)
+                try:
+                    server.start()
+                    load = run_load("127.0.0.1", server.port, app.routes, args.rate, args.duration,
+                                    warmup=args.warmup, connections=args.connections, arrivals=args.arrivals)
+                    result = summarize_run(load, server.memory())
+                except RuntimeError as e:
+                    result = {"error": str(e)}
+                finally:
+                    server.stop()
+                results["apps"][app.id] = result
+                print_app(app.id, result)
+    finally:
+        if redis:
+            redis.stop()
+        if upstream:
+            upstream.stop()
+
+    if args.output:
+        write_results(args.output, results)
+    failed = [app_id for app_id, result in results["apps"].items() if "error" in result]
+    if args.update_baseline:
+        write_results(args.baseline, merge_baseline(baseline, results))
+        print(f"\n✅ Stored the results of {len(results['apps'])} apps in {args.baseline}")
+        return 1 if failed else 0
+    if baseline:
+        try:
+            regressions, notes = compare(results, baseline, {name: getattr(args, name) for name in DEFAULT_THRESHOLDS})
+        except ValueError as e:
+            print(f"\nError: {e}")
+            return 1
+        print()
+        for note in notes:
+            print(f"Note: {note}")
+        for regression in regressions:
+            print(f"Error: regression: {regression}")
+        if regressions:
+            return 1
+        print(f"✅ No regressions against {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
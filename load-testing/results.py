@@ -0,0 +1,122 @@
+"""Summaries of load runs, their JSON results file, and comparison with a baseline."""
+import json
+import os
+import tempfile
+
+RESULTS_VERSION = 1
+PERCENTILES = (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99), ("p999_ms", 99.9))
+# Settings that must match for two runs to be comparable
+COMPARABLE_SETTINGS = ("rate", "duration", "connections", "workers", "threads", "worker_class", "arrivals",
+                       "upstream_delay")
+DEFAULT_THRESHOLDS = {
+    "throughput_drop": 0.10,    # fraction of the baseline's requests/second
+    "latency_increase": 0.50,   # fraction of the baseline's p99
+    "latency_min_delta_ms": 5.0,  # ...and at least this much, so scheduler noise doesn't fail runs
+    "rss_increase": 0.20,       # fraction of the baseline's peak RSS
+}
+
+
+def percentile(sorted_values, pct):
+    """The nearest-rank percentile of already sorted values (0 for none)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """requests, errors, throughput (successful requests/second) and latency percentiles (ms)."""
+    latencies = sorted(latencies)
+    summary = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+    }
+    for name, pct in PERCENTILES:
+        summary[name] = round(percentile(latencies, pct) * 1000, 3)
+    summary["max_ms"] = round(latencies[-1] * 1000, 3) if latencies else 0.0
+    return summary
+
+
+def summarize_run(load, rss=None):
+    """The results of one app: overall, per endpoint, memory and generator lag."""
+    endpoints = {path: summarize(samples.latencies, samples.errors, load.elapsed)
+                 for path, samples in load.endpoints.items()}
+    overall = summarize([latency for samples in load.endpoints.values() for latency in samples.latencies],
+                        sum(samples.errors for samples in load.endpoints.values()), load.elapsed)
+    return {
+        "overall": overall,
+        "endpoints": endpoints,
+        "statuses": {path: {str(status): count for status, count in sorted(samples.statuses.items())}
+                     for path, samples in load.endpoints.items()},
+        "rss_mb": rss and round(rss[0] / 2**20, 1),
+        "peak_rss_mb": rss and round(rss[1] / 2**20, 1),
+        "max_send_lag_ms": round(load.max_send_lag * 1000, 3),
+    }
+
+
+def write_results(path, results):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def read_results(path):
+    with open(path) as f:
+        results = json.load(f)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path}: results version {results.get('version')}, expected {RESULTS_VERSION}")
+    return results
+
+
+def merge_baseline(baseline, results):
+    """`baseline` with the apps of `results` replaced, so updating the baseline for
+    some apps keeps the others."""
+    merged = dict(results, apps=dict(baseline.get("apps", {}) if baseline else {}))
+    merged["apps"].update(results["apps"])
+    return merged
+
+
+def compare(results, baseline, thresholds=DEFAULT_THRESHOLDS):
+    """(regressions, notes): what got worse than `baseline` by more than `thresholds`,
+    and what could not be compared. Raises ValueError if the runs used different settings."""
+    different = [name for name in COMPARABLE_SETTINGS
+                 if results["settings"].get(name) != baseline["settings"].get(name)]
+    if different:
+        raise ValueError("the baseline was measured with different settings: " + ", ".join(
+            f"{name}={baseline['settings'].get(name)} (now {results['settings'].get(name)})" for name in different))
+    regressions = []
+    notes = []
+    for app_id, app in sorted(results["apps"].items()):
+        base = baseline["apps"].get(app_id)
+        if base is None:
+            notes.append(f"{app_id}: not in the baseline")
+            continue
+        if "error" in app:
+            regressions.append(f"{app_id}: {app['error']}")
+            continue
+        if "error" in base:
+            notes.append(f"{app_id}: failed in the baseline, not compared")
+            continue
+        now, then = app["overall"]["throughput"], base["overall"]["throughput"]
+        if then and now < then * (1 - thresholds["throughput_drop"]):
+            regressions.append(f"{app_id}: throughput {now:,.0f} req/s, baseline {then:,.0f} req/s")
+        if app["peak_rss_mb"] and base.get("peak_rss_mb") and \
+                app["peak_rss_mb"] > base["peak_rss_mb"] * (1 + thresholds["rss_increase"]):
+            regressions.append(f"{app_id}: peak RSS {app['peak_rss_mb']} MB, baseline {base['peak_rss_mb']} MB")
+        for path, endpoint in sorted(app["endpoints"].items()):
+            base_endpoint = base["endpoints"].get(path)
+            if base_endpoint is None:
+                notes.append(f"{app_id} {path}: not in the baseline")
+                continue
+            if endpoint["errors"] and not base_endpoint["errors"]:
+                regressions.append(f"{app_id} {path}: {endpoint['errors']} errors, none in the baseline")
+            now, then = endpoint["p99_ms"], base_endpoint["p99_ms"]
+            if now > then * (1 + thresholds["latency_increase"]) and now - then > thresholds["latency_min_delta_ms"]:
+                regressions.append(f"{app_id} {path}: p99 {now:.2f} ms, baseline {then:.2f} ms")
+    return regressions, notes
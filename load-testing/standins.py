@@ -0,0 +1,243 @@
+"""Local stand-ins for the services the lab apps talk to, so they can be load-tested
+without Docker: an in-memory Redis speaking the Redis protocol, and an upstream HTTP
+service with canned responses (the API service the web frontends call).
+
+Both run in background threads of the load-testing process, on 127.0.0.1 and a
+free port, so the apps reach them over real sockets exactly as they would reach
+the real services.
+"""
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _RespError(Exception):
+    pass
+
+
+def _encode(value, resp3=False):
+    # RESP2 replies, or RESP3 once the client switched with HELLO 3 (redis-py 6+ does)
+    if value is None:
+        return b"_\r\n" if resp3 else b"$-1\r\n"
+    if isinstance(value, dict):
+        if resp3:
+            return b"%%%d\r\n" % len(value) + b"".join(_encode(k, resp3) + _encode(v, resp3) for k, v in value.items())
+        value = [item for pair in value.items() for item in pair]
+    if isinstance(value, _RespError):
+        return f"-{value}\r\n".encode()
+    if isinstance(value, bool):
+        return b":1\r\n" if value else b":0\r\n"
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode(item, resp3) for item in value)
+    if isinstance(value, str):  # status reply
+        return f"+{value}\r\n".encode()
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _read_command(rfile):
+    line = rfile.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()  # inline command (redis-cli, telnet)
+    arguments = []
+    for _ in range(int(line[1:])):
+        length = int(rfile.readline()[1:])
+        arguments.append(rfile.read(length + 2)[:-2])
+    return arguments
+
+
+class RedisStandIn:
+    """An in-memory Redis server for the commands the labs use.
+
+    Supports HELLO (RESP2 and RESP3), PING, ECHO, GET, SET, INCR, INCRBY, DECR, DECRBY, DEL, EXISTS, DBSIZE,
+    FLUSHDB, FLUSHALL, SELECT, CLIENT and MULTI/EXEC (pipelines, with or without a
+    transaction). Expiry options are accepted and ignored. Other commands get an
+    "unknown command" error, like from a real server.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.data = {}
+        self.commands = 0
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                queued = None
+                resp3 = False
+                while True:
+                    try:
+                        command = _read_command(self.rfile)
+                    except (OSError, ValueError):
+                        return
+                    if not command:
+                        return
+                    name = command[0].upper()
+                    if name == b"HELLO":
+                        version = int(command[1]) if len(command) > 1 else 2
+                        resp3 = version == 3
+                        reply = {b"server": b"redis", b"version": b"7.2.0", b"proto": version, b"id": 1,
+                                 b"mode": b"standalone", b"role": b"master", b"modules": []}
+                    elif name == b"MULTI":
+                        queued = []
+                        reply = "OK"
+                    elif name == b"EXEC" and queued is not None:
+                        reply = [stand_in.execute(queued_command) for queued_command in queued]
+                        queued = None
+                    elif name == b"DISCARD" and queued is not None:
+                        queued = None
+                        reply = "OK"
+                    elif queued is not None:
+                        queued.append(command)
+                        reply = "QUEUED"
+                    else:
+                        reply = stand_in.execute(command)
+                    try:
+                        self.wfile.write(_encode(reply, resp3))
+                    except OSError:
+                        return
+                    if name == b"QUIT":
+                        return
+
+        self._server = _ThreadingTCPServer((host, port), Handler)
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    def execute(self, command):
+        """The reply to one command ([name, *arguments] as bytes)."""
+        name, arguments = command[0].upper().decode(), command[1:]
+        with self._lock:
+            self.commands += 1
+            try:
+                return self._execute(name, arguments)
+            except (IndexError, ValueError):
+                return _RespError(f"ERR wrong number or type of arguments for '{name.lower()}' command")
+
+    def _execute(self, name, arguments):
+        data = self.data
+        if name == "PING":
+            return arguments[0] if arguments else "PONG"
+        if name == "ECHO":
+            return arguments[0]
+        if name == "GET":
+            return data.get(arguments[0])
+        if name == "SET":
+            options = [argument.upper() for argument in arguments[2:]]
+            if (b"NX" in options and arguments[0] in data) or (b"XX" in options and arguments[0] not in data):
+                return None
+            data[arguments[0]] = arguments[1]
+            return "OK"
+        if name in ("INCR", "INCRBY", "DECR", "DECRBY"):
+            amount = int(arguments[1]) if name.endswith("BY") else 1
+            value = int(data.get(arguments[0], b"0")) + (-amount if name.startswith("DECR") else amount)
+            data[arguments[0]] = str(value).encode()
+            return value
+        if name in ("DEL", "UNLINK"):
+            return sum(data.pop(key, None) is not None for key in arguments)
+        if name == "EXISTS":
+            return sum(key in data for key in arguments)
+        if name == "DBSIZE":
+            return len(data)
+        if name in ("FLUSHDB", "FLUSHALL"):
+            data.clear()
+            return "OK"
+        if name in ("SELECT", "CLIENT", "QUIT", "EXPIRE", "PEXPIRE"):
+            return "OK"
+        return _RespError(f"ERR unknown command '{name.lower()}'")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="redis-stand-in")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def default_routes(rows=20):
+    """Canned responses of the API service: /, /data and /health."""
+    data = {
+        "data": [{"id": i, "name": f"Item {i}", "value": i * 10} for i in range(1, rows + 1)],
+        "next_cursor": None,
+        "source": "API Service",
+    }
+    return {
+        "/": {"message": "Welcome to the API Service!", "service_id": "stand-in"},
+        "/data": data,
+        "/health": {"status": "healthy", "service": "API Service"},
+    }
+
+
+class UpstreamStandIn:
+    """An HTTP/1.1 service with keep-alive that answers GETs from `routes`
+    ({path: JSON document}) after `delay` seconds, and 404 otherwise.
+
+    The delay stands in for the upstream's own latency, so the app under test holds
+    its connections and threads as long as it would in production.
+    """
+
+    def __init__(self, routes=None, delay=0.0, host="127.0.0.1", port=0):
+        self.delay = delay
+        self.requests = 0
+        self._bodies = {path: json.dumps(document).encode() for path, document in (routes or default_routes()).items()}
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without TCP_NODELAY the body
+            # waits for the client's delayed ACK and every response takes ~40 ms more
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                stand_in.requests += 1
+                if stand_in.delay:
+                    time.sleep(stand_in.delay)
+                body = stand_in._bodies.get(self.path.partition("?")[0])
+                status = 200 if body is not None else 404
+                body = body if body is not None else b'{"error": "not found"}'
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self.url = f"http://{self.host}:{self.port}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="upstream-stand-in")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Measure where the cold-start time of each lab Flask app goes.
+
+Usage:
+    python load-testing/startup_profile.py
+    python load-testing/startup_profile.py LAB06 LAB08 --runs 10 --top 8
+    python load-testing/startup_profile.py --budget-ms 100 --output startup.json
+
+Each app (see apps.py) is started --runs times in a fresh interpreter, with its
+Redis and upstream API pointed at a closed local port (unreachable, as in a
+container that starts before its dependencies), and timed in phases:
+
+    python startup   interpreter and site, until the app's code starts running
+    import           `import main` (or `app`)
+    create_app       building the app: create_app() for factories, `module.app` otherwise
+    first request    the first answer to /health/live (or /health, or the first route)
+
+import-to-ready is import + create_app + first request, the median of the runs.
+Below it, the modules the app imported directly, with the milliseconds each took
+including their own imports (from one more run under -X importtime, which slows
+imports down, so it is not timed; a module already imported by an earlier one costs
+nothing again). --budget-ms makes the run exit with 1 if any app takes longer.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from apps import discover, select, stand_in_environment
+
+PHASES = ("startup_ms", "import_ms", "create_app_ms", "first_request_ms")
+READY_ROUTES = ("/health/live", "/health")
+
+# Runs in the app's directory; the phases go to stdout as JSON (and -X importtime to stderr)
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+spawned = float(sys.argv[1])
+startup = time.time() - spawned
+module = __import__(sys.argv[2])
+imported = time.perf_counter()
+factory = getattr(module, 'create_app', None)
+app = factory() if factory is not None else module.app
+created = time.perf_counter()
+response = app.test_client().get(sys.argv[3])
+answered = time.perf_counter()
+print(json.dumps({
+    'startup_ms': startup * 1000, 'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000, 'first_request_ms': (answered - created) * 1000,
+    'status': response.status_code, 'factory': factory is not None,
+}))
+"""
+
+
+def _closed_port():
+    # A port nothing listens on: connections to it are refused at once
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_importtime(stderr):
+    """[(depth, name, self_us, cumulative_us)] from the output of python -X importtime."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def imports_of(entries, module):
+    """{name: cumulative ms} of the modules `module` imported directly.
+
+    -X importtime prints each module after its own imports, so the direct imports
+    of `module` are the lines one level deeper right before it.
+    """
+    for index, (depth, name, _, _) in enumerate(entries):
+        if name == module and depth == 0:
+            children = {}
+            for child_depth, child, _, cumulative in reversed(entries[:index]):
+                if child_depth == 0:
+                    break
+                if child_depth == 1:
+                    children[child] = cumulative / 1000
+            return children
+    return {}
+
+
+def profile(app, runs=5, env=None):
+    """The median phases of `runs` cold starts of `app`, and its direct imports."""
+    ready = next((route for route in READY_ROUTES if route in app.routes), app.routes[0] if app.routes else "/")
+    samples = []
+    for run in range(runs + 1):
+        options = ["-X", "importtime"] if run == runs else []
+        command = [sys.executable, *options, "-c", CHILD, repr(time.time()), app.module, ready]
+        result = subprocess.run(command, cwd=app.directory, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(" | ".join(result.stderr.strip().splitlines()[-3:]))
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        if options:
+            imports = imports_of(parse_importtime(result.stderr), app.module)
+        else:
+            samples.append(sample)
+    median = {phase: round(statistics.median(sample[phase] for sample in samples), 1) for phase in PHASES}
+    median["ready_ms"] = round(statistics.median(
+        sample["import_ms"] + sample["create_app_ms"] + sample["first_request_ms"] for sample in samples), 1)
+    return dict(median, route=ready, status=samples[-1]["status"], factory=samples[-1]["factory"],
+                imports={name: round(ms, 1) for name, ms in sorted(imports.items(), key=lambda item: -item[1])})
+
+
+def print_profile(app_id, result, top):
+    if "error" in result:
+        print(f"\n{app_id}\n  Error: {result['error']}")
+        return
+    kind = "create_app()" if result["factory"] else "module-level app"
+    print(f"\n{app_id}: {result['ready_ms']:.1f} ms import-to-ready ({kind})")
+    print(f"  {'python startup':<22} {result['startup_ms']:>8.1f} ms")
+    print(f"  {'import':<22} {result['import_ms']:>8.1f} ms")
+    for name, ms in list(result["imports"].items())[:top]:
+        print(f"    {name:<20} {ms:>8.1f} ms")
+    print(f"  {'create_app':<22} {result['create_app_ms']:>8.1f} ms")
+    print(f"  {'first request':<22} {result['first_request_ms']:>8.1f} ms  "
+          f"({result['route']} -> {result['status']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("filters", nargs="*", metavar="FILTER", help="only apps whose id contains one of these")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per app (default: 5)")
+    parser.add_argument("--top", type=int, default=6, help="imports listed per app (default: 6)")
+    parser.add_argument("--budget-ms", type=float, help="fail if an app's import-to-ready takes longer")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    apps = select(discover(), args.filters)
+    if not apps:
+        print("Error: no apps match " + " ".join(args.filters))
+        return 1
+    port = _closed_port()
+    unreachable = SimpleNamespace(host="127.0.0.1", port=port, url=f"http://127.0.0.1:{port}")
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="startup-") as workdir:
+        for app in apps:
+            app_dir = os.path.join(workdir, app.id.replace("/", "_"))
+            os.makedirs(app_dir)
+            env = dict(os.environ, **stand_in_environment(app, app_dir, redis=unreachable, upstream=unreachable))
+            env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+            try:
+                results[app.id] = profile(app, args.runs, env)
+            except RuntimeError as e:
+                results[app.id] = {"error": str(e)}
+            print_profile(app.id, results[app.id], args.top)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    failed = [app_id for app_id, result in results.items() if "error" in result]
+    over = [app_id for app_id, result in results.items()
+            if args.budget_ms and "error" not in result and result["ready_ms"] > args.budget_ms]
+    if over:
+        print(f"\nError: over the {args.budget_ms:.0f} ms budget: {', '.join(over)}")
+    return 1 if failed or over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Add the parent directory to sys.path to allow direct import of apps
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from apps import REPO_ROOT, discover, select, stand_in_environment
+from loadtest import main
+from standins import RedisStandIn
+
+def test_discovers_the_lab_apps():
+    """Test that discovery finds the Flask apps with their static GET routes and needs."""
+    apps = {app.id: app for app in discover()}
+    lab06 = apps['Docker-CD/LAB06-Service-Health-Checks/app/main']
+    assert lab06.needs_redis and not lab06.needs_upstream
+    assert '/health/ready' in lab06.routes
+    frontend = apps['Docker-CD/LAB07-Microservices-CI-Pipeline/web_frontend_service/app']
+    assert frontend.needs_upstream
+    assert [app.id for app in select(apps.values(), ['LAB01'])] == ['Docker-CD/LAB01-Dockerfile-Build/app/main']
+
+def test_stand_in_environment_points_at_the_stand_ins(tmp_path):
+    """Test that an app needing Redis gets the stand-in's address, and the shared instrumentation package."""
+    lab06 = select(discover(), ['LAB06-Service'])[0]
+    with RedisStandIn() as redis:
+        env = stand_in_environment(lab06, str(tmp_path), redis=redis)
+    assert (env['REDIS_HOST'], env['REDIS_PORT']) == (redis.host, str(redis.port))
+    assert env['PYTHONPATH'].split(os.pathsep)[0] == os.path.join(REPO_ROOT, 'instrumentation')
+
+def test_load_test_end_to_end(tmp_path, capsys):
+    """Test a short load run of a Redis-backed app under gunicorn, then against its own baseline."""
+    baseline = str(tmp_path / 'baseline.json')
+    arguments = ['LAB06-Service', '--rate', '50', '--duration', '1', '--warmup', '0.3', '--workers', '1',
+                 '--baseline', baseline]
+    assert main(arguments + ['--update-baseline']) == 0
+    output = capsys.readouterr().out
+    assert '/health/ready' in output and 'RSS' in output
+    assert main(arguments + ['--rate', '25']) == 1
+    assert 'different settings' in capsys.readouterr().out
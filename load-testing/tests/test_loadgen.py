@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to allow direct import of loadgen
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loadgen import run_load
+from standins import UpstreamStandIn
+
+def test_open_loop_keeps_the_rate_and_splits_paths():
+    """Test that the generator sends `rate` requests/second, in turn to each path, after the warmup."""
+    with UpstreamStandIn(routes={'/a': {}, '/b': {}}) as upstream:
+        result = run_load(upstream.host, upstream.port, ['/a', '/b', '/missing'], rate=300, duration=1, warmup=0.2)
+    assert [len(result.endpoints[path].latencies) for path in ('/a', '/b')] == [100, 100]
+    assert result.endpoints['/missing'].errors == 100
+    assert result.endpoints['/missing'].statuses == {404: 100}
+
+def test_latency_includes_waiting_for_a_connection():
+    """Test that latency is measured from the scheduled time, so a saturated server shows queueing."""
+    with UpstreamStandIn(routes={'/slow': {}}, delay=0.05) as upstream:
+        result = run_load(upstream.host, upstream.port, ['/slow'], rate=100, duration=0.5, warmup=0, connections=1)
+    latencies = sorted(result.endpoints['/slow'].latencies)
+    # One connection serves 20 requests/second while 100 arrive: the last ones wait for the earlier ones
+    assert latencies[0] >= 0.05
+    assert latencies[-1] > 1.0
+
+def test_invalid_arguments_are_rejected():
+    """Test that run_load refuses a run without paths or with a bad rate or arrival process."""
+    for kwargs in ({'paths': []}, {'rate': 0}, {'arrivals': 'bursty'}):
+        arguments = dict({'host': '127.0.0.1', 'port': 1, 'paths': ['/'], 'rate': 10, 'duration': 1}, **kwargs)
+        with pytest.raises(ValueError):
+            run_load(**arguments)
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to allow direct import of results
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from results import RESULTS_VERSION, compare, merge_baseline, percentile, read_results, summarize, write_results
+
+def run(p99_ms=10.0, throughput=200.0, peak_rss_mb=100.0, errors=0, **settings):
+    endpoint = dict(summarize([0.001], errors, 1.0), p99_ms=p99_ms, throughput=throughput)
+    return {
+        'version': RESULTS_VERSION,
+        'settings': dict({'rate': 200, 'duration': 10, 'workers': 2}, **settings),
+        'apps': {'lab/app': {'overall': endpoint, 'endpoints': {'/': endpoint}, 'rss_mb': peak_rss_mb,
+                             'peak_rss_mb': peak_rss_mb}},
+    }
+
+def test_percentiles_and_summary():
+    """Test nearest-rank percentiles and the summary of a run in milliseconds."""
+    values = [i / 1000 for i in range(1, 1001)]
+    assert percentile(values, 50) == 0.5
+    assert percentile(values, 99.9) == 0.999
+    assert percentile([], 99) == 0.0
+    summary = summarize(values, errors=5, elapsed=2.0)
+    assert (summary['requests'], summary['throughput'], summary['p99_ms']) == (1005, 500.0, 990.0)
+
+def test_regressions_beyond_the_thresholds_fail():
+    """Test that lower throughput, higher p99 or RSS and new errors are regressions, and noise is not."""
+    baseline = run()
+    assert compare(run(p99_ms=12.0, throughput=190.0, peak_rss_mb=110.0), baseline) == ([], [])
+    regressions, _ = compare(run(p99_ms=20.0, throughput=150.0, peak_rss_mb=130.0, errors=3), baseline)
+    assert len(regressions) == 4
+    with pytest.raises(ValueError, match='rate=200'):
+        compare(run(rate=100), baseline)
+
+def test_baseline_round_trip_and_merge(tmp_path):
+    """Test that results are written atomically, read back, and merged into a baseline per app."""
+    path = str(tmp_path / 'baseline.json')
+    other = run()
+    other['apps'] = {'other/app': other['apps']['lab/app']}
+    write_results(path, merge_baseline(read_results_or_none(path), other))
+    write_results(path, merge_baseline(read_results(path), run(p99_ms=3.0)))
+    stored = read_results(path)
+    assert sorted(stored['apps']) == ['lab/app', 'other/app']
+    assert stored['apps']['lab/app']['endpoints']['/']['p99_ms'] == 3.0
+    assert os.listdir(tmp_path) == ['baseline.json']
+
+def read_results_or_none(path):
+    return read_results(path) if os.path.exists(path) else None
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import redis
+import requests
+
+# Add the parent directory to sys.path to allow direct import of standins
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from standins import RedisStandIn, UpstreamStandIn
+
+def test_redis_stand_in_speaks_both_protocols():
+    """Test that redis-py works against the stand-in over RESP2 and RESP3, pipelines included."""
+    with RedisStandIn() as server:
+        for protocol in (2, 3):
+            client = redis.Redis(host=server.host, port=server.port, protocol=protocol, decode_responses=True)
+            assert client.ping()
+            assert client.incr('hits') == (1 if protocol == 2 else 2)
+            pipe = client.pipeline()
+            pipe.set('name', 'lab').get('name').get('missing')
+            assert pipe.execute() == [True, 'lab', None]
+            client.close()
+        assert server.data[b'hits'] == b'2'
+
+def test_upstream_stand_in_serves_routes_with_keep_alive():
+    """Test that the upstream stand-in answers its routes on one kept-alive connection."""
+    with UpstreamStandIn(routes={'/data': {'rows': [1, 2]}}) as upstream:
+        with requests.Session() as session:
+            assert session.get(upstream.url + '/data').json() == {'rows': [1, 2]}
+            assert session.get(upstream.url + '/missing').status_code == 404
+        assert upstream.requests == 2
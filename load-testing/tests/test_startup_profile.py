@@ -0,0 +1,46 @@
+import os
+import sys
+
+# Add the parent directory to sys.path to allow direct import of startup_profile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from apps import discover, select
+from startup_profile import imports_of, parse_importtime, profile
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   _weakref
+import time:       900 |       1000 | warnings
+import time:      2000 |       2000 |       markupsafe._speedups
+import time:      1000 |       3000 |     markupsafe
+import time:      5000 |       8000 |   jinja2
+import time:      2000 |      10000 | flask
+import time:       500 |        500 |   health
+import time:      1500 |       1500 |     redis.client
+import time:       500 |       2000 |   redis
+import time:       400 |      12900 | main
+"""
+
+def test_importtime_is_parsed_by_depth():
+    """Test that -X importtime lines become (depth, module, self, cumulative) entries."""
+    entries = parse_importtime(IMPORTTIME)
+    assert entries[0] == (1, '_weakref', 100, 100)
+    assert entries[-1] == (0, 'main', 400, 12900)
+    assert [depth for depth, name, _, _ in entries if name.startswith('markupsafe')] == [3, 2]
+
+def test_direct_imports_of_the_app_module():
+    """Test that only the modules main imported itself are listed, with their cumulative time."""
+    entries = parse_importtime(IMPORTTIME)
+    assert imports_of(entries, 'main') == {'redis': 2.0, 'health': 0.5}
+    assert imports_of(entries, 'flask') == {'jinja2': 8.0}
+    assert imports_of(entries, 'missing') == {}
+
+def test_profile_of_a_factory_app(tmp_path):
+    """Test a cold start of the LAB06 factory app with Redis unreachable."""
+    app = select(discover(), ['LAB06-Service-Health-Checks'])[0]
+    env = dict(os.environ, REDIS_HOST='127.0.0.1', REDIS_PORT='1',
+               API_KEY_FILE=str(tmp_path / 'api_key'), DATA_FILE=str(tmp_path / 'counter.txt'))
+    result = profile(app, runs=1, env=env)
+    assert result['factory'] and (result['route'], result['status']) == ('/health/live', 200)
+    assert result['ready_ms'] > 0
+    assert 'flask' in result['imports'] and 'redis' in result['imports']